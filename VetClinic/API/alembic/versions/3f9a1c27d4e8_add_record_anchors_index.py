@@ -0,0 +1,53 @@
+"""add record_anchors index table
+
+Revision ID: 3f9a1c27d4e8
+Revises: c83b8735cf02
+Create Date: 2026-01-12 18:04:11.204519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c27d4e8'
+down_revision: Union[str, None] = 'c83b8735cf02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Tworzy tabelę indeksu kotwic MEDICAL_RECORD (tylko jeśli brak)."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "record_anchors" in inspector.get_table_names():
+        return
+
+    op.create_table(
+        "record_anchors",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("record_id", sa.Integer(), nullable=False),
+        sa.Column("owner", sa.String(length=128), nullable=True),
+        sa.Column("data_hash", sa.String(length=128), nullable=True),
+        sa.Column("tx_id", sa.String(length=128), nullable=False, unique=True),
+        sa.Column("block_index", sa.Integer(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_record_anchors_id", "record_anchors", ["id"])
+    op.create_index("ix_record_anchors_record_id", "record_anchors", ["record_id"])
+    op.create_index("ix_record_anchors_owner", "record_anchors", ["owner"])
+    op.create_index(
+        "ix_record_anchors_record_ts", "record_anchors", ["record_id", "timestamp"]
+    )
+    # Istniejące łańcuchy: po migracji uruchom scripts/rebuild_record_index.py
+
+
+def downgrade() -> None:
+    """Usuwa tabelę indeksu kotwic."""
+    op.drop_index("ix_record_anchors_record_ts", table_name="record_anchors")
+    op.drop_index("ix_record_anchors_owner", table_name="record_anchors")
+    op.drop_index("ix_record_anchors_record_id", table_name="record_anchors")
+    op.drop_index("ix_record_anchors_id", table_name="record_anchors")
+    op.drop_table("record_anchors")
@@ -10,8 +10,19 @@ if str(API_PATH) not in sys.path:
 
 import pytest
 
+from vetclinic_api.admin.fault_schedule import get_timeline
+from vetclinic_api.admin.link_rules import get_links
+from vetclinic_api.admin.network_state import NetworkSimState, STATE, update_state
+from vetclinic_api.blockchain.lifecycle import get_tx_lifecycle
+from vetclinic_api.cluster.chain_metrics import get_chain_metrics
+from vetclinic_api.cluster.consensus import get_commit_buffer
+from vetclinic_api.cluster.election import get_election
+from vetclinic_api.cluster.forwarder import get_forwarder
+from vetclinic_api.cluster.health import get_peer_health
+from vetclinic_api.cluster.scheduler import SchedulerSettings, get_scheduler
 from vetclinic_api.crypto.ed25519 import generate_keypair
 from vetclinic_api.main import app
+from vetclinic_api.middleware.response_cache import get_reference_cache
 import vetclinic_api.blockchain.deps as deps
 
 
@@ -52,3 +63,49 @@ def _fresh_storage():
     """
     deps._storage = None
     yield
+
+
+def _reset_network_state() -> None:
+    defaults = NetworkSimState()
+    payload = {
+        key: value
+        for key, value in defaults.__dict__.items()
+        if not key.startswith("_")
+    }
+    update_state(**payload)
+    STATE.reset_counters()
+
+
+def _reset_scheduler() -> None:
+    scheduler = get_scheduler()
+    scheduler.settings = SchedulerSettings()
+    scheduler.update(enabled=scheduler.settings.enabled)
+
+
+# Singletony procesu zmieniane przez testy (API admina, wybory, kolejki, cache).
+# Nowy globalny stan = nowa pozycja tutaj, nie kolejna fixture.
+SINGLETON_RESETS = (
+    _reset_network_state,
+    lambda: get_commit_buffer().clear(),
+    _reset_scheduler,
+    lambda: get_election().bootstrap(),
+    lambda: get_forwarder().clear(),
+    lambda: get_peer_health().reset(),
+    lambda: get_timeline().clear(),
+    lambda: get_links().clear(),
+    lambda: get_tx_lifecycle().clear(),
+    lambda: get_chain_metrics().reset(),
+    lambda: get_reference_cache().reset(),
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset_singletons():
+    """
+    Stan globalny procesu nie przechodzi między testami – czyścimy przed i po.
+    """
+    for reset in SINGLETON_RESETS:
+        reset()
+    yield
+    for reset in SINGLETON_RESETS:
+        reset()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from vetclinic_api.blockchain.core import InMemoryStorage, build_block_proposal
+from vetclinic_api.blockchain.deps import get_storage
+from vetclinic_api.cluster.consensus import commit_to_peer, propose_to_peer
+from vetclinic_api.cluster.health import PeerHealthTracker
+from vetclinic_api.main import app
+from vetclinic_api.routers.blockchain_records import BlockchainRecord, _build_record_tx
+
+PEER = "http://node2:8000"
+
+
+def _tracker(
+    samples: float | None = None, count: int = 20, rpc: str = "propose_block"
+) -> PeerHealthTracker:
+    tracker = PeerHealthTracker(peers_provider=lambda: [PEER])
+    if samples is not None:
+        for _ in range(count):
+            tracker.record_success(PEER, samples, rpc=rpc)
+    return tracker
+
+
+def _client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_adaptive_timeout_follows_peer_latency():
+    rpc = "propose_block"
+    assert _tracker().adaptive_timeout(PEER, 5.0, rpc) == 5.0
+    assert _tracker(0.01, count=3).adaptive_timeout(PEER, 5.0, rpc) == 5.0
+    assert _tracker(0.01).adaptive_timeout(PEER, 5.0, rpc) == 0.25
+    assert _tracker(1.0).adaptive_timeout(PEER, 5.0, rpc) == 3.0
+    assert _tracker(4.0).adaptive_timeout(PEER, 5.0, rpc) == 5.0
+
+
+def test_heartbeat_latency_does_not_shrink_consensus_rpc_timeouts():
+    tracker = _tracker(0.005, count=50, rpc="node-info")
+    for _ in range(20):
+        tracker.record_success(PEER, 0.8, rpc="commit_block")
+
+    assert tracker.adaptive_timeout(PEER, 5.0) == 0.25
+    assert tracker.timeout_for(PEER, 5.0, "commit_block") == pytest.approx(2.4)
+    # Brak własnych próbek propose_block -> domyślny timeout, nie ten z heartbeatów.
+    assert tracker.timeout_for(PEER, 5.0, "propose_block") == 5.0
+    assert tracker.snapshot()[0]["p99_latency_ms"] == 5.0
+
+
+def test_hedged_propose_retries_dropped_request():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            return httpx.Response(503, json={"detail": "Transient RPC drop (simulated)"})
+        return httpx.Response(200, json={"vote": "accept"})
+
+    tracker = _tracker(0.01)
+
+    async def _run():
+        async with _client(handler) as client:
+            return await propose_to_peer(client, tracker, PEER, {}, hedge=True)
+
+    resp = asyncio.run(_run())
+    assert resp.json() == {"vote": "accept"}
+    assert len(calls) == 2
+
+
+def test_hedged_propose_does_not_wait_for_slow_first_attempt():
+    calls = []
+    cancelled = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(time.perf_counter())
+        if len(calls) == 1:
+            try:
+                await asyncio.sleep(2.0)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+        return httpx.Response(200, json={"vote": "accept", "attempt": len(calls)})
+
+    tracker = _tracker(0.01)
+
+    async def _run():
+        async with _client(handler) as client:
+            start = time.perf_counter()
+            resp = await propose_to_peer(client, tracker, PEER, {}, hedge=True)
+            # Przegrane żądanie jest już anulowane i domknięte, nie tylko oznaczone.
+            assert cancelled == [True]
+            return resp, time.perf_counter() - start
+
+    resp, elapsed = asyncio.run(_run())
+    assert resp.json()["attempt"] == 2
+    assert elapsed < 1.0
+
+
+def test_commit_is_retried_until_peer_accepts():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if len(calls) < 3:
+            return httpx.Response(503, json={"detail": "RPC flapping (simulated)"})
+        return httpx.Response(200, json={"status": "committed"})
+
+    tracker = PeerHealthTracker(peers_provider=lambda: [PEER], cb_failures=5)
+
+    async def _run():
+        async with _client(handler) as client:
+            return await commit_to_peer(client, tracker, PEER, {}, retries=2)
+
+    resp = asyncio.run(_run())
+    assert resp.status_code == 200
+    assert calls == ["/rpc/commit_block"] * 3
+
+
+def test_repeated_commit_block_is_idempotent():
+    leader = InMemoryStorage()
+    leader.add_transaction(
+        _build_record_tx(BlockchainRecord(id=1, data_hash="h", owner="alice"))
+    )
+    proposal = build_block_proposal(leader)
+    follower = InMemoryStorage()
+    app.dependency_overrides[get_storage] = lambda: follower
+    client = TestClient(app)
+
+    body = proposal.model_dump(mode="json")
+    first = client.post("/rpc/commit_block", json=body)
+    again = client.post("/rpc/commit_block", json=body)
+    assert first.status_code == 200
+    assert again.status_code == 200
+    assert again.json()["duplicate"] is True
+    assert follower.get_tip().index == 1
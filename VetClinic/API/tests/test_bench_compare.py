@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import json
+
+import benchmarks.compare as bench_compare
+from benchmarks.compare import compare
+
+
+def _suite(**stats):
+    return {
+        "benchmarks": {
+            name: {"min_s": v[0], "median_s": v[0], "iqr_s": v[1], "rounds": 5}
+            for name, v in stats.items()
+        }
+    }
+
+
+def test_compare_flags_only_slowdowns_beyond_threshold_and_noise():
+    baseline = _suite(fast=(0.010, 0.0001), noisy=(0.010, 0.005), gone=(0.01, 0.0))
+    current = _suite(fast=(0.013, 0.0001), noisy=(0.013, 0.001), added=(0.02, 0.0))
+
+    rows = {row["name"]: row for row in compare(baseline, current, threshold=0.15)}
+
+    assert rows["fast"]["status"] == "regression"
+    # +30%, ale w granicach rozrzutu baseline'u.
+    assert rows["noisy"]["status"] == "ok"
+    assert rows["added"]["status"] == "new"
+    assert rows["gone"]["status"] == "missing"
+    assert compare(baseline, current, threshold=0.5)[1]["status"] == "ok"
+
+
+def test_per_benchmark_threshold_overrides_default():
+    baseline = _suite(http=(0.004, 0.0001))
+    current = _suite(http=(0.005, 0.0001))
+    assert compare(baseline, current, threshold=0.15)[0]["status"] == "regression"
+
+    current["benchmarks"]["http"]["threshold"] = 0.3
+    assert compare(baseline, current, threshold=0.15)[0]["status"] == "ok"
+
+
+def test_regression_must_repeat_in_confirmation_run(tmp_path, monkeypatch, capsys):
+    baseline_path = tmp_path / "baseline.json"
+    baseline_path.write_text(json.dumps({"machine": None, **_suite(a=(0.010, 0.0001), b=(0.010, 0.0001))}))
+    runs = []
+
+    def _raw(**mins):
+        return {
+            "benchmarks": [
+                {"fullname": n, "stats": {"min": v, "median": v, "iqr": 0.0001, "rounds": 5}}
+                for n, v in mins.items()
+            ]
+        }
+
+    def fake_run(pytest_args, targets=None):
+        runs.append(targets)
+        if targets is None:
+            return _raw(a=0.015, b=0.015)  # oba wyglądają na regresję
+        return _raw(a=0.0101, b=0.016)  # `a` to był szum, `b` się powtarza
+
+    monkeypatch.setattr(bench_compare, "_run_json", fake_run)
+    assert bench_compare.main(["--baseline", str(baseline_path), "--confirm-runs", "2"]) == 1
+
+    assert runs == [None, ["a", "b"], ["b"]]
+    assert "REGRESJA (1): b" in capsys.readouterr().err
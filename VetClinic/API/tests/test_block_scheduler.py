@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+
+from vetclinic_api.blockchain.core import InMemoryStorage, Transaction, TxPayload
+from vetclinic_api.cluster.scheduler import BlockScheduler, SchedulerSettings
+from vetclinic_api.crypto.ed25519 import load_leader_keys_from_env, sign_message
+from vetclinic_api.main import app
+
+
+def _make_transaction(i: int, age_s: float = 0.0) -> Transaction:
+    payload = TxPayload(sender=f"alice{i}", recipient="bob", amount=Decimal("1.0"))
+    timestamp = datetime.utcnow() - timedelta(seconds=age_s)
+    raw = json.dumps(
+        {"payload": payload.model_dump(mode="json"), "timestamp": timestamp.isoformat()},
+        sort_keys=True,
+    ).encode("utf-8")
+    keys = load_leader_keys_from_env()
+    return Transaction(
+        id=hashlib.sha256(raw).hexdigest(),
+        payload=payload,
+        sender_pub="test-sender",
+        signature=sign_message(keys.priv, raw),
+        timestamp=timestamp,
+    )
+
+
+def _scheduler(**overrides) -> BlockScheduler:
+    settings = SchedulerSettings(enabled=True, min_txs=2, max_wait_s=60.0)
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    return BlockScheduler(settings=settings)
+
+
+def test_scheduler_commits_when_mempool_reaches_threshold():
+    storage = InMemoryStorage()
+    scheduler = _scheduler()
+
+    async def _run():
+        storage.add_transaction(_make_transaction(0))
+        assert await scheduler.tick(storage) is None
+        storage.add_transaction(_make_transaction(1))
+        return await scheduler.tick(storage)
+
+    result = asyncio.run(_run())
+    assert result["status"] == "committed"
+    assert scheduler.status.last_trigger == "size"
+    assert storage.get_tip().index == 1
+    assert storage.get_mempool_size() == 0
+
+
+def test_scheduler_commits_after_max_wait():
+    storage = InMemoryStorage()
+    scheduler = _scheduler(min_txs=100, max_wait_s=0.05)
+
+    async def _run():
+        storage.add_transaction(_make_transaction(0))
+        assert await scheduler.tick(storage) is None
+        await asyncio.sleep(0.06)
+        return await scheduler.tick(storage)
+
+    result = asyncio.run(_run())
+    assert result["status"] == "committed"
+    assert scheduler.status.last_trigger == "deadline"
+
+
+def test_max_wait_counts_from_oldest_transaction_timestamp():
+    # Transakcja sprzed restartu / z czasu bycia followerem: harmonogram widzi ją
+    # pierwszy raz, ale czeka już dłużej niż max_wait_s.
+    storage = InMemoryStorage()
+    storage.add_transaction(_make_transaction(0, age_s=5.0))
+    scheduler = _scheduler(min_txs=100, max_wait_s=2.0)
+
+    result = asyncio.run(scheduler.tick(storage))
+    assert result["status"] == "committed"
+    assert scheduler.status.last_trigger == "deadline"
+
+    assert scheduler.due(1, 0.5) is None
+    assert scheduler.due(0, 10.0) is None
+
+
+def test_scheduler_backs_off_after_failed_round():
+    calls = []
+
+    async def _rejecting_round(storage, client):
+        calls.append(time.monotonic())
+        return {"status": "rejected", "votes": 1, "total": 3}
+
+    storage = InMemoryStorage()
+    storage.add_transaction(_make_transaction(0))
+    settings = SchedulerSettings(enabled=True, min_txs=1, backoff_base_s=10.0)
+    scheduler = BlockScheduler(settings=settings, round_fn=_rejecting_round)
+
+    async def _run():
+        await scheduler.tick(storage)
+        await scheduler.tick(storage)
+
+    asyncio.run(_run())
+    assert len(calls) == 1
+    assert scheduler.status.consecutive_failures == 1
+    assert scheduler.status.last_result == "rejected"
+    assert 9.0 < scheduler.backoff_remaining() <= 10.0
+
+
+def test_disabled_scheduler_does_nothing():
+    storage = InMemoryStorage()
+    storage.add_transaction(_make_transaction(0))
+    scheduler = _scheduler(enabled=False, min_txs=1)
+
+    assert asyncio.run(scheduler.tick(storage)) is None
+    assert storage.get_tip().index == 0
+
+
+def test_admin_scheduler_endpoint_updates_settings():
+    client = TestClient(app)
+    resp = client.put("/admin/scheduler", json={"min_txs": 5, "max_wait_s": 0.5})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["min_txs"] == 5
+    assert body["max_wait_s"] == 0.5
+
+    assert client.get("/admin/scheduler").json()["min_txs"] == 5
+    assert client.put("/admin/scheduler", json={"min_txs": 0}).status_code == 422
@@ -1,3 +1,5 @@
+import json
+
 from fastapi.testclient import TestClient
 
 from vetclinic_api.core.database import SessionLocal
@@ -45,3 +47,65 @@ def test_submit_and_mine_flow():
     r4 = client.get("/chain/status")
     assert r4.status_code == 200
     assert r4.json()["mempool_size"] == 0
+
+
+def _mine_blocks(client, count: int) -> None:
+    for i in range(count):
+        tx = {"sender": f"alice{i}", "recipient": "bob", "amount": 1 + i}
+        assert client.post("/tx/submit", json=tx).status_code == 202
+        assert client.post("/chain/mine").status_code == 200
+
+
+def test_chain_status_is_slim_by_default():
+    _reset_chain_state()
+    client = _client()
+    _mine_blocks(client, 1)
+
+    slim = client.get("/chain/status").json()
+    assert slim["height"] == 1
+    assert slim["last_block_hash"].startswith("0000")
+    assert "chain" not in slim
+    assert "mempool" not in slim
+
+    full = client.get("/chain/status", params={"full": True}).json()
+    assert len(full["chain"]) == 2
+    assert full["last_block_hash"] == slim["last_block_hash"]
+
+
+def test_chain_blocks_range_and_paging():
+    _reset_chain_state()
+    client = _client()
+    _mine_blocks(client, 3)
+
+    page = client.get("/chain/blocks", params={"from": 1, "limit": 2}).json()
+    assert [b["index"] for b in page["blocks"]] == [1, 2]
+    assert page["next_from"] == 3
+
+    rest = client.get("/chain/blocks", params={"from": page["next_from"]}).json()
+    assert [b["index"] for b in rest["blocks"]] == [3]
+    assert rest["next_from"] is None
+
+    bounded = client.get("/chain/blocks", params={"from": 0, "to": 1, "limit": 2}).json()
+    assert [b["index"] for b in bounded["blocks"]] == [0, 1]
+    assert bounded["next_from"] is None
+
+    assert client.get("/chain/blocks", params={"from": 2, "to": 1}).status_code == 400
+
+
+def test_chain_export_streams_ndjson(monkeypatch):
+    import vetclinic_api.routers.blockchain as blockchain_router
+
+    monkeypatch.setattr(blockchain_router, "CHAIN_EXPORT_BATCH_SIZE", 2)
+    _reset_chain_state()
+    client = _client()
+    _mine_blocks(client, 3)
+
+    resp = client.get("/chain/export")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [b["index"] for b in lines] == [0, 1, 2, 3]
+    assert lines[1]["previous_hash"] == lines[0]["hash"]
+
+    tail = client.get("/chain/export", params={"from": 2}).text.splitlines()
+    assert [json.loads(line)["index"] for line in tail] == [2, 3]
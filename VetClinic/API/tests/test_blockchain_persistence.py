@@ -27,7 +27,7 @@ def test_chain_persists_between_restarts():
     r_mine = client.post("/chain/mine")
     assert r_mine.status_code == 200
 
-    status_1 = client.get("/chain/status").json()
+    status_1 = client.get("/chain/status", params={"full": True}).json()
     assert status_1["height"] >= 1
     assert status_1["mempool_size"] == 0
     assert len(status_1["chain"]) == status_1["height"] + 1
@@ -35,7 +35,7 @@ def test_chain_persists_between_restarts():
     # simulate restart: new storage + new client
     deps._storage = SQLAlchemyStorage()
     client2 = TestClient(app)
-    status_2 = client2.get("/chain/status").json()
+    status_2 = client2.get("/chain/status", params={"full": True}).json()
 
     assert status_2["height"] == status_1["height"]
     assert status_2["mempool_size"] == 0
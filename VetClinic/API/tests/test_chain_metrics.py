@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from vetclinic_api.admin.link_rules import LinkRule, LinkRules
+from vetclinic_api.blockchain.core import (
+    InMemoryStorage,
+    Transaction,
+    TxPayload,
+    build_block_proposal,
+    mine_block,
+)
+from vetclinic_api.blockchain.deps import get_storage
+from vetclinic_api.blockchain.snapshot import build_snapshot, restore_snapshot
+from vetclinic_api.cluster.chain_metrics import ChainMetricsCollector, get_chain_metrics
+from vetclinic_api.cluster.harness import InProcessCluster
+from vetclinic_api.crypto.ed25519 import load_leader_keys_from_env, sign_message
+from vetclinic_api.main import app
+from vetclinic_api.metrics import (
+    NODE_NAME,
+    blockchain_chain_height,
+    blockchain_last_block_age_seconds,
+    blockchain_mempool_size,
+    blockchain_peer_lag_blocks,
+    blockchain_verified_height,
+)
+
+
+def _make_transaction(i: int) -> Transaction:
+    payload = TxPayload(sender=f"alice{i}", recipient="bob", amount=Decimal("1.0"))
+    timestamp = datetime.utcnow()
+    raw = json.dumps(
+        {"payload": payload.model_dump(mode="json"), "timestamp": timestamp.isoformat()},
+        sort_keys=True,
+    ).encode("utf-8")
+    keys = load_leader_keys_from_env()
+    return Transaction(
+        id=hashlib.sha256(raw).hexdigest(),
+        payload=payload,
+        sender_pub="test-sender",
+        signature=sign_message(keys.priv, raw),
+        timestamp=timestamp,
+    )
+
+
+def _storage_with_blocks(count: int) -> InMemoryStorage:
+    storage = InMemoryStorage()
+    for i in range(count):
+        storage.add_transaction(_make_transaction(i))
+        mine_block(storage)
+    storage.add_transaction(_make_transaction(count))
+    return storage
+
+
+def test_collector_sets_gauges_and_verifies_incrementally():
+    storage = _storage_with_blocks(3)
+    collector = ChainMetricsCollector(verify_batch=2)
+
+    first = collector.collect(storage)
+    assert first["height"] == 3 and first["mempool_size"] == 1
+    assert first["verified_height"] == 2
+    assert collector.collect(storage)["verified_height"] == 3
+
+    assert blockchain_chain_height.labels(NODE_NAME)._value.get() == 3
+    assert blockchain_mempool_size.labels(NODE_NAME)._value.get() == 1
+    assert blockchain_verified_height.labels(NODE_NAME)._value.get() == 3
+    assert 0 <= blockchain_last_block_age_seconds.labels(NODE_NAME)._value.get() < 60
+
+
+def test_collector_checkpoint_stops_before_invalid_block():
+    storage = _storage_with_blocks(3)
+    storage.get_chain()[2].merkle_root = "tampered"
+    collector = ChainMetricsCollector()
+
+    result = collector.collect(storage)
+    assert result["height"] == 3
+    assert result["verified_height"] == 0
+    assert "Invalid block 2" in collector.last_error
+
+    # Blok 3 wskazuje na zmieniony blok 2 – też odrzucony.
+    collector.verify_batch = 1
+    collector.mark_verified(2)
+    assert collector.collect(storage)["verified_height"] == 2
+    assert "Invalid block 3" in collector.last_error
+    # Checkpoint z zewnątrz (np. snapshot) nigdy się nie cofa.
+    collector.mark_verified(1)
+    assert collector.verified_height == 2
+
+
+def test_collector_seeds_checkpoint_from_snapshot_base():
+    leader = _storage_with_blocks(3)
+    node = InMemoryStorage()
+    restore_snapshot(node, build_snapshot(leader, node_id=1))
+    node.add_block(build_block_proposal(leader).block)
+
+    # Świeży collector (restart węzła): checkpoint od bazy 3, nie od genesis.
+    collector = ChainMetricsCollector()
+    assert collector.collect(node)["verified_height"] == 4
+    assert collector.last_error is None
+
+
+def test_chain_status_no_longer_drives_gauges_and_verify_sets_checkpoint():
+    storage = _storage_with_blocks(2)
+    app.dependency_overrides[get_storage] = lambda: storage
+    client = TestClient(app)
+
+    blockchain_chain_height.labels(NODE_NAME).set(-1)
+    assert client.get("/chain/status").json()["height"] == 2
+    assert blockchain_chain_height.labels(NODE_NAME)._value.get() == -1
+
+    assert client.get("/chain/verify").json()["valid"] is True
+    assert get_chain_metrics().verified_height == 2
+    assert client.get("/rpc/node-info").json()["height"] == 2
+
+
+def test_peer_lag_from_heartbeats_in_cluster():
+    cluster = InProcessCluster(size=3)
+    # node1 -> node3 zablokowane: node3 zostaje w tyle o jeden blok.
+    cluster.load_faults(links=LinkRules(rules=[LinkRule(src=1, dst=3, blocked=True)]))
+
+    async def _run():
+        async with cluster.client() as client:
+            resp = await client.post(
+                "http://node1:8000/tx/submit",
+                json={"sender": "alice", "recipient": "bob", "amount": 1},
+            )
+            assert resp.status_code == 202
+            resp = await client.post("http://node1:8000/chain/mine_distributed")
+            assert resp.json()["status"] == "committed"
+        cluster.load_faults(links=LinkRules())
+        with cluster.as_node(3) as node:
+            await node.peer_health.refresh()
+            first = node.chain_metrics.collect(node.storage)
+            assert blockchain_peer_lag_blocks.labels(NODE_NAME, "node1")._value.get() == 1
+
+            # node1 przestaje odpowiadać: jego seria znika zamiast trzymać lag 1.
+            cluster.load_faults(links=LinkRules(rules=[LinkRule(src=3, dst=1, blocked=True)]))
+            await node.peer_health.refresh()
+            second = node.chain_metrics.collect(node.storage)
+        return first, second
+
+    result, after_outage = asyncio.run(_run())
+    assert result["height"] == 0
+    assert result["peer_lag"] == {"http://node1:8000": 1, "http://node2:8000": 1}
+    assert after_outage["peer_lag"] == {"http://node2:8000": 1}
+    lag = "blockchain_peer_lag_blocks"
+    assert REGISTRY.get_sample_value(lag, {"node": NODE_NAME, "peer": "node1"}) is None
+    assert REGISTRY.get_sample_value(lag, {"node": NODE_NAME, "peer": "node2"}) == 1
+    # Stan węzła 3 w klastrze nie dotyka globalnego collectora procesu.
+    assert get_chain_metrics().verified_height == 0
+
+
+def test_last_block_age_handles_old_tip():
+    storage = InMemoryStorage()
+    storage.get_chain()[0].timestamp = datetime.utcnow() - timedelta(seconds=120)
+    result = ChainMetricsCollector().collect(storage)
+    assert 119 <= result["last_block_age_s"] < 180
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import httpx
+from fastapi.testclient import TestClient
+
+from vetclinic_api.blockchain.core import (
+    BlockProposal,
+    InMemoryStorage,
+    Transaction,
+    TxPayload,
+    mine_block,
+)
+from vetclinic_api.blockchain.deps import get_storage
+from vetclinic_api.cluster.sync import ChainSyncer, SYNCER, plan_ranges
+from vetclinic_api.crypto.ed25519 import load_leader_keys_from_env, sign_message
+from vetclinic_api.main import app
+
+PEERS = ["http://peer1", "http://peer2"]
+
+
+def _make_transaction(i: int) -> Transaction:
+    payload = TxPayload(sender=f"alice{i}", recipient="bob", amount=Decimal("1.0"))
+    timestamp = datetime.utcnow()
+    raw = json.dumps(
+        {"payload": payload.model_dump(mode="json"), "timestamp": timestamp.isoformat()},
+        sort_keys=True,
+    ).encode("utf-8")
+    keys = load_leader_keys_from_env()
+    return Transaction(
+        id=hashlib.sha256(raw).hexdigest(),
+        payload=payload,
+        sender_pub="test-sender",
+        signature=sign_message(keys.priv, raw),
+        timestamp=timestamp,
+    )
+
+
+def _leader_with_blocks(count: int) -> InMemoryStorage:
+    storage = InMemoryStorage()
+    for i in range(count):
+        storage.add_transaction(_make_transaction(i))
+        mine_block(storage)
+    return storage
+
+
+def _syncer_serving(leader: InMemoryStorage) -> ChainSyncer:
+    app.dependency_overrides[get_storage] = lambda: leader
+    return ChainSyncer(
+        peers_provider=lambda: PEERS,
+        client_factory=lambda: httpx.AsyncClient(transport=httpx.ASGITransport(app=app)),
+        batch_size=2,
+        parallel=2,
+    )
+
+
+def test_plan_ranges_splits_into_batches():
+    assert plan_ranges(1, 5, 2) == [(1, 2), (3, 4), (5, 5)]
+    assert plan_ranges(4, 3, 2) == []
+
+
+def test_sync_fetches_missing_blocks_from_peers():
+    leader = _leader_with_blocks(5)
+    follower = InMemoryStorage()
+    syncer = _syncer_serving(leader)
+
+    status = asyncio.run(syncer.sync_once(follower))
+
+    assert status.state == "ok"
+    assert status.blocks_applied == 5
+    assert follower.get_tip().hash == leader.get_tip().hash
+
+    again = asyncio.run(syncer.sync_once(follower))
+    assert again.state == "ok"
+    assert again.blocks_applied == 0
+
+
+def test_sync_rejects_tampered_range():
+    leader = _leader_with_blocks(4)
+    leader._chain[3].leader_sig = leader._chain[2].leader_sig
+    follower = InMemoryStorage()
+    syncer = _syncer_serving(leader)
+
+    status = asyncio.run(syncer.sync_once(follower))
+
+    assert status.state == "failed"
+    assert "signature" in status.last_error
+    assert follower.get_tip().index == 0
+
+
+def test_commit_block_with_gap_schedules_sync(monkeypatch):
+    leader = _leader_with_blocks(3)
+    follower = InMemoryStorage()
+    app.dependency_overrides[get_storage] = lambda: follower
+
+    requested = []
+    monkeypatch.setattr(
+        SYNCER, "request", lambda storage, target=None: requested.append(target) or True
+    )
+
+    tip = leader.get_tip()
+    proposal = BlockProposal(block=tip, hash=tip.hash)
+    client = TestClient(app)
+    resp = client.post("/rpc/commit_block", json=proposal.model_dump(mode="json"))
+
+    assert resp.status_code == 202
+    assert resp.json()["status"] == "syncing"
+    assert requested == [3]
+    assert follower.get_tip().index == 0
+
+    vote = client.post("/rpc/propose_block", json=proposal.model_dump(mode="json"))
+    assert vote.json()["vote"] == "reject"
+    assert requested == [3, 2]
@@ -1,11 +1,23 @@
 from __future__ import annotations
 
 import asyncio
+import json
+import logging
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.testclient import TestClient
 
+from vetclinic_api import tracing
 from vetclinic_api.admin.network_state import STATE
+from vetclinic_api.metrics import (
+    UNMATCHED_PATH,
+    http_request_size_bytes,
+    http_requests_in_progress,
+    http_requests_total,
+    http_response_size_bytes,
+    metrics_router,
+)
+from vetclinic_api.middleware import timing
 from vetclinic_api.middleware.chaos import ChaosMiddleware
 
 
@@ -53,3 +65,163 @@ def test_chaos_middleware_allows_other_paths(monkeypatch):
     resp = client.get("/health")
     assert resp.status_code == 200
     assert resp.json()["status"] == "ok"
+
+
+def test_middleware_records_metrics_with_route_template():
+    STATE.chaos_enabled = False
+    app = FastAPI()
+    app.add_middleware(ChaosMiddleware, instrument=True)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    counter = http_requests_total.labels("GET", "/items/{item_id}", "200")
+    before = counter._value.get()
+    client = TestClient(app)
+    assert client.get("/items/1").status_code == 200
+    assert client.get("/items/2").status_code == 200
+    assert counter._value.get() == before + 2
+
+
+def _sample_sum(metric, *labels) -> float:
+    return metric.labels(*labels)._sum.get()
+
+
+def test_unmatched_and_chaos_paths_do_not_leak_raw_paths(monkeypatch):
+    STATE.chaos_enabled = True
+    STATE.chaos_delay_rate = 0.0
+    STATE.chaos_error_rate = 1.0
+    monkeypatch.setattr("vetclinic_api.middleware.chaos.random.random", lambda: 0.0)
+
+    app = FastAPI()
+    app.add_middleware(ChaosMiddleware)
+
+    @app.get("/tx/{tx_id}/check")
+    def check(tx_id: str):
+        return {"id": tx_id}
+
+    injected = http_requests_total.labels("GET", "/tx/{tx_id}/check", "500")
+    unmatched = http_requests_total.labels("GET", UNMATCHED_PATH, "404")
+    before = (injected._value.get(), unmatched._value.get())
+    client = TestClient(app)
+    # Błąd wstrzyknięty przed routingiem – i tak etykieta to szablon trasy.
+    assert client.get("/tx/abc/check").status_code == 500
+    STATE.chaos_enabled = False
+    assert client.get("/wp-admin/123").status_code == 404
+    assert (injected._value.get(), unmatched._value.get()) == (before[0] + 1, before[1] + 1)
+    assert ("GET", "/tx/abc/check", "500") not in http_requests_total._metrics
+    assert ("GET", "/wp-admin/123", "404") not in http_requests_total._metrics
+
+
+def test_request_response_sizes_and_in_progress():
+    STATE.chaos_enabled = False
+    app = FastAPI()
+    app.add_middleware(ChaosMiddleware, instrument=True)
+    seen = {}
+
+    @app.post("/echo/{key}")
+    def echo(key: str, payload: dict):
+        seen["in_progress"] = http_requests_in_progress.labels("POST")._value.get()
+        return {"key": key, "payload": payload}
+
+    req_before = _sample_sum(http_request_size_bytes, "POST", "/echo/{key}")
+    resp_before = _sample_sum(http_response_size_bytes, "POST", "/echo/{key}")
+    body = json.dumps({"a": "x" * 100}).encode()
+    resp = TestClient(app).post(
+        "/echo/k", content=body, headers={"content-type": "application/json"}
+    )
+    assert resp.status_code == 200
+    assert seen["in_progress"] >= 1
+    assert http_requests_in_progress.labels("POST")._value.get() == seen["in_progress"] - 1
+    assert _sample_sum(http_request_size_bytes, "POST", "/echo/{key}") == req_before + len(body)
+    assert _sample_sum(http_response_size_bytes, "POST", "/echo/{key}") == resp_before + len(
+        resp.content
+    )
+
+
+def test_slow_request_log_has_phase_timings(monkeypatch, caplog):
+    STATE.chaos_enabled = False
+    monkeypatch.setattr(timing, "SLOW_REQUEST_MS", 0.0)
+    monkeypatch.setattr(timing, "SLOW_REQUEST_SAMPLE", 1.0)
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+    app = FastAPI()
+    app.add_middleware(ChaosMiddleware, instrument=True)
+
+    async def dep() -> int:
+        await asyncio.sleep(0.01)
+        return 1
+
+    @app.get("/slow/{item_id}")
+    async def slow(item_id: int, value: int = Depends(dep)):
+        await asyncio.sleep(0.02)
+        return {"id": item_id, "value": value}
+
+    with caplog.at_level(logging.WARNING, logger="vetclinic_api.http"):
+        resp = TestClient(app).get(
+            "/slow/7", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"}
+        )
+    assert resp.status_code == 200
+    entries = [json.loads(r.getMessage()) for r in caplog.records if r.name == "vetclinic_api.http"]
+    assert len(entries) == 1
+    entry = entries[0]
+    assert entry["path"] == "/slow/{item_id}"
+    assert entry["trace_id"] == trace_id
+    phases = entry["phases_ms"]
+    assert phases["dependencies"] >= 10
+    assert phases["handler"] >= 20
+    assert "serialization" in phases and "other" in phases
+
+    monkeypatch.setattr(timing, "SLOW_REQUEST_SAMPLE", 0.0)
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger="vetclinic_api.http"):
+        TestClient(app).get("/slow/8")
+    assert not [r for r in caplog.records if r.name == "vetclinic_api.http"]
+
+
+def test_openmetrics_exposes_trace_id_exemplars():
+    STATE.chaos_enabled = False
+    trace_id = "0af7651916cd43dd8448eb211c80319c"
+    app = FastAPI()
+    app.add_middleware(ChaosMiddleware, instrument=True)
+    app.include_router(metrics_router)
+
+    @app.get("/exemplar/{item_id}")
+    def item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    client.get("/exemplar/1", headers={"traceparent": f"00-{trace_id}-b7ad6b7169203331-01"})
+    text = client.get("/metrics", headers={"accept": "application/openmetrics-text"}).text
+    assert f'trace_id="{trace_id}"' in text
+    assert "# EOF" in text
+    plain = client.get("/metrics").text
+    assert "trace_id=" not in plain
+
+
+def test_traceparent_must_match_w3c_format():
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert tracing.parse_traceparent(f"00-{trace_id}-00f067aa0ba902b7-01") == trace_id
+    assert tracing.parse_traceparent(f"01-{trace_id}-00f067aa0ba902b7-01-extra") == trace_id
+    for bad in (
+        f"00-{trace_id.upper()}-00f067aa0ba902b7-01",
+        f"00-{'0' * 32}-00f067aa0ba902b7-01",
+        f"00-{trace_id}-{'0' * 16}-01",
+        f"ff-{trace_id}-00f067aa0ba902b7-01",
+        f"00-{trace_id}-00f067aa0ba902b7-01-extra",
+        f"00-{'g' * 32}-00f067aa0ba902b7-01",
+        "x-" + "a" * 32 + "-y",
+    ):
+        assert tracing.parse_traceparent(bad) is None, bad
+
+
+def test_phase_timers_skip_unverified_fastapi(monkeypatch):
+    assert timing.phase_timers_supported()
+    assert not timing.phase_timers_supported("0.200.0")
+
+    monkeypatch.setattr(timing, "_installed", False)
+    monkeypatch.setattr(timing, "PHASE_TIMING_FASTAPI_VERSIONS", ())
+    original = timing.fastapi.routing.solve_dependencies
+    assert timing.install_phase_timers() is False
+    assert timing.fastapi.routing.solve_dependencies is original
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+
+from prometheus_client import REGISTRY
+
+from vetclinic_api.admin.link_rules import LinkRule, LinkRules
+from vetclinic_api.cluster.harness import InProcessCluster
+from vetclinic_api.metrics import NODE_NAME
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, {"node": NODE_NAME, **labels}) or 0.0
+
+
+def test_round_emits_phase_vote_and_block_metrics():
+    cluster = InProcessCluster(size=3)
+    cluster.load_faults(links=LinkRules(rules=[LinkRule(src=1, dst=3, blocked=True)]))
+    names = [
+        ("consensus_rounds_total", {"result": "committed"}),
+        ("consensus_rounds_total", {"result": "empty"}),
+        ("consensus_peer_votes_total", {"peer": "node2", "vote": "accept"}),
+        ("consensus_peer_votes_total", {"peer": "node3", "vote": "no_response"}),
+        ("peer_rpc_failures_total", {"peer": "node3", "rpc": "propose_block", "kind": "error"}),
+        ("consensus_votes_total", {"vote": "yes"}),
+        ("consensus_phase_duration_seconds_count", {"phase": "nonce_search"}),
+        ("consensus_phase_duration_seconds_count", {"phase": "vote_collection"}),
+        ("consensus_phase_duration_seconds_count", {"phase": "commit_fanout"}),
+        ("consensus_phase_duration_seconds_count", {"phase": "propose_validate"}),
+        ("consensus_phase_duration_seconds_count", {"phase": "commit_apply"}),
+        ("consensus_block_transactions_sum", {}),
+        ("consensus_block_size_bytes_count", {}),
+    ]
+    before = [_sample(name, **labels) for name, labels in names]
+
+    async def _run():
+        async with cluster.client() as client:
+            for i in range(2):
+                await client.post(
+                    "http://node1:8000/tx/submit",
+                    json={"sender": f"alice{i}", "recipient": "bob", "amount": 1},
+                )
+            committed = await client.post("http://node1:8000/chain/mine_distributed")
+            empty = await client.post("http://node1:8000/chain/mine_distributed")
+            return committed, empty
+
+    committed, empty = asyncio.run(_run())
+    assert committed.json()["status"] == "committed"
+    assert empty.status_code == 400
+
+    delta = dict(
+        zip(
+            [f"{name}{labels}" for name, labels in names],
+            [_sample(name, **labels) - b for (name, labels), b in zip(names, before)],
+        )
+    )
+    assert list(delta.values()) == [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 1], delta
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+
+from vetclinic_api.blockchain.core import (
+    InMemoryStorage,
+    Transaction,
+    TxPayload,
+    build_block_proposal,
+)
+from vetclinic_api.blockchain.deps import get_storage
+from vetclinic_api.cluster.consensus import CommitBuffer
+from vetclinic_api.crypto.ed25519 import load_leader_keys_from_env, sign_message
+from vetclinic_api.main import app
+
+
+def _make_transaction(i: int) -> Transaction:
+    payload = TxPayload(sender=f"alice{i}", recipient="bob", amount=Decimal("1.0"))
+    timestamp = datetime.utcnow()
+    raw = json.dumps(
+        {"payload": payload.model_dump(mode="json"), "timestamp": timestamp.isoformat()},
+        sort_keys=True,
+    ).encode("utf-8")
+    keys = load_leader_keys_from_env()
+    return Transaction(
+        id=hashlib.sha256(raw).hexdigest(),
+        payload=payload,
+        sender_pub="test-sender",
+        signature=sign_message(keys.priv, raw),
+        timestamp=timestamp,
+    )
+
+
+def _pipelined_proposals(count: int):
+    """Propozycje kolejnych bloków tak, jak buduje je lider w trybie potokowym."""
+    leader = InMemoryStorage()
+    proposals = []
+    for i in range(count):
+        leader.add_transaction(_make_transaction(i))
+        proposal = build_block_proposal(leader)
+        leader.add_block(proposal.block)
+        proposals.append(proposal)
+    return proposals
+
+
+def test_commit_buffer_drains_in_index_order():
+    p1, p2, p3 = _pipelined_proposals(3)
+    storage = InMemoryStorage()
+    buffer = CommitBuffer(window=4)
+
+    buffer.buffer_commit(p3.block)
+    buffer.buffer_commit(p2.block)
+    assert buffer.drain(storage) == []
+
+    storage.add_block(p1.block)
+    assert buffer.drain(storage) == [2, 3]
+    assert storage.get_tip().index == 3
+    assert buffer.pending_commits == []
+
+
+def test_commit_buffer_parent_lookup_uses_accepted_proposals():
+    p1, p2 = _pipelined_proposals(2)
+    tip = InMemoryStorage().get_tip()
+    buffer = CommitBuffer(window=2)
+
+    assert buffer.parent_for(1, tip) is tip
+    assert buffer.parent_for(2, tip) is None
+    buffer.remember_proposal(p1.block)
+    assert buffer.parent_for(2, tip) == p1.block
+    assert buffer.parent_for(0, tip) is None
+
+
+def test_follower_accepts_next_proposal_before_previous_commit():
+    p1, p2 = _pipelined_proposals(2)
+    follower = InMemoryStorage()
+    app.dependency_overrides[get_storage] = lambda: follower
+    client = TestClient(app)
+
+    vote1 = client.post("/rpc/propose_block", json=p1.model_dump(mode="json")).json()
+    vote2 = client.post("/rpc/propose_block", json=p2.model_dump(mode="json")).json()
+    assert vote1["vote"] == "accept"
+    assert vote2["vote"] == "accept"
+
+    early = client.post("/rpc/commit_block", json=p2.model_dump(mode="json"))
+    assert early.status_code == 202
+    assert early.json()["status"] == "buffered"
+    assert follower.get_tip().index == 0
+
+    late = client.post("/rpc/commit_block", json=p1.model_dump(mode="json"))
+    assert late.status_code == 200
+    assert late.json()["height"] == 2
+    assert follower.get_tip().hash == p2.block.hash
+
+
+def test_mine_distributed_reports_pipelined_mode():
+    storage = InMemoryStorage()
+    storage.add_transaction(_make_transaction(0))
+    app.dependency_overrides[get_storage] = lambda: storage
+    client = TestClient(app)
+
+    resp = client.post("/chain/mine_distributed", params={"pipelined": True})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["status"] == "committed"
+    assert body["pipelined"] is True
+    assert storage.get_tip().index == 1
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+from vetclinic_api.admin.fault_schedule import FaultSchedule, FaultTimeline
+from vetclinic_api.main import app
+
+SCHEDULE = {
+    "seed": 42,
+    "windows": [
+        {"start": 0, "end": 50, "endpoints": ["propose_block"], "drop_prob": 0.3},
+        {
+            "start": 10,
+            "end": 40,
+            "latency": {"dist": "uniform", "ms": 5, "ms_max": 50},
+        },
+        {"start": 60, "end": 70, "nodes": [1], "offline": True},
+        {"start": 80, "partition": [[1, 2, 3], [4, 5, 6]]},
+    ],
+}
+
+
+ENDPOINTS = ["propose_block", "commit_block", "heartbeat"]
+
+
+def _run(timeline: FaultTimeline, calls: int = 300, caller: int | None = None) -> list:
+    return [
+        timeline.decide(ENDPOINTS[i % 3], caller).model_dump() for i in range(calls)
+    ]
+
+
+def _decisions(events: list, endpoint: str) -> list:
+    return [
+        {k: v for k, v in event.items() if k != "tick"}
+        for event in events
+        if event["endpoint"] == endpoint
+    ]
+
+
+def _timeline(**overrides) -> FaultTimeline:
+    timeline = FaultTimeline(node_id_provider=lambda: 1)
+    timeline.load(FaultSchedule(**{**SCHEDULE, **overrides}))
+    return timeline
+
+
+def test_same_seed_gives_identical_fault_sequence():
+    first = _run(_timeline(), caller=5)
+    assert first == _run(_timeline(), caller=5)
+    assert first != _run(_timeline(seed=7), caller=5)
+
+    proposals = _decisions(first, "propose_block")
+    actions = [event["action"] for event in proposals]
+    assert "drop" in actions[:50]
+    assert set(actions[60:70]) == {"offline"}
+    assert set(actions[80:]) == {"partition"}
+    assert all(event["delay_ms"] >= 5 for event in proposals[10:40])
+
+
+def test_decisions_do_not_depend_on_call_interleaving():
+    interleaved = _run(_timeline(), caller=5)
+
+    sequential = _timeline()
+    events = [
+        sequential.decide(endpoint, 5).model_dump()
+        for endpoint in ENDPOINTS
+        for _ in range(100)
+    ]
+    for endpoint in ENDPOINTS:
+        assert _decisions(events, endpoint) == _decisions(interleaved, endpoint)
+
+
+def test_partition_only_applies_across_groups():
+    events = _run(_timeline(), caller=2)
+    assert "partition" not in {event["action"] for event in events}
+
+
+def test_recording_replays_decisions_exactly():
+    recorded = _timeline()
+    original = _run(recorded, caller=4)
+
+    replayed = _timeline(seed=999, windows=[], replay=recorded.recording())
+    assert _run(replayed, caller=4) == original
+
+
+def test_schedule_is_loaded_and_enforced_via_admin_api():
+    client = TestClient(app)
+    body = {"seed": 1, "windows": [{"start": 1, "end": 2, "offline": True}]}
+    status = client.put("/admin/network/schedule", json=body).json()
+    assert status["loaded"] is True
+    assert status["tick"] == 0
+
+    assert client.get("/rpc/node-info").status_code == 200
+    offline = client.get("/rpc/node-info")
+    assert offline.status_code == 503
+    assert offline.json()["detail"] == "Node is offline (scheduled)"
+    assert client.get("/rpc/node-info").status_code == 200
+
+    recording = client.get("/admin/network/schedule/recording").json()
+    assert [event["action"] for event in recording] == ["pass", "offline", "pass"]
+
+    partitioned = {"seed": 1, "windows": [{"partition": [[1], [2]]}]}
+    client.put("/admin/network/schedule", json=partitioned)
+    assert client.get("/rpc/node-info", headers={"X-Node-Id": "2"}).status_code == 503
+    assert client.get("/rpc/node-info", headers={"X-Node-Id": "1"}).status_code == 200
+    assert client.get("/rpc/node-info").status_code == 200
+
+    assert client.delete("/admin/network/schedule").json()["loaded"] is False
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import asyncio
+
+from vetclinic_api.admin.link_rules import LinkRule, LinkRules
+from vetclinic_api.cluster.config import CONFIG
+from vetclinic_api.cluster.harness import InProcessCluster
+
+
+async def _submit(client, node_id: int, count: int) -> None:
+    for i in range(count):
+        resp = await client.post(
+            f"http://node{node_id}:8000/tx/submit",
+            json={"sender": f"alice{i}", "recipient": "bob", "amount": 1},
+        )
+        assert resp.status_code == 202
+
+
+def test_nodes_have_isolated_config_and_storage():
+    cluster = InProcessCluster(size=3)
+    with cluster.as_node(2):
+        assert CONFIG.node_id == 2
+        assert CONFIG.peers == ["http://node1:8000", "http://node3:8000"]
+    assert CONFIG.node_id == 1
+
+    async def _run():
+        async with cluster.client() as client:
+            await _submit(client, 1, 3)
+            return (await client.get("http://node3:8000/rpc/node-info")).json()
+
+    info = asyncio.run(_run())
+    assert info["node_id"] == 3
+    assert [n.storage.get_mempool_size() for n in cluster.nodes.values()] == [3, 3, 3]
+
+
+def test_cluster_commits_and_partitioned_node_catches_up():
+    cluster = InProcessCluster(size=3)
+    # node1 -> node3 zablokowane: node3 nie dostaje ani transakcji, ani commitu.
+    cluster.load_faults(links=LinkRules(rules=[LinkRule(src=1, dst=3, blocked=True)]))
+
+    async def _run():
+        async with cluster.client() as client:
+            await _submit(client, 1, 2)
+            resp = await client.post("http://node1:8000/chain/mine_distributed")
+            assert resp.json()["status"] == "committed"
+            assert resp.json()["votes"] == 2
+            assert not cluster.converged()
+
+            cluster.load_faults(links=LinkRules())
+            return await cluster.wait_converged(timeout=5.0)
+
+    assert asyncio.run(_run()) is not None
+    assert {index for index, _ in cluster.tips().values()} == {1}
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from vetclinic_api.blockchain.core import InMemoryStorage, build_block_proposal
+from vetclinic_api.blockchain.deps import get_storage
+from vetclinic_api.cluster.config import NodeConfig
+from vetclinic_api.cluster.election import (
+    HeartbeatRequest,
+    LeaderElection,
+    VoteRequest,
+    get_election,
+)
+from vetclinic_api.main import app
+from vetclinic_api.routers.blockchain_records import BlockchainRecord, _build_record_tx
+
+PEERS = ["http://node1:8000", "http://node3:8000"]
+
+
+def _follower(client_factory=None) -> LeaderElection:
+    config = NodeConfig(
+        node_id=2,
+        leader_id=1,
+        peers=list(PEERS),
+        leader_url="http://node1:8000",
+        self_url="http://node2:8000",
+    )
+    kwargs = {"client_factory": client_factory} if client_factory else {}
+    return LeaderElection(config=config, timeout_ms=(10, 20), **kwargs)
+
+
+def _mock_factory(handler):
+    return lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_vote_granted_once_per_term_and_only_to_up_to_date_candidate():
+    election = _follower()
+
+    stale = election.handle_vote_request(
+        VoteRequest(term=1, candidate_id=3, last_index=0), local_height=5
+    )
+    assert stale.vote_granted is False
+    assert election.state.term == 1
+    assert election.config.leader_id == 0
+
+    granted = election.handle_vote_request(
+        VoteRequest(term=1, candidate_id=3, last_index=5), local_height=5
+    )
+    assert granted.vote_granted is True
+    other = election.handle_vote_request(
+        VoteRequest(term=1, candidate_id=1, last_index=9), local_height=5
+    )
+    assert other.vote_granted is False
+
+
+def test_heartbeat_from_stale_term_is_rejected_and_new_leader_is_adopted():
+    election = _follower()
+    election.handle_heartbeat(
+        HeartbeatRequest(term=3, leader_id=3, leader_url="http://node3:8000")
+    )
+    assert election.config.leader_id == 3
+    assert election.config.leader_url == "http://node3:8000"
+
+    old = election.handle_heartbeat(
+        HeartbeatRequest(term=2, leader_id=1, leader_url="http://node1:8000")
+    )
+    assert old.success is False
+    assert old.term == 3
+    assert election.config.leader_id == 3
+
+
+def test_follower_wins_election_after_leader_goes_silent():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "node1":
+            return httpx.Response(503, json={"detail": "Node is offline (simulated)"})
+        body = json.loads(request.content)
+        if request.url.path == "/rpc/request_vote":
+            return httpx.Response(200, json={"term": body["term"], "vote_granted": True})
+        return httpx.Response(200, json={"term": body["term"], "success": True})
+
+    election = _follower(_mock_factory(handler))
+    storage = InMemoryStorage()
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await asyncio.sleep(0.03)
+            await election.tick(client, storage)
+
+    asyncio.run(_run())
+    assert election.state.role == "leader"
+    assert election.state.term == 1
+    assert election.config.leader_id == 2
+    assert election.config.leader_url == "http://node2:8000"
+    assert election.state.last_failover_s is not None
+
+
+def test_candidate_steps_down_on_higher_term():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"term": 7, "vote_granted": False})
+
+    election = _follower()
+    storage = InMemoryStorage()
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await election.run_election(client, storage)
+
+    assert asyncio.run(_run()) is False
+    assert election.state.role == "follower"
+    assert election.state.term == 7
+
+
+def test_leader_info_reports_term_and_stale_proposals_are_rejected():
+    storage = InMemoryStorage()
+    app.dependency_overrides[get_storage] = lambda: storage
+    client = TestClient(app)
+
+    resp = client.post(
+        "/rpc/heartbeat",
+        json={"term": 4, "leader_id": 3, "leader_url": "http://node3:8000"},
+    )
+    assert resp.json() == {"term": 4, "success": True}
+
+    info = client.get("/rpc/leader-info").json()
+    assert info["term"] == 4
+    assert info["leader_id"] == 3
+    assert info["role"] == "follower"
+
+    leader = InMemoryStorage()
+    leader.add_transaction(
+        _build_record_tx(BlockchainRecord(id=1, data_hash="h", owner="alice"))
+    )
+    proposal = build_block_proposal(leader)
+    vote = client.post("/rpc/propose_block", json=proposal.model_dump(mode="json"))
+    assert vote.json()["reason"] == "stale_term"
+    commit = client.post("/rpc/commit_block", json=proposal.model_dump(mode="json"))
+    assert commit.status_code == 409
+    assert commit.json() == {"status": "rejected", "reason": "stale_term", "term": 4}
+    assert storage.get_tip().index == 0
+
+    redirect = client.post("/chain/mine_distributed", follow_redirects=False)
+    assert redirect.status_code == 307
+    assert redirect.headers["location"] == "http://node3:8000/chain/mine_distributed"
+
+    get_election().bootstrap()
+    assert client.get("/rpc/leader-info").json()["term"] == 0
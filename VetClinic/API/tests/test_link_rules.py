@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from vetclinic_api.admin.link_rules import LinkRule, LinkRules, LinkTable, get_links
+from vetclinic_api.blockchain.core import InMemoryStorage
+from vetclinic_api.cluster.consensus import run_consensus_round
+from vetclinic_api.cluster.transport import LinkShapingTransport
+from vetclinic_api.main import app
+from vetclinic_api.routers.blockchain_records import BlockchainRecord, _build_record_tx
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/rpc/propose_block":
+        return httpx.Response(200, json={"vote": "accept", "byzantine": False})
+    return httpx.Response(200, json={"status": "committed"})
+
+
+def _client(links: LinkTable) -> httpx.AsyncClient:
+    transport = LinkShapingTransport(
+        httpx.MockTransport(_handler), links=links, node_id_provider=lambda: 1
+    )
+    return httpx.AsyncClient(transport=transport)
+
+
+def _table(*rules: LinkRule) -> LinkTable:
+    links = LinkTable()
+    links.load(LinkRules(rules=list(rules)))
+    return links
+
+
+def test_outbound_rules_are_per_direction(monkeypatch):
+    delays = []
+
+    async def fake_sleep(seconds: float) -> None:
+        delays.append(seconds)
+
+    monkeypatch.setattr("vetclinic_api.cluster.transport.asyncio.sleep", fake_sleep)
+    links = _table(
+        LinkRule(src=1, dst=2, blocked=True),
+        LinkRule(src=2, dst=1, blocked=True),
+        LinkRule(src=1, dst=3, latency={"ms": 50}, bandwidth_kbps=80),
+        LinkRule(src=4, dst=1, latency={"ms": 500}),
+    )
+
+    async def _run():
+        async with _client(links) as client:
+            with pytest.raises(httpx.ConnectError):
+                await client.post("http://node2:8000/rpc/propose_block", json={})
+            await client.post("http://node3:8000/rpc/propose_block", content=b"x" * 1000)
+            await client.post("http://node4:8000/rpc/propose_block", json={})
+
+    asyncio.run(_run())
+    # 50 ms latencji + 1000 B przy 80 kbit/s = 0.1 s; reguła 4->1 nie dotyczy wysyłki 1->4.
+    assert delays == [pytest.approx(0.15)]
+
+
+def test_inbound_rpc_applies_rules_for_responses_to_caller():
+    client = TestClient(app)
+    rules = {"rules": [{"src": 1, "dst": 2, "blocked": True}]}
+    assert client.put("/admin/network/links", json=rules).status_code == 200
+
+    blocked = client.get("/rpc/node-info", headers={"X-Node-Id": "2"})
+    assert blocked.status_code == 503
+    assert blocked.json()["detail"] == "Link blocked (simulated)"
+    assert client.get("/rpc/node-info", headers={"X-Node-Id": "3"}).status_code == 200
+    assert client.get("/rpc/node-info").status_code == 200
+
+    split = client.post("/admin/network/links/partition", json={"groups": [[1, 2, 3], [4, 5, 6]]})
+    assert len(split.json()["rules"]) == 18
+    assert client.get("/rpc/node-info", headers={"X-Node-Id": "4"}).status_code == 503
+    assert client.get("/rpc/node-info", headers={"X-Node-Id": "2"}).status_code == 200
+
+    assert client.delete("/admin/network/links").json()["rules"] == []
+
+
+def test_leader_in_minority_partition_cannot_commit():
+    get_links().load(
+        LinkRules(rules=[LinkRule(src=1, dst=peer, blocked=True) for peer in (3, 4, 5, 6)])
+    )
+    storage = InMemoryStorage()
+    storage.add_transaction(
+        _build_record_tx(BlockchainRecord(id=1, data_hash="h", owner="alice"))
+    )
+    peers = [f"http://node{i}:8000" for i in range(2, 7)]
+
+    async def _run():
+        async with _client(get_links()) as client:
+            return await run_consensus_round(storage, client, pipelined=False, peers=peers)
+
+    result = asyncio.run(_run())
+    assert result["status"] == "rejected"
+    assert result["votes"] == 2
+    assert storage.get_tip().index == 0
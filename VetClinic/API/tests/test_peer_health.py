@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import httpx
+
+from vetclinic_api.blockchain.core import InMemoryStorage, Transaction, TxPayload
+from vetclinic_api.cluster.consensus import run_consensus_round
+from vetclinic_api.cluster.health import PeerHealthTracker, get_peer_health
+from vetclinic_api.crypto.ed25519 import load_leader_keys_from_env, sign_message
+
+UP = "http://node2:8000"
+DOWN = "http://node3:8000"
+
+
+def _make_transaction() -> Transaction:
+    payload = TxPayload(sender="alice", recipient="bob", amount=Decimal("1.0"))
+    timestamp = datetime.utcnow()
+    raw = json.dumps(
+        {"payload": payload.model_dump(mode="json"), "timestamp": timestamp.isoformat()},
+        sort_keys=True,
+    ).encode("utf-8")
+    keys = load_leader_keys_from_env()
+    return Transaction(
+        id=hashlib.sha256(raw).hexdigest(),
+        payload=payload,
+        sender_pub="test-sender",
+        signature=sign_message(keys.priv, raw),
+        timestamp=timestamp,
+    )
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    if request.url.host == "node3":
+        return httpx.Response(503, json={"detail": "Node is offline (simulated)"})
+    if request.url.path == "/rpc/propose_block":
+        return httpx.Response(200, json={"vote": "accept", "byzantine": False})
+    if request.url.path == "/rpc/commit_block":
+        return httpx.Response(200, json={"status": "committed"})
+    return httpx.Response(200, json={"node_id": 2})
+
+
+def _tracker(**kwargs) -> PeerHealthTracker:
+    return PeerHealthTracker(
+        peers_provider=lambda: [UP, DOWN],
+        client_factory=lambda: httpx.AsyncClient(transport=httpx.MockTransport(_handler)),
+        **kwargs,
+    )
+
+
+def test_heartbeats_track_latency_and_open_circuit_after_failures():
+    tracker = _tracker(cb_failures=2, cb_reset_s=60)
+
+    asyncio.run(tracker.refresh())
+    up, down = tracker.snapshot()
+    assert up["ok"] is True
+    assert up["node_info"] == {"node_id": 2}
+    assert up["ewma_latency_ms"] is not None
+    assert down["circuit"] == "closed"
+    assert tracker.timeout_for(DOWN, 5.0) < 5.0
+
+    asyncio.run(tracker.refresh())
+    down = tracker.snapshot()[1]
+    assert down["consecutive_failures"] == 2
+    assert down["circuit"] == "open"
+    assert tracker.available_peers() == [UP]
+
+
+def test_circuit_goes_half_open_after_reset_and_closes_on_success():
+    tracker = _tracker(cb_failures=1, cb_reset_s=0.0)
+    tracker.record_failure(UP, "timeout")
+    assert tracker.snapshot()[0]["circuit"] == "half_open"
+    assert tracker.is_available(UP)
+
+    tracker.record_failure(UP, "timeout")
+    assert tracker._peers[UP].circuit == "open"
+
+    tracker.record_success(UP, 0.01)
+    assert tracker.snapshot()[0]["circuit"] == "closed"
+    assert tracker.timeout_for(UP, 5.0) == 5.0
+
+
+def test_consensus_round_skips_peers_with_open_circuit():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.host)
+        return _handler(request)
+
+    health = get_peer_health()
+    for _ in range(health.cb_failures):
+        health.record_failure(DOWN, "connection refused")
+
+    storage = InMemoryStorage()
+    storage.add_transaction(_make_transaction())
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await run_consensus_round(
+                storage, client, pipelined=False, peers=[UP, DOWN]
+            )
+
+    result = asyncio.run(_run())
+    assert result["status"] == "committed"
+    assert result["total"] == 3
+    assert result["votes"] == 2
+    assert result["skipped"] == 1
+    assert "node3" not in calls
+    assert calls.count("node2") == 2
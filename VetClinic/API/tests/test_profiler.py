@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from vetclinic_api.admin import profiler as profiler_module
+from vetclinic_api.admin.profiler import MODE_ALLOC, MODE_CPU, MODE_WALL, Profiler
+from vetclinic_api.main import app
+from vetclinic_api.routers import admin as admin_router
+
+
+def _spin_cpu(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def _idle(stop: threading.Event) -> None:
+    stop.wait()
+
+
+def _run_with_threads(func, *targets):
+    stop = threading.Event()
+    threads = [threading.Thread(target=t, args=(stop,), daemon=True) for t in targets]
+    for thread in threads:
+        thread.start()
+    try:
+        return func()
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def test_wall_profile_sees_busy_and_idle_threads():
+    prof = Profiler(interval_s=0.002)
+    result = _run_with_threads(lambda: prof.run(0.3, MODE_WALL), _spin_cpu, _idle)
+    stacks = "\n".join(result.stacks)
+    assert result.samples > 10
+    assert "test_profiler.py:_spin_cpu" in stacks
+    assert "test_profiler.py:_idle" in stacks
+    # Format collapsed: "ramka;ramka waga", korzeń to nazwa wątku.
+    line = result.collapsed().splitlines()[0]
+    stack, weight = line.rsplit(" ", 1)
+    assert int(weight) > 0 and ";" in stack
+
+
+def test_cpu_profile_skips_waiting_threads():
+    prof = Profiler(interval_s=0.002)
+    result = _run_with_threads(lambda: prof.run(0.3, MODE_CPU), _spin_cpu, _idle)
+    busy = sum(w for s, w in result.stacks.items() if "test_profiler.py:_spin_cpu" in s)
+    idle = sum(w for s, w in result.stacks.items() if "test_profiler.py:_idle" in s)
+    assert busy > 10
+    # Wątek czekający na Event trafia najwyżej w pojedynczych próbkach (tuż przed blokadą).
+    assert idle <= busy * 0.1
+    assert result.top(1)[0]["weight"] > 0
+
+
+def test_alloc_profile_attributes_bytes_to_allocating_code():
+    prof = Profiler()
+    kept = []
+
+    def allocate(stop: threading.Event) -> None:
+        time.sleep(0.05)
+        kept.append([bytearray(1024) for _ in range(500)])
+
+    result = _run_with_threads(lambda: prof.run(0.3, MODE_ALLOC), allocate)
+    payload = result.payload()
+    assert payload["unit"] == "bytes"
+    heavy = [s for s, size in result.stacks.items() if "test_profiler.py" in s and size >= 500_000]
+    assert heavy
+    # Liść stosu (po prawej) to linia alokacji w `allocate`.
+    assert heavy[0].rsplit(";", 1)[-1].startswith("tests/test_profiler.py:")
+
+
+def test_profile_endpoint_limits_and_output(monkeypatch):
+    monkeypatch.setattr(admin_router, "ADMIN_TOKEN", "s3cret")
+    client = TestClient(app, headers={"X-Admin-Token": "s3cret"})
+    resp = client.get("/admin/profile", params={"seconds": 0.1, "mode": "wall"})
+    assert resp.status_code == 200
+    assert resp.headers["x-profile-mode"] == "wall"
+    assert resp.text.strip()
+
+    resp = client.get("/admin/profile", params={"seconds": 0.1, "format": "json"})
+    assert resp.status_code == 200
+    assert resp.json()["mode"] == "cpu"
+
+    too_long = profiler_module.PROFILE_MAX_SECONDS + 1
+    assert client.get("/admin/profile", params={"seconds": too_long}).status_code == 422
+    assert client.get("/admin/profile", params={"mode": "gpu"}).status_code == 422
+
+    busy = Profiler()
+    busy._lock.acquire()
+    monkeypatch.setattr(admin_router, "get_profiler", lambda: busy)
+    assert client.get("/admin/profile", params={"seconds": 0.1}).status_code == 409
+    busy._lock.release()
+
+
+def test_profile_endpoint_requires_admin_token(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setattr(admin_router, "ADMIN_TOKEN", "")
+    # Bez skonfigurowanego tokenu profilowanie jest wyłączone, nawet z nagłówkiem.
+    resp = client.get("/admin/profile", params={"seconds": 0.1}, headers={"X-Admin-Token": ""})
+    assert resp.status_code == 403
+
+    monkeypatch.setattr(admin_router, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/admin/profile", params={"seconds": 0.1}).status_code == 401
+    wrong = client.get("/admin/profile", params={"seconds": 0.1}, headers={"X-Admin-Token": "zażółć".encode()})
+    assert wrong.status_code == 401
+    resp = client.get(
+        "/admin/profile", params={"seconds": 0.1}, headers={"X-Admin-Token": "s3cret"}
+    )
+    assert resp.status_code == 200
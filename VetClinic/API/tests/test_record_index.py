@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from vetclinic_api.blockchain.core import (
+    InMemoryStorage,
+    SQLAlchemyStorage,
+    mine_block,
+)
+from vetclinic_api.blockchain.deps import get_storage
+from vetclinic_api.main import app
+from vetclinic_api.models_blockchain import RecordAnchorDB
+from vetclinic_api.routers.blockchain_records import BlockchainRecord, _build_record_tx
+
+
+def _sqlite_storage(tmp_path) -> SQLAlchemyStorage:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'chain.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    return SQLAlchemyStorage(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+
+
+def _anchor(storage, record_id: int, data_hash: str, owner: str) -> None:
+    record = BlockchainRecord(id=record_id, data_hash=data_hash, owner=owner)
+    storage.add_transaction(_build_record_tx(record))
+    mine_block(storage)
+
+
+@pytest.fixture(params=["memory", "sqlalchemy"])
+def storage(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryStorage()
+    return _sqlite_storage(tmp_path)
+
+
+def test_index_tracks_latest_anchor_and_owner(storage):
+    _anchor(storage, 1, "h1", "alice")
+    _anchor(storage, 2, "h2", "alice")
+    _anchor(storage, 1, "h1-v2", "bob")
+
+    latest = storage.get_record_anchor(1)
+    assert latest is not None
+    assert latest.data_hash == "h1-v2"
+    assert latest.block_index == 3
+    assert storage.get_record_anchor(99) is None
+
+    assert storage.get_record_ids_by_owner("alice") == [1, 2]
+    assert storage.get_record_ids_by_owner("bob") == [1]
+    assert storage.get_record_ids_by_owner("carol") == []
+
+
+def test_rebuild_restores_index_from_chain(tmp_path):
+    storage = _sqlite_storage(tmp_path)
+    _anchor(storage, 7, "h7", "alice")
+    _anchor(storage, 8, "h8", "alice")
+
+    with storage._session() as db:
+        db.query(RecordAnchorDB).delete()
+        db.commit()
+    assert storage.get_record_anchor(7) is None
+
+    assert storage.rebuild_record_index() == 2
+    assert storage.get_record_anchor(7).data_hash == "h7"
+    assert storage.get_record_ids_by_owner("alice") == [7, 8]
+
+
+def test_record_endpoints_use_index():
+    storage = InMemoryStorage()
+    app.dependency_overrides[get_storage] = lambda: storage
+    client = TestClient(app)
+
+    resp = client.post(
+        "/blockchain/record", json={"id": 5, "data_hash": "abc", "owner": "alice"}
+    )
+    assert resp.status_code == 200
+    assert client.get("/blockchain/record/5").status_code == 404
+
+    mine_block(storage)
+
+    body = client.get("/blockchain/record/5").json()
+    assert body["id"] == 5
+    assert body["data_hash"] == "abc"
+    assert body["block_index"] == 1
+    assert body["tx_id"] == resp.json()["tx_id"]
+
+    owned = client.get("/blockchain/records-by-owner/alice").json()
+    assert owned == {"owner": "alice", "record_ids": [5]}
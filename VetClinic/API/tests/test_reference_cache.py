@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from vetclinic_api.core.database import Base, get_db
+from vetclinic_api.main import app
+from vetclinic_api.middleware.response_cache import ReferenceCache, etag_matches
+
+
+@pytest.fixture
+def db_calls():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    calls = []
+
+    def _get_db():
+        calls.append(1)
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    yield calls
+    engine.dispose()
+
+
+def test_repeat_get_is_served_from_cache_without_db(db_calls):
+    client = TestClient(app)
+    client.post("/facilities/", json={"name": "Centrum", "address": "ul. Polna 1"})
+    db_calls.clear()
+
+    first = client.get("/facilities/")
+    second = client.get("/facilities/")
+
+    assert first.headers["x-cache"] == "MISS" and second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json() and len(second.json()) == 1
+    assert second.headers["etag"] == first.headers["etag"]
+    assert len(db_calls) == 1
+
+
+def test_if_none_match_returns_304(db_calls):
+    client = TestClient(app)
+    etag = client.get("/doctors/").headers["etag"]
+
+    resp = client.get("/doctors/", headers={"If-None-Match": f'W/{etag}, "other"'})
+
+    assert resp.status_code == 304
+    assert resp.content == b"" and resp.headers["etag"] == etag
+
+
+def test_write_invalidates_namespace(db_calls):
+    client = TestClient(app)
+    created = client.post("/facilities/", json={"name": "A", "address": "ul. A 1"}).json()
+    before = client.get(f"/facilities/{created['id']}")
+    client.get("/consultants/")
+
+    client.put(f"/facilities/{created['id']}", json={"name": "B"})
+    after = client.get(f"/facilities/{created['id']}", headers={"If-None-Match": before.headers["etag"]})
+
+    assert after.status_code == 200 and after.headers["x-cache"] == "MISS"
+    assert after.json()["name"] == "B"
+    # Inne przestrzenie nie są unieważniane.
+    assert client.get("/consultants/").headers["x-cache"] == "HIT"
+
+
+def test_errors_are_not_cached(db_calls):
+    client = TestClient(app)
+    assert client.get("/facilities/999").status_code == 404
+    resp = client.get("/facilities/999")
+    assert resp.status_code == 404 and "x-cache" not in resp.headers
+
+
+def test_shared_generation_invalidates_other_workers(tmp_path):
+    worker_a = ReferenceCache(shared_dir=str(tmp_path))
+    worker_b = ReferenceCache(shared_dir=str(tmp_path))
+    worker_b.put("/doctors", "/doctors/?", b"[]", [], worker_b.generation("/doctors"))
+    assert worker_b.get("/doctors", "/doctors/?") is not None
+
+    worker_a.invalidate("/doctors")
+
+    assert worker_b.get("/doctors", "/doctors/?") is None
+
+
+def test_ttl_and_lru_bounds():
+    cache = ReferenceCache(ttl_s=10, max_entries=2, shared_dir="")
+    for key in ("a", "b", "c"):
+        cache.put("/facilities", key, key.encode(), [], cache.generation("/facilities"))
+    assert cache.get("/facilities", "a") is None
+    entry = cache.get("/facilities", "c")
+    assert entry.body == b"c"
+
+    entry.stored_at -= 11
+    assert cache.get("/facilities", "c") is None
+
+
+def test_etag_matching():
+    assert etag_matches("*", '"x"')
+    assert etag_matches('"y", W/"x"', '"x"')
+    assert not etag_matches('"y"', '"x"')
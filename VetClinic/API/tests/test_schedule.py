@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from vetclinic_api.core.database import Base, get_db
+from vetclinic_api.main import app
+from vetclinic_api.models.appointments import Appointment
+from vetclinic_api.models.users import Doctor
+from vetclinic_api.services.schedule_service import ScheduleGrid
+
+MONDAY = date(2025, 6, 2)
+GRID = ScheduleGrid(day_start=time(8), day_end=time(19), slot_minutes=15, closed_weekdays=frozenset({6}))
+
+
+def _at(day: date, hh: int, mm: int = 0) -> datetime:
+    return datetime.combine(day, time(hh, mm))
+
+
+def test_busy_mask_covers_duration_and_unaligned_visits():
+    assert GRID.slots_per_day == 44
+    # 30 min od 08:00 -> sloty 0 i 1; 09:10 (15 min) nachodzi na 09:00 i 09:15
+    mask = GRID.busy_mask([_at(MONDAY, 8), _at(MONDAY, 9, 10)], duration_min=30)
+    assert mask == 0b11 | (0b111 << 4)
+    # Poza godzinami pracy – bez wpływu.
+    assert GRID.busy_mask([_at(MONDAY, 7), _at(MONDAY, 19, 30)], duration_min=15) == 0
+
+
+def test_free_labels_are_sorted_and_skip_busy():
+    busy = GRID.busy_mask([_at(MONDAY, 8, 15)], duration_min=15)
+    labels = GRID.free_labels(GRID.free_mask(MONDAY, busy))
+    assert labels[:2] == ["08:00", "08:30"] and labels[-1] == "18:45"
+    assert GRID.free_labels(GRID.free_mask(date(2025, 6, 8), 0)) == []  # niedziela
+
+
+@pytest.fixture
+def schedule_db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        for doctor_id, facility_id in ((1, 1), (2, 1), (3, 2)):
+            db.add(
+                Doctor(
+                    id=doctor_id,
+                    first_name="Doc",
+                    last_name=str(doctor_id),
+                    email=f"d{doctor_id}@lekarz.vetclinic.com",
+                    backup_email="b@example.com",
+                    password_hash="x",
+                    specialization="ogólna",
+                    permit_number=f"{doctor_id:07d}",
+                    facility_id=facility_id,
+                )
+            )
+        for doctor_id, visit in ((1, _at(MONDAY, 8)), (1, _at(date(2025, 6, 4), 10, 30)), (2, _at(MONDAY, 9))):
+            db.add(Appointment(doctor_id=doctor_id, animal_id=1, owner_id=1, facility_id=1, visit_datetime=visit))
+        db.commit()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def _get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    yield statements
+    engine.dispose()
+
+
+def test_availability_for_week_in_one_query(schedule_db):
+    client = TestClient(app)
+    resp = client.get("/appointments/availability", params={"doctor_ids": "1,2", "from": "2025-06-02"})
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["from"] == "2025-06-02" and body["to"] == "2025-06-08"
+    assert body["slot_minutes"] == 15
+    days = {d["doctor_id"]: d["days"] for d in body["doctors"]}
+    assert "08:00" not in days[1]["2025-06-02"] and "09:00" in days[1]["2025-06-02"]
+    assert "10:30" not in days[1]["2025-06-04"]
+    assert "09:00" not in days[2]["2025-06-02"] and len(days[2]["2025-06-03"]) == 44
+    assert days[1]["2025-06-08"] == []
+    assert len([s for s in schedule_db if "FROM appointments" in s]) == 1
+
+
+def test_availability_defaults_to_facility_doctors(schedule_db):
+    client = TestClient(app)
+    resp = client.get(
+        "/appointments/availability",
+        params={"facility_id": 2, "from": "2025-06-02", "to": "2025-06-03"},
+    )
+    assert [d["doctor_id"] for d in resp.json()["doctors"]] == [3]
+
+    repeated = client.get("/appointments/availability?doctor_ids=2&doctor_ids=1&from=2025-06-02&to=2025-06-02")
+    assert [d["doctor_id"] for d in repeated.json()["doctors"]] == [1, 2]
+
+
+def test_availability_rejects_bad_ranges(schedule_db):
+    client = TestClient(app)
+    assert client.get("/appointments/availability?from=2025-06-05&to=2025-06-01").status_code == 400
+    assert client.get("/appointments/availability?from=2025-01-01&to=2025-06-01").status_code == 400
+    assert client.get("/appointments/availability?doctor_ids=x&from=2025-06-02").status_code == 422
+
+
+def test_free_slots_uses_schedule_engine(schedule_db):
+    client = TestClient(app)
+    resp = client.get("/appointments/free_slots/", params={"doctor_id": 1, "date": "2025-06-02"})
+    assert resp.status_code == 200
+    assert resp.json()[0] == "08:15" and len(resp.json()) == 43
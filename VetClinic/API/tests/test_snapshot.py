@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from vetclinic_api.blockchain.core import (
+    InMemoryStorage,
+    SQLAlchemyStorage,
+    build_block_proposal,
+    mine_block,
+)
+from vetclinic_api.blockchain.deps import get_storage
+from vetclinic_api.blockchain.snapshot import (
+    build_snapshot,
+    restore_snapshot,
+    verify_snapshot,
+)
+from vetclinic_api.main import app
+from vetclinic_api.routers.blockchain_records import BlockchainRecord, _build_record_tx
+
+
+def _leader_with_records(count: int) -> InMemoryStorage:
+    storage = InMemoryStorage()
+    for i in range(count):
+        record = BlockchainRecord(id=i + 1, data_hash=f"h{i}", owner="alice")
+        storage.add_transaction(_build_record_tx(record))
+        mine_block(storage)
+    return storage
+
+
+def test_snapshot_roundtrip_restores_tip_and_index():
+    leader = _leader_with_records(3)
+    snapshot = build_snapshot(leader, node_id=1)
+    verify_snapshot(snapshot)
+    assert snapshot.height == 3
+    assert snapshot.verified_up_to == 3
+
+    node = InMemoryStorage()
+    restore_snapshot(node, snapshot)
+
+    assert node.get_tip().hash == leader.get_tip().hash
+    assert [b.index for b in node.get_blocks(0)] == [3]
+    assert node.get_record_ids_by_owner("alice") == [1, 2, 3]
+    assert node.get_record_anchor(2).data_hash == "h1"
+
+    record = BlockchainRecord(id=9, data_hash="h9", owner="bob")
+    leader.add_transaction(_build_record_tx(record))
+    proposal = build_block_proposal(leader)
+    node.add_block(proposal.block)
+    assert node.get_tip().index == 4
+    assert node.get_record_ids_by_owner("bob") == [9]
+
+
+def test_in_memory_restore_requires_fresh_node():
+    node = InMemoryStorage()
+    restore_snapshot(node, build_snapshot(_leader_with_records(3), node_id=1))
+    assert [b.index for b in node.get_blocks(0)] == [3]
+
+    # Łańcuch [tip] ma długość 1, ale to już nie jest świeży węzeł.
+    older = build_snapshot(_leader_with_records(2), node_id=1)
+    with pytest.raises(ValueError, match="fresh node"):
+        restore_snapshot(node, older)
+    assert node.get_tip().index == 3
+
+
+def test_tampered_snapshot_is_rejected():
+    snapshot = build_snapshot(_leader_with_records(1), node_id=1)
+    snapshot.verified_up_to = 0
+    with pytest.raises(ValueError, match="signature"):
+        verify_snapshot(snapshot)
+
+
+def test_sqlalchemy_restore_requires_fresh_node(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'node.db'}", connect_args={"check_same_thread": False}
+    )
+    node = SQLAlchemyStorage(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    snapshot = build_snapshot(_leader_with_records(2), node_id=1)
+
+    restore_snapshot(node, snapshot)
+    assert node.get_tip().index == 2
+    assert node.get_record_ids_by_owner("alice") == [1, 2]
+
+    with pytest.raises(ValueError, match="fresh node"):
+        restore_snapshot(node, snapshot)
+
+
+def test_snapshot_endpoints():
+    leader = _leader_with_records(2)
+    app.dependency_overrides[get_storage] = lambda: leader
+    client = TestClient(app)
+    resp = client.get("/admin/snapshot")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["height"] == 2
+
+    fresh = InMemoryStorage()
+    app.dependency_overrides[get_storage] = lambda: fresh
+    restored = client.post("/admin/snapshot/restore", json=body)
+    assert restored.status_code == 200
+    assert restored.json()["height"] == 2
+    assert fresh.get_tip().hash == leader.get_tip().hash
+
+    body["height"] = 5
+    assert client.post("/admin/snapshot/restore", json=body).status_code == 400
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect
+
+import vetclinic_api.core.database as database
+from vetclinic_api import tracing
+from vetclinic_api.core.lazy import lazy_import
+from vetclinic_api.main import app
+
+API_PATH = Path(__file__).resolve().parent.parent
+
+
+def _subprocess_env(**overrides: str) -> dict:
+    """
+    Środowisko bieżącego procesu (SYSTEMROOT na Windows, konfiguracja site)
+    z naszym PYTHONPATH; zmienne zmieniające zachowanie importu usuwamy.
+    """
+    env = {**os.environ, "PYTHONPATH": str(API_PATH)}
+    for name in ("TRACING_EXPORTER", "TRACING_FILE"):
+        env.pop(name, None)
+    env.update(overrides)
+    return env
+
+
+def test_importing_app_skips_optional_integrations(tmp_path):
+    code = (
+        "import json, sys, vetclinic_api.main; "
+        "print(json.dumps(sorted(m for m in ('stripe', 'requests', 'qrcode', 'pyotp', 'passlib') "
+        "if m in sys.modules)))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        env=_subprocess_env(),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert json.loads(proc.stdout.strip().splitlines()[-1]) == []
+    # Log PayU nie powstaje przy samym imporcie.
+    assert not (tmp_path / "payu_service.log").exists()
+
+
+def test_tracing_starts_in_lifespan_not_on_import(tmp_path, monkeypatch):
+    pytest.importorskip("opentelemetry.sdk")
+    traces = tmp_path / "traces.jsonl"
+    proc = subprocess.run(
+        [sys.executable, "-c", "import vetclinic_api.tracing as t; print(t.enabled())"],
+        cwd=tmp_path,
+        env=_subprocess_env(TRACING_EXPORTER="file", TRACING_FILE=str(traces)),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip() == "False" and not traces.exists()
+
+    monkeypatch.setattr(tracing, "TRACING_EXPORTER", "file")
+    monkeypatch.setattr(tracing, "TRACING_FILE", str(traces))
+    with TestClient(app):
+        assert tracing.enabled() and traces.exists()
+    assert not tracing.enabled()
+
+
+def test_lazy_module_loads_on_first_access_and_forwards_setattr(monkeypatch):
+    mod = lazy_import("colorsys")
+    assert "not loaded" in repr(mod)
+    assert mod.rgb_to_hsv(1.0, 0.0, 0.0)[0] == 0.0
+
+    monkeypatch.setattr(mod, "ONE_THIRD", 0.5)
+    import colorsys
+
+    assert colorsys.ONE_THIRD == 0.5
+
+
+def test_init_db_creates_schema_once_per_engine(monkeypatch):
+    engine = create_engine("sqlite://")
+    calls = []
+    create_all = database.Base.metadata.create_all
+    monkeypatch.setattr(
+        database.Base.metadata,
+        "create_all",
+        lambda bind: (calls.append(bind), create_all(bind=bind)),
+    )
+
+    database.init_db(engine)
+    database.init_db(engine)
+
+    assert calls == [engine]
+    assert "blocks" in inspect(engine).get_table_names()
@@ -1,30 +1,107 @@
 from __future__ import annotations
 
-import types
+import asyncio
 
-import requests
+import httpx
+import pytest
 
 import trafficgen.trafficgen as tg
+from trafficgen.trafficgen import Histogram, LoadGenerator, parse_mix
 
 
-def test_get_state_returns_fallback_on_error(monkeypatch):
-    def raise_exc(*_args, **_kwargs):
-        raise requests.RequestException("boom")
+def test_histogram_percentiles_and_closed_loop_correction():
+    hist = Histogram()
+    for ms in range(1, 101):
+        hist.record(ms / 1000.0)
+    assert hist.percentile(50) == pytest.approx(50, rel=0.02)
+    assert hist.percentile(99) == pytest.approx(99, rel=0.02)
+    assert hist.summary()["max_ms"] == pytest.approx(100)
 
-    monkeypatch.setattr(tg.SESSION, "get", raise_exc)
-    state = tg.get_state()
-    assert state["traffic_enabled"] is True
-    assert state["traffic_rps"] == 0.5
+    corrected = Histogram()
+    corrected.record_corrected(1.0, 0.1)
+    # Jedna odpowiedź po 1 s przy oczekiwanym co 100 ms = 9 "niewysłanych" próbek.
+    assert corrected.total == 10
+    assert "Total count" in corrected.hgrm()
 
 
-def test_submit_tx_handles_errors(monkeypatch):
-    called = {"count": 0}
+def test_parse_mix_rejects_unknown_endpoint():
+    assert parse_mix("status=3,submit=1") == {"status": 3.0, "submit": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("status=1,nope=2")
 
-    def raise_exc(*_args, **_kwargs):
-        called["count"] += 1
-        raise requests.RequestException("boom")
 
-    monkeypatch.setattr(tg.SESSION, "post", raise_exc)
-    # Should not raise despite the request failing.
-    tg.submit_tx()
-    assert called["count"] == 1
+def test_open_loop_latency_includes_queueing_delay():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, json={})
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            gen = LoadGenerator(
+                client, {"status": 1}, mode="open", rps=200, max_inflight=1, follow_sim=False
+            )
+            return await gen.run(duration=0.3)
+
+    report = asyncio.run(_run())
+    status = report["endpoints"]["status"]
+    assert status["statuses"] == {"2xx": status["count"]}
+    assert report["backlogged"] > 0
+    # Serwer obsługuje ~50 rps przy zadanych 200 – kolejka rośnie i musi to być widać.
+    assert status["p99_ms"] > 100
+
+
+def test_generator_honours_traffic_disabled_in_sim():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/admin/network/sim":
+            return httpx.Response(200, json={"traffic_enabled": False, "traffic_rps": 50})
+        calls.append(request.url.path)
+        return httpx.Response(200, json={})
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            gen = LoadGenerator(client, {"status": 1}, mode="closed", users=2, rps=50)
+            assert gen.load.enabled is True
+            report = await gen.run(duration=0.3)
+            assert gen.load.enabled is False
+            return report
+
+    report = asyncio.run(_run())
+    assert calls == []
+    assert report["endpoints"]["status"]["count"] == 0
+    assert report["target_rps"] == 50
+
+
+def test_request_errors_are_counted_not_raised():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("boom", request=request)
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            gen = LoadGenerator(client, {"submit": 1}, mode="open", rps=100, follow_sim=False)
+            return await gen.run(duration=0.1)
+
+    report = asyncio.run(_run())
+    submit = report["endpoints"]["submit"]
+    assert submit["errors"] == {"ConnectError": submit["count"]}
+    assert submit["count"] > 0
+
+
+def test_poll_sim_keeps_last_state_on_error(monkeypatch):
+    monkeypatch.setattr(tg, "SIM_POLL_S", 0.01)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("boom", request=request)
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            gen = LoadGenerator(client, {"status": 1}, rps=0.5)
+            task = asyncio.create_task(gen.poll_sim())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            return gen.load
+
+    load = asyncio.run(_run())
+    assert load.enabled is True
+    assert load.rps == 0.5
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from decimal import Decimal
+
+import httpx
+from fastapi.testclient import TestClient
+
+from vetclinic_api.blockchain.core import InMemoryStorage, TxPayload, mine_block
+from vetclinic_api.blockchain.deps import get_storage
+from vetclinic_api.cluster.config import CONFIG
+from vetclinic_api.cluster.forwarder import ForwardBatch, ForwardedTx, TxForwarder, get_forwarder
+from vetclinic_api.main import app
+
+
+def _forwarded(i: int) -> ForwardedTx:
+    return ForwardedTx.create(
+        TxPayload(sender=f"alice{i}", recipient="bob", amount=Decimal("1.5"))
+    )
+
+
+def _as_follower(monkeypatch) -> None:
+    monkeypatch.setattr(CONFIG, "leader_id", CONFIG.node_id + 1)
+    monkeypatch.setattr(CONFIG, "leader_url", "http://leader:8000")
+
+
+def test_follower_queues_submit_and_applies_backpressure(monkeypatch):
+    _as_follower(monkeypatch)
+    monkeypatch.setattr(get_forwarder(), "queue_max", 2)
+    client = TestClient(app)
+
+    tx = {"sender": "alice", "recipient": "bob", "amount": 3}
+    first = client.post("/tx/submit", json=tx)
+    assert first.status_code == 202
+    assert first.json()["status"] == "queued"
+    assert len(first.json()["tx_id"]) == 64
+
+    assert client.post("/tx/submit", json=tx).status_code == 202
+    full = client.post("/tx/submit", json=tx)
+    assert full.status_code == 429
+    assert full.headers["retry-after"] == "1"
+    assert get_forwarder().depth == 2
+
+
+def test_forwarder_sends_batches_and_requeues_on_leader_error():
+    posted = []
+    healthy = {"value": False}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if not healthy["value"]:
+            return httpx.Response(503, json={"detail": "Not a leader"})
+        posted.append(json.loads(request.content)["transactions"])
+        return httpx.Response(200, json={"accepted": [], "duplicates": 0, "rejected": []})
+
+    forwarder = TxForwarder(leader_url_provider=lambda: "http://leader:8000", batch_max=2)
+    for i in range(3):
+        assert forwarder.enqueue(_forwarded(i))
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            assert await forwarder.drain(client) is False
+            assert forwarder.depth == 3
+            healthy["value"] = True
+            return await forwarder.drain(client)
+
+    assert asyncio.run(_run()) is True
+    assert [len(batch) for batch in posted] == [2, 1]
+    assert posted[0][0]["payload"]["sender"] == "alice0"
+    assert forwarder.forwarded == 3
+
+
+def test_leader_accepts_batch_with_follower_ids_and_skips_duplicates():
+    storage = InMemoryStorage()
+    app.dependency_overrides[get_storage] = lambda: storage
+    client = TestClient(app)
+
+    txs = [_forwarded(i) for i in range(2)]
+    body = ForwardBatch(transactions=txs).model_dump(mode="json")
+    resp = client.post("/tx/submit_batch", json=body)
+    assert resp.status_code == 200
+    assert resp.json()["accepted"] == [t.id for t in txs]
+    assert {t.id for t in storage.get_mempool()} == {t.id for t in txs}
+
+    retry = client.post("/tx/submit_batch", json=body).json()
+    assert retry["accepted"] == []
+    assert retry["duplicates"] == 2
+    assert storage.get_mempool_size() == 2
+
+    body["transactions"][0]["id"] = "0" * 64
+    tampered = client.post("/tx/submit_batch", json=body).json()
+    assert tampered["rejected"] == [{"id": "0" * 64, "reason": "id_mismatch"}]
+
+
+def test_leader_reports_committed_batch_retry_as_duplicates():
+    storage = InMemoryStorage()
+    app.dependency_overrides[get_storage] = lambda: storage
+    client = TestClient(app)
+
+    body = ForwardBatch(transactions=[_forwarded(i) for i in range(2)]).model_dump(mode="json")
+    assert len(client.post("/tx/submit_batch", json=body).json()["accepted"]) == 2
+    block = mine_block(storage)
+    assert len(block.transactions) == 2
+
+    retry = client.post("/tx/submit_batch", json=body).json()
+    assert retry == {"accepted": [], "duplicates": 2, "rejected": []}
+    assert storage.get_mempool_size() == 0
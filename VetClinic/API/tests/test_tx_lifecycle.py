@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from vetclinic_api import tracing
+from vetclinic_api.blockchain.lifecycle import TxLifecycle
+from vetclinic_api.cluster.harness import InProcessCluster
+from vetclinic_api.main import app
+
+
+def test_lifecycle_keeps_first_event_and_evicts_oldest():
+    lifecycle = TxLifecycle(max_entries=2)
+    lifecycle.mark("a", "submitted", at=10.0)
+    lifecycle.mark("a", "submitted", at=11.0)
+    lifecycle.mark("a", "committed", block_index=3, at=12.5)
+    assert lifecycle.get("a") == {
+        "events": {"submitted": 10.0, "committed": 12.5},
+        "block_index": 3,
+    }
+    lifecycle.mark("b", "submitted")
+    lifecycle.mark("c", "submitted")
+    assert lifecycle.get("a") is None
+    assert len(lifecycle) == 2
+
+
+def test_unknown_transaction_status_is_404():
+    client = TestClient(app)
+    assert client.get("/tx/deadbeef/status").status_code == 404
+
+
+async def _follower_submit_and_commit(cluster: InProcessCluster) -> tuple:
+    await cluster.start()
+    async with cluster.client() as client:
+        resp = await client.post(
+            "http://node2:8000/tx/submit",
+            json={"sender": "alice", "recipient": "bob", "amount": 3},
+        )
+        tx_id = resp.json()["tx_id"]
+        for _ in range(200):
+            if cluster[1].storage.get_mempool_size():
+                break
+            await asyncio.sleep(0.01)
+        pending = (await client.get(f"http://node1:8000/tx/{tx_id}/status")).json()
+        mined = await client.post("http://node1:8000/chain/mine_distributed")
+        assert mined.json()["status"] == "committed"
+        status = await client.get(f"http://node2:8000/tx/{tx_id}/status?cluster=true")
+    await cluster.stop()
+    return pending, status.json()
+
+
+def test_follower_transaction_is_traced_to_commit_on_every_node():
+    cluster = InProcessCluster(size=3)
+    pending, status = asyncio.run(_follower_submit_and_commit(cluster))
+
+    assert pending["state"] == "pending"
+    assert status["committed_on"] == ["2", "1", "3"]
+    follower = status["nodes"]["2"]
+    # Lider rozsyła paczkę (received) zanim odpowie followerowi (forwarded).
+    assert set(follower["events"]) == {"submitted", "forwarded", "received", "proposed", "committed"}
+    assert list(follower["events"])[0] == "submitted"
+    assert follower["block_index"] == 1
+    leader = status["nodes"]["1"]
+    assert list(leader["events"]) == ["submitted", "gossiped", "proposed", "committed"]
+    assert leader["durations_s"]["committed"] >= leader["durations_s"]["proposed"] >= 0
+
+
+def test_spans_propagate_across_peer_rpcs(tmp_path):
+    pytest.importorskip("opentelemetry.sdk")
+    path = tmp_path / "traces.jsonl"
+    assert tracing.setup_tracing("file", str(path))
+    try:
+        cluster = InProcessCluster(size=3)
+        asyncio.run(_follower_submit_and_commit(cluster))
+    finally:
+        tracing.shutdown_tracing()
+
+    spans = [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+    rounds = [s for s in spans if s["name"] == "consensus.round"]
+    assert len(rounds) == 1
+    trace_id = rounds[0]["context"]["trace_id"]
+    # propose/commit na followerach to dzieci rundy lidera (nagłówek traceparent).
+    remote = [
+        s for s in spans
+        if s["name"] in ("POST /rpc/propose_block", "POST /rpc/commit_block")
+        and s["context"]["trace_id"] == trace_id
+    ]
+    assert len(remote) == 4
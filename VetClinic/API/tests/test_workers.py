@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+
+import httpx
+import pytest
+from starlette.responses import JSONResponse
+
+from vetclinic_api.admin.network_state import (
+    get_state,
+    load_state_file,
+    save_state_file,
+    update_state,
+)
+from vetclinic_api.cluster import workers
+from vetclinic_api.cluster.workers import WorkerRole
+from vetclinic_api.main import app
+from vetclinic_api.middleware.owner_proxy import OwnerProxyMiddleware
+
+# Tryb wielu workerów (flock + gniazdo unix właściciela) jest tylko na POSIX.
+posix_only = pytest.mark.skipif(
+    sys.platform == "win32" or workers.fcntl is None,
+    reason="UVICORN_WORKERS > 1 wymaga fcntl i gniazd unix (POSIX)",
+)
+
+
+def _roles(tmp_path, count: int = 2):
+    return [
+        WorkerRole(
+            workers=3,
+            lock_file=str(tmp_path / "owner.lock"),
+            socket_path=str(tmp_path / "owner.sock"),
+            state_file=str(tmp_path / "netsim.json"),
+            poll_s=0.0,
+        )
+        for _ in range(count)
+    ]
+
+
+def test_single_worker_is_always_owner_and_never_forwards():
+    role = WorkerRole(workers=1)
+    assert role.acquire() is True
+    assert role.is_owner and not role.forwards("/rpc/node-info")
+
+
+@posix_only
+def test_exactly_one_worker_becomes_owner(tmp_path):
+    first, second = _roles(tmp_path)
+    assert first.acquire() is True
+    assert second.acquire() is False
+    assert second.forwards("/chain/status") and second.forwards("/admin/faults")
+    assert not second.forwards("/animals/1") and not second.forwards("/metrics")
+
+    # Po śmierci właściciela blokadę przejmuje kolejny worker.
+    first.release()
+    assert second.acquire() is True
+
+
+def test_state_file_roundtrip(tmp_path):
+    path = str(tmp_path / "netsim.json")
+    update_state(chaos_enabled=True, slow_ms=25)
+    save_state_file(path)
+    update_state(chaos_enabled=False, slow_ms=0)
+
+    mtime = load_state_file(path)
+    assert mtime is not None
+    assert get_state().chaos_enabled is True and get_state().slow_ms == 25
+    # Bez zmiany pliku – brak ponownego odczytu.
+    update_state(slow_ms=1)
+    assert load_state_file(path, mtime) == mtime
+    assert get_state().slow_ms == 1
+
+
+@posix_only
+def test_non_owner_forwards_cluster_paths_to_owner_socket(tmp_path):
+    owner, worker = _roles(tmp_path)
+
+    async def local_app(scope, receive, send):
+        await JSONResponse({"served_by": "worker"})(scope, receive, send)
+
+    proxied = OwnerProxyMiddleware(local_app, role=worker)
+
+    async def _run():
+        assert owner.acquire() and not worker.acquire()
+        await owner.start(app)
+        try:
+            for _ in range(200):
+                if owner._server.started:
+                    break
+                await asyncio.sleep(0.01)
+            transport = httpx.ASGITransport(app=proxied)
+            async with httpx.AsyncClient(transport=transport, base_url="http://node") as client:
+                info = await client.get("/rpc/node-info", headers={"X-Node-Id": "2"})
+                faults = await client.put("/admin/faults", json={"slow_ms": 7})
+                local = await client.get("/animals/")
+            return info, faults, local
+        finally:
+            await owner.stop()
+            await proxied._owner_client().aclose()
+
+    info, faults, local = asyncio.run(_run())
+    assert info.status_code == 200 and "height" in info.json()
+    assert faults.json()["slow_ms"] == 7
+    assert local.json() == {"served_by": "worker"}
+    # Właściciel opublikował zmianę stanu dla pozostałych workerów.
+    update_state(slow_ms=0)
+    load_state_file(worker.state_file)
+    assert get_state().slow_ms == 7
+
+
+def test_forwarding_without_owner_returns_503(tmp_path):
+    _, worker = _roles(tmp_path)
+    worker.is_owner = False
+
+    async def local_app(scope, receive, send):
+        raise AssertionError("cluster path must not be served locally")
+
+    proxied = OwnerProxyMiddleware(local_app, role=worker)
+
+    async def _run():
+        transport = httpx.ASGITransport(app=proxied)
+        async with httpx.AsyncClient(transport=transport, base_url="http://node") as client:
+            return await client.post("/tx/submit", json={})
+
+    resp = asyncio.run(_run())
+    assert resp.status_code == 503
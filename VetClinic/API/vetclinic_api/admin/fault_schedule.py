@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import random
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from vetclinic_api.cluster.config import CONFIG
+from vetclinic_api.cluster.context import node_scoped
+
+FAULT_RECORDING_MAX = 50_000
+
+ACTION_PASS = "pass"
+ACTION_OFFLINE = "offline"
+ACTION_PARTITION = "partition"
+ACTION_DROP = "drop"
+
+
+class LatencySpec(BaseModel):
+    """
+    Rozkład opóźnienia wstrzykiwanego w oknie harmonogramu (ms).
+    """
+
+    dist: Literal["fixed", "uniform", "normal", "exponential"] = "fixed"
+    ms: float = Field(default=0.0, ge=0.0)  # stała / średnia / dolna granica
+    ms_max: float = Field(default=0.0, ge=0.0)  # górna granica dla "uniform"
+    stddev_ms: float = Field(default=0.0, ge=0.0)  # dla "normal"
+
+    def sample(self, rng: random.Random) -> float:
+        if self.dist == "uniform":
+            lo, hi = sorted((self.ms, self.ms_max))
+            return rng.uniform(lo, hi)
+        if self.dist == "normal":
+            return max(0.0, rng.gauss(self.ms, self.stddev_ms))
+        if self.dist == "exponential":
+            return rng.expovariate(1.0 / self.ms) if self.ms > 0 else 0.0
+        return self.ms
+
+
+class FaultWindow(BaseModel):
+    """
+    Okno [start, end) zegara logicznego endpointu z regułami awarii.
+    `nodes` / `endpoints` = None oznacza wszystkie węzły / endpointy RPC.
+    `partition` to grupy węzłów; RPC między różnymi grupami jest odrzucane.
+    """
+
+    start: int = Field(default=0, ge=0)
+    end: Optional[int] = Field(default=None, ge=0)
+    nodes: Optional[List[int]] = None
+    endpoints: Optional[List[str]] = None
+    offline: bool = False
+    drop_prob: float = Field(default=0.0, ge=0.0, le=1.0)
+    latency: Optional[LatencySpec] = None
+    partition: Optional[List[List[int]]] = None
+
+    def active(self, tick: int, node_id: int, endpoint: str) -> bool:
+        if tick < self.start or (self.end is not None and tick >= self.end):
+            return False
+        if self.nodes is not None and node_id not in self.nodes:
+            return False
+        return self.endpoints is None or endpoint in self.endpoints
+
+    def separates(self, a: int, b: int) -> bool:
+        if not self.partition:
+            return False
+        group_a = next((g for g in self.partition if a in g), None)
+        group_b = next((g for g in self.partition if b in g), None)
+        return group_a is not group_b
+
+
+class FaultEvent(BaseModel):
+    """
+    Jedna decyzja harmonogramu – wpis nagrania i jednostka odtwarzania.
+    """
+
+    tick: int
+    endpoint: str
+    index: int
+    caller: Optional[int] = None
+    action: str = ACTION_PASS
+    delay_ms: float = 0.0
+
+
+class FaultSchedule(BaseModel):
+    seed: int = 0
+    windows: List[FaultWindow] = Field(default_factory=list)
+    record: bool = True
+    replay: Optional[List[FaultEvent]] = None
+
+
+class FaultTimeline:
+    """
+    Deterministyczny harmonogram awarii RPC tego węzła.
+
+    Zegarem logicznym okien jest licznik wywołań danego endpointu na tym
+    węźle (apply_rpc_faults), a nie czas ścienny ani wspólny licznik RPC.
+    Decyzja dla n-tego wywołania endpointu zależy więc tylko od
+    (seed, węzeł, endpoint, n) – także losowanie ma takie ziarno – i nie
+    zmienia się przy innym przeplocie współbieżnych żądań do różnych
+    endpointów. `tick` liczy wszystkie wywołania (status, nagranie).
+    Decyzje można nagrać i odtworzyć 1:1 (`replay`), także na innej
+    wersji kodu.
+    """
+
+    def __init__(self, node_id_provider=lambda: CONFIG.node_id) -> None:
+        self._node_id_provider = node_id_provider
+        self._lock = threading.Lock()
+        self.schedule: Optional[FaultSchedule] = None
+        self.tick = 0
+        self._indexes: Dict[str, int] = {}
+        self._replay: Dict[tuple, FaultEvent] = {}
+        self._recording: Deque[FaultEvent] = deque(maxlen=FAULT_RECORDING_MAX)
+
+    @property
+    def loaded(self) -> bool:
+        return self.schedule is not None
+
+    def load(self, schedule: FaultSchedule) -> None:
+        with self._lock:
+            self.schedule = schedule
+            self.tick = 0
+            self._indexes.clear()
+            self._recording.clear()
+            self._replay = {
+                (event.endpoint, event.index): event for event in schedule.replay or []
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self.schedule = None
+            self.tick = 0
+            self._indexes.clear()
+            self._replay = {}
+            self._recording.clear()
+
+    def recording(self) -> List[FaultEvent]:
+        with self._lock:
+            return list(self._recording)
+
+    def _rng(self, node_id: int, endpoint: str, index: int) -> random.Random:
+        return random.Random(f"{self.schedule.seed}:{node_id}:{endpoint}:{index}")
+
+    def _evaluate(
+        self, tick: int, node_id: int, endpoint: str, index: int, caller: Optional[int]
+    ) -> FaultEvent:
+        event = FaultEvent(tick=tick, endpoint=endpoint, index=index, caller=caller)
+        windows = [w for w in self.schedule.windows if w.active(index, node_id, endpoint)]
+        if not windows:
+            return event
+        rng = self._rng(node_id, endpoint, index)
+        for window in windows:
+            if window.offline:
+                event.action = ACTION_OFFLINE
+                return event
+            if caller is not None and window.separates(caller, node_id):
+                event.action = ACTION_PARTITION
+                return event
+        for window in windows:
+            if window.latency is not None:
+                event.delay_ms += round(window.latency.sample(rng), 3)
+        for window in windows:
+            if window.drop_prob > 0 and rng.random() < window.drop_prob:
+                event.action = ACTION_DROP
+                break
+        return event
+
+    def decide(self, endpoint: str, caller: Optional[int] = None) -> Optional[FaultEvent]:
+        """
+        Decyzja dla kolejnego wywołania endpointu; None bez harmonogramu.
+        Przesuwa zegar endpointu i licznik `tick` o jeden krok.
+        """
+        with self._lock:
+            schedule = self.schedule
+            if schedule is None:
+                return None
+            tick = self.tick
+            self.tick += 1
+            index = self._indexes.get(endpoint, 0)
+            self._indexes[endpoint] = index + 1
+            replayed = self._replay.get((endpoint, index))
+            if replayed is not None:
+                event = replayed.model_copy()
+            elif self._replay:
+                # Poza nagraniem nie dokładamy nowych awarii.
+                event = FaultEvent(tick=tick, endpoint=endpoint, index=index, caller=caller)
+            else:
+                event = self._evaluate(
+                    tick, self._node_id_provider(), endpoint, index, caller
+                )
+            if schedule.record:
+                self._recording.append(event)
+            return event
+
+    def status_payload(self) -> dict:
+        with self._lock:
+            schedule = self.schedule
+            return {
+                "loaded": schedule is not None,
+                "seed": schedule.seed if schedule else None,
+                "tick": self.tick,
+                "windows": [w.model_dump() for w in schedule.windows] if schedule else [],
+                "replaying": bool(self._replay),
+                "recorded": len(self._recording),
+            }
+
+
+TIMELINE = FaultTimeline()
+
+
+def get_timeline() -> FaultTimeline:
+    return node_scoped("timeline", TIMELINE)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import random
+import threading
+from dataclasses import dataclass
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from vetclinic_api.admin.fault_schedule import LatencySpec
+from vetclinic_api.cluster.context import node_scoped
+
+
+class LinkRule(BaseModel):
+    """
+    Reguła dla kierunku src -> dst (None = dowolny węzeł).
+    Kierunek jest istotny: A->B nie zmienia B->A (łącza asymetryczne).
+    """
+
+    src: Optional[int] = None
+    dst: Optional[int] = None
+    blocked: bool = False
+    latency: Optional[LatencySpec] = None
+    bandwidth_kbps: Optional[float] = Field(default=None, gt=0.0)
+    drop_prob: float = Field(default=0.0, ge=0.0, le=1.0)
+
+    def matches(self, src: int, dst: int) -> bool:
+        return (self.src is None or self.src == src) and (self.dst is None or self.dst == dst)
+
+
+class LinkRules(BaseModel):
+    seed: int = 0
+    rules: List[LinkRule] = Field(default_factory=list)
+
+
+class PartitionRequest(BaseModel):
+    groups: List[List[int]]
+
+
+@dataclass
+class LinkEffect:
+    blocked: bool = False
+    dropped: bool = False
+    delay_s: float = 0.0
+
+
+class LinkTable:
+    """
+    Reguły łączy między węzłami. Każdy węzeł stosuje tylko reguły, w których
+    jest nadawcą: do swoich żądań (klient RPC) i do swoich odpowiedzi (/rpc),
+    więc ta sama tabela może być wgrana na wszystkie węzły.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rules: List[LinkRule] = []
+        self._rng = random.Random(0)
+        self.seed = 0
+
+    @property
+    def active(self) -> bool:
+        return bool(self._rules)
+
+    def load(self, rules: LinkRules) -> None:
+        with self._lock:
+            self._rules = list(rules.rules)
+            self.seed = rules.seed
+            self._rng.seed(rules.seed)
+
+    def clear(self) -> None:
+        self.load(LinkRules())
+
+    def rules(self) -> List[LinkRule]:
+        with self._lock:
+            return list(self._rules)
+
+    def effect(self, src: Optional[int], dst: Optional[int], size_bytes: int = 0) -> Optional[LinkEffect]:
+        """
+        Skutek reguł pasujących do src -> dst; None, gdy żadna nie pasuje.
+        Opóźnienia się sumują (latencja + czas przesłania przy limicie pasma).
+        """
+        if not self._rules or src is None or dst is None:
+            return None
+        with self._lock:
+            matched = [r for r in self._rules if r.matches(src, dst)]
+            if not matched:
+                return None
+            effect = LinkEffect()
+            for rule in matched:
+                if rule.blocked:
+                    effect.blocked = True
+                    return effect
+                if rule.latency is not None:
+                    effect.delay_s += rule.latency.sample(self._rng) / 1000.0
+                if rule.bandwidth_kbps and size_bytes:
+                    effect.delay_s += size_bytes * 8 / (rule.bandwidth_kbps * 1000.0)
+                if rule.drop_prob > 0 and self._rng.random() < rule.drop_prob:
+                    effect.dropped = True
+            return effect
+
+
+def partition_rules(groups: List[List[int]]) -> List[LinkRule]:
+    """
+    Blokady w obie strony między każdą parą węzłów z różnych grup.
+    """
+    rules = []
+    for i, group in enumerate(groups):
+        for other in groups[i + 1:]:
+            for a in group:
+                for b in other:
+                    rules.append(LinkRule(src=a, dst=b, blocked=True))
+                    rules.append(LinkRule(src=b, dst=a, blocked=True))
+    return rules
+
+
+LINKS = LinkTable()
+
+
+def get_links() -> LinkTable:
+    return node_scoped("links", LINKS)
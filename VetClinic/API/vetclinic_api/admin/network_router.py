@@ -1,11 +1,18 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from fastapi import APIRouter
 from pydantic import BaseModel, Field
 
-from vetclinic_api.admin.network_state import state_payload, update_state
+from vetclinic_api.admin.fault_schedule import FaultEvent, FaultSchedule, get_timeline
+from vetclinic_api.admin.link_rules import (
+    LinkRules,
+    PartitionRequest,
+    get_links,
+    partition_rules,
+)
+from vetclinic_api.admin.network_state import get_state, state_payload, update_state
 
 router = APIRouter(prefix="/admin/network", tags=["admin-network"])
 
@@ -99,3 +106,68 @@ def set_fault_state(payload: RpcFaultsUpdate):
     if updates:
         update_state(**updates)
     return RpcFaultsPayload(**_select_payload(FAULT_FIELDS))
+
+
+@router.get("/schedule")
+def get_schedule():
+    return get_timeline().status_payload()
+
+
+@router.put("/schedule")
+def load_schedule(schedule: FaultSchedule):
+    """
+    Wgrywa harmonogram awarii (zegar logiczny od zera). Ziarno trafia też
+    do losowania dropów z /state, więc cały scenariusz jest powtarzalny.
+    """
+    get_state().reseed(schedule.seed)
+    get_timeline().load(schedule)
+    return get_timeline().status_payload()
+
+
+@router.delete("/schedule")
+def clear_schedule():
+    get_timeline().clear()
+    return get_timeline().status_payload()
+
+
+@router.get("/schedule/recording", response_model=List[FaultEvent])
+def get_schedule_recording():
+    """
+    Nagrane decyzje harmonogramu; do odtworzenia jako `replay` w PUT /schedule.
+    """
+    return get_timeline().recording()
+
+
+def _links_payload() -> LinkRules:
+    links = get_links()
+    return LinkRules(seed=links.seed, rules=links.rules())
+
+
+@router.get("/links", response_model=LinkRules)
+def get_link_rules():
+    return _links_payload()
+
+
+@router.put("/links", response_model=LinkRules)
+def set_link_rules(payload: LinkRules):
+    """
+    Zastępuje reguły łączy (src -> dst). Tę samą tabelę można wgrać na
+    wszystkie węzły – każdy egzekwuje tylko reguły, w których jest nadawcą.
+    """
+    get_links().load(payload)
+    return _links_payload()
+
+
+@router.post("/links/partition", response_model=LinkRules)
+def partition_links(payload: PartitionRequest):
+    """
+    Skrót: pełny podział sieci na podane grupy (np. split-brain 3/3).
+    """
+    get_links().load(LinkRules(seed=get_links().seed, rules=partition_rules(payload.groups)))
+    return _links_payload()
+
+
+@router.delete("/links", response_model=LinkRules)
+def clear_link_rules():
+    get_links().clear()
+    return _links_payload()
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import json
+import os
 import random
 import threading
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Callable, Dict, List, Optional
+
+from vetclinic_api.cluster.context import node_scoped
 
 
 @dataclass
@@ -53,28 +57,87 @@ class NetworkSimState:
         with self._lock:
             self._call_counters.clear()
 
+    def reseed(self, seed: int) -> None:
+        """
+        Powtarzalne losowanie dropów i liczniki flappingu od zera.
+        """
+        with self._lock:
+            self._rng.seed(seed)
+            self._call_counters.clear()
+
 
 STATE = NetworkSimState()
 
+# Wołane po każdej zmianie stanu przez update_state (np. zapis dla innych workerów).
+_listeners: List[Callable[[NetworkSimState], None]] = []
+
 
 def get_state() -> NetworkSimState:
-    return STATE
+    return node_scoped("state", STATE)
 
 
-def update_state(**kwargs) -> NetworkSimState:
-    state = STATE
+def add_state_listener(listener: Callable[[NetworkSimState], None]) -> None:
+    _listeners.append(listener)
+
+
+def remove_state_listener(listener: Callable[[NetworkSimState], None]) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def _apply(state: NetworkSimState, values: dict) -> None:
     with state._lock:
-        for key, value in kwargs.items():
+        for key, value in values.items():
             if hasattr(state, key) and not key.startswith("_"):
                 setattr(state, key, value)
+
+
+def update_state(**kwargs) -> NetworkSimState:
+    state = get_state()
+    _apply(state, kwargs)
+    for listener in list(_listeners):
+        listener(state)
     return state
 
 
 def state_payload() -> dict:
+    state = get_state()
     payload = {
         key: value
-        for key, value in STATE.__dict__.items()
+        for key, value in state.__dict__.items()
         if not key.startswith("_")
     }
-    payload["drop_rpc_probability"] = STATE.drop_rpc_probability
+    payload["drop_rpc_probability"] = state.drop_rpc_probability
     return payload
+
+
+def save_state_file(path: str) -> None:
+    """
+    Zapis stanu do pliku współdzielonego przez workery (atomowo: tmp + rename).
+    """
+    payload = state_payload()
+    payload.pop("drop_rpc_probability", None)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh)
+    os.replace(tmp, path)
+
+
+def load_state_file(path: str, last_mtime: Optional[float] = None) -> Optional[float]:
+    """
+    Wczytuje stan z pliku, jeśli zmienił się od `last_mtime`. Zwraca mtime pliku
+    (None, gdy go nie ma). Bez wołania listenerów – to odczyt cudzej zmiany.
+    """
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    if last_mtime is not None and mtime == last_mtime:
+        return mtime
+    try:
+        with open(path, encoding="utf-8") as fh:
+            values = json.load(fh)
+    except (OSError, ValueError):
+        return last_mtime
+    _apply(get_state(), values)
+    return mtime
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+MODE_CPU = "cpu"
+MODE_WALL = "wall"
+MODE_ALLOC = "alloc"
+MODES = (MODE_CPU, MODE_WALL, MODE_ALLOC)
+
+# Limity bezpieczeństwa dla profilowania na żywym węźle.
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+PROFILE_INTERVAL_MS = max(1.0, float(os.getenv("PROFILE_INTERVAL_MS", "5")))
+PROFILE_MAX_DEPTH = int(os.getenv("PROFILE_MAX_DEPTH", "64"))
+PROFILE_MAX_STACKS = int(os.getenv("PROFILE_MAX_STACKS", "5000"))
+PROFILE_ALLOC_FRAMES = int(os.getenv("PROFILE_ALLOC_FRAMES", "32"))
+
+TRUNCATED_STACK = "[truncated]"
+
+# Liście stosów, w których wątek czeka, a nie liczy (fallback bez /proc).
+_IDLE_LEAVES = frozenset(
+    {"select", "poll", "epoll", "wait", "_wait", "acquire", "sleep", "accept", "recv", "get"}
+)
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+@dataclass
+class ProfileResult:
+    mode: str
+    seconds: float
+    samples: int
+    # "ramka;ramka;ramka" -> waga (liczba próbek albo bajty dla alloc)
+    stacks: Dict[str, int] = field(default_factory=dict)
+
+    def collapsed(self) -> str:
+        """
+        Format "collapsed stacks" (flamegraph.pl, speedscope, inferno).
+        """
+        lines = [f"{stack} {weight}" for stack, weight in self.stacks.items() if weight > 0]
+        return "\n".join(sorted(lines)) + ("\n" if lines else "")
+
+    def top(self, limit: int = 20) -> List[dict]:
+        """
+        Najcięższe funkcje wg wagi "self" (liść stosu).
+        """
+        leaves: Counter = Counter()
+        for stack, weight in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += weight
+        total = sum(leaves.values()) or 1
+        return [
+            {"frame": frame, "weight": weight, "share": round(weight / total, 4)}
+            for frame, weight in leaves.most_common(limit)
+        ]
+
+    def payload(self, limit: int = 20) -> dict:
+        return {
+            "mode": self.mode,
+            "seconds": self.seconds,
+            "samples": self.samples,
+            "unit": "bytes" if self.mode == MODE_ALLOC else "samples",
+            "top": self.top(limit),
+            "collapsed": self.collapsed(),
+        }
+
+
+def _frame_label(filename: str, name: str) -> str:
+    parts = filename.replace("\\", "/").rsplit("/", 2)
+    return f"{'/'.join(parts[-2:])}:{name}"
+
+
+def _thread_running(native_id: Optional[int]) -> Optional[bool]:
+    """
+    Stan wątku z /proc (Linux): True = R (na CPU). None = brak informacji.
+    """
+    if native_id is None:
+        return None
+    try:
+        with open(f"/proc/self/task/{native_id}/stat", "rb") as fh:
+            stat = fh.read()
+    except OSError:
+        return None
+    # "pid (comm) S ..." – comm może zawierać spacje i nawiasy
+    return stat[stat.rfind(b")") + 2 : stat.rfind(b")") + 3] == b"R"
+
+
+class Profiler:
+    """
+    Próbkujący profiler w procesie węzła: co PROFILE_INTERVAL_MS zrzut
+    stosów wszystkich wątków (`sys._current_frames`), zliczany jako
+    collapsed stacks. `wall` liczy każdą próbkę, `cpu` tylko wątki na CPU,
+    `alloc` to migawka tracemalloc po N sekundach (waga = bajty).
+
+    Naraz działa jeden profil; kolejne wywołanie dostaje ProfilerBusy.
+    """
+
+    def __init__(
+        self,
+        interval_s: float = PROFILE_INTERVAL_MS / 1000.0,
+        max_depth: int = PROFILE_MAX_DEPTH,
+        max_stacks: int = PROFILE_MAX_STACKS,
+    ) -> None:
+        self.interval_s = interval_s
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def run(self, seconds: float, mode: str = MODE_CPU) -> ProfileResult:
+        if mode not in MODES:
+            raise ValueError(f"unknown profile mode: {mode}")
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("profile already running")
+        try:
+            if mode == MODE_ALLOC:
+                return self._run_alloc(seconds)
+            return self._run_sampling(seconds, mode)
+        finally:
+            self._lock.release()
+
+    def _stack(self, frame) -> str:
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(_frame_label(code.co_filename, code.co_name))
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _add(self, stacks: Counter, stack: str, weight: int) -> None:
+        if stack not in stacks and len(stacks) >= self.max_stacks:
+            stack = TRUNCATED_STACK
+        stacks[stack] += weight
+
+    def _run_sampling(self, seconds: float, mode: str) -> ProfileResult:
+        own = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            threads = {t.ident: t for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                thread = threads.get(ident)
+                if mode == MODE_CPU:
+                    running = _thread_running(getattr(thread, "native_id", None))
+                    if running is None:
+                        running = frame.f_code.co_name not in _IDLE_LEAVES
+                    if not running:
+                        continue
+                name = thread.name if thread is not None else f"thread-{ident}"
+                self._add(stacks, f"{name};{self._stack(frame)}", 1)
+            samples += 1
+            time.sleep(self.interval_s)
+        return ProfileResult(mode=mode, seconds=seconds, samples=samples, stacks=dict(stacks))
+
+    def _run_alloc(self, seconds: float) -> ProfileResult:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(PROFILE_ALLOC_FRAMES)
+        try:
+            time.sleep(seconds)
+            snapshot = tracemalloc.take_snapshot()
+        finally:
+            if started:
+                tracemalloc.stop()
+        snapshot = snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        )
+        stacks: Counter = Counter()
+        stats = snapshot.statistics("traceback")
+        for stat in stats:
+            # ramki od najstarszej (korzeń) do najnowszej (liść) – jak w flamegraphie
+            frames = [_frame_label(f.filename, str(f.lineno)) for f in stat.traceback]
+            self._add(stacks, ";".join(frames[-self.max_depth :]), stat.size)
+        return ProfileResult(
+            mode=MODE_ALLOC, seconds=seconds, samples=len(stats), stacks=dict(stacks)
+        )
+
+
+PROFILER = Profiler()
+
+
+def get_profiler() -> Profiler:
+    return PROFILER
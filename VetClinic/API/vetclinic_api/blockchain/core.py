@@ -2,16 +2,18 @@ from __future__ import annotations
 
 import hashlib
 import json
+import time
 from abc import ABC, abstractmethod
 from datetime import datetime
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from pydantic import BaseModel, Field, field_validator
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
 
-from vetclinic_api.core.database import SessionLocal, Base
-from vetclinic_api.models_blockchain import BlockDB, TransactionDB
+from vetclinic_api.core.database import SessionLocal, init_db
+from vetclinic_api.models_blockchain import BlockDB, RecordAnchorDB, TransactionDB
 from vetclinic_api.crypto.ed25519 import (
     load_leader_keys_from_env,
     sign_message,
@@ -19,6 +21,7 @@ from vetclinic_api.crypto.ed25519 import (
 )
 
 DIFFICULTY_PREFIX = "0000"
+RECORD_TX_KIND = "MEDICAL_RECORD"
 GENESIS_TIMESTAMP = datetime(2025, 1, 1, 0, 0, 0)
 
 
@@ -83,6 +86,58 @@ class BlockchainState(BaseModel):
 class BlockProposal(BaseModel):
     block: Block
     hash: str
+    term: int = 0  # kadencja lidera (wybory); nie wchodzi do hasha bloku
+
+
+class RecordAnchor(BaseModel):
+    record_id: int
+    data_hash: Optional[str] = None
+    owner: Optional[str] = None
+    timestamp: datetime
+    block_index: int
+    tx_id: str
+
+
+def iter_record_anchors(blocks: Iterable[Block]) -> List[RecordAnchor]:
+    """
+    Zwraca kotwice dokumentacji medycznej (transakcje MEDICAL_RECORD)
+    w kolejności występowania w łańcuchu.
+    """
+    anchors: List[RecordAnchor] = []
+    for block in blocks:
+        for tx in block.transactions:
+            payload = tx.payload
+            if payload.kind != RECORD_TX_KIND or payload.record_id is None:
+                continue
+            anchors.append(
+                RecordAnchor(
+                    record_id=payload.record_id,
+                    data_hash=payload.data_hash,
+                    owner=payload.owner,
+                    timestamp=tx.timestamp,
+                    block_index=block.index,
+                    tx_id=tx.id,
+                )
+            )
+    return anchors
+
+
+def _latest_anchor(anchors: List[RecordAnchor]) -> Optional[RecordAnchor]:
+    latest: Optional[RecordAnchor] = None
+    for anchor in anchors:
+        if latest is None or anchor.timestamp >= latest.timestamp:
+            latest = anchor
+    return latest
+
+
+def transaction_bytes(payload: TxPayload, timestamp: datetime) -> bytes:
+    """
+    Podpisywana treść transakcji; sha256 z niej to id transakcji.
+    """
+    return json.dumps(
+        {"payload": payload.model_dump(mode="json"), "timestamp": timestamp.isoformat()},
+        sort_keys=True,
+    ).encode("utf-8")
 
 
 def build_genesis_block() -> Block:
@@ -136,6 +191,22 @@ def is_valid_new_block(previous: Block, new: Block) -> bool:
     return block_hash.startswith(DIFFICULTY_PREFIX)
 
 
+def validate_block_sequence(previous: Block, blocks: List[Block], keys=None) -> None:
+    """
+    Waliduje ciąg bloków dołączany za `previous` (np. pobrany przy synchronizacji):
+    ciągłość indeksów i hashy, merkle_root, PoW oraz podpis lidera.
+    Rzuca ValueError przy pierwszym błędnym bloku.
+    """
+    leader_keys = keys or load_leader_keys_from_env()
+    prev = previous
+    for block in blocks:
+        if not is_valid_new_block(prev, block):
+            raise ValueError(f"Invalid block {block.index}")
+        if not verify_signature(leader_keys.pub, block_header_bytes(block), block.leader_sig):
+            raise ValueError(f"Invalid leader signature in block {block.index}")
+        prev = block
+
+
 class Storage(ABC):
     @abstractmethod
     def get_chain(self) -> List[Block]:
@@ -157,11 +228,106 @@ class Storage(ABC):
     def clear_mempool(self) -> None:
         raise NotImplementedError
 
+    def add_blocks(self, blocks: List[Block]) -> None:
+        for block in blocks:
+            self.add_block(block)
+
+    def get_tip(self) -> Block:
+        return self.get_chain()[-1]
+
+    def get_mempool_size(self) -> int:
+        return len(self.get_mempool())
+
+    def get_mempool_summary(self) -> Tuple[int, Optional[datetime]]:
+        """
+        Rozmiar mempoola i znacznik czasu najstarszej oczekującej transakcji.
+        """
+        mempool = self.get_mempool()
+        return len(mempool), min((tx.timestamp for tx in mempool), default=None)
+
+    def get_tip_summary(self) -> Tuple[int, datetime]:
+        """
+        Indeks i znacznik czasu czubka bez ładowania transakcji (metryki, node-info).
+        """
+        tip = self.get_tip()
+        return tip.index, tip.timestamp
+
+    def get_blocks(
+        self, start: int = 0, end: Optional[int] = None, limit: Optional[int] = None
+    ) -> List[Block]:
+        """
+        Bloki o indeksach z przedziału [start, end] (end=None -> do końca),
+        rosnąco, maksymalnie `limit` sztuk.
+        """
+        blocks = [
+            b for b in self.get_chain() if b.index >= start and (end is None or b.index <= end)
+        ]
+        return blocks[:limit] if limit is not None else blocks
+
+    def iter_blocks(
+        self, start: int = 0, end: Optional[int] = None, batch_size: int = 100
+    ) -> Iterator[Block]:
+        """
+        Leniwie zwraca bloki paczkami po `batch_size`, więc eksport długiego
+        łańcucha nie trzyma go w pamięci w całości.
+        """
+        cursor = start
+        while True:
+            batch = self.get_blocks(cursor, end, limit=batch_size)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            cursor = batch[-1].index + 1
+
+    def get_transaction_block(self, tx_id: str) -> Optional[int]:
+        """
+        Indeks bloku z transakcją `tx_id` albo None (w mempoolu lub nieznana).
+        Domyślnie skanuje łańcuch paczkami.
+        """
+        for block in self.iter_blocks():
+            if any(tx.id == tx_id for tx in block.transactions):
+                return block.index
+        return None
+
+    def get_record_anchor(self, record_id: int) -> Optional[RecordAnchor]:
+        """
+        Najnowsza kotwica rekordu. Domyślnie skanuje cały łańcuch;
+        implementacje z indeksem nadpisują to zapytaniem punktowym.
+        """
+        anchors = [
+            a for a in iter_record_anchors(self.get_chain()) if a.record_id == record_id
+        ]
+        return _latest_anchor(anchors)
+
+    def get_record_ids_by_owner(self, owner: str) -> List[int]:
+        return sorted(
+            {a.record_id for a in iter_record_anchors(self.get_chain()) if a.owner == owner}
+        )
+
+    def rebuild_record_index(self) -> int:
+        """
+        Odbudowuje indeks kotwic z łańcucha; zwraca liczbę zaindeksowanych wpisów.
+        """
+        return len(iter_record_anchors(self.get_chain()))
+
+    def list_record_anchors(self) -> List[RecordAnchor]:
+        return iter_record_anchors(self.iter_blocks())
+
+    def restore_base(self, tip: Block, anchors: List[RecordAnchor]) -> None:
+        """
+        Ustawia `tip` jako bazę łańcucha (bootstrap ze snapshotu) razem
+        z pochodnym indeksem kotwic. Dozwolone tylko na świeżym węźle.
+        """
+        raise NotImplementedError("Storage does not support snapshot restore")
+
 
 class InMemoryStorage(Storage):
     def __init__(self) -> None:
         self._chain: List[Block] = []
         self._mempool: List[Transaction] = []
+        self._anchors: List[RecordAnchor] = []
+        self._record_anchors: Dict[int, RecordAnchor] = {}
+        self._owner_records: Dict[str, set[int]] = {}
 
         if not self._chain:
             genesis = build_genesis_block()
@@ -170,12 +336,27 @@ class InMemoryStorage(Storage):
     def get_chain(self) -> List[Block]:
         return list(self._chain)
 
+    def get_tip(self) -> Block:
+        return self._chain[-1]
+
+    def get_blocks(
+        self, start: int = 0, end: Optional[int] = None, limit: Optional[int] = None
+    ) -> List[Block]:
+        # Po bootstrapie ze snapshotu łańcuch nie zaczyna się od genesis.
+        base = self._chain[0].index
+        lo = max(start - base, 0)
+        hi = len(self._chain) if end is None else min(end - base + 1, len(self._chain))
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return self._chain[lo:hi]
+
     def add_block(self, block: Block) -> None:
         last = self._chain[-1]
         if not is_valid_new_block(last, block):
             raise ValueError("Invalid block")
         self._chain.append(block)
         self._mempool.clear()
+        self._index_anchors(iter_record_anchors([block]))
 
     def get_mempool(self) -> List[Transaction]:
         return list(self._mempool)
@@ -186,6 +367,43 @@ class InMemoryStorage(Storage):
     def clear_mempool(self) -> None:
         self._mempool.clear()
 
+    def _index_anchors(self, anchors: List[RecordAnchor]) -> None:
+        for anchor in anchors:
+            self._anchors.append(anchor)
+            current = self._record_anchors.get(anchor.record_id)
+            if current is None or anchor.timestamp >= current.timestamp:
+                self._record_anchors[anchor.record_id] = anchor
+            if anchor.owner is not None:
+                self._owner_records.setdefault(anchor.owner, set()).add(anchor.record_id)
+
+    def get_record_anchor(self, record_id: int) -> Optional[RecordAnchor]:
+        return self._record_anchors.get(record_id)
+
+    def get_record_ids_by_owner(self, owner: str) -> List[int]:
+        return sorted(self._owner_records.get(owner, set()))
+
+    def rebuild_record_index(self) -> int:
+        anchors = iter_record_anchors(self._chain)
+        self._anchors.clear()
+        self._record_anchors.clear()
+        self._owner_records.clear()
+        self._index_anchors(anchors)
+        return len(anchors)
+
+    def list_record_anchors(self) -> List[RecordAnchor]:
+        return list(self._anchors)
+
+    def restore_base(self, tip: Block, anchors: List[RecordAnchor]) -> None:
+        # Jak w SQLAlchemyStorage: świeży = tylko genesis (po restore baza N > 0).
+        if any(block.index > 0 for block in self._chain):
+            raise ValueError("Snapshot restore requires a fresh node")
+        self._chain = [tip]
+        self._mempool.clear()
+        self._anchors.clear()
+        self._record_anchors.clear()
+        self._owner_records.clear()
+        self._index_anchors(anchors)
+
 
 class SQLAlchemyStorage(Storage):
     def __init__(self, session_factory: type = SessionLocal) -> None:
@@ -198,47 +416,118 @@ class SQLAlchemyStorage(Storage):
             except Exception:
                 self._engine = None
         if self._engine is not None:
-            # Ensure tables exist even when tests swap storages mid-flight.
-            Base.metadata.create_all(bind=self._engine)
+            # Ensure tables exist even when tests swap storages mid-flight
+            # (once per engine – init_db remembers engines already set up).
+            init_db(self._engine)
 
     def _session(self) -> Session:
         return self._session_factory()
 
+    @staticmethod
+    def _block_from_db(b: BlockDB) -> Block:
+        txs = [
+            Transaction(
+                id=t.tx_id,
+                payload=TxPayload.model_validate_json(t.payload),
+                sender_pub=t.sender_pub,
+                signature=t.signature,
+                timestamp=t.timestamp,
+            )
+            for t in sorted(b.transactions, key=lambda t: t.id)
+        ]
+        return Block(
+            index=b.index,
+            previous_hash=b.previous_hash,
+            timestamp=b.timestamp,
+            transactions=txs,
+            nonce=b.nonce,
+            merkle_root=b.merkle_root,
+            leader_sig=b.leader_sig,
+            hash=b.hash,
+        )
+
+    def _ensure_genesis(self, db: Session) -> Block:
+        genesis = build_genesis_block()
+        self._persist_block(genesis, db=db)
+        return genesis
+
     def get_chain(self) -> List[Block]:
         with self._session() as db:
-            blocks_db = db.query(BlockDB).order_by(BlockDB.index.asc()).all()
-            result: List[Block] = []
-            for b in blocks_db:
-                txs = [
-                    Transaction(
-                        id=t.tx_id,
-                        payload=TxPayload.model_validate_json(t.payload),
-                        sender_pub=t.sender_pub,
-                        signature=t.signature,
-                        timestamp=t.timestamp,
-                    )
-                    for t in sorted(b.transactions, key=lambda t: t.id)
-                ]
-                result.append(
-                    Block(
-                        index=b.index,
-                        previous_hash=b.previous_hash,
-                        timestamp=b.timestamp,
-                        transactions=txs,
-                        nonce=b.nonce,
-                        merkle_root=b.merkle_root,
-                        leader_sig=b.leader_sig,
-                        hash=b.hash,
-                    )
-                )
+            blocks_db = (
+                db.query(BlockDB)
+                .options(selectinload(BlockDB.transactions))
+                .order_by(BlockDB.index.asc())
+                .all()
+            )
+            result = [self._block_from_db(b) for b in blocks_db]
 
             if not result:
-                genesis = build_genesis_block()
-                self._persist_block(genesis, db=db)
-                result = [genesis]
+                result = [self._ensure_genesis(db)]
             return result
 
-    def _persist_block(self, block: Block, db: Session | None = None) -> None:
+    def get_tip(self) -> Block:
+        with self._session() as db:
+            tip = (
+                db.query(BlockDB)
+                .options(selectinload(BlockDB.transactions))
+                .order_by(BlockDB.index.desc())
+                .first()
+            )
+            if tip is None:
+                return self._ensure_genesis(db)
+            return self._block_from_db(tip)
+
+    def get_blocks(
+        self, start: int = 0, end: Optional[int] = None, limit: Optional[int] = None
+    ) -> List[Block]:
+        with self._session() as db:
+            query = (
+                db.query(BlockDB)
+                .options(selectinload(BlockDB.transactions))
+                .filter(BlockDB.index >= start)
+            )
+            if end is not None:
+                query = query.filter(BlockDB.index <= end)
+            query = query.order_by(BlockDB.index.asc())
+            if limit is not None:
+                query = query.limit(limit)
+            blocks = [self._block_from_db(b) for b in query.all()]
+            if not blocks and start <= 0 and db.query(BlockDB.id).first() is None:
+                blocks = [self._ensure_genesis(db)]
+            return blocks
+
+    def get_tip_summary(self) -> Tuple[int, datetime]:
+        with self._session() as db:
+            row = (
+                db.query(BlockDB.index, BlockDB.timestamp)
+                .order_by(BlockDB.index.desc())
+                .first()
+            )
+            if row is None:
+                tip = self._ensure_genesis(db)
+                return tip.index, tip.timestamp
+            return row[0], row[1]
+
+    def get_mempool_size(self) -> int:
+        with self._session() as db:
+            return (
+                db.query(TransactionDB)
+                .filter(TransactionDB.committed.is_(False))
+                .count()
+            )
+
+    def get_mempool_summary(self) -> Tuple[int, Optional[datetime]]:
+        with self._session() as db:
+            count, oldest = (
+                db.query(func.count(TransactionDB.id), func.min(TransactionDB.timestamp))
+                .filter(TransactionDB.committed.is_(False))
+                .one()
+            )
+            return count, oldest
+
+    def _persist_block(
+        self, block: Block, db: Session | None = None, index_anchors: bool = True
+    ) -> None:
         close = False
         if db is None:
             db = self._session()
@@ -281,6 +570,8 @@ class SQLAlchemyStorage(Storage):
                         committed=True,
                     )
                     db.add(tx_db)
+            if index_anchors:
+                self._persist_anchors(iter_record_anchors([block]), db)
             db.commit()
         except Exception:
             db.rollback()
@@ -289,9 +580,22 @@ class SQLAlchemyStorage(Storage):
             if close:
                 db.close()
 
+    @staticmethod
+    def _persist_anchors(anchors: List[RecordAnchor], db: Session) -> None:
+        for anchor in anchors:
+            db.add(
+                RecordAnchorDB(
+                    record_id=anchor.record_id,
+                    owner=anchor.owner,
+                    data_hash=anchor.data_hash,
+                    tx_id=anchor.tx_id,
+                    block_index=anchor.block_index,
+                    timestamp=anchor.timestamp,
+                )
+            )
+
     def add_block(self, block: Block) -> None:
-        chain = self.get_chain()
-        last = chain[-1]
+        last = self.get_tip()
         if not is_valid_new_block(last, block):
             raise ValueError("Invalid block")
         with self._session() as db:
@@ -299,6 +603,20 @@ class SQLAlchemyStorage(Storage):
             db.query(TransactionDB).filter(TransactionDB.committed.is_(False)).delete()
             db.commit()
 
+    def add_blocks(self, blocks: List[Block]) -> None:
+        if not blocks:
+            return
+        prev = self.get_tip()
+        for block in blocks:
+            if not is_valid_new_block(prev, block):
+                raise ValueError("Invalid block")
+            prev = block
+        with self._session() as db:
+            for block in blocks:
+                self._persist_block(block, db=db)
+            db.query(TransactionDB).filter(TransactionDB.committed.is_(False)).delete()
+            db.commit()
+
     def get_mempool(self) -> List[Transaction]:
         with self._session() as db:
             pending = (
@@ -340,6 +658,87 @@ class SQLAlchemyStorage(Storage):
             db.query(TransactionDB).filter(TransactionDB.committed.is_(False)).delete()
             db.commit()
 
+    def get_transaction_block(self, tx_id: str) -> Optional[int]:
+        with self._session() as db:
+            row = (
+                db.query(BlockDB.index)
+                .join(TransactionDB, TransactionDB.block_id == BlockDB.id)
+                .filter(TransactionDB.tx_id == tx_id)
+                .first()
+            )
+            return row[0] if row is not None else None
+
+    def get_record_anchor(self, record_id: int) -> Optional[RecordAnchor]:
+        with self._session() as db:
+            row = (
+                db.query(RecordAnchorDB)
+                .filter(RecordAnchorDB.record_id == record_id)
+                .order_by(RecordAnchorDB.timestamp.desc(), RecordAnchorDB.id.desc())
+                .first()
+            )
+            if row is None:
+                return None
+            return RecordAnchor(
+                record_id=row.record_id,
+                data_hash=row.data_hash,
+                owner=row.owner,
+                timestamp=row.timestamp,
+                block_index=row.block_index,
+                tx_id=row.tx_id,
+            )
+
+    def get_record_ids_by_owner(self, owner: str) -> List[int]:
+        with self._session() as db:
+            rows = (
+                db.query(RecordAnchorDB.record_id)
+                .filter(RecordAnchorDB.owner == owner)
+                .distinct()
+                .order_by(RecordAnchorDB.record_id.asc())
+                .all()
+            )
+            return [row.record_id for row in rows]
+
+    def rebuild_record_index(self) -> int:
+        anchors = iter_record_anchors(self.iter_blocks())
+        with self._session() as db:
+            try:
+                db.query(RecordAnchorDB).delete()
+                self._persist_anchors(anchors, db)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        return len(anchors)
+
+    def list_record_anchors(self) -> List[RecordAnchor]:
+        with self._session() as db:
+            rows = db.query(RecordAnchorDB).order_by(RecordAnchorDB.id.asc()).all()
+            return [
+                RecordAnchor(
+                    record_id=row.record_id,
+                    data_hash=row.data_hash,
+                    owner=row.owner,
+                    timestamp=row.timestamp,
+                    block_index=row.block_index,
+                    tx_id=row.tx_id,
+                )
+                for row in rows
+            ]
+
+    def restore_base(self, tip: Block, anchors: List[RecordAnchor]) -> None:
+        with self._session() as db:
+            if db.query(BlockDB).filter(BlockDB.index > 0).first() is not None:
+                raise ValueError("Snapshot restore requires a fresh node")
+            try:
+                db.query(TransactionDB).delete()
+                db.query(BlockDB).delete()
+                db.query(RecordAnchorDB).delete()
+                self._persist_anchors(anchors, db)
+                self._persist_block(tip, db=db, index_anchors=False)
+            except Exception:
+                db.rollback()
+                raise
+
 
 def mine_block(storage: Storage) -> Block:
     proposal = build_block_proposal(storage)
@@ -347,20 +746,26 @@ def mine_block(storage: Storage) -> Block:
     return proposal.block
 
 
-def build_block_proposal(storage: Storage) -> BlockProposal:
-    chain = storage.get_chain()
+def build_block_proposal(
+    storage: Storage, timings: Optional[Dict[str, float]] = None
+) -> BlockProposal:
+    """
+    Buduje i podpisuje blok z mempoola. `timings` (opcjonalnie) dostaje
+    czas szukania nonce pod kluczem "nonce_search".
+    """
     mempool = storage.get_mempool()
 
     if not mempool:
         raise ValueError("No transactions to mine")
 
-    previous = chain[-1]
+    previous = storage.get_tip()
     previous_hash = previous.hash or compute_block_hash(previous)
     index = previous.index + 1
     nonce = 0
     timestamp = datetime.utcnow()
     merkle_root = compute_merkle_root(mempool)
 
+    search_start = time.perf_counter()
     while True:
         candidate = Block(
             index=index,
@@ -376,6 +781,8 @@ def build_block_proposal(storage: Storage) -> BlockProposal:
             candidate.hash = block_hash
             break
         nonce += 1
+    if timings is not None:
+        timings["nonce_search"] = time.perf_counter() - search_start
 
     header_bytes = block_header_bytes(candidate)
     keys = load_leader_keys_from_env()
@@ -438,11 +845,7 @@ def verify_chain(storage: Storage) -> Dict[str, Any]:
 
 
 def _verify_transaction(tx: Transaction, *, keys=None) -> bool:
-    payload_dict = tx.payload.model_dump(mode="json")
-    raw = json.dumps(
-        {"payload": payload_dict, "timestamp": tx.timestamp.isoformat()},
-        sort_keys=True,
-    ).encode("utf-8")
+    raw = transaction_bytes(tx.payload, tx.timestamp)
 
     expected_id = hashlib.sha256(raw).hexdigest()
     if tx.id != expected_id:
@@ -1,3 +1,5 @@
+from vetclinic_api.cluster.context import current_node
+
 from .core import SQLAlchemyStorage, Storage
 
 _storage: Storage | None = None
@@ -5,6 +7,9 @@ _storage: Storage | None = None
 
 def get_storage() -> Storage:
     global _storage
+    node = current_node()
+    if node is not None:
+        return node.storage
     if _storage is None:
         _storage = SQLAlchemyStorage()
     return _storage
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from vetclinic_api.cluster.context import node_scoped
+from vetclinic_api.metrics import observe_tx_stage
+
+TX_TRACE_MAX = max(1, int(os.getenv("TX_TRACE_MAX", "10000")))
+
+STAGE_SUBMITTED = "submitted"  # /tx/submit lub /tx/submit_batch na tym węźle
+STAGE_FORWARDED = "forwarded"  # follower: paczka przyjęta przez lidera
+STAGE_GOSSIPED = "gossiped"  # lider: rozesłana do peerów (/tx/receive*)
+STAGE_RECEIVED = "received"  # follower: dostał ją od lidera
+STAGE_PROPOSED = "proposed"  # w propozycji bloku (lider: zbudowana, follower: przyjęta)
+STAGE_COMMITTED = "committed"  # blok z transakcją zapisany lokalnie
+
+
+class TxLifecycle:
+    """
+    Znaczniki czasu etapów życia transakcji widziane przez ten węzeł.
+
+    Każdy etap zapisujemy raz (pierwsze wystąpienie), czas liczymy od
+    pierwszego zdarzenia na węźle. Pamiętamy `max_entries` ostatnich
+    transakcji – to diagnostyka, nie źródło prawdy (tym jest łańcuch).
+    """
+
+    def __init__(self, max_entries: int = TX_TRACE_MAX) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._traces: "OrderedDict[str, dict]" = OrderedDict()
+
+    def mark(
+        self, tx_id: str, stage: str, block_index: Optional[int] = None, at: Optional[float] = None
+    ) -> None:
+        self.mark_many([tx_id], stage, block_index, at)
+
+    def mark_many(
+        self,
+        tx_ids: Iterable[str],
+        stage: str,
+        block_index: Optional[int] = None,
+        at: Optional[float] = None,
+    ) -> None:
+        now = time.time() if at is None else at
+        latencies = []
+        with self._lock:
+            for tx_id in tx_ids:
+                trace = self._traces.get(tx_id)
+                if trace is None:
+                    trace = {"events": {}, "block_index": None}
+                    self._traces[tx_id] = trace
+                    if len(self._traces) > self.max_entries:
+                        self._traces.popitem(last=False)
+                events = trace["events"]
+                if stage in events:
+                    continue
+                if events:
+                    latencies.append(now - min(events.values()))
+                events[stage] = now
+                if block_index is not None:
+                    trace["block_index"] = block_index
+        for elapsed in latencies:
+            observe_tx_stage(stage, elapsed)
+
+    def mark_block(self, block, stage: str = STAGE_COMMITTED) -> None:
+        self.mark_many([tx.id for tx in block.transactions], stage, block.index)
+
+    def get(self, tx_id: str) -> Optional[dict]:
+        with self._lock:
+            trace = self._traces.get(tx_id)
+            if trace is None:
+                return None
+            return {"events": dict(trace["events"]), "block_index": trace["block_index"]}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+    def __len__(self) -> int:
+        return len(self._traces)
+
+
+def stage_durations(events: Dict[str, float]) -> Dict[str, float]:
+    """
+    Czas (s) od pierwszego zdarzenia na węźle do każdego etapu.
+    """
+    if not events:
+        return {}
+    origin = min(events.values())
+    return {stage: round(at - origin, 6) for stage, at in events.items()}
+
+
+TX_LIFECYCLE = TxLifecycle()
+
+
+def get_tx_lifecycle() -> TxLifecycle:
+    return node_scoped("tx_lifecycle", TX_LIFECYCLE)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from vetclinic_api.blockchain.core import (
+    Block,
+    RecordAnchor,
+    Storage,
+    _stable_json,
+    block_header_bytes,
+    compute_block_hash,
+    verify_chain,
+)
+from vetclinic_api.crypto.ed25519 import (
+    load_leader_keys_from_env,
+    sign_message,
+    verify_signature,
+)
+
+SNAPSHOT_VERSION = 1
+
+
+class ChainSnapshot(BaseModel):
+    """
+    Podpisany snapshot stanu węzła: czubek łańcucha (pełny blok, od którego
+    nowy węzeł kontynuuje), pochodny indeks kotwic i punkt kontrolny
+    weryfikacji. Historia sprzed czubka nie jest przenoszona.
+    """
+
+    version: int = SNAPSHOT_VERSION
+    node_id: int
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    height: int
+    tip_hash: str
+    verified_up_to: int
+    tip: Block
+    record_anchors: List[RecordAnchor] = Field(default_factory=list)
+    signature: str = ""
+
+
+def snapshot_signing_bytes(snapshot: ChainSnapshot) -> bytes:
+    return _stable_json(snapshot.model_dump(mode="json", exclude={"signature"}))
+
+
+def build_snapshot(storage: Storage, node_id: int) -> ChainSnapshot:
+    """
+    Weryfikuje łańcuch i tworzy snapshot podpisany kluczem lidera.
+    Rzuca ValueError, jeśli lokalny łańcuch nie przechodzi weryfikacji.
+    """
+    result = verify_chain(storage)
+    if not result["valid"]:
+        raise ValueError("Local chain failed verification; refusing to snapshot")
+
+    tip = storage.get_tip()
+    snapshot = ChainSnapshot(
+        node_id=node_id,
+        height=tip.index,
+        tip_hash=compute_block_hash(tip),
+        verified_up_to=result["height"],
+        tip=tip,
+        record_anchors=storage.list_record_anchors(),
+    )
+    keys = load_leader_keys_from_env()
+    snapshot.signature = sign_message(keys.priv, snapshot_signing_bytes(snapshot))
+    return snapshot
+
+
+def verify_snapshot(snapshot: ChainSnapshot) -> None:
+    """
+    Sprawdza podpis snapshotu, spójność czubka i punkt kontrolny.
+    Rzuca ValueError z powodem odrzucenia.
+    """
+    if snapshot.version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {snapshot.version}")
+
+    keys = load_leader_keys_from_env()
+    if not verify_signature(keys.pub, snapshot_signing_bytes(snapshot), snapshot.signature):
+        raise ValueError("Invalid snapshot signature")
+
+    tip = snapshot.tip
+    if tip.index != snapshot.height or compute_block_hash(tip) != snapshot.tip_hash:
+        raise ValueError("Snapshot tip does not match header")
+    if tip.index > 0 and not verify_signature(
+        keys.pub, block_header_bytes(tip), tip.leader_sig
+    ):
+        raise ValueError("Invalid leader signature on snapshot tip")
+    if snapshot.verified_up_to < snapshot.height:
+        raise ValueError("Snapshot tip is beyond its verified checkpoint")
+
+
+def restore_snapshot(storage: Storage, snapshot: ChainSnapshot) -> Block:
+    verify_snapshot(snapshot)
+    storage.restore_base(snapshot.tip, snapshot.record_anchors)
+    return snapshot.tip
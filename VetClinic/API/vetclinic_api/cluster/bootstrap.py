@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Optional
+
+import httpx
+
+from vetclinic_api.blockchain.core import Block, Storage
+from vetclinic_api.blockchain.snapshot import ChainSnapshot, restore_snapshot
+from vetclinic_api.cluster.chain_metrics import get_chain_metrics
+
+logger = logging.getLogger(__name__)
+
+# URL węzła (pobranie GET /admin/snapshot) albo ścieżka do pliku JSON ze snapshotem.
+SNAPSHOT_SOURCE = os.getenv("SNAPSHOT_SOURCE", "")
+
+
+async def load_snapshot(
+    source: str,
+    client_factory: Callable[[], httpx.AsyncClient] = lambda: httpx.AsyncClient(timeout=30.0),
+) -> ChainSnapshot:
+    if source.startswith(("http://", "https://")):
+        async with client_factory() as client:
+            resp = await client.get(f"{source.rstrip('/')}/admin/snapshot")
+            resp.raise_for_status()
+            return ChainSnapshot.model_validate(resp.json())
+    return ChainSnapshot.model_validate_json(Path(source).read_text(encoding="utf-8"))
+
+
+async def bootstrap_from_snapshot(
+    storage: Storage, source: str = SNAPSHOT_SOURCE
+) -> Optional[Block]:
+    """
+    Ładuje snapshot na świeżym węźle (sam genesis). Bloki po snapshocie
+    dociąga potem zwykła synchronizacja z peerami.
+    """
+    if not source or storage.get_tip().index > 0:
+        return None
+    try:
+        snapshot = await load_snapshot(source)
+        tip = restore_snapshot(storage, snapshot)
+        get_chain_metrics().mark_verified(snapshot.verified_up_to)
+    except Exception as exc:
+        logger.warning("Snapshot bootstrap from %s failed: %s", source, exc)
+        return None
+    logger.info("Bootstrapped from snapshot at height %s", tip.index)
+    return tip
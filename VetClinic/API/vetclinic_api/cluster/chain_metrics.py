@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Set
+
+from vetclinic_api.blockchain.core import Storage, validate_block_sequence
+from vetclinic_api.cluster.context import node_scoped
+from vetclinic_api.cluster.health import get_peer_health
+from vetclinic_api.metrics import (
+    clear_peer_lag,
+    set_chain_freshness,
+    set_chain_status,
+    set_peer_lag,
+)
+
+CHAIN_METRICS_INTERVAL_S = float(os.getenv("CHAIN_METRICS_INTERVAL_S", "5"))
+# Ile nowych bloków weryfikujemy w jednym cyklu (przyrostowo od checkpointu).
+CHAIN_VERIFY_BATCH = max(1, int(os.getenv("CHAIN_VERIFY_BATCH", "100")))
+
+
+def _age_seconds(timestamp: datetime) -> float:
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (datetime.utcnow() - timestamp).total_seconds()
+
+
+class ChainMetricsCollector:
+    """
+    Odświeża metryki stanu łańcucha w tle, niezależnie od ruchu na /chain/status.
+
+    Co `interval` sekund: wysokość i mempool (tanie zapytania o czubek),
+    wiek ostatniego bloku, przyrostowa weryfikacja nowych bloków od
+    checkpointu (`verified_height`) i opóźnienie względem peerów
+    (wysokości z heartbeatów /rpc/node-info). Peer bez odpowiedzi traci
+    serię opóźnienia zamiast zostawiać ostatnią znaną wartość.
+    """
+
+    def __init__(
+        self,
+        interval: float = CHAIN_METRICS_INTERVAL_S,
+        verify_batch: int = CHAIN_VERIFY_BATCH,
+    ) -> None:
+        self.interval = interval
+        self.verify_batch = verify_batch
+        self.verified_height = 0
+        self.last_error: Optional[str] = None
+        self._lag_peers: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def mark_verified(self, height: int) -> None:
+        """
+        Checkpoint z zewnątrz: pełne /chain/verify albo zweryfikowany snapshot.
+        """
+        self.verified_height = max(self.verified_height, height)
+
+    def _advance_verified(self, storage: Storage, height: int) -> None:
+        if self.verified_height >= height:
+            return
+        blocks = storage.get_blocks(self.verified_height, limit=self.verify_batch + 1)
+        if blocks and blocks[0].index > self.verified_height:
+            # Węzeł ze snapshotu (np. po restarcie) ma łańcuch od bazy N, zweryfikowanej
+            # przy odtwarzaniu – checkpoint startuje od niej, a nie od genesis.
+            base = storage.get_blocks(0, limit=1)
+            if base and base[0].index == blocks[0].index:
+                self.verified_height = base[0].index
+        if len(blocks) < 2 or blocks[0].index != self.verified_height:
+            return
+        try:
+            validate_block_sequence(blocks[0], blocks[1:])
+        except (ValueError, RuntimeError) as exc:
+            # Checkpoint zostaje przed błędnym blokiem (albo bez kluczy lidera w env)
+            # – widać to jako rosnącą różnicę, reszta metryk dalej się odświeża.
+            self.last_error = str(exc)
+            return
+        self.verified_height = blocks[-1].index
+        self.last_error = None
+
+    def collect(self, storage: Storage) -> dict:
+        height, timestamp = storage.get_tip_summary()
+        mempool_size = storage.get_mempool_size()
+        self._advance_verified(storage, height)
+        age = _age_seconds(timestamp)
+        set_chain_status(height=height, mempool_size=mempool_size)
+        set_chain_freshness(age, self.verified_height)
+
+        lags: Dict[str, int] = {}
+        for peer in get_peer_health().snapshot():
+            info = peer.get("node_info") or {}
+            if peer.get("ok") and info.get("height") is not None:
+                lags[peer["url"]] = int(info["height"]) - height
+                set_peer_lag(peer["url"], lags[peer["url"]])
+        for url in self._lag_peers - lags.keys():
+            clear_peer_lag(url)
+        self._lag_peers = set(lags)
+        return {
+            "height": height,
+            "mempool_size": mempool_size,
+            "last_block_age_s": round(age, 3),
+            "verified_height": self.verified_height,
+            "peer_lag": lags,
+        }
+
+    async def run_forever(self, storage_provider: Callable[[], Storage]) -> None:
+        while True:
+            try:
+                # Zapytania do bazy synchroniczne – poza pętlą zdarzeń.
+                await asyncio.to_thread(self.collect, storage_provider())
+            except Exception as exc:
+                self.last_error = str(exc)
+            await asyncio.sleep(self.interval)
+
+    def start(self, storage_provider: Callable[[], Storage]) -> Optional[asyncio.Task]:
+        if self.interval <= 0:
+            return None
+        self._task = asyncio.get_running_loop().create_task(
+            self.run_forever(storage_provider)
+        )
+        return self._task
+
+    async def stop(self) -> None:
+        task = self._task
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+
+    def reset(self) -> None:
+        self.verified_height = 0
+        self.last_error = None
+
+
+CHAIN_METRICS = ChainMetricsCollector()
+
+
+def get_chain_metrics() -> ChainMetricsCollector:
+    return node_scoped("chain_metrics", CHAIN_METRICS)
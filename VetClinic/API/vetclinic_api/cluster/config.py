@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 import os
+import re
 from dataclasses import dataclass
 from typing import List
 from urllib.parse import urlparse
 
+from vetclinic_api.cluster.context import NODE_CONTEXT
+
 
 @dataclass
 class NodeConfig:
@@ -12,6 +15,7 @@ class NodeConfig:
     leader_id: int
     peers: List[str]
     leader_url: str
+    self_url: str = ""
 
 
 def _parse_peers(raw: str | None) -> list[str]:
@@ -41,6 +45,11 @@ def _resolve_leader_url(node_id: int, leader_id: int, peers: list[str]) -> str:
     return ""
 
 
+def _resolve_self_url(node_id: int) -> str:
+    # Adres, pod którym peery widzą ten węzeł (ogłaszany w wyborach lidera).
+    return os.getenv("NODE_URL") or f"http://node{node_id}:8000"
+
+
 def load_config() -> NodeConfig:
     node_id = int(os.getenv("NODE_ID", "1"))
     leader_id = int(os.getenv("LEADER_ID", "1"))
@@ -51,7 +60,47 @@ def load_config() -> NodeConfig:
         leader_id=leader_id,
         peers=peers,
         leader_url=leader_url,
+        self_url=_resolve_self_url(node_id),
     )
 
 
-CONFIG = load_config()
+class _ConfigProxy:
+    """
+    CONFIG procesu; w klastrze z cluster/harness.py – konfiguracja bieżącego
+    węzła. Odczyt i zapis atrybutów trafiają do właściwego NodeConfig.
+    """
+
+    def __init__(self, default: NodeConfig) -> None:
+        object.__setattr__(self, "_default", default)
+
+    def _target(self) -> NodeConfig:
+        ctx = NODE_CONTEXT.get()
+        return ctx.config if ctx is not None else self._default
+
+    def __getattr__(self, name: str):
+        return getattr(self._target(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self._target(), name, value)
+
+    def __repr__(self) -> str:
+        return repr(self._target())
+
+
+CONFIG = _ConfigProxy(load_config())
+
+# Nagłówek z id węzła-nadawcy w RPC między węzłami (reguły partycji sieci).
+NODE_ID_HEADER = "X-Node-Id"
+
+
+def node_headers() -> dict:
+    return {NODE_ID_HEADER: str(CONFIG.node_id)}
+
+
+def peer_node_id(url: str) -> int | None:
+    """
+    Id węzła z adresu peera (http://node3:8000 -> 3); None dla innych adresów.
+    """
+    host = (urlparse(url).hostname or "").lower()
+    match = re.fullmatch(r"node(\d+)", host)
+    return int(match.group(1)) if match else None
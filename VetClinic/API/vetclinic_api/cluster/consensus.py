@@ -0,0 +1,412 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from vetclinic_api import tracing
+from vetclinic_api.blockchain.core import Block, Storage, build_block_proposal
+from vetclinic_api.blockchain.lifecycle import STAGE_COMMITTED, STAGE_PROPOSED, get_tx_lifecycle
+from vetclinic_api.cluster.config import CONFIG
+from vetclinic_api.cluster.context import node_scoped
+from vetclinic_api.cluster.election import get_election
+from vetclinic_api.cluster.health import PeerHealthTracker, get_peer_health
+from vetclinic_api.cluster.transport import peer_client
+from vetclinic_api.metrics import (
+    inc_peer_hedge,
+    inc_peer_retry,
+    inc_peer_vote,
+    observe_block_size,
+    observe_consensus_phase,
+    observe_consensus_round,
+    observe_peer_rpc,
+    observe_tx_commit_latency,
+)
+
+CONSENSUS_PIPELINE = os.getenv("CONSENSUS_PIPELINE", "0").lower() in ("1", "true", "yes", "on")
+PIPELINE_WINDOW = max(1, int(os.getenv("CONSENSUS_PIPELINE_WINDOW", "4")))
+COMMIT_TIMEOUT_S = float(os.getenv("CONSENSUS_COMMIT_TIMEOUT_S", "5"))
+RPC_TIMEOUT_S = float(os.getenv("CONSENSUS_RPC_TIMEOUT_S", "5"))
+HEDGE_PROPOSE = os.getenv("CONSENSUS_HEDGE_PROPOSE", "0").lower() in ("1", "true", "yes", "on")
+HEDGE_PERCENTILE = float(os.getenv("CONSENSUS_HEDGE_PERCENTILE", "0.95"))
+HEDGE_MIN_SAMPLES = max(1, int(os.getenv("CONSENSUS_HEDGE_MIN_SAMPLES", "10")))
+COMMIT_RETRIES = max(0, int(os.getenv("CONSENSUS_COMMIT_RETRIES", "2")))
+COMMIT_RETRY_BACKOFF_S = float(os.getenv("CONSENSUS_COMMIT_RETRY_BACKOFF_S", "0.1"))
+
+
+class CommitBuffer:
+    """
+    Bufor followera dla konsensusu potokowego.
+
+    Lider może zaproponować blok N+1 zanim commit bloku N dotrze do followera,
+    dlatego follower pamięta zaakceptowane propozycje (rodzic do walidacji N+1)
+    oraz przechowuje commity, które przyszły poza kolejnością, aż luka się domknie.
+    """
+
+    def __init__(self, window: int = PIPELINE_WINDOW) -> None:
+        self.window = window
+        self._proposals: Dict[int, Block] = {}
+        self._commits: Dict[int, Block] = {}
+        self._lock = threading.Lock()
+
+    def remember_proposal(self, block: Block) -> None:
+        with self._lock:
+            self._proposals[block.index] = block
+            for idx in sorted(self._proposals)[: -self.window]:
+                del self._proposals[idx]
+
+    def parent_for(self, index: int, tip: Block) -> Optional[Block]:
+        if index == tip.index + 1:
+            return tip
+        if index > tip.index + 1:
+            with self._lock:
+                return self._proposals.get(index - 1)
+        return None
+
+    def buffer_commit(self, block: Block) -> None:
+        with self._lock:
+            self._commits[block.index] = block
+
+    @property
+    def pending_commits(self) -> List[int]:
+        with self._lock:
+            return sorted(self._commits)
+
+    def drain(self, storage: Storage) -> List[int]:
+        """
+        Dokleja buforowane commity, które stały się kolejnymi blokami łańcucha.
+        """
+        applied: List[int] = []
+        with self._lock:
+            while True:
+                tip = storage.get_tip()
+                for idx in [i for i in self._commits if i <= tip.index]:
+                    del self._commits[idx]
+                for idx in [i for i in self._proposals if i <= tip.index]:
+                    del self._proposals[idx]
+                block = self._commits.pop(tip.index + 1, None)
+                if block is None:
+                    return applied
+                try:
+                    storage.add_block(block)
+                except ValueError:
+                    return applied
+                get_tx_lifecycle().mark_block(block, STAGE_COMMITTED)
+                applied.append(block.index)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._proposals.clear()
+            self._commits.clear()
+
+
+def _default_client_factory() -> httpx.AsyncClient:
+    return peer_client(timeout=COMMIT_TIMEOUT_S)
+
+
+async def post_to_peer(
+    client: httpx.AsyncClient,
+    health: PeerHealthTracker,
+    base_url: str,
+    path: str,
+    payload: dict,
+) -> Optional[httpx.Response]:
+    """
+    RPC konsensusu do peera z uwzględnieniem jego zdrowia: peer z otwartym
+    obwodem jest pomijany (None), timeout wynika z jego opóźnień
+    (krótszy dla zdegradowanego), a wynik zasila tracker.
+    """
+    if not health.is_available(base_url):
+        return None
+    rpc = path.rsplit("/", 1)[-1]
+    timeout = health.timeout_for(base_url, RPC_TIMEOUT_S, rpc)
+    start = time.perf_counter()
+    try:
+        resp = await client.post(
+            f"{base_url.rstrip('/')}{path}", json=payload, timeout=timeout
+        )
+    except Exception as exc:
+        health.record_failure(base_url, str(exc) or type(exc).__name__)
+        failure = "timeout" if isinstance(exc, httpx.TimeoutException) else "error"
+        observe_peer_rpc(base_url, rpc, timeout, failure=failure)
+        return None
+    elapsed = time.perf_counter() - start
+    if resp.status_code >= 500:
+        health.record_failure(base_url, f"HTTP {resp.status_code}")
+        observe_peer_rpc(base_url, rpc, timeout, failure="error")
+    else:
+        health.record_success(base_url, elapsed, rpc=rpc)
+        observe_peer_rpc(base_url, rpc, timeout, elapsed)
+    return resp
+
+
+def _usable(resp: Optional[httpx.Response]) -> bool:
+    return resp is not None and resp.status_code < 500
+
+
+async def propose_to_peer(
+    client: httpx.AsyncClient,
+    health: PeerHealthTracker,
+    base_url: str,
+    payload: dict,
+    hedge: bool = HEDGE_PROPOSE,
+) -> Optional[httpx.Response]:
+    """
+    propose_block z opcjonalnym hedgingiem: gdy peer nie odpowie w czasie
+    swojego p95 (albo od razu zgubi żądanie), wysyłamy drugie identyczne
+    żądanie i bierzemy pierwszą poprawną odpowiedź. Głosowanie jest
+    idempotentne, więc duplikat nie szkodzi.
+    """
+    path = "/rpc/propose_block"
+    if not hedge:
+        return await post_to_peer(client, health, base_url, path, payload)
+
+    first = asyncio.ensure_future(post_to_peer(client, health, base_url, path, payload))
+    delay = health.latency_percentile(base_url, HEDGE_PERCENTILE, "propose_block")
+    if delay is None or health.sample_count(base_url, "propose_block") < HEDGE_MIN_SAMPLES:
+        delay = RPC_TIMEOUT_S / 4
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done:
+        resp = first.result()
+        if _usable(resp) or not health.is_available(base_url):
+            return resp
+        # Peer zgubił żądanie (drop/flapping) – jedna natychmiastowa powtórka.
+        inc_peer_hedge(base_url)
+        return await post_to_peer(client, health, base_url, path, payload)
+
+    inc_peer_hedge(base_url)
+    second = asyncio.ensure_future(post_to_peer(client, health, base_url, path, payload))
+    pending = {first, second}
+    fallback: Optional[httpx.Response] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                resp = task.result()
+                if _usable(resp):
+                    return resp
+                fallback = fallback or resp
+        return fallback
+    finally:
+        # Przegrany hedge (albo anulowana runda): anulujemy i czekamy na zakończenie,
+        # żeby nie zostało wiszące zadanie ani połknięty wyjątek.
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def commit_to_peer(
+    client: httpx.AsyncClient,
+    health: PeerHealthTracker,
+    base_url: str,
+    payload: dict,
+    retries: int = COMMIT_RETRIES,
+) -> Optional[httpx.Response]:
+    """
+    commit_block z ponowieniami (backoff wykładniczy). Follower traktuje
+    powtórny commit bloku, który już ma, jako sukces, więc retry jest bezpieczny.
+    """
+    path = "/rpc/commit_block"
+    resp = None
+    for attempt in range(retries + 1):
+        resp = await post_to_peer(client, health, base_url, path, payload)
+        if _usable(resp):
+            return resp
+        if attempt == retries or not health.is_available(base_url):
+            break
+        inc_peer_retry(base_url, "commit_block")
+        await asyncio.sleep(COMMIT_RETRY_BACKOFF_S * (2 ** attempt))
+    return resp
+
+
+class LeaderPipeline:
+    """
+    Strona lidera: rundy są serializowane (`round_lock`), ale rozesłanie
+    commitu bloku N idzie w tle, więc propozycja N+1 startuje od razu.
+    W fazie commitu jest naraz najwyżej jeden blok.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], httpx.AsyncClient] = _default_client_factory,
+    ) -> None:
+        self._client_factory = client_factory
+        self.round_lock = asyncio.Lock()
+        self._inflight: Optional[asyncio.Task] = None
+
+    @property
+    def inflight(self) -> bool:
+        return self._inflight is not None and not self._inflight.done()
+
+    async def drain(self) -> None:
+        task = self._inflight
+        if task is not None:
+            try:
+                await task
+            except Exception:
+                pass
+            self._inflight = None
+
+    async def submit_commit(self, payload: dict, peers: List[str]) -> None:
+        await self.drain()
+        self._inflight = asyncio.get_running_loop().create_task(
+            self._fan_out(payload, list(peers))
+        )
+
+    async def _fan_out(self, payload: dict, peers: List[str]) -> None:
+        health = get_peer_health()
+        start = time.perf_counter()
+        async with self._client_factory() as client:
+            await asyncio.gather(
+                *(commit_to_peer(client, health, base_url, payload) for base_url in peers),
+                return_exceptions=True,
+            )
+        observe_consensus_phase("commit_fanout", time.perf_counter() - start)
+
+
+class RoundConflict(RuntimeError):
+    """Lider nie mógł dokleić własnego, przegłosowanego bloku (np. zmienił się czubek)."""
+
+
+def _peer_vote(resp: Optional[httpx.Response], available: bool) -> str:
+    if not available:
+        return "skipped"
+    if resp is None or resp.status_code != 200:
+        return "no_response"
+    try:
+        body = resp.json()
+    except ValueError:
+        return "no_response"
+    return "accept" if body.get("vote") == "accept" else "reject"
+
+
+async def run_consensus_round(
+    storage: Storage,
+    client: httpx.AsyncClient,
+    pipelined: Optional[bool] = None,
+    peers: Optional[List[str]] = None,
+) -> dict:
+    """
+    Jedna runda konsensusu lidera: propozycja -> głosy -> commit.
+
+    Wspólna dla `/chain/mine_distributed` i harmonogramu bloków.
+    Pusty mempool -> ValueError, konflikt przy doklejaniu -> RoundConflict.
+    """
+    pipeline = get_pipeline()
+    health = get_peer_health()
+    if pipelined is None:
+        pipelined = CONSENSUS_PIPELINE
+    if peers is None:
+        peers = CONFIG.peers
+
+    round_start = time.perf_counter()
+    result = "error"
+    try:
+        with tracing.span("consensus.round", pipelined=pipelined):
+            response = await _consensus_round(storage, client, pipeline, health, pipelined, peers)
+        result = response["status"]
+        return response
+    except RoundConflict:
+        result = "conflict"
+        raise
+    except ValueError:
+        result = "empty"
+        raise
+    finally:
+        observe_consensus_round(result, time.perf_counter() - round_start)
+
+
+async def _consensus_round(
+    storage: Storage,
+    client: httpx.AsyncClient,
+    pipeline: LeaderPipeline,
+    health: PeerHealthTracker,
+    pipelined: bool,
+    peers: List[str],
+) -> dict:
+    async with pipeline.round_lock:
+        if not pipelined:
+            # Tryb szeregowy nie może wyprzedzić commitu z trybu potokowego.
+            await pipeline.drain()
+
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        proposal = build_block_proposal(storage, timings=timings)
+        proposal.term = get_election().state.term
+        observe_consensus_phase("proposal_build", time.perf_counter() - start)
+        observe_consensus_phase("nonce_search", timings["nonce_search"])
+        lifecycle = get_tx_lifecycle()
+        lifecycle.mark_block(proposal.block, STAGE_PROPOSED)
+
+        votes = 1
+        total = 1
+        available = set(health.available_peers(peers))
+        skipped = len(peers) - len(available)
+
+        payload = proposal.model_dump(mode="json")
+
+        # Propozycja idzie do wszystkich peerów naraz; wolny peer nie blokuje reszty.
+        total += len(peers)
+        start = time.perf_counter()
+        with tracing.span("consensus.propose", **{"block.index": proposal.block.index}):
+            responses = await asyncio.gather(
+                *(propose_to_peer(client, health, base_url, payload) for base_url in peers)
+            )
+        observe_consensus_phase("vote_collection", time.perf_counter() - start)
+        for base_url, resp in zip(peers, responses):
+            vote = _peer_vote(resp, base_url in available)
+            inc_peer_vote(base_url, vote)
+            if vote == "accept":
+                votes += 1
+
+        if votes <= total // 2:
+            return {"status": "rejected", "votes": votes, "total": total, "skipped": skipped}
+
+        try:
+            storage.add_block(proposal.block)
+        except ValueError as exc:
+            raise RoundConflict(str(exc)) from exc
+        observe_tx_commit_latency(proposal.block.transactions)
+        lifecycle.mark_block(proposal.block, STAGE_COMMITTED)
+        observe_block_size(
+            len(proposal.block.transactions),
+            len(json.dumps(payload["block"], separators=(",", ":"))),
+        )
+
+        # Peery z otwartym obwodem dociągną blok synchronizacją.
+        if pipelined:
+            await pipeline.submit_commit(payload, health.available_peers(peers))
+        else:
+            start = time.perf_counter()
+            with tracing.span("consensus.commit", **{"block.index": proposal.block.index}):
+                await asyncio.gather(
+                    *(commit_to_peer(client, health, base_url, payload) for base_url in peers)
+                )
+            observe_consensus_phase("commit_fanout", time.perf_counter() - start)
+
+    return {
+        "status": "committed",
+        "block_hash": proposal.hash,
+        "votes": votes,
+        "total": total,
+        "skipped": skipped,
+        "pipelined": pipelined,
+    }
+
+
+COMMIT_BUFFER = CommitBuffer()
+PIPELINE = LeaderPipeline()
+
+
+def get_commit_buffer() -> CommitBuffer:
+    return node_scoped("commit_buffer", COMMIT_BUFFER)
+
+
+def get_pipeline() -> LeaderPipeline:
+    return node_scoped("pipeline", PIPELINE)
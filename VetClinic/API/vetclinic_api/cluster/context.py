@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from contextvars import ContextVar
+from typing import Any, Optional
+
+# Węzeł, w imieniu którego wykonuje się bieżący kod. Ustawiane tylko przez
+# klaster w jednym procesie (cluster/harness.py); w normalnym wdrożeniu
+# None i gettery zwracają globalne singletony modułów.
+NODE_CONTEXT: ContextVar[Optional[Any]] = ContextVar("node_context", default=None)
+
+
+def current_node() -> Optional[Any]:
+    return NODE_CONTEXT.get()
+
+
+def node_scoped(name: str, default: Any) -> Any:
+    """
+    Komponent `name` bieżącego węzła harnessu albo globalny `default`.
+    """
+    ctx = NODE_CONTEXT.get()
+    if ctx is None:
+        return default
+    return getattr(ctx, name)
@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, List, Optional
+
+import httpx
+from pydantic import BaseModel
+
+from vetclinic_api.admin.network_state import get_state
+from vetclinic_api.blockchain.core import Storage
+from vetclinic_api.cluster.config import CONFIG, NodeConfig
+from vetclinic_api.cluster.context import node_scoped
+from vetclinic_api.cluster.transport import peer_client
+from vetclinic_api.metrics import inc_election_started, set_election_state
+
+ELECTION_ENABLED = os.getenv("ELECTION_ENABLED", "0").lower() in ("1", "true", "yes", "on")
+ELECTION_TIMEOUT_MIN_MS = int(os.getenv("ELECTION_TIMEOUT_MIN_MS", "1500"))
+ELECTION_TIMEOUT_MAX_MS = max(
+    ELECTION_TIMEOUT_MIN_MS, int(os.getenv("ELECTION_TIMEOUT_MAX_MS", "3000"))
+)
+HEARTBEAT_INTERVAL_MS = int(os.getenv("HEARTBEAT_INTERVAL_MS", "300"))
+ELECTION_RPC_TIMEOUT_S = float(os.getenv("ELECTION_RPC_TIMEOUT_S", "0.5"))
+
+
+class VoteRequest(BaseModel):
+    term: int
+    candidate_id: int
+    candidate_url: str = ""
+    last_index: int = 0
+
+
+class VoteResponse(BaseModel):
+    term: int
+    vote_granted: bool
+
+
+class HeartbeatRequest(BaseModel):
+    term: int
+    leader_id: int
+    leader_url: str = ""
+    height: int = 0
+
+
+class HeartbeatResponse(BaseModel):
+    term: int
+    success: bool
+
+
+@dataclass
+class ElectionState:
+    term: int = 0
+    role: str = "follower"  # follower|candidate|leader
+    voted_for: Optional[int] = None
+    leader_id: Optional[int] = None
+    leader_url: str = ""
+    elections_started: int = 0
+    last_election_at: Optional[datetime] = None
+    last_failover_s: Optional[float] = None  # od ostatniego heartbeatu do objęcia władzy
+
+
+def _default_client_factory() -> httpx.AsyncClient:
+    return peer_client(timeout=ELECTION_RPC_TIMEOUT_S)
+
+
+class LeaderElection:
+    """
+    Wybory lidera w stylu Raft (kadencje + heartbeaty) po istniejącym /rpc.
+
+    Węzeł z LEADER_ID startuje jako lider kadencji 0, więc bez awarii klaster
+    zachowuje się jak przy statycznej konfiguracji. Follower, który nie dostał
+    heartbeatu przez losowy timeout, zostaje kandydatem: podbija kadencję
+    i prosi o głosy; głos dostaje tylko kandydat z łańcuchem co najmniej tak
+    długim jak głosującego. Lider bez kworum potwierdzeń ustępuje.
+
+    Aktualny lider jest wpisywany do CONFIG (leader_id/leader_url), więc
+    reszta kodu (`/tx/submit`, `mine_distributed`, harmonogram) działa bez zmian.
+    """
+
+    def __init__(
+        self,
+        config: NodeConfig = CONFIG,
+        client_factory: Callable[[], httpx.AsyncClient] = _default_client_factory,
+        timeout_ms: tuple = (ELECTION_TIMEOUT_MIN_MS, ELECTION_TIMEOUT_MAX_MS),
+        heartbeat_interval_ms: int = HEARTBEAT_INTERVAL_MS,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.config = config
+        self._client_factory = client_factory
+        self.timeout_ms = timeout_ms
+        self.heartbeat_interval_s = heartbeat_interval_ms / 1000.0
+        self._rng = rng or random.Random()
+        self._initial_leader = (config.leader_id, config.leader_url)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.bootstrap()
+
+    def bootstrap(self) -> None:
+        """
+        Stan startowy: lider z konfiguracji w kadencji 0.
+        """
+        leader_id, leader_url = self._initial_leader
+        with self._lock:
+            self.state = ElectionState()
+            now = time.monotonic()
+            self._last_heartbeat = now
+            self._last_quorum = now
+            self._last_sent = 0.0
+            self._reset_deadline(now)
+            if leader_id == self.config.node_id:
+                self.state.role = "leader"
+            self._set_leader(leader_id, leader_url, count=False)
+
+    @property
+    def is_leader(self) -> bool:
+        return self.state.role == "leader"
+
+    @property
+    def peers(self) -> List[str]:
+        return list(self.config.peers)
+
+    def _quorum(self, acks: int) -> bool:
+        return acks * 2 > len(self.peers) + 1
+
+    def _reset_deadline(self, now: float) -> None:
+        lo, hi = self.timeout_ms
+        self._deadline = now + self._rng.uniform(lo, hi) / 1000.0
+
+    def _set_leader(
+        self, leader_id: Optional[int], leader_url: str, count: bool = True
+    ) -> None:
+        changed = count and leader_id is not None and leader_id != self.state.leader_id
+        self.state.leader_id = leader_id
+        if leader_id == self.config.node_id:
+            leader_url = self.config.self_url
+        self.state.leader_url = leader_url
+        self.config.leader_id = leader_id or 0
+        self.config.leader_url = leader_url
+        set_election_state(self.state.term, self.is_leader, leader_changed=changed)
+
+    def _step_down(self, term: int) -> None:
+        if term > self.state.term:
+            self.state.term = term
+            self.state.voted_for = None
+        elif self.state.role == "follower":
+            return
+        # Nowa kadencja albo utrata przywództwa: lider nieznany do pierwszego heartbeatu.
+        self.state.role = "follower"
+        self._set_leader(None, "")
+
+    def observe_term(self, term: int) -> None:
+        """
+        Wyższa kadencja z dowolnej wiadomości -> węzeł staje się followerem.
+        """
+        with self._lock:
+            if term > self.state.term:
+                self._step_down(term)
+                self._reset_deadline(time.monotonic())
+
+    def handle_vote_request(self, req: VoteRequest, local_height: int) -> VoteResponse:
+        with self._lock:
+            if req.term < self.state.term:
+                return VoteResponse(term=self.state.term, vote_granted=False)
+            if req.term > self.state.term:
+                self._step_down(req.term)
+            up_to_date = req.last_index >= local_height
+            granted = up_to_date and self.state.voted_for in (None, req.candidate_id)
+            if granted:
+                self.state.voted_for = req.candidate_id
+                self._reset_deadline(time.monotonic())
+            return VoteResponse(term=self.state.term, vote_granted=granted)
+
+    def handle_heartbeat(self, req: HeartbeatRequest) -> HeartbeatResponse:
+        with self._lock:
+            if req.term < self.state.term:
+                return HeartbeatResponse(term=self.state.term, success=False)
+            if req.term > self.state.term or self.state.role != "follower":
+                self._step_down(req.term)
+            now = time.monotonic()
+            self._last_heartbeat = now
+            self._reset_deadline(now)
+            if req.leader_id != self.state.leader_id:
+                self._set_leader(req.leader_id, req.leader_url)
+            return HeartbeatResponse(term=self.state.term, success=True)
+
+    def status_payload(self) -> dict:
+        payload = asdict(self.state)
+        payload["node_id"] = self.config.node_id
+        payload["enabled"] = self.running
+        return payload
+
+    async def _post(
+        self, client: httpx.AsyncClient, base_url: str, path: str, body: BaseModel
+    ) -> Optional[dict]:
+        try:
+            resp = await client.post(
+                f"{base_url.rstrip('/')}{path}", json=body.model_dump(mode="json")
+            )
+        except Exception:
+            return None
+        if resp.status_code != 200:
+            return None
+        try:
+            return resp.json()
+        except ValueError:
+            return None
+
+    async def run_election(self, client: httpx.AsyncClient, storage: Storage) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            last_contact = self._last_heartbeat
+            self.state.term += 1
+            self.state.role = "candidate"
+            self.state.voted_for = self.config.node_id
+            self.state.elections_started += 1
+            self.state.last_election_at = datetime.utcnow()
+            self._set_leader(None, "")
+            self._reset_deadline(now)
+            term = self.state.term
+        inc_election_started()
+
+        req = VoteRequest(
+            term=term,
+            candidate_id=self.config.node_id,
+            candidate_url=self.config.self_url,
+            last_index=storage.get_tip().index,
+        )
+        results = await asyncio.gather(
+            *(self._post(client, p, "/rpc/request_vote", req) for p in self.peers)
+        )
+        votes = 1
+        for body in results:
+            if not body:
+                continue
+            if int(body.get("term", 0)) > term:
+                self.observe_term(int(body["term"]))
+                return False
+            if body.get("vote_granted"):
+                votes += 1
+
+        with self._lock:
+            if self.state.role != "candidate" or self.state.term != term:
+                return False
+            if not self._quorum(votes):
+                return False
+            self.state.role = "leader"
+            self.state.last_failover_s = round(time.monotonic() - last_contact, 3)
+            self._last_quorum = time.monotonic()
+            self._set_leader(self.config.node_id, self.config.self_url)
+        await self.send_heartbeats(client, storage)
+        return True
+
+    async def send_heartbeats(self, client: httpx.AsyncClient, storage: Storage) -> None:
+        term = self.state.term
+        req = HeartbeatRequest(
+            term=term,
+            leader_id=self.config.node_id,
+            leader_url=self.config.self_url,
+            height=storage.get_tip().index,
+        )
+        self._last_sent = time.monotonic()
+        results = await asyncio.gather(
+            *(self._post(client, p, "/rpc/heartbeat", req) for p in self.peers)
+        )
+        acks = 1
+        for body in results:
+            if not body:
+                continue
+            if int(body.get("term", 0)) > term:
+                self.observe_term(int(body["term"]))
+                return
+            if body.get("success"):
+                acks += 1
+
+        now = time.monotonic()
+        with self._lock:
+            if self.state.role != "leader" or self.state.term != term:
+                return
+            if self._quorum(acks):
+                self._last_quorum = now
+            elif now - self._last_quorum > self.timeout_ms[1] / 1000.0:
+                # Lider odcięty od większości ustępuje, żeby nie było dwóch liderów.
+                self._step_down(term)
+                self._reset_deadline(now)
+
+    async def tick(self, client: httpx.AsyncClient, storage: Storage) -> None:
+        if get_state().offline:
+            # Symulowana awaria: węzeł ani nie wysyła heartbeatów, ani nie kandyduje.
+            return
+        now = time.monotonic()
+        if self.is_leader:
+            if now - self._last_sent >= self.heartbeat_interval_s:
+                await self.send_heartbeats(client, storage)
+        elif now >= self._deadline:
+            await self.run_election(client, storage)
+
+    async def run_forever(self, storage_provider: Callable[[], Storage]) -> None:
+        interval = max(self.heartbeat_interval_s / 3, 0.02)
+        async with self._client_factory() as client:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    await self.tick(client, storage_provider())
+                except Exception:
+                    continue
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(
+        self, storage_provider: Callable[[], Storage], enabled: bool = ELECTION_ENABLED
+    ) -> Optional[asyncio.Task]:
+        if not enabled:
+            return None
+        self._task = asyncio.get_running_loop().create_task(
+            self.run_forever(storage_provider)
+        )
+        return self._task
+
+    async def stop(self) -> None:
+        task = self._task
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+
+
+ELECTION = LeaderElection()
+
+
+def get_election() -> LeaderElection:
+    return node_scoped("election", ELECTION)
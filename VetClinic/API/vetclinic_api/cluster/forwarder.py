@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, List, Optional, Tuple
+
+import httpx
+from pydantic import BaseModel, Field
+
+from vetclinic_api.blockchain.core import TxPayload, transaction_bytes
+from vetclinic_api.blockchain.lifecycle import STAGE_FORWARDED, get_tx_lifecycle
+from vetclinic_api.cluster.config import CONFIG
+from vetclinic_api.cluster.context import node_scoped
+from vetclinic_api.cluster.transport import peer_client
+from vetclinic_api.metrics import inc_tx_rejected, observe_forward_batch, set_forward_queue_depth
+
+TX_FORWARD_QUEUE_MAX = max(1, int(os.getenv("TX_FORWARD_QUEUE_MAX", "5000")))
+TX_FORWARD_BATCH_MAX = max(1, int(os.getenv("TX_FORWARD_BATCH_MAX", "100")))
+TX_FORWARD_LINGER_MS = int(os.getenv("TX_FORWARD_LINGER_MS", "20"))
+TX_FORWARD_RETRY_S = float(os.getenv("TX_FORWARD_RETRY_S", "0.5"))
+TX_FORWARD_MAX_ATTEMPTS = max(1, int(os.getenv("TX_FORWARD_MAX_ATTEMPTS", "5")))
+TX_FORWARD_TIMEOUT_S = float(os.getenv("TX_FORWARD_TIMEOUT_S", "5"))
+
+
+class ForwardedTx(BaseModel):
+    """
+    Transakcja przyjęta przez followera. Znacznik czasu nadaje follower,
+    więc id (sha256 treści) jest znane od razu i lider odtworzy to samo.
+    """
+
+    id: str
+    payload: TxPayload
+    timestamp: datetime
+
+    @classmethod
+    def create(cls, payload: TxPayload, timestamp: Optional[datetime] = None) -> "ForwardedTx":
+        timestamp = timestamp or datetime.utcnow()
+        tx_id = hashlib.sha256(transaction_bytes(payload, timestamp)).hexdigest()
+        return cls(id=tx_id, payload=payload, timestamp=timestamp)
+
+
+class ForwardBatch(BaseModel):
+    transactions: List[ForwardedTx] = Field(default_factory=list)
+
+
+def _default_client_factory() -> httpx.AsyncClient:
+    return peer_client(
+        timeout=TX_FORWARD_TIMEOUT_S,
+        limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+    )
+
+
+class TxForwarder:
+    """
+    Kolejka followera dla `/tx/submit`.
+
+    Transakcje trafiają do lokalnej kolejki (odpowiedź 202 z id od razu),
+    a pętla w tle zbiera je w paczki i wysyła do lidera (`/tx/submit_batch`)
+    jednym, trwałym klientem HTTP. Pełna kolejka = 429 dla klienta.
+    Paczka, której nie udało się dostarczyć, wraca na początek kolejki;
+    po `max_attempts` próbach transakcje są porzucane.
+    """
+
+    def __init__(
+        self,
+        leader_url_provider: Callable[[], str] = lambda: CONFIG.leader_url,
+        client_factory: Callable[[], httpx.AsyncClient] = _default_client_factory,
+        queue_max: int = TX_FORWARD_QUEUE_MAX,
+        batch_max: int = TX_FORWARD_BATCH_MAX,
+        linger_s: float = TX_FORWARD_LINGER_MS / 1000.0,
+        max_attempts: int = TX_FORWARD_MAX_ATTEMPTS,
+    ) -> None:
+        self._leader_url_provider = leader_url_provider
+        self._client_factory = client_factory
+        self.queue_max = queue_max
+        self.batch_max = batch_max
+        self.linger_s = linger_s
+        self.max_attempts = max_attempts
+        self._queue: Deque[Tuple[ForwardedTx, int]] = deque()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.forwarded = 0
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def enqueue(self, tx: ForwardedTx) -> bool:
+        with self._lock:
+            if len(self._queue) >= self.queue_max:
+                return False
+            self._queue.append((tx, 0))
+            depth = len(self._queue)
+        set_forward_queue_depth(depth)
+        return True
+
+    def contains(self, tx_id: str) -> bool:
+        with self._lock:
+            return any(tx.id == tx_id for tx, _ in self._queue)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._queue.clear()
+        set_forward_queue_depth(0)
+
+    def status_payload(self) -> dict:
+        return {
+            "queue_depth": self.depth,
+            "queue_max": self.queue_max,
+            "batch_max": self.batch_max,
+            "forwarded": self.forwarded,
+            "dropped": self.dropped,
+            "last_error": self.last_error,
+        }
+
+    def _take_batch(self) -> List[Tuple[ForwardedTx, int]]:
+        with self._lock:
+            count = min(self.batch_max, len(self._queue))
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _requeue(self, batch: List[Tuple[ForwardedTx, int]], count_attempt: bool) -> None:
+        dropped = 0
+        with self._lock:
+            for tx, attempts in reversed(batch):
+                attempts += 1 if count_attempt else 0
+                if attempts >= self.max_attempts:
+                    dropped += 1
+                    continue
+                self._queue.appendleft((tx, attempts))
+            depth = len(self._queue)
+        if dropped:
+            self.dropped += dropped
+            for _ in range(dropped):
+                inc_tx_rejected("forward_failed")
+        set_forward_queue_depth(depth)
+
+    async def flush_once(self, client: httpx.AsyncClient) -> int:
+        """
+        Wysyła jedną paczkę do lidera; zwraca liczbę przekazanych transakcji.
+        """
+        batch = self._take_batch()
+        if not batch:
+            return 0
+        leader_url = self._leader_url_provider()
+        if not leader_url:
+            # Wybory w toku – czekamy na lidera, bez zużywania prób.
+            self._requeue(batch, count_attempt=False)
+            return 0
+
+        body = ForwardBatch(transactions=[tx for tx, _ in batch])
+        try:
+            resp = await client.post(
+                f"{leader_url.rstrip('/')}/tx/submit_batch",
+                json=body.model_dump(mode="json"),
+            )
+        except httpx.HTTPError as exc:
+            self.last_error = f"leader unreachable: {exc}"
+            self._requeue(batch, count_attempt=True)
+            observe_forward_batch("error", len(batch))
+            return 0
+
+        if resp.status_code >= 500:
+            # 503 także wtedy, gdy adresat przestał być liderem.
+            self.last_error = f"leader returned {resp.status_code}"
+            self._requeue(batch, count_attempt=True)
+            observe_forward_batch("error", len(batch))
+            return 0
+        if resp.status_code >= 400:
+            self.last_error = f"batch rejected: {resp.status_code}"
+            self.dropped += len(batch)
+            for _ in batch:
+                inc_tx_rejected("validation")
+            observe_forward_batch("rejected", len(batch))
+            set_forward_queue_depth(self.depth)
+            return 0
+
+        self.forwarded += len(batch)
+        self.last_error = None
+        get_tx_lifecycle().mark_many([tx.id for tx, _ in batch], STAGE_FORWARDED)
+        observe_forward_batch("ok", len(batch))
+        set_forward_queue_depth(self.depth)
+        return len(batch)
+
+    async def drain(self, client: httpx.AsyncClient) -> bool:
+        """
+        Opróżnia kolejkę; False, jeśli lider nie przyjął paczki (ponowimy później).
+        """
+        while self._queue:
+            if await self.flush_once(client) == 0:
+                return False
+        return True
+
+    async def run_forever(self) -> None:
+        async with self._client_factory() as client:
+            try:
+                while True:
+                    await asyncio.sleep(self.linger_s)
+                    try:
+                        if not await self.drain(client):
+                            await asyncio.sleep(TX_FORWARD_RETRY_S)
+                    except Exception as exc:
+                        self.last_error = str(exc)
+            finally:
+                # Zamknięcie węzła: ostatnia próba przekazania tego, co w kolejce.
+                try:
+                    await self.drain(client)
+                except Exception:
+                    pass
+
+    def start(self) -> asyncio.Task:
+        self._task = asyncio.get_running_loop().create_task(self.run_forever())
+        return self._task
+
+    async def stop(self) -> None:
+        task = self._task
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+
+
+FORWARDER = TxForwarder()
+
+
+def get_forwarder() -> TxForwarder:
+    return node_scoped("forwarder", FORWARDER)
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+from vetclinic_api.admin.fault_schedule import FaultSchedule, FaultTimeline
+from vetclinic_api.admin.link_rules import LinkRules, LinkTable
+from vetclinic_api.admin.network_state import NetworkSimState
+from vetclinic_api.blockchain.core import InMemoryStorage, Storage
+from vetclinic_api.blockchain.lifecycle import TxLifecycle
+from vetclinic_api.cluster.chain_metrics import ChainMetricsCollector
+from vetclinic_api.cluster.config import NodeConfig
+from vetclinic_api.cluster.consensus import CommitBuffer, LeaderPipeline
+from vetclinic_api.cluster.context import NODE_CONTEXT
+from vetclinic_api.cluster.election import LeaderElection
+from vetclinic_api.cluster.forwarder import TxForwarder
+from vetclinic_api.cluster.health import PeerHealthTracker
+from vetclinic_api.cluster.scheduler import BlockScheduler, SchedulerSettings
+from vetclinic_api.cluster.sync import ChainSyncer
+from vetclinic_api.crypto.ed25519 import generate_keypair
+from vetclinic_api.middleware.response_cache import ReferenceCache
+
+
+def node_url(node_id: int) -> str:
+    return f"http://node{node_id}:8000"
+
+
+def ensure_leader_keys() -> None:
+    """
+    Wspólny klucz lidera dla wszystkich węzłów (jak w docker-compose).
+    """
+    if not (os.getenv("LEADER_PRIV_KEY") and os.getenv("LEADER_PUB_KEY")):
+        priv_b64, pub_b64 = generate_keypair()
+        os.environ["LEADER_PRIV_KEY"] = priv_b64
+        os.environ["LEADER_PUB_KEY"] = pub_b64
+
+
+@dataclass
+class NodeContext:
+    """
+    Komplet stanu jednego węzła w klastrze jednoprocesowym: to, co
+    w normalnym wdrożeniu jest globalnym singletonem modułu.
+    """
+
+    config: NodeConfig
+    storage: Storage
+    transport: httpx.AsyncBaseTransport
+    state: NetworkSimState = field(default_factory=NetworkSimState)
+    timeline: FaultTimeline = field(init=False)
+    links: LinkTable = field(default_factory=LinkTable)
+    commit_buffer: CommitBuffer = field(default_factory=CommitBuffer)
+    tx_lifecycle: TxLifecycle = field(default_factory=TxLifecycle)
+    chain_metrics: ChainMetricsCollector = field(default_factory=ChainMetricsCollector)
+    reference_cache: ReferenceCache = field(default_factory=ReferenceCache)
+    pipeline: LeaderPipeline = field(init=False)
+    election: LeaderElection = field(init=False)
+    peer_health: PeerHealthTracker = field(init=False)
+    syncer: ChainSyncer = field(init=False)
+    forwarder: TxForwarder = field(init=False)
+    scheduler: BlockScheduler = field(init=False)
+
+    def __post_init__(self) -> None:
+        cfg = self.config
+        self.timeline = FaultTimeline(node_id_provider=lambda: cfg.node_id)
+        self.pipeline = LeaderPipeline()
+        self.election = LeaderElection(config=cfg, rng=random.Random(cfg.node_id))
+        self.peer_health = PeerHealthTracker(peers_provider=lambda: cfg.peers)
+        self.syncer = ChainSyncer(peers_provider=lambda: cfg.peers)
+        self.forwarder = TxForwarder(leader_url_provider=lambda: cfg.leader_url)
+        self.scheduler = BlockScheduler(SchedulerSettings(enabled=False))
+
+    @property
+    def node_id(self) -> int:
+        return self.config.node_id
+
+
+class ClusterTransport(httpx.AsyncBaseTransport):
+    """
+    Transport peerów: http://nodeN:8000 -> aplikacja ASGI w kontekście węzła N.
+    Żądanie wykonuje się w tym samym procesie i pętli zdarzeń.
+    """
+
+    def __init__(self, cluster: "InProcessCluster") -> None:
+        self._cluster = cluster
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        node = self._cluster.by_host(request.url.host)
+        if node is None or node.node_id in self._cluster.down:
+            raise httpx.ConnectError(f"node unreachable: {request.url.host}", request=request)
+        token = NODE_CONTEXT.set(node)
+        try:
+            return await self._cluster.asgi.handle_async_request(request)
+        finally:
+            NODE_CONTEXT.reset(token)
+
+    async def aclose(self) -> None:
+        # Współdzielony przez klientów wszystkich węzłów – zamyka go klaster.
+        return None
+
+
+class InProcessCluster:
+    """
+    N instancji vetclinic_api w jednym procesie: osobny storage, CONFIG,
+    stan symulacji sieci i komponenty klastra dla każdego węzła, a RPC
+    między węzłami idą przez transport ASGI (bez sieci i Dockera).
+
+    Kod węzła wykonuje się w jego kontekście (`NODE_CONTEXT`), więc gettery
+    (`get_storage`, `get_state`, `get_election`, ... i CONFIG) zwracają
+    stan właściwego węzła. Metryki Prometheusa pozostają wspólne dla procesu.
+    """
+
+    def __init__(self, size: int = 3, leader_id: int = 1, app=None) -> None:
+        if app is None:
+            from vetclinic_api.main import app
+        ensure_leader_keys()
+        self.app = app
+        self.asgi = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        self.transport = ClusterTransport(self)
+        self.down: set = set()
+        self.nodes: Dict[int, NodeContext] = {}
+        ids = list(range(1, size + 1))
+        for node_id in ids:
+            config = NodeConfig(
+                node_id=node_id,
+                leader_id=leader_id,
+                peers=[node_url(i) for i in ids if i != node_id],
+                leader_url=node_url(leader_id),
+                self_url=node_url(node_id),
+            )
+            self.nodes[node_id] = NodeContext(
+                config=config, storage=InMemoryStorage(), transport=self.transport
+            )
+        self._started: List[int] = []
+
+    def __getitem__(self, node_id: int) -> NodeContext:
+        return self.nodes[node_id]
+
+    def by_host(self, host: str) -> Optional[NodeContext]:
+        for node in self.nodes.values():
+            if host == f"node{node.node_id}":
+                return node
+        return None
+
+    @property
+    def leader_id(self) -> Optional[int]:
+        leaders = [n.node_id for n in self.nodes.values() if n.election.is_leader]
+        return leaders[0] if len(leaders) == 1 else None
+
+    @contextmanager
+    def as_node(self, node_id: int) -> Iterator[NodeContext]:
+        """
+        Kod wewnątrz bloku widzi stan węzła `node_id` (np. bezpośrednie wywołania komponentów).
+        """
+        token = NODE_CONTEXT.set(self.nodes[node_id])
+        try:
+            yield self.nodes[node_id]
+        finally:
+            NODE_CONTEXT.reset(token)
+
+    def client(self, **kwargs) -> httpx.AsyncClient:
+        """
+        Klient "z zewnątrz" (jak curl): adresy http://nodeN:8000, bez X-Node-Id.
+        """
+        return httpx.AsyncClient(transport=self.transport, **kwargs)
+
+    def load_faults(
+        self, schedule: Optional[FaultSchedule] = None, links: Optional[LinkRules] = None
+    ) -> None:
+        for node in self.nodes.values():
+            if schedule is not None:
+                node.state.reseed(schedule.seed)
+                node.timeline.load(schedule)
+            if links is not None:
+                node.links.load(links)
+
+    async def start(self, election: bool = False, scheduler: bool = False) -> None:
+        """
+        Zadania w tle węzłów (jak w lifespan main.py), każde w kontekście swojego węzła.
+        """
+        for node in self.nodes.values():
+            with self.as_node(node.node_id):
+                node.peer_health.start()
+                node.forwarder.start()
+                node.election.start(lambda n=node: n.storage, enabled=election)
+                if scheduler:
+                    node.scheduler.update(enabled=True)
+                    node.scheduler.start(lambda n=node: n.storage)
+            self._started.append(node.node_id)
+
+    async def stop(self) -> None:
+        for node_id in self._started:
+            node = self.nodes[node_id]
+            with self.as_node(node_id):
+                await node.scheduler.stop()
+                await node.forwarder.stop()
+                await node.election.stop()
+                await node.peer_health.stop()
+                await node.syncer.stop()
+                await node.pipeline.drain()
+        self._started.clear()
+
+    async def __aenter__(self) -> "InProcessCluster":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    def tips(self) -> Dict[int, tuple]:
+        return {
+            node_id: (node.storage.get_tip().index, node.storage.get_tip().hash)
+            for node_id, node in self.nodes.items()
+        }
+
+    def converged(self, nodes: Optional[List[int]] = None) -> bool:
+        tips = self.tips()
+        ids = nodes or [i for i in tips if i not in self.down]
+        return len({tips[i] for i in ids}) == 1
+
+    async def wait_converged(
+        self, timeout: float = 10.0, nodes: Optional[List[int]] = None, poll_s: float = 0.01
+    ) -> Optional[float]:
+        """
+        Czas do zgodności czubków łańcucha; None po przekroczeniu `timeout`.
+        Węzły w tyle dociągają bloki synchronizacją.
+        """
+        start = time.perf_counter()
+        while time.perf_counter() - start < timeout:
+            if self.converged(nodes):
+                return time.perf_counter() - start
+            target = max(index for index, _ in self.tips().values())
+            for node_id, node in self.nodes.items():
+                if node_id in self.down or node.storage.get_tip().index >= target:
+                    continue
+                with self.as_node(node_id):
+                    node.syncer.request(node.storage, target)
+            await asyncio.sleep(poll_s)
+        return None
@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+from vetclinic_api.cluster.config import CONFIG
+from vetclinic_api.cluster.context import node_scoped
+from vetclinic_api.cluster.transport import peer_client
+from vetclinic_api.metrics import observe_peer_health
+
+PEER_HEALTH_INTERVAL_S = float(os.getenv("PEER_HEALTH_INTERVAL_S", "2"))
+PEER_HEALTH_TIMEOUT_S = float(os.getenv("PEER_HEALTH_TIMEOUT_S", "1"))
+PEER_EWMA_ALPHA = min(1.0, max(0.01, float(os.getenv("PEER_EWMA_ALPHA", "0.3"))))
+PEER_CB_FAILURES = max(1, int(os.getenv("PEER_CB_FAILURES", "3")))
+PEER_CB_RESET_S = float(os.getenv("PEER_CB_RESET_S", "10"))
+PEER_DEGRADED_TIMEOUT_S = float(os.getenv("PEER_DEGRADED_TIMEOUT_S", "1"))
+
+# Adaptacyjne timeouty: timeout = percentyl opóźnień peera * mnożnik, w granicach [min, domyślny].
+ADAPTIVE_TIMEOUT_ENABLED = os.getenv("ADAPTIVE_TIMEOUT_ENABLED", "1").lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+ADAPTIVE_TIMEOUT_PERCENTILE = float(os.getenv("ADAPTIVE_TIMEOUT_PERCENTILE", "0.99"))
+ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", "3"))
+ADAPTIVE_TIMEOUT_MIN_S = float(os.getenv("ADAPTIVE_TIMEOUT_MIN_S", "0.25"))
+ADAPTIVE_TIMEOUT_MIN_SAMPLES = max(1, int(os.getenv("ADAPTIVE_TIMEOUT_MIN_SAMPLES", "10")))
+PEER_LATENCY_WINDOW = max(10, int(os.getenv("PEER_LATENCY_WINDOW", "200")))
+
+# Okna opóźnień są osobne dla każdego RPC: tani heartbeat nie może ustalać
+# timeoutu propose/commit (PoW, podpisy, zapis do bazy).
+RPC_HEARTBEAT = "node-info"
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+@dataclass
+class PeerHealth:
+    url: str
+    ok: bool = False
+    node_info: Optional[dict] = None
+    ewma_latency_ms: Optional[float] = None
+    last_latency_ms: Optional[float] = None
+    consecutive_failures: int = 0
+    total_checks: int = 0
+    total_failures: int = 0
+    circuit: str = CIRCUIT_CLOSED
+    p50_latency_ms: Optional[float] = None
+    p99_latency_ms: Optional[float] = None
+    last_ok_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+
+
+def _default_client_factory() -> httpx.AsyncClient:
+    return peer_client(timeout=PEER_HEALTH_TIMEOUT_S)
+
+
+class PeerHealthTracker:
+    """
+    Stan zdrowia peerów utrzymywany w tle.
+
+    Co `interval` s równolegle odpytuje /rpc/node-info każdego peera, liczy
+    EWMA opóźnienia i serie porażek. Po `cb_failures` porażkach z rzędu
+    obwód peera się otwiera (konsensus go pomija); po `cb_reset_s` przechodzi
+    w half-open i kolejny heartbeat decyduje, czy wraca do gry.
+    Wyniki prawdziwych RPC konsensusu też trafiają tu (`record_*`);
+    opóźnienia (percentyle, adaptacyjny timeout) liczymy osobno dla pary
+    (peer, rpc), a p50/p99 w stanie peera – z heartbeatów.
+    """
+
+    def __init__(
+        self,
+        peers_provider: Callable[[], List[str]] = lambda: CONFIG.peers,
+        client_factory: Callable[[], httpx.AsyncClient] = _default_client_factory,
+        interval: float = PEER_HEALTH_INTERVAL_S,
+        alpha: float = PEER_EWMA_ALPHA,
+        cb_failures: int = PEER_CB_FAILURES,
+        cb_reset_s: float = PEER_CB_RESET_S,
+    ) -> None:
+        self._peers_provider = peers_provider
+        self._client_factory = client_factory
+        self.interval = interval
+        self.alpha = alpha
+        self.cb_failures = cb_failures
+        self.cb_reset_s = cb_reset_s
+        self._peers: Dict[str, PeerHealth] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.last_refresh: Optional[float] = None
+
+    def _get(self, url: str) -> PeerHealth:
+        health = self._peers.get(url)
+        if health is None:
+            health = self._peers[url] = PeerHealth(url=url)
+        return health
+
+    def _percentile_locked(self, url: str, q: float, rpc: str) -> Optional[float]:
+        samples = self._samples.get((url, rpc))
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        idx = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+        return ordered[idx]
+
+    def latency_percentile(self, url: str, q: float, rpc: str = RPC_HEARTBEAT) -> Optional[float]:
+        """
+        Percentyl opóźnień RPC `rpc` do peera w sekundach (okno ostatnich udanych wywołań).
+        """
+        with self._lock:
+            return self._percentile_locked(url, q, rpc)
+
+    def sample_count(self, url: str, rpc: str = RPC_HEARTBEAT) -> int:
+        with self._lock:
+            return len(self._samples.get((url, rpc), ()))
+
+    def record_success(
+        self,
+        url: str,
+        latency_s: float,
+        node_info: Optional[dict] = None,
+        rpc: str = RPC_HEARTBEAT,
+    ) -> None:
+        latency_ms = latency_s * 1000.0
+        with self._lock:
+            health = self._get(url)
+            health.ok = True
+            health.total_checks += 1
+            health.consecutive_failures = 0
+            health.last_latency_ms = round(latency_ms, 3)
+            if health.ewma_latency_ms is None:
+                health.ewma_latency_ms = round(latency_ms, 3)
+            else:
+                health.ewma_latency_ms = round(
+                    self.alpha * latency_ms + (1 - self.alpha) * health.ewma_latency_ms, 3
+                )
+            samples = self._samples.setdefault((url, rpc), deque(maxlen=PEER_LATENCY_WINDOW))
+            samples.append(latency_s)
+            if rpc == RPC_HEARTBEAT:
+                health.p50_latency_ms = round(self._percentile_locked(url, 0.5, rpc) * 1000.0, 3)
+                health.p99_latency_ms = round(self._percentile_locked(url, 0.99, rpc) * 1000.0, 3)
+            if node_info is not None:
+                health.node_info = node_info
+            health.last_ok_at = datetime.utcnow()
+            health.last_error = None
+            health.circuit = CIRCUIT_CLOSED
+            self._opened_at.pop(url, None)
+            snapshot = asdict(health)
+        observe_peer_health(url, snapshot, failed=False)
+
+    def record_failure(self, url: str, error: str) -> None:
+        with self._lock:
+            health = self._get(url)
+            health.ok = False
+            health.total_checks += 1
+            health.total_failures += 1
+            health.consecutive_failures += 1
+            health.last_error = error
+            if (
+                health.circuit == CIRCUIT_HALF_OPEN
+                or health.consecutive_failures >= self.cb_failures
+            ):
+                health.circuit = CIRCUIT_OPEN
+                self._opened_at[url] = time.monotonic()
+            snapshot = asdict(health)
+        observe_peer_health(url, snapshot, failed=True)
+
+    def _circuit(self, url: str) -> str:
+        health = self._peers.get(url)
+        if health is None:
+            return CIRCUIT_CLOSED
+        if health.circuit == CIRCUIT_OPEN:
+            opened = self._opened_at.get(url, 0.0)
+            if time.monotonic() - opened >= self.cb_reset_s:
+                health.circuit = CIRCUIT_HALF_OPEN
+        return health.circuit
+
+    def is_available(self, url: str) -> bool:
+        """
+        False dla peera z otwartym obwodem – konsensus go nie odpytuje.
+        """
+        with self._lock:
+            return self._circuit(url) != CIRCUIT_OPEN
+
+    def adaptive_timeout(self, url: str, default: float, rpc: str = RPC_HEARTBEAT) -> float:
+        """
+        Timeout z rozkładu opóźnień tego RPC do peera (percentyl * mnożnik);
+        przy zbyt małej liczbie próbek – domyślny.
+        """
+        if not ADAPTIVE_TIMEOUT_ENABLED:
+            return default
+        with self._lock:
+            if len(self._samples.get((url, rpc), ())) < ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+                return default
+            pct = self._percentile_locked(url, ADAPTIVE_TIMEOUT_PERCENTILE, rpc)
+        return min(default, max(ADAPTIVE_TIMEOUT_MIN_S, pct * ADAPTIVE_TIMEOUT_MULTIPLIER))
+
+    def timeout_for(self, url: str, default: float, rpc: str = RPC_HEARTBEAT) -> float:
+        """
+        Adaptacyjny timeout peera; peer z niedawnymi porażkami (albo
+        half-open) dostaje dodatkowo krótszy timeout.
+        """
+        timeout = self.adaptive_timeout(url, default, rpc)
+        with self._lock:
+            circuit = self._circuit(url)
+            health = self._peers.get(url)
+            degraded = circuit == CIRCUIT_HALF_OPEN or (
+                health is not None and health.consecutive_failures > 0
+            )
+        return min(timeout, PEER_DEGRADED_TIMEOUT_S) if degraded else timeout
+
+    def available_peers(self, peers: Optional[List[str]] = None) -> List[str]:
+        peers = list(self._peers_provider()) if peers is None else peers
+        return [p for p in peers if self.is_available(p)]
+
+    def snapshot(self) -> List[dict]:
+        peers = list(self._peers_provider())
+        with self._lock:
+            for url in peers:
+                self._circuit(url)
+            return [asdict(self._get(url)) for url in peers]
+
+    def is_stale(self) -> bool:
+        return (
+            self.last_refresh is None
+            or time.monotonic() - self.last_refresh > 2 * self.interval
+        )
+
+    async def _check(self, client: httpx.AsyncClient, url: str) -> None:
+        start = time.perf_counter()
+        try:
+            resp = await client.get(f"{url.rstrip('/')}/rpc/node-info")
+        except Exception as exc:
+            self.record_failure(url, str(exc) or type(exc).__name__)
+            return
+        elapsed = time.perf_counter() - start
+        if resp.status_code != 200:
+            self.record_failure(url, f"HTTP {resp.status_code}")
+            return
+        try:
+            payload = resp.json()
+        except ValueError:
+            payload = None
+        self.record_success(url, elapsed, payload)
+
+    async def refresh(self, client: Optional[httpx.AsyncClient] = None) -> List[dict]:
+        """
+        Jeden cykl heartbeatów do wszystkich peerów naraz.
+        """
+        peers = list(self._peers_provider())
+        if client is None:
+            async with self._client_factory() as own:
+                await asyncio.gather(*(self._check(own, p) for p in peers))
+        else:
+            await asyncio.gather(*(self._check(client, p) for p in peers))
+        self.last_refresh = time.monotonic()
+        return self.snapshot()
+
+    async def run_forever(self) -> None:
+        async with self._client_factory() as client:
+            while True:
+                try:
+                    await self.refresh(client)
+                except Exception:
+                    pass
+                await asyncio.sleep(self.interval)
+
+    def start(self) -> Optional[asyncio.Task]:
+        if self.interval <= 0 or not self._peers_provider():
+            return None
+        self._task = asyncio.get_running_loop().create_task(self.run_forever())
+        return self._task
+
+    async def stop(self) -> None:
+        task = self._task
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._peers.clear()
+            self._opened_at.clear()
+            self._samples.clear()
+        self.last_refresh = None
+
+
+PEER_HEALTH = PeerHealthTracker()
+
+
+def get_peer_health() -> PeerHealthTracker:
+    return node_scoped("peer_health", PEER_HEALTH)
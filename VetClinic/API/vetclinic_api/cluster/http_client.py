@@ -4,11 +4,13 @@ from typing import AsyncGenerator
 
 import httpx
 
+from vetclinic_api.cluster.transport import peer_client
+
 
 async def get_http_client() -> AsyncGenerator[httpx.AsyncClient, None]:
     """
     Dependency for FastAPI that provides a shared AsyncClient
     for the duration of a request.
     """
-    async with httpx.AsyncClient(timeout=5.0) as client:
+    async with peer_client(timeout=5.0) as client:
         yield client
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from vetclinic_api.blockchain.core import Storage
+from vetclinic_api.cluster.config import CONFIG
+from vetclinic_api.cluster.consensus import COMMIT_TIMEOUT_S, run_consensus_round
+from vetclinic_api.cluster.context import node_scoped
+from vetclinic_api.cluster.transport import peer_client
+from vetclinic_api.metrics import observe_scheduler_round
+
+BLOCK_SCHEDULER_ENABLED = os.getenv("BLOCK_SCHEDULER_ENABLED", "0").lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+BLOCK_MIN_TXS = max(1, int(os.getenv("BLOCK_MIN_TXS", "10")))
+BLOCK_MAX_WAIT_S = float(os.getenv("BLOCK_MAX_WAIT_S", "2"))
+BLOCK_SCHEDULER_TICK_S = float(os.getenv("BLOCK_SCHEDULER_TICK_S", "0.2"))
+BLOCK_BACKOFF_BASE_S = float(os.getenv("BLOCK_BACKOFF_BASE_S", "1"))
+BLOCK_BACKOFF_MAX_S = float(os.getenv("BLOCK_BACKOFF_MAX_S", "30"))
+
+
+@dataclass
+class SchedulerSettings:
+    enabled: bool = BLOCK_SCHEDULER_ENABLED
+    min_txs: int = BLOCK_MIN_TXS
+    max_wait_s: float = BLOCK_MAX_WAIT_S
+    tick_s: float = BLOCK_SCHEDULER_TICK_S
+    backoff_base_s: float = BLOCK_BACKOFF_BASE_S
+    backoff_max_s: float = BLOCK_BACKOFF_MAX_S
+
+
+@dataclass
+class SchedulerStatus:
+    rounds_committed: int = 0
+    rounds_failed: int = 0
+    consecutive_failures: int = 0
+    last_trigger: Optional[str] = None  # size|deadline
+    last_result: Optional[str] = None  # committed|rejected|error
+    last_error: Optional[str] = None
+    last_round_at: Optional[datetime] = None
+
+
+RoundFn = Callable[[Storage, httpx.AsyncClient], Awaitable[dict]]
+
+
+def _default_client_factory() -> httpx.AsyncClient:
+    return peer_client(timeout=COMMIT_TIMEOUT_S)
+
+
+def _age_seconds(timestamp: Optional[datetime]) -> Optional[float]:
+    if timestamp is None:
+        return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (datetime.utcnow() - timestamp).total_seconds()
+
+
+class BlockScheduler:
+    """
+    Automatyczna produkcja bloków na liderze.
+
+    Runda konsensusu startuje, gdy mempool osiągnie `min_txs` albo gdy
+    najstarsza oczekująca transakcja czeka dłużej niż `max_wait_s` – wiek
+    liczony od jej znacznika czasu, więc transakcje sprzed restartu albo
+    z czasu, gdy węzeł był followerem, nie czekają dodatkowego okna.
+    Po nieudanej rundzie kolejna próba jest odkładana wykładniczo
+    (`backoff_base_s` * 2^n, najwyżej `backoff_max_s`).
+    """
+
+    def __init__(
+        self,
+        settings: Optional[SchedulerSettings] = None,
+        client_factory: Callable[[], httpx.AsyncClient] = _default_client_factory,
+        round_fn: RoundFn = run_consensus_round,
+    ) -> None:
+        self.settings = settings or SchedulerSettings()
+        self.status = SchedulerStatus()
+        self._client_factory = client_factory
+        self._round_fn = round_fn
+        self._backoff_until = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def is_leader() -> bool:
+        return CONFIG.node_id == CONFIG.leader_id
+
+    def update(self, **changes) -> SchedulerSettings:
+        for key, value in changes.items():
+            if hasattr(self.settings, key):
+                setattr(self.settings, key, value)
+        if "enabled" in changes:
+            self._backoff_until = 0.0
+            self.status.consecutive_failures = 0
+        return self.settings
+
+    def backoff_remaining(self, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        return max(self._backoff_until - now, 0.0)
+
+    def status_payload(self) -> dict:
+        payload = asdict(self.settings)
+        payload.update(asdict(self.status))
+        payload["leader"] = self.is_leader()
+        payload["running"] = self._task is not None and not self._task.done()
+        payload["backoff_remaining_s"] = round(self.backoff_remaining(), 3)
+        return payload
+
+    def due(self, mempool_size: int, oldest_age_s: Optional[float]) -> Optional[str]:
+        """
+        Zwraca powód uruchomienia rundy (`size`/`deadline`) albo None.
+        `oldest_age_s` – wiek najstarszej transakcji w mempoolu.
+        """
+        if mempool_size <= 0:
+            return None
+        if mempool_size >= self.settings.min_txs:
+            return "size"
+        if oldest_age_s is not None and oldest_age_s >= self.settings.max_wait_s:
+            return "deadline"
+        return None
+
+    async def tick(self, storage: Storage) -> Optional[dict]:
+        """
+        Pojedynczy krok harmonogramu; zwraca wynik rundy, jeśli ją uruchomił.
+        """
+        if not self.settings.enabled or not self.is_leader():
+            return None
+        if time.monotonic() < self._backoff_until:
+            return None
+        size, oldest = storage.get_mempool_summary()
+        trigger = self.due(size, _age_seconds(oldest))
+        if trigger is None:
+            return None
+
+        self.status.last_trigger = trigger
+        self.status.last_round_at = datetime.utcnow()
+        try:
+            async with self._client_factory() as client:
+                result = await self._round_fn(storage, client)
+        except ValueError:
+            # Mempool opróżniony w międzyczasie (np. ręczne /chain/mine).
+            return None
+        except Exception as exc:
+            self._record_failure(trigger, "error", str(exc))
+            return None
+
+        if result.get("status") == "committed":
+            self.status.rounds_committed += 1
+            self.status.consecutive_failures = 0
+            self.status.last_result = "committed"
+            self.status.last_error = None
+            self._backoff_until = 0.0
+            observe_scheduler_round(trigger, "committed", 0.0)
+        else:
+            self._record_failure(
+                trigger,
+                "rejected",
+                f"votes {result.get('votes')}/{result.get('total')}",
+            )
+        return result
+
+    def _record_failure(self, trigger: str, result: str, error: str) -> None:
+        status = self.status
+        status.rounds_failed += 1
+        status.consecutive_failures += 1
+        status.last_result = result
+        status.last_error = error
+        delay = min(
+            self.settings.backoff_base_s * 2 ** (status.consecutive_failures - 1),
+            self.settings.backoff_max_s,
+        )
+        self._backoff_until = time.monotonic() + delay
+        observe_scheduler_round(trigger, result, delay)
+
+    async def run_forever(self, storage_provider: Callable[[], Storage]) -> None:
+        while True:
+            await asyncio.sleep(self.settings.tick_s)
+            try:
+                await self.tick(storage_provider())
+            except Exception as exc:
+                self.status.last_error = str(exc)
+
+    def start(self, storage_provider: Callable[[], Storage]) -> asyncio.Task:
+        """
+        Pętla startuje zawsze; wyłączony harmonogram (albo follower) tylko czeka,
+        więc można go włączyć w locie przez PUT /admin/scheduler.
+        """
+        self._task = asyncio.get_running_loop().create_task(
+            self.run_forever(storage_provider)
+        )
+        return self._task
+
+    async def stop(self) -> None:
+        task = self._task
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+
+
+SCHEDULER = BlockScheduler()
+
+
+def get_scheduler() -> BlockScheduler:
+    return node_scoped("scheduler", SCHEDULER)
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from vetclinic_api.blockchain.core import Block, Storage, validate_block_sequence
+from vetclinic_api.blockchain.lifecycle import STAGE_COMMITTED, get_tx_lifecycle
+from vetclinic_api.cluster.config import CONFIG
+from vetclinic_api.cluster.context import node_scoped
+from vetclinic_api.cluster.transport import peer_client
+from vetclinic_api.metrics import observe_sync
+
+SYNC_INTERVAL_S = float(os.getenv("SYNC_INTERVAL_S", "5"))  # 0 = brak okresowego sync
+SYNC_BATCH_SIZE = max(1, min(int(os.getenv("SYNC_BATCH_SIZE", "50")), 100))
+SYNC_PARALLEL = max(1, int(os.getenv("SYNC_PARALLEL", "3")))
+SYNC_TIMEOUT_S = float(os.getenv("SYNC_TIMEOUT_S", "5"))
+
+
+@dataclass
+class SyncStatus:
+    state: str = "idle"  # idle|syncing|ok|failed
+    local_height: int = 0
+    target_height: int = 0
+    blocks_applied: int = 0
+    last_error: Optional[str] = None
+    last_run_at: Optional[datetime] = None
+    last_duration_s: float = 0.0
+
+
+def _default_client_factory() -> httpx.AsyncClient:
+    return peer_client(timeout=SYNC_TIMEOUT_S)
+
+
+async def fetch_peer_height(client: httpx.AsyncClient, base_url: str) -> Optional[int]:
+    try:
+        resp = await client.get(f"{base_url.rstrip('/')}/chain/status")
+        if resp.status_code != 200:
+            return None
+        height = resp.json().get("height")
+        return int(height) if height is not None else None
+    except Exception:
+        return None
+
+
+async def fetch_block_range(
+    client: httpx.AsyncClient, base_url: str, start: int, end: int
+) -> List[Block]:
+    resp = await client.get(
+        f"{base_url.rstrip('/')}/chain/blocks",
+        params={"from": start, "to": end, "limit": end - start + 1},
+    )
+    resp.raise_for_status()
+    return [Block.model_validate(b) for b in resp.json().get("blocks", [])]
+
+
+def plan_ranges(start: int, target: int, batch_size: int) -> List[Tuple[int, int]]:
+    return [
+        (lo, min(lo + batch_size - 1, target))
+        for lo in range(start, target + 1, batch_size)
+    ]
+
+
+class ChainSyncer:
+    """
+    Doganianie łańcucha przez węzeł, który przegapił commity.
+
+    Wykrywa lukę (z indeksu propozycji/commitu albo z wysokości peerów),
+    pobiera brakujące zakresy z /chain/blocks równolegle od kilku peerów,
+    waliduje je hurtem i dokleja do lokalnego storage.
+    """
+
+    def __init__(
+        self,
+        peers_provider: Callable[[], List[str]] = lambda: CONFIG.peers,
+        client_factory: Callable[[], httpx.AsyncClient] = _default_client_factory,
+        batch_size: int = SYNC_BATCH_SIZE,
+        parallel: int = SYNC_PARALLEL,
+    ) -> None:
+        self._peers_provider = peers_provider
+        self._client_factory = client_factory
+        self.batch_size = batch_size
+        self.parallel = parallel
+        self.status = SyncStatus()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._periodic: Optional[asyncio.Task] = None
+
+    @property
+    def in_progress(self) -> bool:
+        return self._lock.locked()
+
+    def status_payload(self) -> dict:
+        payload = asdict(self.status)
+        payload["in_progress"] = self.in_progress
+        return payload
+
+    def request(self, storage: Storage, target: Optional[int] = None) -> bool:
+        """
+        Planuje synchronizację w tle (bez czekania). Zwraca False, jeśli
+        synchronizacja już trwa.
+        """
+        if self.in_progress or (self._task is not None and not self._task.done()):
+            return False
+        self._task = asyncio.get_running_loop().create_task(self.sync_once(storage, target))
+        return True
+
+    async def sync_once(self, storage: Storage, target: Optional[int] = None) -> SyncStatus:
+        async with self._lock:
+            return await self._sync(storage, target)
+
+    async def _sync(self, storage: Storage, target: Optional[int]) -> SyncStatus:
+        start = time.perf_counter()
+        status = self.status
+        status.state = "syncing"
+        status.last_error = None
+        status.blocks_applied = 0
+        status.last_run_at = datetime.utcnow()
+        local = storage.get_tip()
+        status.local_height = local.index
+
+        peers = list(self._peers_provider())
+        async with self._client_factory() as client:
+            heights = await self._peer_heights(client, peers)
+            best = max(heights.values(), default=local.index)
+            status.target_height = max(target or 0, best)
+
+            if status.target_height <= local.index:
+                return self._finish("ok", "noop", start)
+            if not heights:
+                status.last_error = "no reachable peers"
+                return self._finish("failed", "failed", start)
+
+            ranges = plan_ranges(local.index + 1, status.target_height, self.batch_size)
+            fetched = await self._fetch_ranges(client, ranges, heights)
+
+        blocks: List[Block] = []
+        for (lo, hi), batch in zip(ranges, fetched):
+            if not batch or batch[0].index != lo:
+                break
+            blocks.extend(batch)
+            if batch[-1].index != hi:
+                break
+
+        try:
+            validate_block_sequence(local, blocks)
+            storage.add_blocks(blocks)
+        except Exception as exc:
+            status.last_error = str(exc)
+            return self._finish("failed", "failed", start)
+
+        lifecycle = get_tx_lifecycle()
+        for block in blocks:
+            lifecycle.mark_block(block, STAGE_COMMITTED)
+        status.blocks_applied = len(blocks)
+        status.local_height = local.index + len(blocks)
+        if status.local_height < status.target_height:
+            status.last_error = "peers returned incomplete ranges"
+            return self._finish("failed", "partial", start)
+        return self._finish("ok", "ok", start)
+
+    def _finish(self, state: str, result: str, start: float) -> SyncStatus:
+        status = self.status
+        status.state = state
+        status.last_duration_s = time.perf_counter() - start
+        observe_sync(
+            result,
+            status.blocks_applied,
+            status.target_height - status.local_height,
+            status.last_duration_s,
+        )
+        return status
+
+    async def _peer_heights(
+        self, client: httpx.AsyncClient, peers: List[str]
+    ) -> Dict[str, int]:
+        results = await asyncio.gather(*(fetch_peer_height(client, p) for p in peers))
+        return {peer: h for peer, h in zip(peers, results) if h is not None}
+
+    async def _fetch_ranges(
+        self,
+        client: httpx.AsyncClient,
+        ranges: List[Tuple[int, int]],
+        heights: Dict[str, int],
+    ) -> List[List[Block]]:
+        sem = asyncio.Semaphore(self.parallel)
+
+        async def _fetch(i: int, lo: int, hi: int) -> List[Block]:
+            candidates = [p for p, h in heights.items() if h >= hi] or list(heights)
+            async with sem:
+                for attempt in range(len(candidates)):
+                    peer = candidates[(i + attempt) % len(candidates)]
+                    try:
+                        batch = await fetch_block_range(client, peer, lo, hi)
+                    except Exception:
+                        continue
+                    # Peer po bootstrapie ze snapshotu może nie mieć starszych bloków.
+                    if batch and batch[0].index == lo:
+                        return batch
+            return []
+
+        return await asyncio.gather(
+            *(_fetch(i, lo, hi) for i, (lo, hi) in enumerate(ranges))
+        )
+
+    async def run_periodic(
+        self, storage_provider: Callable[[], Storage], interval: float
+    ) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sync_once(storage_provider())
+            except Exception as exc:
+                self.status.state = "failed"
+                self.status.last_error = str(exc)
+
+    def start_periodic(
+        self, storage_provider: Callable[[], Storage], interval: float = SYNC_INTERVAL_S
+    ) -> Optional[asyncio.Task]:
+        if interval <= 0 or not self._peers_provider():
+            return None
+        self._periodic = asyncio.get_running_loop().create_task(
+            self.run_periodic(storage_provider, interval)
+        )
+        return self._periodic
+
+    async def stop(self) -> None:
+        for task in (self._periodic, self._task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._periodic = None
+        self._task = None
+
+
+SYNCER = ChainSyncer()
+
+
+def get_syncer() -> ChainSyncer:
+    return node_scoped("syncer", SYNCER)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Optional
+
+import httpx
+
+from vetclinic_api import tracing
+from vetclinic_api.admin.link_rules import LinkTable, get_links
+from vetclinic_api.cluster.config import CONFIG, node_headers, peer_node_id
+from vetclinic_api.cluster.context import current_node
+from vetclinic_api.metrics import inc_link_fault
+
+
+class LinkShapingTransport(httpx.AsyncBaseTransport):
+    """
+    Transport klienta RPC stosujący reguły łącza self -> peer
+    (blokada, latencja z jitterem, limit pasma, drop) przed wysłaniem żądania.
+    Zablokowane / zgubione żądanie kończy się błędem połączenia, jak w prawdziwej sieci.
+    """
+
+    def __init__(
+        self,
+        inner: Optional[httpx.AsyncBaseTransport] = None,
+        links: Optional[LinkTable] = None,
+        node_id_provider=lambda: CONFIG.node_id,
+    ) -> None:
+        self._inner = inner or httpx.AsyncHTTPTransport()
+        self._links = links or get_links()
+        self._node_id_provider = node_id_provider
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        links = self._links
+        if links.active:
+            dst = peer_node_id(str(request.url))
+            size = len(request.content) if isinstance(request.stream, httpx.ByteStream) else 0
+            effect = links.effect(self._node_id_provider(), dst, size)
+            if effect is not None:
+                if effect.blocked:
+                    inc_link_fault(dst, "outbound", "blocked")
+                    raise httpx.ConnectError("Link blocked (simulated)", request=request)
+                if effect.delay_s > 0:
+                    await asyncio.sleep(effect.delay_s)
+                if effect.dropped:
+                    inc_link_fault(dst, "outbound", "dropped")
+                    raise httpx.ReadTimeout("Link drop (simulated)", request=request)
+        return await self._inner.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def peer_client(**kwargs) -> httpx.AsyncClient:
+    """
+    Klient HTTP do innych węzłów: nagłówek X-Node-Id + reguły łączy.
+    W klastrze jednoprocesowym żądania idą transportem harnessu (ASGI).
+    """
+    limits = kwargs.pop("limits", None)
+    node = current_node()
+    if node is not None:
+        inner = node.transport
+    else:
+        inner = httpx.AsyncHTTPTransport(limits=limits) if limits else None
+    if tracing.enabled():
+        # Kontekst spanu w nagłówku traceparent – span peera będzie dzieckiem naszego.
+        kwargs.setdefault("event_hooks", {"request": [tracing.inject_request_hook]})
+    return httpx.AsyncClient(
+        headers=node_headers(), transport=LinkShapingTransport(inner), **kwargs
+    )
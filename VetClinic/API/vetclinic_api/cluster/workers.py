@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import uvicorn
+
+from vetclinic_api.admin.network_state import (
+    add_state_listener,
+    load_state_file,
+    remove_state_listener,
+    save_state_file,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows – tylko tryb jednego workera
+    fcntl = None
+
+# Liczba workerów uvicorna na węźle (vetclinic_api.serve). 1 = dotychczasowy tryb.
+UVICORN_WORKERS = max(1, int(os.getenv("UVICORN_WORKERS", "1")))
+MULTI_WORKER = UVICORN_WORKERS > 1
+
+RUNTIME_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else "/tmp"
+OWNER_LOCK_FILE = os.getenv("OWNER_LOCK_FILE", os.path.join(RUNTIME_DIR, "vetclinic-owner.lock"))
+OWNER_SOCKET = os.getenv("OWNER_SOCKET", os.path.join(RUNTIME_DIR, "vetclinic-owner.sock"))
+SHARED_STATE_FILE = os.getenv(
+    "SHARED_STATE_FILE", os.path.join(RUNTIME_DIR, "vetclinic-netsim.json")
+)
+SHARED_STATE_POLL_S = float(os.getenv("SHARED_STATE_POLL_S", "0.5"))
+
+# Ścieżki ze stanem w pamięci właściciela (konsensus, mempool w drodze do lidera,
+# wybory, symulacja awarii) – pozostałe workery przekazują je właścicielowi.
+OWNER_PATH_PREFIXES = ("/rpc", "/chain", "/tx", "/admin", "/peers", "/blockchain")
+
+
+class _OwnerServer(uvicorn.Server):
+    # Sygnały obsługuje główny serwer workera – ten tylko dzieli jego pętlę.
+    @contextmanager
+    def capture_signals(self):
+        yield
+
+
+class WorkerRole:
+    """
+    Rola procesu w trybie wielu workerów uvicorna.
+
+    Dokładnie jeden worker (ten, który dostał blokadę pliku `lock_file`)
+    jest właścicielem: uruchamia zadania w tle węzła (konsensus, sync,
+    wybory, heartbeaty) i dodatkowo nasłuchuje na gnieździe unix
+    `socket_path`. Pozostałe obsługują CRUD (wspólna baza) i przekazują
+    ścieżki OWNER_PATH_PREFIXES właścicielowi. Stan symulacji sieci
+    właściciel zapisuje do `state_file`, a workery go odczytują.
+    """
+
+    def __init__(
+        self,
+        workers: int = UVICORN_WORKERS,
+        lock_file: str = OWNER_LOCK_FILE,
+        socket_path: str = OWNER_SOCKET,
+        state_file: str = SHARED_STATE_FILE,
+        poll_s: float = SHARED_STATE_POLL_S,
+    ) -> None:
+        self.multi_worker = workers > 1
+        self.lock_file = lock_file
+        self.socket_path = socket_path
+        self.state_file = state_file
+        self.poll_s = poll_s
+        self.is_owner = not self.multi_worker
+        self._lock_fd: Optional[int] = None
+        self._server: Optional[_OwnerServer] = None
+        self._server_task: Optional[asyncio.Task] = None
+        self._state_mtime: Optional[float] = None
+        self._state_checked = 0.0
+
+    def acquire(self) -> bool:
+        """
+        Próba zostania właścicielem (nieblokująca). Blokadę trzyma proces do końca życia,
+        więc po awarii właściciela przejmie ją kolejny uruchomiony worker.
+        """
+        if not self.multi_worker:
+            self.is_owner = True
+            return True
+        if fcntl is None:
+            raise RuntimeError("UVICORN_WORKERS > 1 requires fcntl (POSIX)")
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            self.is_owner = False
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._lock_fd = fd
+        self.is_owner = True
+        return True
+
+    def release(self) -> None:
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _publish_state(self, _state) -> None:
+        save_state_file(self.state_file)
+
+    async def start(self, app) -> None:
+        """
+        Właściciel: gniazdo unix dla przekazanych żądań + publikacja stanu symulacji.
+        """
+        if not (self.multi_worker and self.is_owner):
+            return
+        save_state_file(self.state_file)
+        add_state_listener(self._publish_state)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        config = uvicorn.Config(
+            app, uds=self.socket_path, lifespan="off", log_config=None, access_log=False
+        )
+        self._server = _OwnerServer(config)
+        self._server_task = asyncio.get_running_loop().create_task(self._server.serve())
+
+    async def stop(self) -> None:
+        remove_state_listener(self._publish_state)
+        if self._server is not None:
+            self._server.should_exit = True
+            try:
+                await self._server_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._server = None
+            self._server_task = None
+        self.release()
+
+    def sync_state(self) -> None:
+        """
+        Worker (nie właściciel): odświeża stan symulacji sieci z pliku, najwyżej co `poll_s`.
+        """
+        if not self.multi_worker or self.is_owner:
+            return
+        now = time.monotonic()
+        if now - self._state_checked < self.poll_s:
+            return
+        self._state_checked = now
+        self._state_mtime = load_state_file(self.state_file, self._state_mtime)
+
+    def forwards(self, path: str) -> bool:
+        return self.multi_worker and not self.is_owner and path.startswith(OWNER_PATH_PREFIXES)
+
+
+WORKER_ROLE = WorkerRole()
+
+
+def get_worker_role() -> WorkerRole:
+    return WORKER_ROLE
@@ -4,10 +4,10 @@ import os
 
 # znajdź katalog API (tam, gdzie leży .env)
 BASE_DIR = Path(__file__).resolve().parent.parent.parent  # .../VetClinic/API
-DOTENV = BASE_DIR / ".env"
-if not DOTENV.exists():
-    raise FileNotFoundError(f"Nie znalazłem pliku .env pod {DOTENV}")
-load_dotenv(DOTENV)
+DOTENV = Path(os.getenv("VETCLINIC_ENV_FILE", BASE_DIR / ".env"))
+# .env jest opcjonalny – w kontenerze konfiguracja przychodzi ze zmiennych środowiska.
+if DOTENV.exists():
+    load_dotenv(DOTENV)
 
 API_BASE_URL = "http://127.0.0.1:8000"
 
@@ -1,8 +1,29 @@
-from sqlalchemy import create_engine
+import os
+import threading
+import weakref
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from vetclinic_api.core.config import DATABASE_URL
 
-engine       = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# Kilka workerów uvicorna pisze do jednego pliku SQLite: WAL (czytelnicy nie blokują
+# pisarza) i czekanie na blokadę zamiast natychmiastowego "database is locked".
+MULTI_WORKER = int(os.getenv("UVICORN_WORKERS", "1")) > 1
+SQLITE_BUSY_TIMEOUT_S = float(os.getenv("SQLITE_BUSY_TIMEOUT_S", "10" if MULTI_WORKER else "5"))
+
+engine       = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_S},
+)
+
+if MULTI_WORKER:
+    @event.listens_for(engine, "connect")
+    def _sqlite_wal(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base         = declarative_base()
 
@@ -14,8 +35,22 @@ import vetclinic_api.models.users
 import vetclinic_api.models.facility
 import vetclinic_api.models_blockchain
 
-# Tworzymy wszystkie tabele w produkcyjnej bazie
-Base.metadata.create_all(bind=engine)
+_initialized = weakref.WeakSet()
+_init_lock = threading.Lock()
+
+
+def init_db(bind=None) -> None:
+    """
+    Zakłada brakujące tabele – raz na silnik (lifespan aplikacji, serve.py,
+    storage z własną sesją w testach). Migracje schematu robi Alembic.
+    """
+    bind = engine if bind is None else bind
+    with _init_lock:
+        if bind in _initialized:
+            return
+        Base.metadata.create_all(bind=bind)
+        _initialized.add(bind)
+
 
 def get_db():
     """Funkcja zależności, która tworzy sesję bazy danych i ją zamyka po wykorzystaniu."""
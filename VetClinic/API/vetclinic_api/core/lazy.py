@@ -0,0 +1,45 @@
+import importlib
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule:
+    """
+    Moduł importowany przy pierwszym dostępie do atrybutu.
+
+    Dla opcjonalnych integracji (stripe, requests, pyotp, qrcode, passlib):
+    import vetclinic_api.main ich nie ładuje, a kod modułu dalej pisze
+    `stripe.checkout...`. setattr trafia do prawdziwego modułu,
+    więc monkeypatch w testach działa bez zmian.
+    """
+
+    __slots__ = ("_name", "_module")
+
+    def __init__(self, name: str) -> None:
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+
+    def _load(self) -> ModuleType:
+        module: Optional[ModuleType] = object.__getattribute__(self, "_module")
+        if module is None:
+            module = importlib.import_module(object.__getattribute__(self, "_name"))
+            object.__setattr__(self, "_module", module)
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value: Any) -> None:
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr: str) -> None:
+        delattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        name = object.__getattribute__(self, "_name")
+        loaded = object.__getattribute__(self, "_module") is not None
+        return f"<lazy module {name!r}{'' if loaded else ' (not loaded)'}>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
@@ -1,25 +1,32 @@
 import jwt
 import datetime
-import pyotp
-import qrcode
 import os
-from passlib.context import CryptContext
+from functools import lru_cache
 from sqlalchemy.orm import Session
 from jwt import encode 
 import secrets
+from vetclinic_api.core.lazy import lazy_import
 from vetclinic_api.models.users import Client, Doctor, Consultant
 
+# Ładowane przy pierwszym użyciu (logowanie, TOTP), nie przy starcie aplikacji.
+pyotp = lazy_import("pyotp")
+qrcode = lazy_import("qrcode")
+passlib_context = lazy_import("passlib.context")
+
 # Ustawienia do JWT
 SECRET_KEY = secrets.token_hex(32)
 ALGORITHM = "HS256"
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    """Wspólny CryptContext (bcrypt) – tworzony przy pierwszym haszowaniu."""
+    return passlib_context.CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def get_password_hash(plain_password: str) -> str:
-    return pwd_context.hash(plain_password)
+    return get_pwd_context().hash(plain_password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_user_by_email(db: Session, email: str):
     # Przeszukujemy wszystkie tabele, aż znajdziemy użytkownika o danym emailu
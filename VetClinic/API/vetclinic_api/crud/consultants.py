@@ -1,19 +1,13 @@
 # vetclinic_api/crud/consultants.py
 
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 import secrets
 
+from vetclinic_api.core.security import get_password_hash
 from vetclinic_api.models.users import Consultant
 from vetclinic_api.schemas.users import ConsultantCreate, UserUpdate
 from vetclinic_api.services.email_service import EmailService
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
 
 def create_consultant(
     db: Session,
@@ -1,16 +1,11 @@
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 import secrets
 
+from vetclinic_api.core.security import get_password_hash
 from vetclinic_api.models.users import Doctor
 from vetclinic_api.schemas.users import DoctorCreate, UserUpdate
 from vetclinic_api.services.email_service import EmailService
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
 def create_doctor(db: Session, doc_in: DoctorCreate) -> tuple[str, Doctor]:
     raw_password = secrets.token_urlsafe(16)
     hashed       = get_password_hash(raw_password)
@@ -1,18 +1,13 @@
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 import secrets
 
+from vetclinic_api.core.security import get_password_hash
 from vetclinic_api.models.users import Client
 from vetclinic_api.models.animals import Animal
 from vetclinic_api.models.appointments import Appointment
 from vetclinic_api.schemas.users import ClientCreate, UserUpdate
 from vetclinic_api.services.email_service import EmailService
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
 def create_client(db: Session, cli_in: ClientCreate) -> Client:
     raw_password = secrets.token_urlsafe(16)
     hashed       = get_password_hash(raw_password)
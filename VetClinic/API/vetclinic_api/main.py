@@ -1,16 +1,30 @@
 """
 Główny punkt wejścia aplikacji FastAPI.
-Importuje wszystkie moduły, rejestruje routery, konfiguruje bazę danych.
+Importuje wszystkie moduły, rejestruje routery; schemat bazy zakłada lifespan.
 """
 
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from dotenv import load_dotenv
-load_dotenv()
 import uvicorn
 
+# .env (opcjonalny) przed modułami czytającymi konfigurację z env przy imporcie.
+import vetclinic_api.core.config  # noqa: F401
 from vetclinic_api.admin.network_router import router as admin_network_router
-from vetclinic_api.metrics import metrics_router, instrumentator_middleware
+from vetclinic_api.blockchain.deps import get_storage
+from vetclinic_api.cluster.bootstrap import bootstrap_from_snapshot
+from vetclinic_api.cluster.chain_metrics import get_chain_metrics
+from vetclinic_api.cluster.election import get_election
+from vetclinic_api.cluster.forwarder import get_forwarder
+from vetclinic_api.cluster.health import get_peer_health
+from vetclinic_api.cluster.scheduler import get_scheduler
+from vetclinic_api.cluster.sync import get_syncer
+from vetclinic_api.cluster.workers import get_worker_role
+from vetclinic_api.metrics import mark_process_dead, metrics_router
 from vetclinic_api.middleware.chaos import ChaosMiddleware
+from vetclinic_api.middleware.owner_proxy import OwnerProxyMiddleware
+from vetclinic_api.middleware.response_cache import ReferenceCacheMiddleware
 from vetclinic_api.routers import (
     users,
     doctors,
@@ -28,12 +42,58 @@ from vetclinic_api.routers import (
     cluster,
     admin,
 )
-from vetclinic_api.core.database import engine, Base
+from vetclinic_api.core.database import init_db
+from vetclinic_api import tracing
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Schemat zakładany raz, przy starcie (a nie przy imporcie modułów).
+    init_db()
+    # Spany (TRACING_EXPORTER) w każdym workerze – plik śladów otwierany dopiero tutaj.
+    owns_tracing = not tracing.enabled() and tracing.setup_tracing()
+    # Kilka workerów (UVICORN_WORKERS > 1): stan klastra ma tylko jeden – właściciel.
+    role = get_worker_role()
+    if not role.acquire():
+        yield
+        if owns_tracing:
+            tracing.shutdown_tracing()
+        mark_process_dead(os.getpid())
+        return
+    # Świeży węzeł startuje ze snapshotu (SNAPSHOT_SOURCE), resztę dociąga sync.
+    if await bootstrap_from_snapshot(get_storage()) is not None:
+        get_syncer().request(get_storage())
+    # Okresowe doganianie łańcucha od peerów (tylko gdy są skonfigurowani).
+    get_syncer().start_periodic(get_storage)
+    # Heartbeaty do peerów: cache dla /peers i circuit breaker dla konsensusu.
+    get_peer_health().start()
+    # Wybory lidera (ELECTION_ENABLED=1): heartbeaty i failover po /rpc.
+    get_election().start(get_storage)
+    # Follower przekazuje /tx/submit do lidera paczkami (kolejka w tle).
+    get_forwarder().start()
+    # Lider sam produkuje bloki (próg mempoola / maksymalny czas oczekiwania).
+    get_scheduler().start(get_storage)
+    # Metryki wysokości / mempoola / opóźnienia względem peerów (bez /chain/status).
+    get_chain_metrics().start(get_storage)
+    # Właściciel przyjmuje żądania przekazane przez pozostałe workery.
+    await role.start(_app)
+    yield
+    await role.stop()
+    await get_chain_metrics().stop()
+    await get_scheduler().stop()
+    await get_forwarder().stop()
+    await get_election().stop()
+    await get_peer_health().stop()
+    await get_syncer().stop()
+    if owns_tracing:
+        tracing.shutdown_tracing()
+    mark_process_dead(os.getpid())
+
 
 app = FastAPI(
     title="System Zarządzania Kliniką Weterynaryjną",
     description="Aplikacja wykorzystująca FastAPI, SQLAlchemy oraz defensywne programowanie.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Rejestracja routerów
@@ -56,11 +116,12 @@ app.include_router(admin.router)
 app.include_router(admin_network_router)
  
 
-app.middleware("http")(instrumentator_middleware)
-app.add_middleware(ChaosMiddleware)
-
-# Tworzenie tabel w bazie danych (jeśli nie istnieją)
-Base.metadata.create_all(bind=engine)
+# Najbardziej wewnętrzna: cache danych referencyjnych (placówki, lekarze, konsultanci).
+app.add_middleware(ReferenceCacheMiddleware)
+# Chaos + metryki HTTP w jednej warstwie czystego ASGI.
+app.add_middleware(ChaosMiddleware, instrument=True)
+# Najbardziej zewnętrzna: w trybie wielu workerów ścieżki klastra -> właściciel.
+app.add_middleware(OwnerProxyMiddleware)
 
 if __name__ == "__main__":
     uvicorn.run("vetclinic_api.main:app", host="127.0.0.1", port=8000, reload=True)
@@ -2,20 +2,32 @@ from __future__ import annotations
 
 import os
 import time
-from typing import Callable, Optional
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import urlparse
 
 from fastapi import APIRouter, Request, Response
 from prometheus_client import (
     CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
     Counter,
     Gauge,
     Histogram,
     generate_latest,
+    multiprocess,
 )
+from prometheus_client.openmetrics import exposition as openmetrics
+from starlette.routing import Match
 
 # Stała nazwa noda (node1..node6) z env, żeby nie robić losowej kardynalności
 NODE_NAME = os.getenv("NODE_NAME", "node-local")
 
+# Kilka workerów uvicorna (vetclinic_api.serve): wartości w plikach mmap w tym katalogu,
+# /metrics agreguje je ze wszystkich procesów. Gauge: `multiprocess_mode` mówi jak
+# (livemax – stan ustawiany przez proces właściciela konsensusu, livesum – suma workerów).
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "")
+
 metrics_router = APIRouter(tags=["metrics"])
 
 # -----------------------
@@ -34,12 +46,47 @@ http_request_duration_seconds = Histogram(
     buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
 )
 
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+    ["method"],  # trasa nie jest znana przed routingiem
+    multiprocess_mode="livesum",
+)
+
+_SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+http_request_size_bytes = Histogram(
+    "http_request_size_bytes",
+    "HTTP request body size in bytes",
+    ["method", "path"],
+    buckets=_SIZE_BUCKETS,
+)
+
+http_response_size_bytes = Histogram(
+    "http_response_size_bytes",
+    "HTTP response body size in bytes",
+    ["method", "path"],
+    buckets=_SIZE_BUCKETS,
+)
+
 http_exceptions_total = Counter(
     "http_exceptions_total",
     "Total number of exceptions raised during request handling",
     ["exception_type", "path"],
 )
 
+http_cache_requests_total = Counter(
+    "http_cache_requests_total",
+    "Reference data cache lookups (GET /facilities, /doctors, /consultants)",
+    ["node", "namespace", "result"],  # hit | not_modified | miss
+)
+
+http_cache_invalidations_total = Counter(
+    "http_cache_invalidations_total",
+    "Reference data cache invalidations caused by writes",
+    ["node", "namespace"],
+)
+
 # -----------------------
 # Blockchain / consensus metrics (minimum Stage 1)
 # -----------------------
@@ -47,12 +94,35 @@ blockchain_chain_height = Gauge(
     "blockchain_chain_height",
     "Current blockchain height on node",
     ["node"],
+    multiprocess_mode="livemax",
 )
 
 blockchain_mempool_size = Gauge(
     "blockchain_mempool_size",
     "Current mempool size on node",
     ["node"],
+    multiprocess_mode="livemax",
+)
+
+blockchain_last_block_age_seconds = Gauge(
+    "blockchain_last_block_age_seconds",
+    "Seconds since the timestamp of the local chain tip",
+    ["node"],
+    multiprocess_mode="livemax",
+)
+
+blockchain_verified_height = Gauge(
+    "blockchain_verified_height",
+    "Highest block index verified (links, merkle root, PoW, leader signature) on node",
+    ["node"],
+    multiprocess_mode="livemax",
+)
+
+blockchain_peer_lag_blocks = Gauge(
+    "blockchain_peer_lag_blocks",
+    "Peer chain height minus local height (positive = this node is behind)",
+    ["node", "peer"],
+    multiprocess_mode="livemax",
 )
 
 tx_submitted_total = Counter(
@@ -86,42 +156,290 @@ chain_verify_duration_seconds = Histogram(
     buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
 )
 
+# -----------------------
+# Rundy konsensusu (fazy, głosy peerów, rozmiar bloków)
+# -----------------------
+consensus_rounds_total = Counter(
+    "consensus_rounds_total",
+    "Total consensus rounds run by the leader",
+    ["node", "result"],  # committed|rejected|conflict|empty|error
+)
+
+consensus_round_duration_seconds = Histogram(
+    "consensus_round_duration_seconds",
+    "End-to-end consensus round duration on the leader",
+    ["node", "result"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+consensus_phase_duration_seconds = Histogram(
+    "consensus_phase_duration_seconds",
+    "Duration of a single consensus phase",
+    # nonce_search|proposal_build|vote_collection|commit_fanout (lider)
+    # propose_validate|commit_apply (follower)
+    ["node", "phase"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+consensus_peer_votes_total = Counter(
+    "consensus_peer_votes_total",
+    "Votes on block proposals received by the leader, per peer",
+    ["node", "peer", "vote"],  # accept|reject|no_response|skipped
+)
+
+consensus_block_transactions = Histogram(
+    "consensus_block_transactions",
+    "Transactions per block committed by the leader",
+    ["node"],
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+)
+
+consensus_block_size_bytes = Histogram(
+    "consensus_block_size_bytes",
+    "Serialized size of blocks committed by the leader",
+    ["node"],
+    buckets=(1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+
+# -----------------------
+# Chain sync (catch-up followerów)
+# -----------------------
+sync_runs_total = Counter(
+    "blockchain_sync_runs_total",
+    "Total chain sync runs",
+    ["node", "result"],  # ok|noop|partial|failed
+)
+
+sync_blocks_applied_total = Counter(
+    "blockchain_sync_blocks_applied_total",
+    "Total blocks appended by chain sync",
+    ["node"],
+)
+
+sync_lag_blocks = Gauge(
+    "blockchain_sync_lag_blocks",
+    "Blocks missing locally versus best known peer tip",
+    ["node"],
+    multiprocess_mode="livemax",
+)
+
+sync_duration_seconds = Histogram(
+    "blockchain_sync_duration_seconds",
+    "Chain sync run duration in seconds",
+    ["node"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+# -----------------------
+# Produkcja bloków (harmonogram lidera)
+# -----------------------
+tx_commit_latency_seconds = Histogram(
+    "tx_commit_latency_seconds",
+    "Time from transaction submit to block commit on the leader",
+    ["node"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120),
+)
+
+tx_stage_latency_seconds = Histogram(
+    "tx_stage_latency_seconds",
+    "Time from first sighting of a transaction on the node to a lifecycle stage",
+    ["node", "stage"],  # forwarded|gossiped|received|proposed|committed
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120),
+)
+
+block_scheduler_rounds_total = Counter(
+    "block_scheduler_rounds_total",
+    "Consensus rounds triggered by the block scheduler",
+    ["node", "trigger", "result"],  # trigger: size|deadline, result: committed|rejected|error
+)
+
+block_scheduler_backoff_seconds = Gauge(
+    "block_scheduler_backoff_seconds",
+    "Current block scheduler backoff after failed rounds (0 = none)",
+    ["node"],
+    multiprocess_mode="livemax",
+)
+
+# -----------------------
+# Wybory lidera
+# -----------------------
+election_term = Gauge(
+    "election_term",
+    "Current leader election term seen by this node",
+    ["node"],
+    multiprocess_mode="livemax",
+)
+
+election_is_leader = Gauge(
+    "election_is_leader",
+    "1 if this node is the current leader, else 0",
+    ["node"],
+    multiprocess_mode="livemax",
+)
+
+leader_changes_total = Counter(
+    "leader_changes_total",
+    "Number of leader changes observed by this node",
+    ["node"],
+)
+
+elections_started_total = Counter(
+    "elections_started_total",
+    "Number of elections started by this node as candidate",
+    ["node"],
+)
+
+# -----------------------
+# Kolejka przekazywania transakcji (follower -> lider)
+# -----------------------
+tx_forward_queue_depth = Gauge(
+    "tx_forward_queue_depth",
+    "Transactions queued on a follower waiting to be forwarded to the leader",
+    ["node"],
+    multiprocess_mode="livemax",
+)
+
+tx_forward_batches_total = Counter(
+    "tx_forward_batches_total",
+    "Forwarded transaction batches",
+    ["node", "result"],  # ok|error|rejected
+)
+
+tx_forward_batch_size = Histogram(
+    "tx_forward_batch_size",
+    "Number of transactions per forwarded batch",
+    ["node"],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+
+# -----------------------
+# Zdrowie peerów (heartbeat /rpc/node-info)
+# -----------------------
+node_up = Gauge(
+    "node_up",
+    "Peer reachable according to heartbeat (1=ok, 0=down)",
+    ["node", "peer"],
+    multiprocess_mode="livemax",
+)
+
+peer_latency_ewma_seconds = Gauge(
+    "peer_latency_ewma_seconds",
+    "EWMA of peer heartbeat/RPC latency in seconds",
+    ["node", "peer"],
+    multiprocess_mode="livemax",
+)
+
+peer_circuit_open = Gauge(
+    "peer_circuit_open",
+    "Peer circuit breaker state (0=closed, 0.5=half-open, 1=open)",
+    ["node", "peer"],
+    multiprocess_mode="livemax",
+)
+
+peer_failures_total = Counter(
+    "peer_failures_total",
+    "Failed heartbeats/RPCs to a peer",
+    ["node", "peer"],
+)
+
+peer_rpc_latency_seconds = Histogram(
+    "peer_rpc_latency_seconds",
+    "Latency of consensus RPCs per peer (successful responses)",
+    ["node", "peer", "rpc"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+peer_rpc_timeout_seconds = Histogram(
+    "peer_rpc_timeout_seconds",
+    "Adaptive timeout applied to consensus RPCs per peer",
+    ["node", "peer", "rpc"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10),
+)
+
+peer_rpc_failures_total = Counter(
+    "peer_rpc_failures_total",
+    "Failed consensus RPCs to a peer",
+    ["node", "peer", "rpc", "kind"],  # kind: timeout|error
+)
+
+peer_rpc_hedges_total = Counter(
+    "peer_rpc_hedges_total",
+    "Hedged (duplicate) propose_block requests sent to a peer",
+    ["node", "peer"],
+)
+
+peer_rpc_retries_total = Counter(
+    "peer_rpc_retries_total",
+    "Retried consensus RPCs per peer",
+    ["node", "peer", "rpc"],
+)
+
+link_faults_total = Counter(
+    "link_faults_total",
+    "Simulated per-link faults applied by this node (as sender)",
+    ["node", "peer", "direction", "action"],
+)
+
 # -----------------------
 # Helpers
 # -----------------------
-def _normalized_path(request: Request) -> str:
+# Etykieta `path` dla żądań, które nie pasują do żadnej trasy (404, skanery).
+UNMATCHED_PATH = "<unmatched>"
+
+
+def _match_route(scope: dict):
+    router = getattr(scope.get("app"), "router", None)
+    partial = None
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route
+        if match == Match.PARTIAL and partial is None:
+            partial = route
+    return partial
+
+
+def route_path(scope: dict) -> str:
     """
     Zwraca path w wersji "route template", np. /animals/{animal_id} zamiast /animals/123.
-    To minimalizuje kardynalność metryk.
+    Router wpisuje "route" do scope, więc wołamy to po obsłudze żądania.
+    Gdy odpowiedź powstała przed routingiem (chaos), szablon dopasowujemy sami;
+    surowa ścieżka nigdy nie trafia do etykiet – to minimalizuje kardynalność metryk.
     """
-    try:
-        route = request.scope.get("route")
-        if route and getattr(route, "path", None):
-            return route.path
-    except Exception:
-        pass
-    return request.url.path
+    route = scope.get("route")
+    if route is None:
+        route = _match_route(scope)
+    return getattr(route, "path", None) or UNMATCHED_PATH
 
 
-async def instrumentator_middleware(request: Request, call_next: Callable):
-    path = _normalized_path(request)
-    method = request.method
+def observe_http_request(
+    method: str,
+    path: str,
+    status: int,
+    elapsed: float,
+    request_bytes: Optional[int] = None,
+    response_bytes: Optional[int] = None,
+    trace_id: Optional[str] = None,
+) -> None:
+    exemplar = {"trace_id": trace_id} if trace_id else None
+    http_requests_total.labels(method, path, str(status)).inc(exemplar=exemplar)
+    http_request_duration_seconds.labels(method, path).observe(elapsed, exemplar=exemplar)
+    if request_bytes is not None:
+        http_request_size_bytes.labels(method, path).observe(request_bytes)
+    if response_bytes is not None:
+        http_response_size_bytes.labels(method, path).observe(response_bytes)
+
+
+def inc_http_exception(exc: BaseException, path: str) -> None:
+    http_exceptions_total.labels(type(exc).__name__, path).inc()
 
-    start = time.perf_counter()
-    try:
-        response = await call_next(request)
-        status = str(getattr(response, "status_code", 500))
-        return response
-    except Exception as e:
-        http_exceptions_total.labels(type(e).__name__, path).inc()
-        # FastAPI i tak zamieni to na 500, ale metryka ma widzieć wyjątek
-        raise
-    finally:
-        elapsed = time.perf_counter() - start
-        # status może nie istnieć jeśli wyjątek poleciał zanim response powstał
-        status_val = locals().get("status", "500")
-        http_requests_total.labels(method, path, status_val).inc()
-        http_request_duration_seconds.labels(method, path).observe(elapsed)
+
+def inc_http_cache(namespace: str, result: str, node: Optional[str] = None) -> None:
+    http_cache_requests_total.labels(node or NODE_NAME, namespace, result).inc()
+
+
+def inc_http_cache_invalidation(namespace: str, node: Optional[str] = None) -> None:
+    http_cache_invalidations_total.labels(node or NODE_NAME, namespace).inc()
 
 
 def set_chain_status(height: int, mempool_size: int, node: Optional[str] = None) -> None:
@@ -130,6 +448,33 @@ def set_chain_status(height: int, mempool_size: int, node: Optional[str] = None)
     blockchain_mempool_size.labels(n).set(mempool_size)
 
 
+def set_chain_freshness(
+    last_block_age_s: float, verified_height: int, node: Optional[str] = None
+) -> None:
+    n = node or NODE_NAME
+    blockchain_last_block_age_seconds.labels(n).set(max(0.0, last_block_age_s))
+    blockchain_verified_height.labels(n).set(verified_height)
+
+
+def set_peer_lag(url: str, lag_blocks: int, node: Optional[str] = None) -> None:
+    blockchain_peer_lag_blocks.labels(node or NODE_NAME, peer_label(url)).set(lag_blocks)
+
+
+def clear_peer_lag(url: str, node: Optional[str] = None) -> None:
+    """
+    Peer przestał odpowiadać – jego opóźnienie jest nieznane, nie ostatnie.
+    """
+    labels = (node or NODE_NAME, peer_label(url))
+    if PROMETHEUS_MULTIPROC_DIR:
+        # Plik mmap trzyma wartość także po remove() – nadpisujemy ją NaN.
+        blockchain_peer_lag_blocks.labels(*labels).set(float("nan"))
+        return
+    try:
+        blockchain_peer_lag_blocks.remove(*labels)
+    except KeyError:
+        pass
+
+
 def inc_tx_submitted(node: Optional[str] = None) -> None:
     (tx_submitted_total.labels(node or NODE_NAME)).inc()
 
@@ -142,7 +487,166 @@ def inc_vote(vote: str, node: Optional[str] = None) -> None:
     (consensus_votes_total.labels(node or NODE_NAME, vote)).inc()
 
 
+def observe_consensus_round(result: str, elapsed: float, node: Optional[str] = None) -> None:
+    n = node or NODE_NAME
+    consensus_rounds_total.labels(n, result).inc()
+    consensus_round_duration_seconds.labels(n, result).observe(elapsed)
+
+
+def observe_consensus_phase(phase: str, elapsed: float, node: Optional[str] = None) -> None:
+    consensus_phase_duration_seconds.labels(node or NODE_NAME, phase).observe(elapsed)
+
+
+def inc_peer_vote(url: str, vote: str, node: Optional[str] = None) -> None:
+    consensus_peer_votes_total.labels(node or NODE_NAME, peer_label(url), vote).inc()
+
+
+def observe_block_size(transactions: int, size_bytes: int, node: Optional[str] = None) -> None:
+    n = node or NODE_NAME
+    consensus_block_transactions.labels(n).observe(transactions)
+    consensus_block_size_bytes.labels(n).observe(size_bytes)
+
+
+def observe_sync(
+    result: str,
+    blocks_applied: int,
+    lag: int,
+    elapsed: float,
+    node: Optional[str] = None,
+) -> None:
+    n = node or NODE_NAME
+    sync_runs_total.labels(n, result).inc()
+    if blocks_applied:
+        sync_blocks_applied_total.labels(n).inc(blocks_applied)
+    sync_lag_blocks.labels(n).set(max(lag, 0))
+    sync_duration_seconds.labels(n).observe(elapsed)
+
+
+def observe_tx_commit_latency(transactions, node: Optional[str] = None) -> None:
+    n = node or NODE_NAME
+    now = datetime.utcnow()
+    for tx in transactions:
+        submitted = tx.timestamp
+        if submitted.tzinfo is not None:
+            submitted = submitted.astimezone(timezone.utc).replace(tzinfo=None)
+        tx_commit_latency_seconds.labels(n).observe(
+            max((now - submitted).total_seconds(), 0.0)
+        )
+
+
+def observe_tx_stage(stage: str, elapsed: float, node: Optional[str] = None) -> None:
+    tx_stage_latency_seconds.labels(node or NODE_NAME, stage).observe(max(elapsed, 0.0))
+
+
+def observe_scheduler_round(
+    trigger: str, result: str, backoff: float, node: Optional[str] = None
+) -> None:
+    n = node or NODE_NAME
+    block_scheduler_rounds_total.labels(n, trigger, result).inc()
+    block_scheduler_backoff_seconds.labels(n).set(backoff)
+
+
+def set_election_state(
+    term: int, is_leader: bool, leader_changed: bool = False, node: Optional[str] = None
+) -> None:
+    n = node or NODE_NAME
+    election_term.labels(n).set(term)
+    election_is_leader.labels(n).set(1 if is_leader else 0)
+    if leader_changed:
+        leader_changes_total.labels(n).inc()
+
+
+def inc_election_started(node: Optional[str] = None) -> None:
+    elections_started_total.labels(node or NODE_NAME).inc()
+
+
+def set_forward_queue_depth(depth: int, node: Optional[str] = None) -> None:
+    tx_forward_queue_depth.labels(node or NODE_NAME).set(depth)
+
+
+def observe_forward_batch(result: str, size: int, node: Optional[str] = None) -> None:
+    n = node or NODE_NAME
+    tx_forward_batches_total.labels(n, result).inc()
+    if result == "ok":
+        tx_forward_batch_size.labels(n).observe(size)
+
+
+def peer_label(url: str) -> str:
+    """
+    Label `peer` = nazwa hosta (node2..node6), bez portu i schematu.
+    """
+    return urlparse(url).hostname or url
+
+
+_CIRCUIT_VALUES = {"closed": 0.0, "half_open": 0.5, "open": 1.0}
+
+
+def observe_peer_health(
+    url: str, health: dict, failed: bool, node: Optional[str] = None
+) -> None:
+    n = node or NODE_NAME
+    peer = peer_label(url)
+    node_up.labels(n, peer).set(1 if health.get("ok") else 0)
+    if health.get("ewma_latency_ms") is not None:
+        peer_latency_ewma_seconds.labels(n, peer).set(health["ewma_latency_ms"] / 1000.0)
+    peer_circuit_open.labels(n, peer).set(_CIRCUIT_VALUES.get(health.get("circuit"), 0.0))
+    if failed:
+        peer_failures_total.labels(n, peer).inc()
+
+
+def observe_peer_rpc(
+    url: str,
+    rpc: str,
+    timeout: float,
+    elapsed: Optional[float] = None,
+    failure: Optional[str] = None,
+    node: Optional[str] = None,
+) -> None:
+    n = node or NODE_NAME
+    peer = peer_label(url)
+    peer_rpc_timeout_seconds.labels(n, peer, rpc).observe(timeout)
+    if elapsed is not None:
+        peer_rpc_latency_seconds.labels(n, peer, rpc).observe(elapsed)
+    if failure is not None:
+        peer_rpc_failures_total.labels(n, peer, rpc, failure).inc()
+
+
+def inc_peer_hedge(url: str, node: Optional[str] = None) -> None:
+    peer_rpc_hedges_total.labels(node or NODE_NAME, peer_label(url)).inc()
+
+
+def inc_peer_retry(url: str, rpc: str, node: Optional[str] = None) -> None:
+    peer_rpc_retries_total.labels(node or NODE_NAME, peer_label(url), rpc).inc()
+
+
+def inc_link_fault(peer_id: int, direction: str, action: str, node: Optional[str] = None) -> None:
+    link_faults_total.labels(node or NODE_NAME, f"node{peer_id}", direction, action).inc()
+
+
+def _scrape_registry() -> CollectorRegistry:
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=PROMETHEUS_MULTIPROC_DIR)
+    return registry
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Usuwa pliki live* zakończonego workera (tryb wieloprocesowy).
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid, PROMETHEUS_MULTIPROC_DIR)
+
+
 @metrics_router.get("/metrics")
-def metrics():
-    data = generate_latest()
+def metrics(request: Request):
+    registry = _scrape_registry()
+    # Exemplary (trace_id) są widoczne tylko w formacie OpenMetrics (bez trybu wieloprocesowego).
+    if "application/openmetrics-text" in request.headers.get("accept", ""):
+        return Response(
+            content=openmetrics.generate_latest(registry),
+            media_type=openmetrics.CONTENT_TYPE_LATEST,
+        )
+    data = generate_latest(registry)
     return Response(content=data, media_type=CONTENT_TYPE_LATEST)
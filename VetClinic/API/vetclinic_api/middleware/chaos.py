@@ -1,33 +1,183 @@
 import asyncio
 import random
+import time
+from contextvars import ContextVar
+from typing import Optional
 
-from fastapi import HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Header, HTTPException
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from vetclinic_api.admin.network_state import STATE, get_state
+from vetclinic_api import tracing
+from vetclinic_api.admin.fault_schedule import (
+    ACTION_DROP,
+    ACTION_OFFLINE,
+    ACTION_PARTITION,
+    FaultEvent,
+    get_timeline,
+)
+from vetclinic_api.admin.link_rules import get_links
+from vetclinic_api.admin.network_state import get_state
+from vetclinic_api.cluster.config import CONFIG
+from vetclinic_api.metrics import (
+    http_requests_in_progress,
+    inc_http_exception,
+    inc_link_fault,
+    observe_http_request,
+    route_path,
+)
+from vetclinic_api.middleware.timing import REQUEST_PHASES, install_phase_timers, log_slow_request
 
 
-class ChaosMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        if STATE.chaos_enabled:
-            # Delay some requests to simulate network slowness.
-            if random.random() < STATE.chaos_delay_rate:
-                lo = min(STATE.chaos_delay_ms_min, STATE.chaos_delay_ms_max)
-                hi = max(STATE.chaos_delay_ms_min, STATE.chaos_delay_ms_max)
-                delay_ms = random.randint(lo, hi)
-                await asyncio.sleep(delay_ms / 1000.0)
+CHAOS_PATH_PREFIXES = ("/chain", "/tx", "/rpc")
 
-            # Inject 5xx errors on key blockchain endpoints; skip admin/metrics.
-            path = request.url.path
-            if path.startswith("/chain") or path.startswith("/tx") or path.startswith("/rpc"):
-                if random.random() < STATE.chaos_error_rate:
-                    return JSONResponse({"detail": "simulated_failure"}, status_code=500)
 
-        return await call_next(request)
+class ChaosMiddleware:
+    """
+    Jedna warstwa czystego ASGI: symulacja chaosu + metryki HTTP.
+
+    Bez BaseHTTPMiddleware (dodatkowe taski i strumienie na każde żądanie).
+    Gdy chaos jest wyłączony, żądanie idzie prosto do aplikacji – jedynie
+    status i rozmiary są podglądane na potrzeby metryk (`instrument`).
+    Szablon trasy odczytujemy po routingu, a wolne żądania (próbkowane)
+    lądują w logu z czasami faz: zależności, handler, serializacja.
+    Z włączonym tracingiem (TRACING_EXPORTER) każde żądanie dostaje span serwera.
+    """
+
+    def __init__(self, app: ASGIApp, instrument: bool = True) -> None:
+        self.app = app
+        self.instrument = instrument
+        if instrument:
+            install_phase_timers()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state = get_state()
+        if not self.instrument:
+            if not (state.chaos_enabled and await self._inject(scope, receive, send)):
+                await self.app(scope, receive, send)
+            return
+        if tracing.enabled():
+            with tracing.server_span(scope):
+                await self._instrumented(scope, receive, send, state)
+        else:
+            await self._instrumented(scope, receive, send, state)
+
+    async def _instrumented(self, scope: Scope, receive: Receive, send: Send, state) -> None:
+        status_code = 500
+        request_bytes = 0
+        response_bytes = 0
+        method = scope["method"]
+        phases: dict = {}
+        phases_token = REQUEST_PHASES.set(phases)
+        in_progress = http_requests_in_progress.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+
+        async def receive_wrapper() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            if not (
+                state.chaos_enabled and await self._inject(scope, receive_wrapper, send_wrapper)
+            ):
+                await self.app(scope, receive_wrapper, send_wrapper)
+        except Exception as exc:
+            # FastAPI i tak zamieni to na 500, ale metryka ma widzieć wyjątek
+            inc_http_exception(exc, route_path(scope))
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            REQUEST_PHASES.reset(phases_token)
+            path = route_path(scope)
+            trace_id = tracing.current_trace_id(scope)
+            observe_http_request(
+                method, path, status_code, elapsed, request_bytes, response_bytes, trace_id
+            )
+            log_slow_request(
+                method, path, status_code, elapsed, phases, trace_id, request_bytes, response_bytes
+            )
+
+    async def _inject(self, scope: Scope, receive: Receive, send: Send) -> bool:
+        """
+        Opóźnienie i/lub sztuczny błąd 5xx. True = odpowiedź już wysłana.
+        """
+        state = get_state()
+        # Delay some requests to simulate network slowness.
+        if random.random() < state.chaos_delay_rate:
+            lo = min(state.chaos_delay_ms_min, state.chaos_delay_ms_max)
+            hi = max(state.chaos_delay_ms_min, state.chaos_delay_ms_max)
+            delay_ms = random.randint(lo, hi)
+            await asyncio.sleep(delay_ms / 1000.0)
+
+        # Inject 5xx errors on key blockchain endpoints; skip admin/metrics.
+        if scope["path"].startswith(CHAOS_PATH_PREFIXES):
+            if random.random() < state.chaos_error_rate:
+                response = JSONResponse({"detail": "simulated_failure"}, status_code=500)
+                await response(scope, receive, send)
+                return True
+        return False
+
+
+# Id węzła wywołującego bieżące RPC (nagłówek X-Node-Id), ustawiane przez rpc_caller.
+RPC_CALLER: ContextVar[Optional[int]] = ContextVar("rpc_caller", default=None)
+
+
+async def rpc_caller(x_node_id: Optional[int] = Header(default=None)) -> None:
+    RPC_CALLER.set(x_node_id)
+
+
+async def apply_scheduled_fault(event: FaultEvent) -> None:
+    if event.action == ACTION_OFFLINE:
+        raise HTTPException(status_code=503, detail="Node is offline (scheduled)")
+    if event.action == ACTION_PARTITION:
+        raise HTTPException(status_code=503, detail="Network partition (scheduled)")
+    if event.delay_ms > 0:
+        await asyncio.sleep(event.delay_ms / 1000.0)
+    if event.action == ACTION_DROP:
+        raise HTTPException(status_code=503, detail="Transient RPC drop (scheduled)")
+
+
+async def apply_link_faults(caller: Optional[int]) -> None:
+    """
+    Reguły łącza self -> wywołujący, czyli kierunek naszej odpowiedzi.
+    Kierunek wywołujący -> self egzekwuje klient RPC po jego stronie.
+    """
+    effect = get_links().effect(CONFIG.node_id, caller)
+    if effect is None:
+        return
+    if effect.blocked:
+        inc_link_fault(caller, "inbound", "blocked")
+        raise HTTPException(status_code=503, detail="Link blocked (simulated)")
+    if effect.delay_s > 0:
+        await asyncio.sleep(effect.delay_s)
+    if effect.dropped:
+        inc_link_fault(caller, "inbound", "dropped")
+        raise HTTPException(status_code=503, detail="Link drop (simulated)")
 
 
 async def apply_rpc_faults(endpoint_name: str) -> None:
+    caller = RPC_CALLER.get()
+    event = get_timeline().decide(endpoint_name, caller)
+    if event is not None:
+        await apply_scheduled_fault(event)
+    await apply_link_faults(caller)
+
     state = get_state()
 
     if state.offline:
@@ -0,0 +1,89 @@
+from typing import Optional
+
+import httpx
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from vetclinic_api.cluster.workers import WorkerRole, get_worker_role
+
+# Nagłówki połączenia – nie przechodzą przez proxy.
+_HOP_BY_HOP = {b"connection", b"keep-alive", b"transfer-encoding", b"upgrade", b"host"}
+
+
+class OwnerProxyMiddleware:
+    """
+    Tryb wielu workerów: żądania do ścieżek ze stanem właściciela
+    (konsensus, /tx, /admin, ...) idą przez gniazdo unix do workera-właściciela;
+    resztę (CRUD na wspólnej bazie) obsługuje bieżący worker.
+
+    Najbardziej zewnętrzna warstwa, więc metryki HTTP i chaos liczy tylko
+    właściciel, raz na żądanie. W trybie jednego workera – przezroczysta.
+    """
+
+    def __init__(self, app: ASGIApp, role: Optional[WorkerRole] = None) -> None:
+        self.app = app
+        self._role = role
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def role(self) -> WorkerRole:
+        return self._role or get_worker_role()
+
+    def _owner_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(uds=self.role.socket_path),
+                base_url="http://owner",
+                timeout=None,
+            )
+        return self._client
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.role.multi_worker:
+            await self.app(scope, receive, send)
+            return
+        if not self.role.forwards(scope["path"]):
+            self.role.sync_state()
+            await self.app(scope, receive, send)
+            return
+        await self._forward(scope, receive, send)
+
+    async def _forward(self, scope: Scope, receive: Receive, send: Send) -> None:
+        body = b""
+        more = True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        headers = [(k, v) for k, v in scope["headers"] if k.lower() not in _HOP_BY_HOP]
+        query = scope.get("query_string", b"")
+        url = scope.get("raw_path") or scope["path"].encode()
+        if query:
+            url += b"?" + query
+        client = self._owner_client()
+        request = client.build_request(
+            scope["method"], url.decode("latin-1"), headers=headers, content=body
+        )
+        try:
+            response = await client.send(request, stream=True)
+        except httpx.TransportError:
+            # Właściciel padł albo jeszcze startuje – uvicorn podniesie nowego workera.
+            await JSONResponse({"detail": "Consensus owner unavailable"}, status_code=503)(
+                scope, receive, send
+            )
+            return
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": response.status_code,
+                    "headers": [
+                        (k, v) for k, v in response.headers.raw if k.lower() not in _HOP_BY_HOP
+                    ],
+                }
+            )
+            async for chunk in response.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            await response.aclose()
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from vetclinic_api.cluster.context import node_scoped
+from vetclinic_api.cluster.workers import MULTI_WORKER, RUNTIME_DIR
+from vetclinic_api.metrics import inc_http_cache, inc_http_cache_invalidation
+
+# Dane referencyjne: zmieniają się rzadko, a GUI pobiera je na prawie każdym ekranie.
+CACHE_PATH_PREFIXES = ("/facilities", "/doctors", "/consultants")
+REFERENCE_CACHE_ENABLED = os.getenv("REFERENCE_CACHE_ENABLED", "1") == "1"
+# Górna granica nieświeżości, gdyby zmiana ominęła API (np. seed prosto do bazy).
+REFERENCE_CACHE_TTL_S = float(os.getenv("REFERENCE_CACHE_TTL_S", "60"))
+REFERENCE_CACHE_MAX_ENTRIES = max(1, int(os.getenv("REFERENCE_CACHE_MAX_ENTRIES", "512")))
+# Tryb wielu workerów: zapis w jednym workerze unieważnia cache pozostałych
+# przez mtime pliku generacji (jeden stat na trafienie).
+REFERENCE_CACHE_SHARED_DIR = os.getenv(
+    "REFERENCE_CACHE_SHARED_DIR", RUNTIME_DIR if MULTI_WORKER else ""
+)
+
+_SAFE_METHODS = ("GET", "HEAD")
+_CACHE_CONTROL = b"no-cache"  # klient może trzymać kopię, ale zawsze pyta z If-None-Match
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: List[Tuple[bytes, bytes]]
+    generation: Tuple[int, int]
+    stored_at: float
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match: lista tagów albo `*`; porównanie słabe (RFC 9110 13.1.2).
+    """
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ReferenceCache:
+    """
+    Cache gotowych odpowiedzi GET (bajty + ETag) dla danych referencyjnych.
+
+    Klucz: ścieżka + query string w obrębie przestrzeni (`/doctors` itd.).
+    Każdy zapis (POST/PUT/PATCH/DELETE) w przestrzeni podbija jej generację;
+    wpisy ze starszej generacji są chybieniami. Generację odczytujemy przed
+    obsługą GET, więc odpowiedź policzona w trakcie zapisu nie przeżyje
+    unieważnienia. LRU do `max_entries`, wpisy wygasają po `ttl_s`.
+    """
+
+    def __init__(
+        self,
+        ttl_s: float = REFERENCE_CACHE_TTL_S,
+        max_entries: int = REFERENCE_CACHE_MAX_ENTRIES,
+        shared_dir: str = REFERENCE_CACHE_SHARED_DIR,
+    ) -> None:
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.shared_dir = shared_dir
+        self._entries: "OrderedDict[Tuple[str, str], CachedResponse]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def namespace(path: str) -> Optional[str]:
+        for prefix in CACHE_PATH_PREFIXES:
+            if path == prefix or path.startswith(prefix + "/"):
+                return prefix
+        return None
+
+    def _shared_file(self, namespace: str) -> str:
+        return os.path.join(self.shared_dir, "vetclinic-refcache" + namespace.replace("/", "-"))
+
+    def generation(self, namespace: str) -> Tuple[int, int]:
+        shared = 0
+        if self.shared_dir:
+            try:
+                shared = os.stat(self._shared_file(namespace)).st_mtime_ns
+            except FileNotFoundError:
+                pass
+        return self._generations.get(namespace, 0), shared
+
+    def get(self, namespace: str, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return None
+            expired = self.ttl_s > 0 and time.monotonic() - entry.stored_at > self.ttl_s
+            if expired or entry.generation != self.generation(namespace):
+                del self._entries[(namespace, key)]
+                return None
+            self._entries.move_to_end((namespace, key))
+            return entry
+
+    def put(
+        self,
+        namespace: str,
+        key: str,
+        body: bytes,
+        headers: List[Tuple[bytes, bytes]],
+        generation: Tuple[int, int],
+    ) -> CachedResponse:
+        entry = CachedResponse(body, make_etag(body), headers, generation, time.monotonic())
+        with self._lock:
+            self._entries[(namespace, key)] = entry
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, namespace: str) -> None:
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            for key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[key]
+        if self.shared_dir:
+            path = self._shared_file(namespace)
+            with open(path, "a"):
+                os.utime(path, ns=(time.time_ns(), time.time_ns()))
+        inc_http_cache_invalidation(namespace)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+
+REFERENCE_CACHE = ReferenceCache()
+
+
+def get_reference_cache() -> ReferenceCache:
+    return node_scoped("reference_cache", REFERENCE_CACHE)
+
+
+def _header(scope: Scope, name: bytes) -> str:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return ""
+
+
+class ReferenceCacheMiddleware:
+    """
+    Warstwa czystego ASGI przed routerem: trafienie w cache nie dotyka
+    zależności ani bazy. GET z pasującym If-None-Match dostaje 304,
+    pozostałe – zapamiętane bajty z nagłówkiem ETag. Zapisy przechodzą
+    do aplikacji i unieważniają swoją przestrzeń.
+    """
+
+    def __init__(self, app: ASGIApp, enabled: bool = REFERENCE_CACHE_ENABLED) -> None:
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        cache = get_reference_cache()
+        namespace = cache.namespace(scope["path"])
+        if namespace is None:
+            await self.app(scope, receive, send)
+            return
+        if scope["method"] not in _SAFE_METHODS:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                cache.invalidate(namespace)
+            return
+        if scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        key = scope["path"] + "?" + scope.get("query_string", b"").decode("latin-1")
+        if_none_match = _header(scope, b"if-none-match")
+        entry = cache.get(namespace, key)
+        if entry is not None:
+            not_modified = bool(if_none_match) and etag_matches(if_none_match, entry.etag)
+            inc_http_cache(namespace, "not_modified" if not_modified else "hit")
+            await self._send_entry(entry, send, not_modified, b"HIT")
+            return
+
+        generation = cache.generation(namespace)
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    await send(message)
+                    return
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            headers = [
+                (k, v)
+                for k, v in start.get("headers", [])
+                if k.lower() not in (b"content-length", b"etag", b"cache-control")
+            ]
+            stored = cache.put(namespace, key, b"".join(chunks), headers, generation)
+            not_modified = bool(if_none_match) and etag_matches(if_none_match, stored.etag)
+            inc_http_cache(namespace, "not_modified" if not_modified else "miss")
+            await self._send_entry(stored, send, not_modified, b"MISS")
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    async def _send_entry(entry: CachedResponse, send: Send, not_modified: bool, status: bytes) -> None:
+        headers = [
+            (b"etag", entry.etag.encode("latin-1")),
+            (b"cache-control", _CACHE_CONTROL),
+            (b"x-cache", status),
+        ]
+        if not_modified:
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        headers = entry.headers + headers + [(b"content-length", str(len(entry.body)).encode())]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
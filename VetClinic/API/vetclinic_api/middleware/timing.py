@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import inspect
+import json
+import logging
+import os
+import random
+import time
+import types
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+import fastapi
+import fastapi.routing
+
+logger = logging.getLogger("vetclinic_api.http")
+
+# Żądania wolniejsze niż SLOW_REQUEST_MS trafiają do logu z prawdopodobieństwem
+# SLOW_REQUEST_SAMPLE (0 = wyłączone), żeby przy przeciążeniu nie zalać logów.
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+SLOW_REQUEST_SAMPLE = float(os.getenv("SLOW_REQUEST_SAMPLE", "0.1"))
+
+PHASE_DEPENDENCIES = "dependencies"
+PHASE_HANDLER = "handler"
+PHASE_SERIALIZATION = "serialization"
+
+# Funkcje fastapi.routing (API prywatne) mierzone jako fazy żądania.
+PHASE_FUNCTIONS = {
+    PHASE_DEPENDENCIES: "solve_dependencies",
+    PHASE_HANDLER: "run_endpoint_function",
+    PHASE_SERIALIZATION: "serialize_response",
+}
+# Wersje FastAPI (major.minor), na których sprawdzono podmianę; requirements.txt przypina 0.115.
+PHASE_TIMING_FASTAPI_VERSIONS = ("0.115",)
+
+# Czasy faz bieżącego żądania; ustawiane przez middleware, None = nie mierzymy.
+REQUEST_PHASES: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "request_phases", default=None
+)
+
+_installed = False
+
+
+def _timed(phase: str, func):
+    async def wrapper(*args, **kwargs):
+        phases = REQUEST_PHASES.get()
+        if phases is None:
+            return await func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - start
+
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def _code_names(code: types.CodeType) -> set:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+
+def phase_timers_supported(version: str = fastapi.__version__) -> bool:
+    """
+    Czy podmiana jest bezpieczna: znana wersja FastAPI, a `get_request_handler`
+    (z zagnieżdżonym handlerem) woła mierzone funkcje-korutyny po nazwach globalnych.
+    """
+    if ".".join(version.split(".")[:2]) not in PHASE_TIMING_FASTAPI_VERSIONS:
+        return False
+    handler = getattr(fastapi.routing, "get_request_handler", None)
+    if handler is None:
+        return False
+    names = _code_names(handler.__code__)
+    return all(
+        name in names and inspect.iscoroutinefunction(getattr(fastapi.routing, name, None))
+        for name in PHASE_FUNCTIONS.values()
+    )
+
+
+def install_phase_timers() -> bool:
+    """
+    Pomiar faz obsługi żądania przez FastAPI: rozwiązywanie zależności,
+    handler i serializacja odpowiedzi.
+
+    `get_request_handler` woła te funkcje przez globalne nazwy modułu
+    fastapi.routing, więc podmieniamy je raz na wersje z pomiarem czasu.
+    Na niesprawdzonej wersji FastAPI nic nie podmieniamy – log wolnych
+    żądań ma wtedy tylko czas całkowity ("other"). True = pomiar aktywny.
+    """
+    global _installed
+    if _installed:
+        return True
+    if not phase_timers_supported():
+        logger.warning(
+            "FastAPI %s: brak pomiaru faz żądania (niesprawdzona wersja)", fastapi.__version__
+        )
+        return False
+    for phase, name in PHASE_FUNCTIONS.items():
+        setattr(fastapi.routing, name, _timed(phase, getattr(fastapi.routing, name)))
+    _installed = True
+    return True
+
+
+def log_slow_request(
+    method: str,
+    path: str,
+    status: int,
+    elapsed: float,
+    phases: Optional[Dict[str, float]],
+    trace_id: Optional[str] = None,
+    request_bytes: int = 0,
+    response_bytes: int = 0,
+) -> bool:
+    """
+    Jedna linia JSON dla wolnego żądania (z próbkowaniem). True = zalogowano.
+    """
+    if elapsed * 1000 < SLOW_REQUEST_MS or random.random() >= SLOW_REQUEST_SAMPLE:
+        return False
+    timings = {name: round(value * 1000, 3) for name, value in (phases or {}).items()}
+    # Reszta: middleware, chaos, kolejka w pętli zdarzeń, wysyłanie odpowiedzi.
+    timings["other"] = round(max(0.0, elapsed * 1000 - sum(timings.values())), 3)
+    logger.warning(
+        json.dumps(
+            {
+                "event": "slow_request",
+                "method": method,
+                "path": path,
+                "status": status,
+                "duration_ms": round(elapsed * 1000, 3),
+                "phases_ms": timings,
+                "request_bytes": request_bytes,
+                "response_bytes": response_bytes,
+                "trace_id": trace_id,
+            }
+        )
+    )
+    return True
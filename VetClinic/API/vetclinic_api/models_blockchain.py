@@ -1,6 +1,15 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.orm import relationship
 
 from vetclinic_api.core.database import Base
@@ -37,3 +46,23 @@ class TransactionDB(Base):
     committed = Column(Boolean, default=False, nullable=False)
 
     block = relationship("BlockDB", back_populates="transactions")
+
+
+class RecordAnchorDB(Base):
+    """
+    Indeks pomocniczy: jedna pozycja na każdą zatwierdzoną transakcję
+    MEDICAL_RECORD, utrzymywany przy zapisie bloku.
+    """
+
+    __tablename__ = "record_anchors"
+    __table_args__ = (
+        Index("ix_record_anchors_record_ts", "record_id", "timestamp"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    record_id = Column(Integer, nullable=False, index=True)
+    owner = Column(String(128), nullable=True, index=True)
+    data_hash = Column(String(128), nullable=True)
+    tx_id = Column(String(128), nullable=False, unique=True)
+    block_index = Column(Integer, nullable=False)
+    timestamp = Column(DateTime, nullable=False)
@@ -1,12 +1,45 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+import asyncio
+import hmac
+import os
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
 
 from vetclinic_api.admin.network_state import state_payload, update_state
+from vetclinic_api.admin.profiler import PROFILE_MAX_SECONDS, ProfilerBusy, get_profiler
+from vetclinic_api.blockchain.core import Storage
+from vetclinic_api.blockchain.deps import get_storage
+from vetclinic_api.blockchain.snapshot import (
+    ChainSnapshot,
+    build_snapshot,
+    restore_snapshot,
+)
+from vetclinic_api.cluster.chain_metrics import get_chain_metrics
+from vetclinic_api.cluster.config import CONFIG
+from vetclinic_api.cluster.scheduler import get_scheduler
+from vetclinic_api.cluster.sync import get_syncer
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+# Operacje kosztowne dla węzła (profilowanie) wymagają nagłówka X-Admin-Token.
+# Bez ustawionego ADMIN_TOKEN są wyłączone (fail closed).
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "1").lower() in ("1", "true", "yes", "on")
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin operations disabled (ADMIN_TOKEN not set)")
+    # Porównanie bajtów: compare_digest na str rzuca TypeError dla znaków spoza ASCII.
+    supplied = (x_admin_token or "").encode("utf-8", "surrogateescape")
+    if not hmac.compare_digest(supplied, ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Admin token required")
+
+
 FAULT_FIELDS = [
     "offline",
     "slow_ms",
@@ -42,3 +75,85 @@ def update_faults(payload: FaultsPayload) -> dict:
     if updates:
         update_state(**updates)
     return _fault_payload()
+
+
+class SchedulerPayload(BaseModel):
+    enabled: bool | None = None
+    min_txs: int | None = Field(default=None, ge=1)
+    max_wait_s: float | None = Field(default=None, gt=0.0)
+    tick_s: float | None = Field(default=None, gt=0.0)
+    backoff_base_s: float | None = Field(default=None, ge=0.0)
+    backoff_max_s: float | None = Field(default=None, ge=0.0)
+
+
+@router.get("/scheduler")
+def get_block_scheduler() -> dict:
+    return get_scheduler().status_payload()
+
+
+@router.put("/scheduler")
+def update_block_scheduler(payload: SchedulerPayload) -> dict:
+    """
+    Zmienia progi harmonogramu bloków w locie (bez restartu węzła).
+    """
+    updates = payload.model_dump(exclude_unset=True, exclude_none=True)
+    if updates:
+        get_scheduler().update(**updates)
+    return get_scheduler().status_payload()
+
+
+@router.get("/snapshot", response_model=ChainSnapshot)
+def get_snapshot(storage: Storage = Depends(get_storage)) -> ChainSnapshot:
+    """
+    Podpisany snapshot stanu łańcucha do szybkiego startu nowego węzła.
+    """
+    try:
+        return build_snapshot(storage, CONFIG.node_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@router.post("/snapshot/restore")
+async def restore_from_snapshot(
+    snapshot: ChainSnapshot,
+    storage: Storage = Depends(get_storage),
+) -> dict:
+    """
+    Ładuje snapshot na świeżym węźle i planuje dociągnięcie nowszych bloków.
+    """
+    try:
+        tip = restore_snapshot(storage, snapshot)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    get_chain_metrics().mark_verified(snapshot.verified_up_to)
+    sync_scheduled = get_syncer().request(storage)
+    return {"status": "restored", "height": tip.index, "sync_scheduled": sync_scheduled}
+
+
+@router.get("/profile", dependencies=[Depends(require_admin_token)])
+async def profile(
+    seconds: float = Query(default=5.0, gt=0.0, le=PROFILE_MAX_SECONDS),
+    mode: Literal["cpu", "wall", "alloc"] = "cpu",
+    format: Literal["collapsed", "json"] = "collapsed",
+    top: int = Query(default=20, ge=1, le=200),
+):
+    """
+    Profil działającego węzła: próbkowanie stosów (cpu/wall) albo tracemalloc (alloc).
+    Domyślnie collapsed stacks – wejście dla flamegraph.pl / speedscope.
+    """
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling disabled (PROFILING_ENABLED=0)")
+    profiler = get_profiler()
+    if profiler.busy:
+        raise HTTPException(status_code=409, detail="Profile already running")
+    try:
+        # Próbkowanie w osobnym wątku – pętla zdarzeń dalej obsługuje ruch.
+        result = await asyncio.to_thread(profiler.run, seconds, mode)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="Profile already running")
+    if format == "json":
+        return result.payload(top)
+    return PlainTextResponse(
+        result.collapsed(),
+        headers={"X-Profile-Mode": mode, "X-Profile-Samples": str(result.samples)},
+    )
@@ -2,13 +2,16 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import date, datetime, time, timedelta
+from typing import List, Optional
+from datetime import date, timedelta
 
-from vetclinic_api.schemas.appointment import Appointment, AppointmentCreate, AppointmentUpdate
+from vetclinic_api.schemas.appointment import (
+    Appointment, AppointmentCreate, AppointmentUpdate,
+    AvailabilityOut, DoctorAvailability,
+)
 from vetclinic_api.crud import appointments_crud
 from vetclinic_api.core.database import get_db
-from vetclinic_api.models.appointments import Appointment as AppointmentModel
+from vetclinic_api.services import schedule_service
 
 router = APIRouter(
     prefix="/appointments",
@@ -23,6 +26,43 @@ def create_appointment(appointment: AppointmentCreate, db: Session = Depends(get
 def read_appointments(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     return appointments_crud.get_appointments(db, skip=skip, limit=limit)
 
+@router.get(
+    "/availability",
+    response_model=AvailabilityOut,
+    summary="Wolne sloty wielu lekarzy w zakresie dat (jedno zapytanie)"
+)
+def get_availability(
+    doctor_ids: Optional[List[str]] = Query(
+        None, description="ID lekarzy: powtarzany parametr albo lista po przecinku; brak = wszyscy"
+    ),
+    facility_id: Optional[int] = Query(None, description="Tylko lekarze tej placówki"),
+    start: date = Query(..., alias="from", description="Pierwszy dzień (YYYY-MM-DD)"),
+    end: Optional[date] = Query(None, alias="to", description="Ostatni dzień włącznie; domyślnie from + 6"),
+    db: Session = Depends(get_db)
+):
+    end = end or start + timedelta(days=6)
+    if end < start:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "'to' must not be before 'from'")
+    if (end - start).days + 1 > schedule_service.SCHEDULE_MAX_DAYS:
+        raise HTTPException(
+            status.HTTP_400_BAD_REQUEST,
+            f"Range longer than {schedule_service.SCHEDULE_MAX_DAYS} days",
+        )
+    try:
+        ids = [int(part) for raw in doctor_ids or [] for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, "doctor_ids must be integers")
+
+    ids = schedule_service.resolve_doctor_ids(db, ids, facility_id)
+    slots = schedule_service.availability(db, ids, start, end)
+    return AvailabilityOut(
+        start=start,
+        end=end,
+        slot_minutes=schedule_service.DEFAULT_GRID.slot_minutes,
+        duration_minutes=schedule_service.APPOINTMENT_DURATION_MIN,
+        doctors=[DoctorAvailability(doctor_id=d, days=days) for d, days in slots.items()],
+    )
+
 @router.get("/{appointment_id}", response_model=Appointment)
 def read_appointment(appointment_id: int, db: Session = Depends(get_db)):
     db_appointment = appointments_crud.get_appointment(db, appointment_id)
@@ -55,43 +95,7 @@ def get_free_slots(
     db: Session = Depends(get_db)
 ):
     """
-    1. Jeśli dzień tygodnia to niedziela (weekday()==6), zwraca [].
-    2. Generuje wszystkie kwadransy od 08:00 do 18:45.
-    3. Pobiera z bazy wszystkie istniejące wizyty (Appointment) dla doctor_id w tym dniu.
-    4. Filtruje out te godziny (HH:MM), które są już zajęte.
-    5. Zwraca posortowaną listę wolnych godzin jako ["HH:MM", ...].
+    Wolne sloty jednego lekarza w jednym dniu (silnik grafiku: services/schedule_service.py).
+    Niedziela (dzień zamknięty) – pusta lista; wizyta zajmuje APPOINTMENT_DURATION_MIN minut.
     """
-    # 1) Jeżeli niedziela (weekday == 6), lekarz nie przyjmuje
-    if date.weekday() == 6:
-        return []
-
-    # 2) Generujemy wszystkie możliwe kwadransy od 08:00 do 18:45
-    all_slots: List[str] = []
-    current = datetime.combine(date, time(hour=8, minute=0))
-    end_slot = datetime.combine(date, time(hour=18, minute=45))
-    while current <= end_slot:
-        all_slots.append(current.strftime("%H:%M"))
-        current += timedelta(minutes=15)
-
-    # 3) Ustalamy granice całego dnia (00:00:00–23:59:59)
-    start_of_day = datetime.combine(date, time(hour=0, minute=0, second=0))
-    end_of_day = datetime.combine(date, time(hour=23, minute=59, second=59))
-
-    # 4) Pobieramy z bazy wszystkie wizyty lekarza w tym dniu
-    appointments = (
-        db
-        .query(AppointmentModel)
-        .filter(
-            AppointmentModel.doctor_id == doctor_id,
-            AppointmentModel.visit_datetime >= start_of_day,
-            AppointmentModel.visit_datetime <= end_of_day
-        )
-        .all()
-    )
-
-    # 5) Wyciągamy zestaw zajętych kwadransów w formacie "HH:MM"
-    busy_slots = {app.visit_datetime.strftime("%H:%M") for app in appointments}
-
-    # 6) Tworzymy listę wolnych slotów
-    free_slots = [slot for slot in all_slots if slot not in busy_slots]
-    return free_slots
+    return schedule_service.free_slots(db, doctor_id, date)
@@ -1,12 +1,13 @@
+import asyncio
 import hashlib
-import json
 import time
 from datetime import datetime
 from decimal import Decimal
+from typing import Iterator, List, Optional
 
 import httpx
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from pydantic import BaseModel, Field, validator
 
 from vetclinic_api.blockchain.core import (
@@ -14,13 +15,25 @@ from vetclinic_api.blockchain.core import (
     Storage,
     Transaction,
     TxPayload,
-    build_block_proposal,
     compute_block_hash,
     mine_block,
+    transaction_bytes,
     verify_chain,
 )
+from vetclinic_api import tracing
 from vetclinic_api.blockchain.deps import get_storage
-from vetclinic_api.cluster.config import CONFIG
+from vetclinic_api.blockchain.lifecycle import (
+    STAGE_COMMITTED,
+    STAGE_GOSSIPED,
+    STAGE_RECEIVED,
+    STAGE_SUBMITTED,
+    get_tx_lifecycle,
+    stage_durations,
+)
+from vetclinic_api.cluster.chain_metrics import get_chain_metrics
+from vetclinic_api.cluster.config import CONFIG, peer_node_id
+from vetclinic_api.cluster.consensus import RoundConflict, run_consensus_round
+from vetclinic_api.cluster.forwarder import ForwardBatch, ForwardedTx, get_forwarder
 from vetclinic_api.cluster.http_client import get_http_client
 from vetclinic_api.middleware.chaos import apply_rpc_faults
 from vetclinic_api.crypto.ed25519 import (
@@ -33,7 +46,7 @@ from vetclinic_api.metrics import (
     chain_verify_total,
     inc_tx_rejected,
     inc_tx_submitted,
-    set_chain_status,
+    observe_tx_commit_latency,
 )
 
 router = APIRouter(tags=["blockchain"])
@@ -52,6 +65,18 @@ class SubmitTransaction(BaseModel):
         return v
 
 
+def _leader_transaction(payload: TxPayload, timestamp: datetime) -> Transaction:
+    raw = transaction_bytes(payload, timestamp)
+    keys = load_leader_keys_from_env()
+    return Transaction(
+        id=hashlib.sha256(raw).hexdigest(),
+        payload=payload,
+        sender_pub="demo-sender-pub",
+        signature=sign_message(keys.priv, raw),
+        timestamp=timestamp,
+    )
+
+
 @router.post("/tx/submit", status_code=202)
 async def submit_transaction(
     tx: SubmitTransaction,
@@ -59,27 +84,24 @@ async def submit_transaction(
     client: httpx.AsyncClient = Depends(get_http_client),
 ):
     if CONFIG.node_id != CONFIG.leader_id:
-        if not CONFIG.leader_url:
-            inc_tx_rejected("exception")
-            raise HTTPException(status_code=500, detail="Leader URL not configured")
-        try:
-            resp = await client.post(
-                f"{CONFIG.leader_url.rstrip('/')}/tx/submit",
-                json=tx.model_dump(mode="json"),
+        # Follower: kolejka lokalna, paczki do lidera wysyła TxForwarder w tle.
+        forwarded = ForwardedTx.create(
+            TxPayload(
+                sender=tx.sender,
+                recipient=tx.recipient,
+                amount=Decimal(str(tx.amount)),
             )
-        except httpx.HTTPError as exc:
-            inc_tx_rejected("exception")
+        )
+        forwarder = get_forwarder()
+        get_tx_lifecycle().mark(forwarded.id, STAGE_SUBMITTED)
+        if not forwarder.enqueue(forwarded):
+            inc_tx_rejected("queue_full")
             raise HTTPException(
-                status_code=502,
-                detail=f"Leader unreachable: {exc}",
-            ) from exc
-
-        try:
-            payload = resp.json()
-        except ValueError:
-            payload = {"detail": resp.text}
-
-        return JSONResponse(status_code=resp.status_code, content=payload)
+                status_code=429,
+                detail="Forward queue full",
+                headers={"Retry-After": "1"},
+            )
+        return {"status": "queued", "tx_id": forwarded.id, "queue_depth": forwarder.depth}
 
     try:
         payload = TxPayload(
@@ -87,24 +109,9 @@ async def submit_transaction(
             recipient=tx.recipient,
             amount=Decimal(str(tx.amount)),
         )
-        timestamp = datetime.utcnow()
-        raw = json.dumps(
-            {"payload": payload.model_dump(mode="json"), "timestamp": timestamp.isoformat()},
-            sort_keys=True,
-        ).encode("utf-8")
-        tx_id = hashlib.sha256(raw).hexdigest()
-
-        keys = load_leader_keys_from_env()
-        signature = sign_message(keys.priv, raw)
-
-        transaction = Transaction(
-            id=tx_id,
-            payload=payload,
-            sender_pub="demo-sender-pub",
-            signature=signature,
-            timestamp=timestamp,
-        )
-        storage.add_transaction(transaction)
+        transaction = _leader_transaction(payload, datetime.utcnow())
+        with tracing.span("tx.submit", **{"tx.id": transaction.id}):
+            storage.add_transaction(transaction)
     except ValueError:
         inc_tx_rejected("validation")
         raise
@@ -112,51 +119,173 @@ async def submit_transaction(
         inc_tx_rejected("exception")
         raise
 
+    lifecycle = get_tx_lifecycle()
+    lifecycle.mark(transaction.id, STAGE_SUBMITTED)
+
     # Broadcast transaction to peers so each keeps it in mempool.
-    for base_url in CONFIG.peers:
-        url = f"{base_url.rstrip('/')}/tx/receive"
+    with tracing.span("tx.gossip", **{"tx.id": transaction.id}):
+        for base_url in CONFIG.peers:
+            url = f"{base_url.rstrip('/')}/tx/receive"
+            try:
+                await client.post(url, json=transaction.model_dump(mode="json"))
+            except Exception:
+                # Best-effort: nie blokujemy lokalnej akceptacji.
+                continue
+    if CONFIG.peers:
+        lifecycle.mark(transaction.id, STAGE_GOSSIPED)
+
+    inc_tx_submitted()
+    return {"status": "accepted", "tx_id": transaction.id}
+
+
+@router.post("/tx/submit_batch", include_in_schema=False)
+async def submit_transaction_batch(
+    batch: ForwardBatch,
+    storage: Storage = Depends(get_storage),
+    client: httpx.AsyncClient = Depends(get_http_client),
+):
+    """
+    Paczka transakcji przekazana przez followera. Id i znacznik czasu nadał
+    follower; powtórzona paczka (retry) nie dubluje transakcji ani w mempoolu,
+    ani w łańcuchu – zatwierdzone sprawdzamy indeksem tx_id.
+    """
+    if CONFIG.node_id != CONFIG.leader_id:
+        # 503, żeby follower ponowił paczkę do nowego lidera.
+        raise HTTPException(status_code=503, detail="Not a leader")
+
+    known = {t.id for t in storage.get_mempool()}
+    accepted: List[Transaction] = []
+    rejected: List[dict] = []
+    duplicates = 0
+    for item in batch.transactions:
+        transaction = _leader_transaction(item.payload, item.timestamp)
+        if transaction.id != item.id:
+            inc_tx_rejected("validation")
+            rejected.append({"id": item.id, "reason": "id_mismatch"})
+            continue
+        if transaction.id in known or storage.get_transaction_block(transaction.id) is not None:
+            duplicates += 1
+            continue
         try:
-            await client.post(url, json=transaction.model_dump(mode="json"))
+            storage.add_transaction(transaction)
         except Exception:
-            # Best-effort: nie blokujemy lokalnej akceptacji.
+            inc_tx_rejected("exception")
+            rejected.append({"id": item.id, "reason": "storage_error"})
             continue
+        known.add(transaction.id)
+        accepted.append(transaction)
+        inc_tx_submitted()
+
+    lifecycle = get_tx_lifecycle()
+    lifecycle.mark_many([t.id for t in accepted], STAGE_SUBMITTED)
+    if accepted and CONFIG.peers:
+        body = [t.model_dump(mode="json") for t in accepted]
+        with tracing.span("tx.gossip_batch", **{"tx.count": len(accepted)}):
+            await asyncio.gather(
+                *(
+                    client.post(f"{base_url.rstrip('/')}/tx/receive_batch", json=body)
+                    for base_url in CONFIG.peers
+                ),
+                return_exceptions=True,
+            )
+        lifecycle.mark_many([t.id for t in accepted], STAGE_GOSSIPED)
 
-    inc_tx_submitted()
-    return {"status": "accepted"}
+    return {
+        "accepted": [t.id for t in accepted],
+        "duplicates": duplicates,
+        "rejected": rejected,
+    }
+
+
+CHAIN_BLOCKS_MAX_LIMIT = 100
+CHAIN_EXPORT_BATCH_SIZE = 50
 
 
 @router.get("/chain/status")
 def chain_status(
+    full: bool = Query(False, description="Dołącz cały łańcuch i mempool (kosztowne)"),
     storage: Storage = Depends(get_storage),
 ):
+    """
+    Metadane czubka łańcucha. Pełny łańcuch tylko przy `?full=true`;
+    do przeglądania historii służą /chain/blocks i /chain/export.
+    """
     try:
-        chain = storage.get_chain()
-        mempool = storage.get_mempool()
-        state = BlockchainState(chain=chain, mempool=mempool)
-
-        last_block_hash = compute_block_hash(chain[-1]) if chain else None
-        height = len(chain) - 1 if chain else -1
-        mempool_size = len(mempool)
-
-        set_chain_status(height=height, mempool_size=mempool_size)
+        tip = storage.get_tip()
+        height = tip.index
+        mempool_size = storage.get_mempool_size()
 
-        return {
+        body = {
             "height": height,
-            "last_block_hash": last_block_hash,
+            "last_block_hash": compute_block_hash(tip),
+            "last_block_timestamp": tip.timestamp,
             "mempool_size": mempool_size,
-            "chain": state.chain,
-            "mempool": state.mempool,
         }
+        if full:
+            state = BlockchainState(chain=storage.get_chain(), mempool=storage.get_mempool())
+            body["chain"] = state.chain
+            body["mempool"] = state.mempool
+        return body
     except Exception as exc:
         # Provide a consistent shape even on errors so tests do not KeyError.
-        return {
-            "height": None,
-            "last_block_hash": None,
-            "mempool_size": 0,
-            "chain": [],
-            "mempool": [],
-            "detail": str(exc),
-        }, 500
+        return JSONResponse(
+            {
+                "height": None,
+                "last_block_hash": None,
+                "mempool_size": 0,
+                "detail": str(exc),
+            },
+            status_code=500,
+        )
+
+
+@router.get("/chain/blocks")
+def chain_blocks(
+    from_index: int = Query(0, alias="from", ge=0),
+    to_index: Optional[int] = Query(None, alias="to", ge=0),
+    limit: int = Query(20, ge=1, le=CHAIN_BLOCKS_MAX_LIMIT),
+    storage: Storage = Depends(get_storage),
+):
+    """
+    Zakres bloków [from, to] (włącznie), maksymalnie `limit` na stronę.
+    `next_from` wskazuje początek kolejnej strony albo jest null.
+    """
+    if to_index is not None and to_index < from_index:
+        raise HTTPException(status_code=400, detail="'to' must be >= 'from'")
+
+    blocks = storage.get_blocks(from_index, to_index, limit=limit)
+    next_from = blocks[-1].index + 1 if len(blocks) == limit else None
+    if next_from is not None and to_index is not None and next_from > to_index:
+        next_from = None
+    return {
+        "from": from_index,
+        "to": to_index,
+        "count": len(blocks),
+        "next_from": next_from,
+        "blocks": blocks,
+    }
+
+
+@router.get("/chain/export")
+def chain_export(
+    from_index: int = Query(0, alias="from", ge=0),
+    to_index: Optional[int] = Query(None, alias="to", ge=0),
+    storage: Storage = Depends(get_storage),
+):
+    """
+    Strumieniowy eksport łańcucha w formacie NDJSON (jeden blok na linię).
+    Bloki są czytane z bazy paczkami, więc pamięć nie rośnie z wysokością.
+    """
+    if to_index is not None and to_index < from_index:
+        raise HTTPException(status_code=400, detail="'to' must be >= 'from'")
+
+    def _lines() -> Iterator[str]:
+        for block in storage.iter_blocks(
+            from_index, to_index, batch_size=CHAIN_EXPORT_BATCH_SIZE
+        ):
+            yield block.model_dump_json() + "\n"
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
 
 
 @router.post("/tx/receive", status_code=202, include_in_schema=False)
@@ -168,10 +297,30 @@ async def receive_transaction(
         storage.add_transaction(tx)
     except Exception:
         raise HTTPException(status_code=400, detail="Failed to enqueue transaction")
+    get_tx_lifecycle().mark(tx.id, STAGE_RECEIVED)
 
     return {"status": "queued"}
 
 
+@router.post("/tx/receive_batch", status_code=202, include_in_schema=False)
+async def receive_transaction_batch(
+    txs: List[Transaction],
+    storage: Storage = Depends(get_storage),
+):
+    known = {t.id for t in storage.get_mempool()}
+    queued = 0
+    for tx in txs:
+        if tx.id in known:
+            continue
+        try:
+            storage.add_transaction(tx)
+        except Exception:
+            continue
+        queued += 1
+        get_tx_lifecycle().mark(tx.id, STAGE_RECEIVED)
+    return {"status": "queued", "count": queued}
+
+
 @router.post("/chain/mine")
 def mine_block_endpoint(
     storage: Storage = Depends(get_storage),
@@ -184,6 +333,8 @@ def mine_block_endpoint(
         block = mine_block(storage)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
+    observe_tx_commit_latency(block.transactions)
+    get_tx_lifecycle().mark_block(block, STAGE_COMMITTED)
 
     block_hash = compute_block_hash(block)
     return {
@@ -203,6 +354,8 @@ async def verify_chain_endpoint(
         result = verify_chain(storage)
         ok = bool(result.get("valid"))
         chain_verify_total.labels(NODE_NAME, "ok" if ok else "invalid").inc()
+        if ok:
+            get_chain_metrics().mark_verified(int(result.get("height", 0)))
         if not ok and "reason" not in result:
             errors = result.get("errors") or []
             result["reason"] = errors[0].get("reason", "invalid_chain") if errors else "invalid_chain"
@@ -225,54 +378,102 @@ async def verify_chain_endpoint(
 
 @router.post("/chain/mine_distributed")
 async def mine_distributed(
+    pipelined: Optional[bool] = Query(
+        None, description="Commit w tle, kolejna runda startuje od razu"
+    ),
     storage: Storage = Depends(get_storage),
     client: httpx.AsyncClient = Depends(get_http_client),
 ):
     if CONFIG.node_id != CONFIG.leader_id:
-        raise HTTPException(status_code=400, detail="Not a leader")
+        if not CONFIG.leader_url:
+            raise HTTPException(
+                status_code=503,
+                detail="No leader elected",
+                headers={"Retry-After": "1"},
+            )
+        # Follower przekierowuje do aktualnego lidera (po failoverze też).
+        return RedirectResponse(
+            url=f"{CONFIG.leader_url.rstrip('/')}/chain/mine_distributed",
+            status_code=307,
+        )
 
     await apply_rpc_faults("mine_distributed")
 
     try:
-        proposal = build_block_proposal(storage)
+        return await run_consensus_round(storage, client, pipelined=pipelined)
+    except RoundConflict as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
-    votes = 1
-    total = 1
 
-    payload = proposal.model_dump(mode="json")
-
-    for base_url in CONFIG.peers:
-        url = f"{base_url.rstrip('/')}/rpc/propose_block"
-        total += 1
-        try:
-            resp = await client.post(url, json=payload)
-        except Exception:
-            continue
-        if resp.status_code == 200:
-            try:
-                body = resp.json()
-            except ValueError:
-                continue
-            if body.get("vote") == "accept":
-                votes += 1
+def _local_tx_status(tx_id: str, storage: Storage) -> dict:
+    trace = get_tx_lifecycle().get(tx_id)
+    events = trace["events"] if trace else {}
+    block_index = trace["block_index"] if trace and STAGE_COMMITTED in events else None
+    if block_index is None:
+        block_index = storage.get_transaction_block(tx_id)
+    if block_index is not None:
+        state = "committed"
+    elif any(t.id == tx_id for t in storage.get_mempool()):
+        state = "pending"
+    elif get_forwarder().contains(tx_id):
+        state = "queued"
+    elif events:
+        # Follower: paczka w drodze do lidera albo transakcja czeka na gossip.
+        state = "in_flight"
+    else:
+        state = "unknown"
+    return {
+        "node_id": CONFIG.node_id,
+        "state": state,
+        "block_index": block_index,
+        "events": {
+            stage: datetime.utcfromtimestamp(at).isoformat() + "Z"
+            for stage, at in sorted(events.items(), key=lambda item: item[1])
+        },
+        "durations_s": stage_durations(events),
+    }
 
-    if votes <= total // 2:
-        return {"status": "rejected", "votes": votes, "total": total}
 
-    storage.add_block(proposal.block)
+@router.get("/tx/{tx_id}/status")
+async def transaction_status(
+    tx_id: str,
+    cluster: bool = Query(False, description="Dołącz stan transakcji na wszystkich peerach"),
+    storage: Storage = Depends(get_storage),
+    client: httpx.AsyncClient = Depends(get_http_client),
+):
+    """
+    Cykl życia transakcji na tym węźle: stan (pending/queued/committed),
+    znaczniki czasu etapów i czasy od pierwszego zdarzenia.
+    Z `?cluster=true` także stan na peerach (np. commit na każdym followerze).
+    """
+    local = _local_tx_status(tx_id, storage)
+    if not cluster:
+        if local["state"] == "unknown":
+            raise HTTPException(status_code=404, detail="Unknown transaction")
+        return {"tx_id": tx_id, **local}
 
-    for base_url in CONFIG.peers:
-        url = f"{base_url.rstrip('/')}/rpc/commit_block"
+    async def _peer(base_url: str) -> dict:
         try:
-            await client.post(url, json=payload)
-        except Exception:
-            continue
-
+            resp = await client.get(f"{base_url.rstrip('/')}/tx/{tx_id}/status")
+        except httpx.HTTPError:
+            return {"state": "unreachable"}
+        if resp.status_code == 404:
+            return {"state": "unknown"}
+        if resp.status_code != 200:
+            return {"state": "error", "status_code": resp.status_code}
+        return resp.json()
+
+    peers = await asyncio.gather(*(_peer(url) for url in CONFIG.peers))
+    nodes = {str(CONFIG.node_id): local}
+    for base_url, payload in zip(CONFIG.peers, peers):
+        payload.pop("tx_id", None)
+        nodes[str(peer_node_id(base_url) or base_url)] = payload
+    committed = [n for n, p in nodes.items() if p.get("state") == "committed"]
     return {
-        "status": "committed",
-        "block_hash": proposal.hash,
-        "votes": votes,
-        "total": total,
+        "tx_id": tx_id,
+        "state": local["state"],
+        "committed_on": committed,
+        "nodes": nodes,
     }
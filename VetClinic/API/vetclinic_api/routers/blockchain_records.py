@@ -3,12 +3,13 @@ from __future__ import annotations
 import hashlib
 import json
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
 from vetclinic_api.blockchain.core import (
+    RECORD_TX_KIND,
     Transaction,
     TxPayload,
 )
@@ -26,7 +27,7 @@ class BlockchainRecord(BaseModel):
 
 def _build_record_tx(record: BlockchainRecord) -> Transaction:
     payload = TxPayload(
-        kind="MEDICAL_RECORD",
+        kind=RECORD_TX_KIND,
         record_id=record.id,
         data_hash=record.data_hash,
         owner=record.owner or "system",
@@ -50,26 +51,6 @@ def _build_record_tx(record: BlockchainRecord) -> Transaction:
     )
 
 
-def _iter_record_txs(chain) -> List[Dict[str, Any]]:
-    results: List[Dict[str, Any]] = []
-    for block in chain:
-        for tx in block.transactions:
-            payload = tx.payload
-            if getattr(payload, "kind", None) != "MEDICAL_RECORD":
-                continue
-            results.append(
-                {
-                    "record_id": getattr(payload, "record_id", None),
-                    "data_hash": getattr(payload, "data_hash", None),
-                    "owner": getattr(payload, "owner", None),
-                    "timestamp": tx.timestamp,
-                    "block_index": block.index,
-                    "tx_id": tx.id,
-                }
-            )
-    return results
-
-
 @router.post("/record")
 def add_blockchain_record(
     record: BlockchainRecord, storage: Storage = Depends(get_storage)
@@ -83,26 +64,20 @@ def add_blockchain_record(
 def get_blockchain_record(
     record_id: int, storage: Storage = Depends(get_storage)
 ):
-    chain = storage.get_chain()
-    records = [
-        tx for tx in _iter_record_txs(chain) if tx["record_id"] == record_id
-    ]
-    if not records:
+    latest = storage.get_record_anchor(record_id)
+    if latest is None:
         raise HTTPException(status_code=404, detail="Record not found on-chain")
-    latest = sorted(records, key=lambda item: item["timestamp"])[-1]
     return {
-        "id": latest["record_id"],
-        "data_hash": latest["data_hash"],
-        "timestamp": latest["timestamp"],
-        "owner": latest["owner"],
-        "block_index": latest["block_index"],
-        "tx_id": latest["tx_id"],
+        "id": latest.record_id,
+        "data_hash": latest.data_hash,
+        "timestamp": latest.timestamp,
+        "owner": latest.owner,
+        "block_index": latest.block_index,
+        "tx_id": latest.tx_id,
     }
 
 
 @router.get("/records-by-owner/{owner}")
 def get_records_by_owner(owner: str, storage: Storage = Depends(get_storage)):
-    chain = storage.get_chain()
-    records = _iter_record_txs(chain)
-    ids = sorted({tx["record_id"] for tx in records if tx["owner"] == owner})
+    ids = storage.get_record_ids_by_owner(owner)
     return {"owner": owner, "record_ids": ids}
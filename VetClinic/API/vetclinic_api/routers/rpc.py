@@ -1,13 +1,22 @@
 from __future__ import annotations
 
-from typing import List
+import time
 
-import httpx
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
 
 from vetclinic_api.admin.network_state import get_state
 from vetclinic_api.cluster.config import CONFIG
-from vetclinic_api.cluster.http_client import get_http_client
+from vetclinic_api.cluster.consensus import get_commit_buffer
+from vetclinic_api.cluster.election import (
+    HeartbeatRequest,
+    HeartbeatResponse,
+    VoteRequest,
+    VoteResponse,
+    get_election,
+)
+from vetclinic_api.cluster.health import get_peer_health
+from vetclinic_api.cluster.sync import get_syncer
 from vetclinic_api.blockchain.core import (
     BlockProposal,
     Storage,
@@ -16,72 +25,84 @@ from vetclinic_api.blockchain.core import (
     is_valid_new_block,
 )
 from vetclinic_api.blockchain.deps import get_storage
+from vetclinic_api.blockchain.lifecycle import STAGE_COMMITTED, STAGE_PROPOSED, get_tx_lifecycle
 from vetclinic_api.crypto.ed25519 import (
     load_leader_keys_from_env,
     verify_signature,
 )
-from vetclinic_api.middleware.chaos import apply_rpc_faults
+from vetclinic_api.metrics import inc_vote, observe_consensus_phase
+from vetclinic_api.middleware.chaos import apply_rpc_faults, rpc_caller
 
-router = APIRouter(prefix="/rpc", tags=["rpc"])
+router = APIRouter(prefix="/rpc", tags=["rpc"], dependencies=[Depends(rpc_caller)])
 
 
 @router.get("/node-info")
-async def node_info():
+async def node_info(storage: Storage = Depends(get_storage)):
     """
-    Zwraca podstawowe informacje o tym węźle.
+    Zwraca podstawowe informacje o tym węźle (wysokość – dla opóźnienia peerów w metrykach).
     """
     await apply_rpc_faults("node_info")
+    height, _ = storage.get_tip_summary()
     return {
         "node_id": CONFIG.node_id,
         "leader_id": CONFIG.leader_id,
+        "term": get_election().state.term,
         "peers": CONFIG.peers,
+        "height": height,
     }
 
 
 @router.get("/leader-info")
 async def leader_info():
     """
-    Zwraca identyfikator lidera znany temu węźle.
+    Zwraca lidera znanego temu węzłowi wraz z bieżącą kadencją wyborów.
     """
     await apply_rpc_faults("leader_info")
-    return {"leader_id": CONFIG.leader_id}
+    election = get_election()
+    return {
+        "leader_id": CONFIG.leader_id,
+        "leader_url": CONFIG.leader_url,
+        "term": election.state.term,
+        "role": election.state.role,
+        "election_enabled": election.running,
+    }
 
 
-@router.get("/ping-peers")
-async def ping_peers(
-    client: httpx.AsyncClient = Depends(get_http_client),
+@router.post("/request_vote", response_model=VoteResponse)
+async def request_vote(
+    req: VoteRequest,
+    storage: Storage = Depends(get_storage),
 ):
     """
-    Testowo odpytuje wszystkich peers o /rpc/node-info.
-    Nie jest to mechanizm konsensusu, tylko diagnostyka sieci.
+    Głosowanie w wyborach lidera (RequestVote z Rafta).
+    """
+    await apply_rpc_faults("request_vote")
+    return get_election().handle_vote_request(req, storage.get_tip().index)
+
+
+@router.post("/heartbeat", response_model=HeartbeatResponse)
+async def heartbeat(req: HeartbeatRequest):
+    """
+    Heartbeat lidera: potwierdza kadencję i odkłada timeout wyborów.
+    """
+    await apply_rpc_faults("heartbeat")
+    return get_election().handle_heartbeat(req)
+
+
+@router.get("/ping-peers")
+async def ping_peers():
+    """
+    Diagnostyka sieci: stan peerów z trackera heartbeatów (bez odpytywania
+    peerów przy każdym wywołaniu). Nie jest to mechanizm konsensusu.
     """
     await apply_rpc_faults("ping_peers")
-    results: List[dict] = []
-    for base_url in CONFIG.peers:
-        url = f"{base_url.rstrip('/')}/rpc/node-info"
-        try:
-            resp = await client.get(url)
-            ok = resp.status_code == 200
-            payload = resp.json() if ok else None
-            results.append(
-                {
-                    "url": url,
-                    "ok": ok,
-                    "response": payload,
-                }
-            )
-        except Exception as exc:
-            results.append(
-                {
-                    "url": url,
-                    "ok": False,
-                    "error": str(exc),
-                }
-            )
+    health = get_peer_health()
+    if health.is_stale():
+        await health.refresh()
     return {
         "node_id": CONFIG.node_id,
         "leader_id": CONFIG.leader_id,
-        "results": results,
+        "results": health.snapshot(),
     }
 
 
@@ -94,14 +115,27 @@ async def propose_block(
     Waliduje i głosuje nad propozycją bloku.
     """
     await apply_rpc_faults("propose_block")
+    start = time.perf_counter()
 
-    chain = storage.get_chain()
-    if not chain:
-        raise HTTPException(status_code=500, detail="Empty chain on follower")
+    election = get_election()
+    if proposal.term < election.state.term:
+        # Propozycja od lidera z minionej kadencji (np. po failoverze).
+        inc_vote("no")
+        return {"vote": "reject", "byzantine": False, "reason": "stale_term"}
+    election.observe_term(proposal.term)
 
-    last = chain[-1]
+    last = storage.get_tip()
+    buffer = get_commit_buffer()
+    # W trybie potokowym rodzicem może być zaakceptowana, jeszcze niezatwierdzona propozycja.
+    parent = buffer.parent_for(proposal.block.index, last)
 
-    is_ok = is_valid_new_block(last, proposal.block)
+    if parent is None and proposal.block.index > last.index + 1:
+        # Luka w łańcuchu: nie da się zwalidować propozycji, doganiamy w tle.
+        get_syncer().request(storage, target=proposal.block.index - 1)
+        inc_vote("no")
+        return {"vote": "reject", "byzantine": False, "reason": "lagging"}
+
+    is_ok = is_valid_new_block(parent or last, proposal.block)
 
     computed_hash = compute_block_hash(proposal.block)
     if computed_hash != proposal.hash:
@@ -116,7 +150,12 @@ async def propose_block(
     vote = "accept" if is_ok else "reject"
     if state.byzantine:
         vote = "reject" if is_ok else "accept"
+    elif is_ok:
+        buffer.remember_proposal(proposal.block)
+        get_tx_lifecycle().mark_block(proposal.block, STAGE_PROPOSED)
 
+    observe_consensus_phase("propose_validate", time.perf_counter() - start)
+    inc_vote("yes" if vote == "accept" else "no")
     return {"vote": vote, "byzantine": state.byzantine}
 
 
@@ -129,12 +168,63 @@ async def commit_block(
     Przyjmuje zatwierdzony blok i dodaje do łańcucha.
     """
     await apply_rpc_faults("commit_block")
+    start = time.perf_counter()
+
+    election = get_election()
+    if proposal.term < election.state.term:
+        # Commit od zdetronizowanego lidera – jak w propose_block, nie stosujemy go.
+        return JSONResponse(
+            status_code=409,
+            content={"status": "rejected", "reason": "stale_term", "term": election.state.term},
+        )
+    election.observe_term(proposal.term)
+
+    last = storage.get_tip()
+    if proposal.block.index <= last.index:
+        # Powtórzony commit (retry lidera po zgubionej odpowiedzi) jest idempotentny.
+        existing = storage.get_blocks(proposal.block.index, proposal.block.index, limit=1)
+        if existing and existing[0].hash == proposal.block.hash:
+            return {
+                "status": "committed",
+                "byzantine": False,
+                "height": last.index,
+                "duplicate": True,
+            }
+
+    buffer = get_commit_buffer()
+    parent = buffer.parent_for(proposal.block.index, last)
+    if parent is not None and parent is not last:
+        # Commit wyprzedził commit poprzedniego bloku (konsensus potokowy);
+        # rodzica znamy z zaakceptowanej propozycji, więc czekamy w buforze.
+        keys = load_leader_keys_from_env()
+        header_bytes = block_header_bytes(proposal.block)
+        if not is_valid_new_block(parent, proposal.block) or not verify_signature(
+            keys.pub, header_bytes, proposal.block.leader_sig
+        ):
+            raise HTTPException(status_code=400, detail="Invalid block on commit")
+        buffer.buffer_commit(proposal.block)
+        return JSONResponse(
+            status_code=202,
+            content={
+                "status": "buffered",
+                "height": last.index,
+                "pending": buffer.pending_commits,
+            },
+        )
 
-    chain = storage.get_chain()
-    if not chain:
-        raise HTTPException(status_code=500, detail="Empty chain on commit")
+    if proposal.block.index > last.index + 1:
+        # Lider ma już ten blok zapisany, więc sync do jego indeksu go obejmie.
+        scheduled = get_syncer().request(storage, target=proposal.block.index)
+        return JSONResponse(
+            status_code=202,
+            content={
+                "status": "syncing",
+                "height": last.index,
+                "target": proposal.block.index,
+                "scheduled": scheduled,
+            },
+        )
 
-    last = chain[-1]
     if not is_valid_new_block(last, proposal.block):
         raise HTTPException(status_code=400, detail="Invalid block on commit")
 
@@ -148,8 +238,30 @@ async def commit_block(
         return {"status": "committed", "byzantine": True, "height": last.index}
 
     storage.add_block(proposal.block)
+    get_tx_lifecycle().mark_block(proposal.block, STAGE_COMMITTED)
+    buffer.drain(storage)
+    observe_consensus_phase("commit_apply", time.perf_counter() - start)
     return {
         "status": "committed",
         "byzantine": False,
-        "height": proposal.block.index,
+        "height": storage.get_tip().index,
     }
+
+
+@router.get("/sync-status")
+async def sync_status():
+    """
+    Stan mechanizmu doganiania łańcucha na tym węźle.
+    """
+    return get_syncer().status_payload()
+
+
+@router.post("/sync")
+async def trigger_sync(
+    storage: Storage = Depends(get_storage),
+):
+    """
+    Wymusza synchronizację z peerami i czeka na jej wynik.
+    """
+    await get_syncer().sync_once(storage)
+    return get_syncer().status_payload()
@@ -1,8 +1,6 @@
 import datetime
-import pyotp
 from datetime import timedelta
 from typing import List, Optional
-from qrcode import make as generate_qr_code
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
 from fastapi.responses import JSONResponse
@@ -17,10 +15,20 @@ from vetclinic_api.schemas.users import (
     UserLogin, ConfirmTOTP, PasswordReset
 )
 from vetclinic_api.core.database import get_db
+from vetclinic_api.core.lazy import lazy_import
 from vetclinic_api.core.security import (
     get_user_by_email, verify_password, create_access_token, get_password_hash
 )
 
+# TOTP i kody QR ładowane przy pierwszym logowaniu, nie przy starcie.
+pyotp = lazy_import("pyotp")
+qrcode = lazy_import("qrcode")
+
+
+def generate_qr_code(uri: str):
+    return qrcode.make(uri)
+
+
 router = APIRouter(prefix="/users", tags=["users"])
 
 MAX_FAILS    = 5
@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field, ConfigDict
 
 class AppointmentBase(BaseModel):
@@ -94,3 +94,21 @@ class Appointment(AppointmentBase):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class DoctorAvailability(BaseModel):
+    doctor_id: int
+    days: Dict[date, List[str]] = Field(
+        ..., description="Wolne sloty (HH:MM) na każdy dzień zakresu"
+    )
+
+
+class AvailabilityOut(BaseModel):
+    """Dostępność lekarzy w zakresie dat (/appointments/availability)."""
+    start: date = Field(..., alias="from")
+    end: date = Field(..., alias="to")
+    slot_minutes: int
+    duration_minutes: int
+    doctors: List[DoctorAvailability]
+
+    model_config = ConfigDict(populate_by_name=True)
@@ -0,0 +1,42 @@
+"""
+Start węzła: `python -m vetclinic_api.serve` (obraz Dockera).
+
+UVICORN_WORKERS=1 – zwykły uvicorn w jednym procesie.
+UVICORN_WORKERS>1 – kilka workerów: przed ich startem czyścimy katalog
+metryk wieloprocesowych Prometheusa i zakładamy tabele, żeby workery
+nie ścigały się przy create_all.
+"""
+
+import os
+import shutil
+
+import uvicorn
+
+DEFAULT_MULTIPROC_DIR = "/tmp/vetclinic-prometheus"
+
+
+def prepare_multiprocess(workers: int) -> None:
+    if workers <= 1:
+        return
+    # Musi być w env przed importem prometheus_client w workerach.
+    path = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", DEFAULT_MULTIPROC_DIR)
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    from vetclinic_api.core.database import init_db
+
+    init_db()
+
+
+def main() -> None:
+    workers = max(1, int(os.getenv("UVICORN_WORKERS", "1")))
+    prepare_multiprocess(workers)
+    uvicorn.run(
+        "vetclinic_api.main:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        workers=workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
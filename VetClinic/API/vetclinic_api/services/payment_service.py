@@ -1,12 +1,15 @@
-import stripe
 import os
 
-stripe.api_key = os.getenv("STRIPE_API_KEY", "")
+from vetclinic_api.core.lazy import lazy_import
+
+# SDK Stripe ładujemy dopiero przy pierwszej płatności (szybszy start węzła).
+stripe = lazy_import("stripe")
 
 def create_stripe_session(invoice_id: int, amount: float):
     """
     Tworzy Stripe Checkout Session w trybie sandbox.
     """
+    stripe.api_key = os.getenv("STRIPE_API_KEY", "")
     session = stripe.checkout.Session.create(
         payment_method_types=["card"],
         line_items=[{
@@ -1,17 +1,29 @@
 import os
-import requests
 import logging
 from datetime import datetime, timezone
-from requests.auth import HTTPBasicAuth
 from urllib.parse import urlparse, parse_qs
 
+from vetclinic_api.core.lazy import lazy_import
+
+# requests ładujemy przy pierwszym zamówieniu – nie przy starcie węzła.
+requests = lazy_import("requests")
+
 # ——— konfiguracja loggera ———
-_LOG_FILE = "payu_service.log"
+_LOG_FILE = os.getenv("PAYU_LOG_FILE", "payu_service.log")
 logger = logging.getLogger("payu_service")
-logger.setLevel(logging.DEBUG)
-fh = logging.FileHandler(_LOG_FILE, encoding="utf-8")
-fh.setFormatter(logging.Formatter("%(asctime)s %(levelname)-8s %(message)s"))
-logger.addHandler(fh)
+
+
+def _ensure_log_handler() -> None:
+    """
+    Plik logu PayU otwieramy przy pierwszym użyciu, nie przy imporcie modułu.
+    """
+    if any(getattr(h, "_payu", False) for h in logger.handlers):
+        return
+    logger.setLevel(logging.DEBUG)
+    fh = logging.FileHandler(_LOG_FILE, encoding="utf-8")
+    fh.setFormatter(logging.Formatter("%(asctime)s %(levelname)-8s %(message)s"))
+    fh._payu = True
+    logger.addHandler(fh)
 
 # etykiety logów
 _LOG_REQ      = "→ PAYU AUTH REQUEST"
@@ -38,9 +50,10 @@ API_URL       = os.getenv("PAYU_API_URL",   "https://secure.snd.payu.com/api/v2_
 NOTIFY_URL    = os.getenv("PAYU_NOTIFY_URL", "")
 
 def _get_access_token() -> str:
+    _ensure_log_handler()
     headers = {"Content-Type": _CONTENT_TYPE_FORM, "Accept": _ACCEPT_JSON}
     data = {"grant_type": "client_credentials"}
-    auth = HTTPBasicAuth(CLIENT_ID, CLIENT_SECRET)
+    auth = requests.auth.HTTPBasicAuth(CLIENT_ID, CLIENT_SECRET)
 
     logger.debug(_LOG_REQ)
     logger.debug(_LOG_URL + repr(OAUTH_URL))
@@ -86,6 +99,7 @@ def create_payu_order(
     """
     Tworzy zamówienie w PayU sandbox. Zwraca JSON lub parametry przekierowania płatności.
     """
+    _ensure_log_handler()
     token = _get_access_token()
     headers = {
         "Authorization": f"Bearer {token}",
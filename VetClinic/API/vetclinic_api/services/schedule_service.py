@@ -0,0 +1,182 @@
+"""
+Silnik grafiku: wolne sloty wielu lekarzy w zakresie dat.
+
+Dzień lekarza to maska bitowa (int): bit i = slot `day_start + i * slot_minutes`.
+Wizyty z całego zakresu pobieramy jednym zapytaniem po indeksie pokrywającym
+(doctor_id, visit_datetime) – unikalne ograniczenie uq_doctor_visit_datetime –
+i zamieniamy na maski zajętości; wolne = pełna maska & ~zajęte.
+Wspólne dla API (/appointments/availability, /appointments/free_slots/) i GUI.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import cached_property
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from vetclinic_api.models.appointments import Appointment as AppointmentModel
+from vetclinic_api.models.users import Doctor
+
+
+def _parse_hhmm(value: str) -> time:
+    hour, minute = value.split(":")
+    return time(int(hour), int(minute))
+
+
+SCHEDULE_DAY_START = _parse_hhmm(os.getenv("SCHEDULE_DAY_START", "08:00"))
+# Koniec pracy (wyłącznie): ostatni slot zaczyna się slot_minutes wcześniej.
+SCHEDULE_DAY_END = _parse_hhmm(os.getenv("SCHEDULE_DAY_END", "19:00"))
+SCHEDULE_SLOT_MINUTES = int(os.getenv("SCHEDULE_SLOT_MINUTES", "15"))
+# Model wizyty nie ma czasu trwania – przyjmujemy stały (może zająć kilka slotów).
+APPOINTMENT_DURATION_MIN = int(os.getenv("APPOINTMENT_DURATION_MIN", "15"))
+SCHEDULE_CLOSED_WEEKDAYS = frozenset(
+    int(d) for d in os.getenv("SCHEDULE_CLOSED_WEEKDAYS", "6").split(",") if d.strip()
+)
+# Największy zakres jednego zapytania o dostępność (dni).
+SCHEDULE_MAX_DAYS = int(os.getenv("SCHEDULE_MAX_DAYS", "31"))
+
+
+def _minutes(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+@dataclass(frozen=True)
+class ScheduleGrid:
+    day_start: time = SCHEDULE_DAY_START
+    day_end: time = SCHEDULE_DAY_END
+    slot_minutes: int = SCHEDULE_SLOT_MINUTES
+    closed_weekdays: FrozenSet[int] = SCHEDULE_CLOSED_WEEKDAYS
+
+    @cached_property
+    def slots_per_day(self) -> int:
+        return max(0, (_minutes(self.day_end) - _minutes(self.day_start)) // self.slot_minutes)
+
+    @cached_property
+    def full_mask(self) -> int:
+        return (1 << self.slots_per_day) - 1
+
+    @cached_property
+    def labels(self) -> Tuple[str, ...]:
+        start = _minutes(self.day_start)
+        return tuple(
+            f"{m // 60:02d}:{m % 60:02d}"
+            for m in range(start, start + self.slots_per_day * self.slot_minutes, self.slot_minutes)
+        )
+
+    def is_open(self, day: date) -> bool:
+        return day.weekday() not in self.closed_weekdays
+
+    def busy_mask(self, visits: Iterable[datetime], duration_min: int = APPOINTMENT_DURATION_MIN) -> int:
+        """
+        Sloty, na które nachodzi choć jedna wizyta [start, start + duration).
+        """
+        mask = 0
+        start_min = _minutes(self.day_start)
+        for visit in visits:
+            offset = visit.hour * 60 + visit.minute - start_min
+            first = max(0, offset // self.slot_minutes)
+            last = min(self.slots_per_day, -(-(offset + max(duration_min, 1)) // self.slot_minutes))
+            if last > first:
+                mask |= ((1 << (last - first)) - 1) << first
+        return mask
+
+    def free_mask(self, day: date, busy: int) -> int:
+        if not self.is_open(day):
+            return 0
+        return self.full_mask & ~busy
+
+    def free_labels(self, mask: int) -> List[str]:
+        labels = self.labels
+        out = []
+        while mask:
+            low = mask & -mask
+            out.append(labels[low.bit_length() - 1])
+            mask ^= low
+        return out
+
+
+DEFAULT_GRID = ScheduleGrid()
+
+
+def _days(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def resolve_doctor_ids(
+    db: Session,
+    doctor_ids: Optional[Sequence[int]] = None,
+    facility_id: Optional[int] = None,
+) -> List[int]:
+    """
+    Jawna lista lekarzy, albo wszyscy (z placówki `facility_id`, jeśli podano).
+    """
+    if doctor_ids:
+        return sorted(set(doctor_ids))
+    query = db.query(Doctor.id)
+    if facility_id is not None:
+        query = query.filter(Doctor.facility_id == facility_id)
+    return sorted(row[0] for row in query.all())
+
+
+def busy_masks(
+    db: Session,
+    doctor_ids: Sequence[int],
+    start: date,
+    end: date,
+    grid: ScheduleGrid = DEFAULT_GRID,
+    duration_min: int = APPOINTMENT_DURATION_MIN,
+) -> Dict[int, Dict[date, int]]:
+    """
+    Maski zajętości {lekarz: {dzień: maska}} – jedno zapytanie dla całego zakresu.
+    """
+    visits: Dict[Tuple[int, date], List[datetime]] = {}
+    if doctor_ids and any(grid.is_open(day) for day in _days(start, end)):
+        rows = (
+            db.query(AppointmentModel.doctor_id, AppointmentModel.visit_datetime)
+            .filter(
+                AppointmentModel.doctor_id.in_(list(doctor_ids)),
+                AppointmentModel.visit_datetime >= datetime.combine(start, time.min),
+                AppointmentModel.visit_datetime < datetime.combine(end + timedelta(days=1), time.min),
+            )
+            .all()
+        )
+        for doctor_id, visit in rows:
+            visits.setdefault((doctor_id, visit.date()), []).append(visit)
+    return {
+        doctor_id: {
+            day: grid.busy_mask(visits.get((doctor_id, day), ()), duration_min)
+            for day in _days(start, end)
+        }
+        for doctor_id in doctor_ids
+    }
+
+
+def availability(
+    db: Session,
+    doctor_ids: Sequence[int],
+    start: date,
+    end: date,
+    grid: ScheduleGrid = DEFAULT_GRID,
+    duration_min: int = APPOINTMENT_DURATION_MIN,
+) -> Dict[int, Dict[date, List[str]]]:
+    """
+    Wolne sloty {lekarz: {dzień: ["HH:MM", ...]}}.
+    """
+    masks = busy_masks(db, doctor_ids, start, end, grid, duration_min)
+    return {
+        doctor_id: {day: grid.free_labels(grid.free_mask(day, busy)) for day, busy in days.items()}
+        for doctor_id, days in masks.items()
+    }
+
+
+def free_slots(
+    db: Session,
+    doctor_id: int,
+    day: date,
+    grid: ScheduleGrid = DEFAULT_GRID,
+) -> List[str]:
+    return availability(db, [doctor_id], day, day, grid)[doctor_id][day]
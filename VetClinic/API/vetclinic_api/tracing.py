@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import os
+import re
+from contextlib import contextmanager
+from typing import Any, Iterator, MutableMapping, Optional
+
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter, SimpleSpanProcessor
+except ImportError:  # OpenTelemetry jest opcjonalny
+    trace = None
+
+# "console" (stdout) albo "file" (TRACING_FILE); puste = wyłączone.
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "").lower()
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+SERVICE_NAME = os.getenv("NODE_NAME", "node-local")
+
+_tracer = None
+_out = None
+
+# W3C Trace Context: wersja-trace_id-parent_id-flagi, małe hex; wersja ff niedozwolona.
+_TRACEPARENT = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}(-.*)?$")
+
+
+def setup_tracing(exporter: Optional[str] = None, path: Optional[str] = None) -> bool:
+    """
+    Włącza spany OpenTelemetry z lokalnym eksporterem (konsola / plik).
+    Bez pakietu opentelemetry-sdk albo bez eksportera – no-op (False).
+    Wołane z lifespan aplikacji; sam import modułu niczego nie otwiera.
+    """
+    global _tracer, _out
+    if _tracer is not None:
+        return True
+    exporter = (exporter if exporter is not None else TRACING_EXPORTER).lower()
+    if trace is None or exporter not in ("console", "file"):
+        return False
+    if exporter == "file":
+        _out = open(path or TRACING_FILE, "a", encoding="utf-8")
+        span_exporter = ConsoleSpanExporter(
+            out=_out, formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+    else:
+        span_exporter = ConsoleSpanExporter()
+    provider = TracerProvider(resource=Resource.create({"service.name": SERVICE_NAME}))
+    provider.add_span_processor(SimpleSpanProcessor(span_exporter))
+    _tracer = provider.get_tracer("vetclinic_api")
+    return True
+
+
+def shutdown_tracing() -> None:
+    global _tracer, _out
+    _tracer = None
+    if _out is not None:
+        _out.close()
+        _out = None
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Any]]:
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name) as current:
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, value)
+        yield current
+
+
+@contextmanager
+def server_span(scope: dict) -> Iterator[Optional[Any]]:
+    """
+    Span żądania przychodzącego; rodzic z nagłówka `traceparent` (RPC od peera).
+    """
+    if _tracer is None:
+        yield None
+        return
+    headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+    ctx = propagate.extract(headers)
+    name = f"{scope.get('method', 'GET')} {scope.get('path', '')}"
+    with _tracer.start_as_current_span(name, context=ctx, kind=trace.SpanKind.SERVER) as current:
+        current.set_attribute("http.method", scope.get("method", ""))
+        current.set_attribute("http.target", scope.get("path", ""))
+        yield current
+
+
+def current_trace_id(scope: Optional[dict] = None) -> Optional[str]:
+    """
+    Id śladu (32 hex) bieżącego spanu; bez tracingu – z nagłówka `traceparent` żądania.
+    """
+    if _tracer is not None:
+        context = trace.get_current_span().get_span_context()
+        if context.is_valid:
+            return format(context.trace_id, "032x")
+    if scope is None:
+        return None
+    for key, value in scope.get("headers", []):
+        if key == b"traceparent":
+            return parse_traceparent(value.decode("latin-1"))
+    return None
+
+
+def parse_traceparent(value: str) -> Optional[str]:
+    """
+    Trace id z nagłówka `traceparent` albo None, gdy nagłówek nie spełnia formatu W3C
+    (trafia do exemplarów Prometheusa, więc nie ufamy dowolnym danym od klienta).
+    """
+    match = _TRACEPARENT.match(value.strip())
+    if match is None:
+        return None
+    version, trace_id, parent_id, rest = match.groups()
+    if version == "ff" or (version == "00" and rest is not None):
+        return None
+    if trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    return trace_id
+
+
+def inject(headers: MutableMapping[str, str]) -> None:
+    if _tracer is not None:
+        propagate.inject(headers)
+
+
+async def inject_request_hook(request) -> None:
+    """
+    Hook httpx: kontekst bieżącego spanu w nagłówkach RPC do peerów.
+    """
+    inject(request.headers)
@@ -128,7 +128,8 @@ def test_appointment_booking_success(mock_client, mock_animal, mock_fac, mock_do
     mock_animal.list_by_owner.return_value = [DummyAnimal()]
     mock_doc.list.return_value = [DummyDoctor()]
     mock_fac.list.return_value = [DummyFacility()]
-    mock_appt.get_free_slots.return_value = ["09:00", "10:00"]
+    import datetime
+    mock_appt.get_availability.return_value = {5: {datetime.date.today(): ["09:00", "10:00"]}}
     page = AppointmentBookingPage()
     # Wybierz klienta
     page._on_client_chosen("Jan Kowal, ul. Y")
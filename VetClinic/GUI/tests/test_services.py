@@ -459,3 +459,13 @@ def test_appointments_get_free_slots(mock_session):
 
     slots3 = AppointmentService.get_free_slots(1, "ZLY")
     assert slots3 == []
+
+
+# ---------- db.py ----------
+def test_db_module_creates_schema():
+    from sqlalchemy import inspect
+    from vetclinic_api.core import database
+    from vetclinic_gui.services import db
+
+    assert db.engine in database._initialized
+    assert set(db.Base.metadata.tables) <= set(inspect(db.engine).get_table_names())
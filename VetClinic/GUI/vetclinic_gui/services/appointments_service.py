@@ -1,12 +1,13 @@
 # vetclinic_gui/services/appointments_service.py
 
-from datetime import datetime, date, time, timedelta
-from typing import List, Optional
+from datetime import datetime, date
+from typing import Dict, List, Optional, Sequence
 
 from sqlalchemy.orm import Session, selectinload
 
 from vetclinic_gui.services.db import SessionLocal
 from vetclinic_api.models.appointments import Appointment as AppointmentModel
+from vetclinic_api.services import schedule_service
 
 
 class AppointmentService:
@@ -120,36 +121,28 @@ class AppointmentService:
         except ValueError:
             return []
 
-        # Niedziela – brak pracy
-        if target_date.weekday() == 6:
+        # Niedziela – brak pracy (bez zapytania do bazy)
+        if not schedule_service.DEFAULT_GRID.is_open(target_date):
             return []
 
         db: Session = SessionLocal()
         try:
-            start_of_day = datetime.combine(target_date, time(0, 0))
-            end_of_day   = datetime.combine(target_date, time(23, 59, 59))
-
-            apps = (
-                db.query(AppointmentModel)
-                  .filter(
-                      AppointmentModel.doctor_id == doctor_id,
-                      AppointmentModel.visit_datetime >= start_of_day,
-                      AppointmentModel.visit_datetime <= end_of_day,
-                  )
-                  .all()
-            )
-
-            busy_slots = {app.visit_datetime.strftime("%H:%M") for app in apps}
-
-            free_slots: List[str] = []
-            current_dt = datetime.combine(target_date, time(8, 0))
-            end_slot   = datetime.combine(target_date, time(18, 45))
-            while current_dt <= end_slot:
-                slot = current_dt.strftime("%H:%M")
-                if slot not in busy_slots:
-                    free_slots.append(slot)
-                current_dt += timedelta(minutes=15)
+            return schedule_service.free_slots(db, doctor_id, target_date)
+        finally:
+            db.close()
 
-            return free_slots
+    @staticmethod
+    def get_availability(
+        doctor_ids: Sequence[int],
+        start: date,
+        end: date,
+    ) -> Dict[int, Dict[date, List[str]]]:
+        """
+        Wolne sloty wielu lekarzy w zakresie dat – jedno zapytanie
+        (ten sam silnik co GET /appointments/availability).
+        """
+        db: Session = SessionLocal()
+        try:
+            return schedule_service.availability(db, list(doctor_ids), start, end)
         finally:
             db.close()
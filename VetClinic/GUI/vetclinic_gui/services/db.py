@@ -1 +1,4 @@
-from vetclinic_api.core.database import engine, SessionLocal, Base
+from vetclinic_api.core.database import engine, SessionLocal, Base, init_db
+
+# GUI korzysta z bazy bezpośrednio, bez lifespanu API – zakładamy tabele sami.
+init_db(engine)
@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from PyQt6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -44,6 +46,9 @@ class AppointmentBookingPage(QWidget):
         self._selected_client_id  = None
         self._selected_doctor_id  = None
         self._selected_facility_id = None
+        # Wolne sloty wszystkich lekarzy na bieżący tydzień (jedno zapytanie)
+        self._week_start          = None
+        self._week_slots          = {}
 
         self._setup_ui()
         self._populate_client_completer()
@@ -259,23 +264,34 @@ class AppointmentBookingPage(QWidget):
         # self._update_time_slots(self.date_edit.date())  # odkomentuj, jeśli placówka ma wpływ
 
 
+    def _week_free_slots(self, day):
+        """
+        Wolne sloty wszystkich lekarzy w tygodniu zawierającym `day`
+        (AppointmentService.get_availability) – zmiana lekarza lub dnia
+        w tym samym tygodniu nie odpytuje już bazy.
+        """
+        monday = day - timedelta(days=day.weekday())
+        if self._week_start != monday:
+            self._week_slots = AppointmentService.get_availability(
+                [d.id for d in self._doctors], monday, monday + timedelta(days=6)
+            )
+            self._week_start = monday
+        return self._week_slots
+
+
     def _update_time_slots(self, qdate: QDate):
         """
-        Pobiera z backendu (AppointmentService.get_free_slots) listę wolnych kwadransów
-        dla wybranego lekarza i daty. Wypełnia self.time_cb tylko tymi slotami.
+        Wypełnia self.time_cb wolnymi kwadransami wybranego lekarza w wybranym dniu
+        (z tygodniowej dostępności wszystkich lekarzy, patrz _week_free_slots).
         """
         # 1) Jeśli nie wybrano lekarza ani placówki, nie pokazuj nic
         if not self._selected_doctor_id or self.facility_cb.currentData() is None:
             self.time_cb.clear()
             return
 
-        date_str = qdate.toString("yyyy-MM-dd")
+        day = qdate.toPyDate()
         try:
-            # Zakładam, że get_free_slots zwraca listę ciągów "HH:MM"
-            free_slots = AppointmentService.get_free_slots(
-                doctor_id=self._selected_doctor_id,
-                date_str=date_str
-            )
+            free_slots = self._week_free_slots(day).get(self._selected_doctor_id, {}).get(day, [])
         except Exception:
             # W razie błędu sieci/serwisu: wyczyść combobox i dopisz placeholder
             self.time_cb.clear()
@@ -359,6 +375,8 @@ class AppointmentBookingPage(QWidget):
 
         try:
             AppointmentService.create(payload)
+            # Zajęty slot – przy następnym wyborze pobierz tydzień od nowa
+            self._week_start = None
             QMessageBox.information(self, "Sukces", "Wizyta została umówiona.")
             # Po poprawnym zapisie czyścimy cały formularz:
             self._reset_form()
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "baseline.json"
+DEFAULT_THRESHOLD = float(os.getenv("BENCH_THRESHOLD", "0.15"))
+DEFAULT_STAT = os.getenv("BENCH_STAT", "min")
+# Ile razy powtarzamy same oflagowane benchmarki, zanim uznamy regresję.
+DEFAULT_CONFIRM_RUNS = int(os.getenv("BENCH_CONFIRM_RUNS", "2"))
+
+
+def run_suite(json_path: Path, pytest_args: List[str], targets: Optional[List[str]] = None) -> None:
+    cmd = [
+        sys.executable,
+        "-m",
+        "pytest",
+        *(targets or ["benchmarks"]),
+        "-q",
+        "-p",
+        "no:cacheprovider",
+        f"--benchmark-json={json_path}",
+        *pytest_args,
+    ]
+    subprocess.run(cmd, cwd=ROOT, check=True)
+
+
+def _run_json(pytest_args: List[str], targets: Optional[List[str]] = None) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "bench.json"
+        run_suite(json_path, pytest_args, targets)
+        return json.loads(json_path.read_text(encoding="utf-8"))
+
+
+def summarize(raw: dict) -> dict:
+    """
+    Z pełnego JSON-a pytest-benchmark zostawiamy to, co potrzebne do porównania.
+    Benchmark może zaostrzyć/poluzować próg: `benchmark.extra_info["threshold"]`.
+    """
+    machine = raw.get("machine_info", {})
+    return {
+        "machine": {
+            "cpu": (machine.get("cpu") or {}).get("brand_raw"),
+            "python": machine.get("python_version"),
+            "system": platform.system(),
+        },
+        "commit": (raw.get("commit_info") or {}).get("id"),
+        "benchmarks": {
+            b["fullname"]: {
+                "min_s": b["stats"]["min"],
+                "median_s": b["stats"]["median"],
+                "iqr_s": b["stats"]["iqr"],
+                "rounds": b["stats"]["rounds"],
+                **(
+                    {"threshold": b["extra_info"]["threshold"]}
+                    if "threshold" in (b.get("extra_info") or {})
+                    else {}
+                ),
+            }
+            for b in raw.get("benchmarks", [])
+        },
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float, stat: str = "min") -> List[dict]:
+    """
+    Regresja = wolniej o więcej niż próg (własny benchmarku albo `threshold`)
+    ORAZ więcej niż rozrzut (IQR) baseline'u.
+    """
+    key = f"{stat}_s"
+    rows = []
+    for name, cur in sorted(current["benchmarks"].items()):
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            rows.append({"name": name, "status": "new", "current_s": cur[key]})
+            continue
+        limit = cur.get("threshold", threshold)
+        ratio = cur[key] / base[key] if base[key] else 1.0
+        slower = ratio > 1.0 + limit and cur[key] - base[key] > base["iqr_s"]
+        rows.append(
+            {
+                "name": name,
+                "status": "regression" if slower else "ok",
+                "baseline_s": base[key],
+                "current_s": cur[key],
+                "ratio": round(ratio, 3),
+            }
+        )
+    for name in sorted(set(baseline["benchmarks"]) - set(current["benchmarks"])):
+        rows.append({"name": name, "status": "missing"})
+    return rows
+
+
+def keep_best(current: dict, rerun: dict, stat: str = "min") -> None:
+    """
+    Po powtórce zostaje lepszy wynik każdego benchmarku – szum tylko spowalnia,
+    więc lepszy pomiar jest bliższy prawdziwemu kosztowi.
+    """
+    key = f"{stat}_s"
+    for name, cur in rerun["benchmarks"].items():
+        prev = current["benchmarks"].get(name)
+        if prev is None or cur[key] < prev[key]:
+            current["benchmarks"][name] = cur
+
+
+def _regressions(rows: List[dict]) -> List[str]:
+    return [row["name"] for row in rows if row["status"] == "regression"]
+
+
+def _fmt(seconds: Optional[float]) -> str:
+    return f"{seconds * 1000:10.3f} ms" if seconds is not None else " " * 13
+
+
+def print_table(rows: List[dict], threshold: float, stat: str) -> None:
+    print(f"\n{stat} vs baseline (próg +{threshold:.0%})")
+    for row in rows:
+        ratio = f"x{row['ratio']:.3f}" if "ratio" in row else ""
+        print(
+            f"{row['status']:>10}  {_fmt(row.get('baseline_s'))}  {_fmt(row.get('current_s'))}"
+            f"  {ratio:>7}  {row['name']}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmarki gorących ścieżek + porównanie z zapisanym baseline"
+    )
+    parser.add_argument("--update", action="store_true", help="zapisz wynik jako nowy baseline")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--stat", choices=["min", "median"], default=DEFAULT_STAT)
+    parser.add_argument("--json", type=Path, help="gotowy --benchmark-json (bez uruchamiania)")
+    parser.add_argument(
+        "--confirm-runs",
+        type=int,
+        default=DEFAULT_CONFIRM_RUNS,
+        help="powtórki oflagowanych benchmarków przed zgłoszeniem regresji",
+    )
+    args, pytest_args = parser.parse_known_args(argv)
+
+    if args.json:
+        raw = json.loads(args.json.read_text(encoding="utf-8"))
+    else:
+        raw = _run_json(pytest_args)
+    current = summarize(raw)
+
+    if args.update:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+        print(f"baseline zapisany: {args.baseline} ({len(current['benchmarks'])} benchmarków)")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"brak baseline {args.baseline} – uruchom z --update", file=sys.stderr)
+        return 2
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline.get("machine") != current["machine"]:
+        print("uwaga: baseline z innej maszyny – porównanie orientacyjne", file=sys.stderr)
+
+    rows = compare(baseline, current, args.threshold, args.stat)
+    # Regresja musi się powtórzyć: oflagowane benchmarki uruchamiamy ponownie same.
+    for attempt in range(1, args.confirm_runs + 1):
+        flagged = _regressions(rows)
+        if not flagged or args.json:
+            break
+        print(f"potwierdzanie ({attempt}/{args.confirm_runs}): " + ", ".join(flagged), file=sys.stderr)
+        keep_best(current, summarize(_run_json(pytest_args, flagged)), args.stat)
+        rows = compare(baseline, current, args.threshold, args.stat)
+    print_table(rows, args.threshold, args.stat)
+    regressions = _regressions(rows)
+    if regressions:
+        print(f"\nREGRESJA ({len(regressions)}): " + ", ".join(regressions), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
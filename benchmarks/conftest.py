@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import List
+
+API_PATH = Path(__file__).resolve().parents[1] / "VetClinic" / "API"
+if str(API_PATH) not in sys.path:
+    sys.path.insert(0, str(API_PATH))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from vetclinic_api.blockchain.core import (
+    Block,
+    Transaction,
+    TxPayload,
+    block_header_bytes,
+    build_genesis_block,
+    compute_block_hash,
+    compute_merkle_root,
+    transaction_bytes,
+)
+from vetclinic_api.crypto.ed25519 import generate_keypair, load_leader_keys_from_env, sign_message
+
+# Stały czas: ten sam mempool i znacznik czasu => ta sama praca PoW w każdej rundzie.
+BENCH_TIME = datetime(2025, 6, 1, 12, 0, 0)
+
+if not (os.getenv("LEADER_PRIV_KEY") and os.getenv("LEADER_PUB_KEY")):
+    _priv, _pub = generate_keypair()
+    os.environ["LEADER_PRIV_KEY"] = _priv
+    os.environ["LEADER_PUB_KEY"] = _pub
+
+
+def signed_tx(idx: int, timestamp: datetime = BENCH_TIME) -> Transaction:
+    payload = TxPayload(sender=f"user{idx}", recipient=f"dest{idx}", amount=Decimal("1.5"))
+    raw = transaction_bytes(payload, timestamp)
+    keys = load_leader_keys_from_env()
+    return Transaction(
+        id=hashlib.sha256(raw).hexdigest(),
+        payload=payload,
+        sender_pub="demo-sender-pub",
+        signature=sign_message(keys.priv, raw),
+        timestamp=timestamp,
+    )
+
+
+def next_block(previous: Block, txs: List[Transaction]) -> Block:
+    """
+    Poprawnie podpisany blok bez szukania nonce (z fixture `cheap_pow`).
+    """
+    keys = load_leader_keys_from_env()
+    block = Block(
+        index=previous.index + 1,
+        previous_hash=previous.hash,
+        timestamp=BENCH_TIME + timedelta(seconds=previous.index + 1),
+        transactions=txs,
+        nonce=0,
+        merkle_root=compute_merkle_root(txs),
+        leader_sig="",
+    )
+    block.leader_sig = sign_message(keys.priv, block_header_bytes(block))
+    block.hash = compute_block_hash(block)
+    return block
+
+
+def make_chain(height: int, txs_per_block: int = 10) -> List[Block]:
+    chain = [build_genesis_block()]
+    for i in range(height):
+        txs = [signed_tx(i * txs_per_block + j) for j in range(txs_per_block)]
+        chain.append(next_block(chain[-1], txs))
+    return chain
+
+
+@pytest.fixture
+def cheap_pow(monkeypatch):
+    """
+    Bez wymogu trudności PoW: łańcuch 500 bloków z prawdziwym PoW budowałby się
+    minutami, a mierzymy walidację/zapis, nie kopanie (to mierzy build_block_proposal).
+    """
+    import vetclinic_api.blockchain.core as core
+
+    monkeypatch.setattr(core, "DIFFICULTY_PREFIX", "")
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """
+    Osobna baza SQLite na benchmark – nie dotykamy vetclinic.db.
+    """
+    from vetclinic_api.core.database import Base
+
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'bench.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def api_client(session_factory):
+    from fastapi.testclient import TestClient
+
+    import vetclinic_api.blockchain.deps as deps
+    from vetclinic_api.blockchain.core import SQLAlchemyStorage
+    from vetclinic_api.core.database import get_db
+    from vetclinic_api.main import app
+
+    def _get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    previous = deps._storage
+    deps._storage = SQLAlchemyStorage(session_factory)
+    app.dependency_overrides[get_db] = _get_db
+    # Bez lifespan – zadania klastra w tle tylko zaszumiłyby pomiar.
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    deps._storage = previous
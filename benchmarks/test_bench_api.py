@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+
+import pyotp
+
+from vetclinic_api.core.security import get_password_hash
+from vetclinic_api.models.appointments import Appointment
+from vetclinic_api.models.users import Client
+
+from benchmarks.conftest import make_chain
+
+
+def test_tx_submit(benchmark, api_client):
+    tx = {"sender": "alice", "recipient": "bob", "amount": 5.0}
+    resp = benchmark(api_client.post, "/tx/submit", json=tx)
+    assert resp.status_code == 202
+
+
+# Żądania TestClient rzędu kilku ms mają duży rozrzut między przebiegami.
+HTTP_THRESHOLD = 0.3
+
+
+def test_chain_status(benchmark, cheap_pow, api_client):
+    import vetclinic_api.blockchain.deps as deps
+
+    benchmark.extra_info["threshold"] = HTTP_THRESHOLD
+
+    deps._storage.add_blocks(make_chain(100, txs_per_block=10)[1:])
+    resp = benchmark(api_client.get, "/chain/status")
+    assert resp.status_code == 200
+    assert resp.json()["height"] == 100
+
+
+def test_free_slots(benchmark, api_client, session_factory):
+    benchmark.extra_info["threshold"] = HTTP_THRESHOLD
+    day = date(2025, 6, 2)  # poniedziałek
+    with session_factory() as db:
+        for i in range(20):
+            db.add(
+                Appointment(
+                    doctor_id=1,
+                    animal_id=1,
+                    owner_id=1,
+                    facility_id=1,
+                    visit_datetime=datetime.combine(day, time(8)) + timedelta(minutes=30 * i),
+                )
+            )
+        db.commit()
+    params = {"doctor_id": 1, "date": day.isoformat()}
+    resp = benchmark(api_client.get, "/appointments/free_slots/", params=params)
+    assert resp.status_code == 200
+    assert len(resp.json()) == 44 - 20
+
+
+def test_availability_week(benchmark, api_client, session_factory):
+    benchmark.extra_info["threshold"] = HTTP_THRESHOLD
+    monday = date(2025, 6, 2)
+    with session_factory() as db:
+        for doctor_id in range(1, 21):
+            for i in range(10):
+                db.add(
+                    Appointment(
+                        doctor_id=doctor_id,
+                        animal_id=1,
+                        owner_id=1,
+                        facility_id=1,
+                        visit_datetime=datetime.combine(monday + timedelta(days=i % 6), time(8))
+                        + timedelta(minutes=30 * i),
+                    )
+                )
+        db.commit()
+    params = {"doctor_ids": ",".join(str(i) for i in range(1, 21)), "from": monday.isoformat()}
+    resp = benchmark(api_client.get, "/appointments/availability", params=params)
+    assert resp.status_code == 200
+    assert len(resp.json()["doctors"]) == 20
+
+
+def test_login(benchmark, api_client, session_factory):
+    secret = pyotp.random_base32()
+    with session_factory() as db:
+        db.add(
+            Client(
+                first_name="Bench",
+                last_name="User",
+                email="bench@example.com",
+                password_hash=get_password_hash("secret123"),
+                must_change_password=False,
+                phone_number="000",
+                address="-",
+                postal_code="00-000",
+                totp_secret=secret,
+                totp_confirmed=True,
+                wallet_address="0xbench",
+            )
+        )
+        db.commit()
+
+    def _login():
+        creds = {
+            "email": "bench@example.com",
+            "password": "secret123",
+            "totp_code": pyotp.TOTP(secret).now(),
+        }
+        return api_client.post("/users/login", json=creds)
+
+    resp = benchmark(_login)
+    assert resp.status_code == 200, resp.text
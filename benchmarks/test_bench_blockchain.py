@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import pytest
+
+import vetclinic_api.blockchain.core as core
+from vetclinic_api.blockchain.core import (
+    InMemoryStorage,
+    build_block_proposal,
+    compute_block_hash,
+    verify_chain,
+)
+
+from benchmarks.conftest import BENCH_TIME, make_chain, signed_tx
+
+
+class _FrozenDatetime(core.datetime):
+    @classmethod
+    def utcnow(cls):
+        return BENCH_TIME
+
+
+def test_compute_block_hash(benchmark):
+    block = make_chain(1, txs_per_block=50)[-1]
+    assert benchmark(compute_block_hash, block) == block.hash
+
+
+def test_build_block_proposal(benchmark, monkeypatch):
+    monkeypatch.setattr(core, "datetime", _FrozenDatetime)
+    storage = InMemoryStorage()
+    for i in range(50):
+        storage.add_transaction(signed_tx(i))
+    proposal = benchmark(build_block_proposal, storage)
+    assert proposal.hash.startswith(core.DIFFICULTY_PREFIX)
+
+
+@pytest.mark.parametrize("height", [10, 100, 500])
+def test_verify_chain(benchmark, cheap_pow, height):
+    storage = InMemoryStorage()
+    storage.add_blocks(make_chain(height, txs_per_block=10)[1:])
+    result = benchmark(verify_chain, storage)
+    assert result["valid"] and result["height"] == height
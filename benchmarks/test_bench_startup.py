@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+from scripts.bench_import import DEFAULT_MODULE, eager_optional, measure_once
+
+
+def test_import_main(benchmark):
+    # Świeży interpreter na rundę: mierzymy zimny import, jak przy starcie workera.
+    rows = benchmark.pedantic(measure_once, args=(DEFAULT_MODULE,), rounds=5)
+    assert eager_optional(rows) == []
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from vetclinic_api.blockchain.core import SQLAlchemyStorage
+
+from benchmarks.conftest import make_chain, next_block, signed_tx
+
+
+def test_sqlalchemy_add_block(benchmark, cheap_pow, session_factory):
+    storage = SQLAlchemyStorage(session_factory)
+    tip = [storage.get_tip()]
+    counter = iter(range(10**9))
+
+    def _setup():
+        txs = [signed_tx(next(counter)) for _ in range(20)]
+        return (next_block(tip[0], txs),), {}
+
+    def _add(block):
+        storage.add_block(block)
+        tip[0] = block
+
+    benchmark.pedantic(_add, setup=_setup, rounds=50)
+    assert storage.get_tip().index == 50
+
+
+def test_sqlalchemy_get_chain(benchmark, cheap_pow, session_factory):
+    storage = SQLAlchemyStorage(session_factory)
+    storage.add_blocks(make_chain(100, txs_per_block=10)[1:])
+    chain = benchmark(storage.get_chain)
+    assert len(chain) == 101
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+
+import httpx
+
+from scripts.cluster_scenarios import LEADER_ID, NODES
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _heights(client: httpx.Client) -> dict[int, int | None]:
+    result: dict[int, int | None] = {}
+    for node_id, base_url in NODES.items():
+        try:
+            resp = client.get(f"{base_url}/chain/status", timeout=5.0)
+            result[node_id] = resp.json().get("height") if resp.status_code == 200 else None
+        except httpx.HTTPError:
+            result[node_id] = None
+    return result
+
+
+def _wait_for_convergence(client: httpx.Client, timeout: float) -> float | None:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        heights = {h for h in _heights(client).values() if h is not None}
+        if len(heights) == 1:
+            return time.perf_counter() - start
+        time.sleep(0.1)
+    return None
+
+
+def run_mode(client: httpx.Client, pipelined: bool, rounds: int, txs_per_round: int) -> dict:
+    leader = NODES[LEADER_ID]
+    latencies: list[float] = []
+    committed = 0
+
+    start = time.perf_counter()
+    for r in range(rounds):
+        for i in range(txs_per_round):
+            client.post(
+                f"{leader}/tx/submit",
+                json={"sender": f"bench{r}", "recipient": f"dest{i}", "amount": 1 + i},
+                timeout=10.0,
+            )
+        t0 = time.perf_counter()
+        resp = client.post(
+            f"{leader}/chain/mine_distributed",
+            params={"pipelined": pipelined},
+            timeout=30.0,
+        )
+        latencies.append(time.perf_counter() - t0)
+        if resp.status_code == 200 and resp.json().get("status") == "committed":
+            committed += 1
+    elapsed = time.perf_counter() - start
+    convergence = _wait_for_convergence(client, timeout=30.0)
+
+    return {
+        "mode": "pipelined" if pipelined else "serial",
+        "rounds": rounds,
+        "committed": committed,
+        "elapsed_s": round(elapsed, 3),
+        "blocks_per_s": round(committed / elapsed, 3) if elapsed else 0.0,
+        "round_latency_p50_s": round(statistics.median(latencies), 4) if latencies else 0.0,
+        "round_latency_p95_s": round(_percentile(latencies, 0.95), 4),
+        "convergence_s": round(convergence, 3) if convergence is not None else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Throughput konsensusu: tryb szeregowy vs potokowy (klaster docker-compose)"
+    )
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--txs-per-round", type=int, default=3)
+    parser.add_argument("--mode", choices=["serial", "pipelined", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = {"serial": [False], "pipelined": [True], "both": [False, True]}[args.mode]
+    with httpx.Client() as client:
+        results = [run_mode(client, p, args.rounds, args.txs_per_round) for p in modes]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+
+import httpx
+
+from scripts.cluster_scenarios import NODES
+
+
+def _leader_info(client: httpx.Client, node_id: int) -> dict | None:
+    try:
+        resp = client.get(f"{NODES[node_id]}/rpc/leader-info", timeout=1.0)
+        return resp.json() if resp.status_code == 200 else None
+    except httpx.HTTPError:
+        return None
+
+
+def _current_leader(client: httpx.Client) -> tuple[int, int] | None:
+    """
+    Lider i kadencja uznawane przez większość węzłów.
+    """
+    seen: dict[tuple[int, int], int] = {}
+    for node_id in NODES:
+        info = _leader_info(client, node_id)
+        if info and info.get("leader_id"):
+            key = (int(info["leader_id"]), int(info.get("term", 0)))
+            seen[key] = seen.get(key, 0) + 1
+    if not seen:
+        return None
+    key, count = max(seen.items(), key=lambda item: item[1])
+    return key if count * 2 > len(NODES) else None
+
+
+def _set_offline(client: httpx.Client, node_id: int, offline: bool) -> None:
+    client.put(f"{NODES[node_id]}/admin/faults", json={"offline": offline}, timeout=5.0)
+
+
+def run_trial(client: httpx.Client, timeout: float) -> dict:
+    before = _current_leader(client)
+    if before is None:
+        return {"error": "no majority leader before fault"}
+    old_leader, old_term = before
+
+    _set_offline(client, old_leader, True)
+    start = time.perf_counter()
+    elected = None
+    try:
+        while time.perf_counter() - start < timeout:
+            current = _current_leader(client)
+            if current is not None and current[0] != old_leader and current[1] > old_term:
+                elected = current
+                break
+            time.sleep(0.05)
+        failover = time.perf_counter() - start if elected else None
+
+        accepted = None
+        if elected:
+            follower = next(n for n in NODES if n not in (old_leader, elected[0]))
+            resp = client.post(
+                f"{NODES[follower]}/tx/submit",
+                json={"sender": "failover", "recipient": "bench", "amount": 1},
+                timeout=10.0,
+            )
+            accepted = resp.status_code < 300
+    finally:
+        _set_offline(client, old_leader, False)
+
+    return {
+        "old_leader": old_leader,
+        "old_term": old_term,
+        "new_leader": elected[0] if elected else None,
+        "new_term": elected[1] if elected else None,
+        "failover_s": round(failover, 3) if failover is not None else None,
+        "tx_accepted_after_failover": accepted,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Czas failoveru lidera: FAULT offline na liderze -> nowy lider (klaster docker-compose)"
+    )
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=15.0)
+    parser.add_argument("--settle", type=float, default=3.0, help="przerwa między próbami [s]")
+    args = parser.parse_args()
+
+    trials = []
+    with httpx.Client() as client:
+        for i in range(args.trials):
+            trials.append(run_trial(client, args.timeout))
+            if i + 1 < args.trials:
+                time.sleep(args.settle)
+
+    times = [t["failover_s"] for t in trials if t.get("failover_s") is not None]
+    summary = {
+        "trials": len(trials),
+        "failed": len(trials) - len(times),
+        "failover_p50_s": round(statistics.median(times), 3) if times else None,
+        "failover_max_s": round(max(times), 3) if times else None,
+    }
+    print(json.dumps({"summary": summary, "trials": trials}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Czas importu aplikacji (`python -X importtime`) – start węzła / workera.
+
+Każdy pomiar w świeżym interpreterze; raportujemy min/medianę łącznego
+czasu importu modułu, najcięższe pakiety z najlepszego przebiegu i to,
+czy opcjonalne integracje (LAZY_MODULES) nie zostały załadowane przy starcie.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+API_PATH = ROOT / "VetClinic" / "API"
+
+DEFAULT_MODULE = "vetclinic_api.main"
+# Ładowane dopiero przy pierwszym użyciu (płatności, TOTP, haszowanie haseł).
+LAZY_MODULES = ("stripe", "requests", "qrcode", "pyotp", "passlib")
+
+
+def parse_importtime(stderr: str) -> List[dict]:
+    """
+    Linie `import time: self [us] | cumulative | imported package`.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # nagłówek
+        rows.append(
+            {
+                "self_us": int(parts[0]),
+                "cumulative_us": int(parts[1]),
+                "name": parts[2].strip(),
+            }
+        )
+    return rows
+
+
+def measure_once(module: str) -> List[dict]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(API_PATH), env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} nie powiódł się:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def total_us(rows: List[dict], module: str) -> int:
+    for row in reversed(rows):
+        if row["name"] == module:
+            return row["cumulative_us"]
+    raise RuntimeError(f"brak {module} w wyniku -X importtime")
+
+
+def top_packages(rows: List[dict], limit: int) -> List[dict]:
+    per_package: Dict[str, int] = defaultdict(int)
+    for row in rows:
+        per_package[row["name"].split(".")[0]] += row["self_us"]
+    ranked = sorted(per_package.items(), key=lambda item: item[1], reverse=True)
+    return [{"package": name, "self_ms": round(us / 1000, 2)} for name, us in ranked[:limit]]
+
+
+def eager_optional(rows: List[dict]) -> List[str]:
+    loaded = {row["name"].split(".")[0] for row in rows}
+    return [name for name in LAZY_MODULES if name in loaded]
+
+
+def run(module: str, runs: int, top: int) -> dict:
+    results = [measure_once(module) for _ in range(runs)]
+    totals = [total_us(rows, module) for rows in results]
+    best = results[totals.index(min(totals))]
+    return {
+        "module": module,
+        "runs": runs,
+        "min_ms": round(min(totals) / 1000, 2),
+        "median_ms": round(statistics.median(totals) / 1000, 2),
+        "modules_imported": len(best),
+        "top_packages": top_packages(best, top),
+        "eager_optional": eager_optional(best),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Czas importu aplikacji (-X importtime)")
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float, help="błąd, gdy min czasu importu przekroczy próg")
+    parser.add_argument("--json", type=Path, help="zapis wyniku do pliku")
+    args = parser.parse_args(argv)
+
+    result = run(args.module, max(1, args.runs), args.top)
+    print(
+        f"import {result['module']}: min {result['min_ms']:.1f} ms, "
+        f"mediana {result['median_ms']:.1f} ms ({result['runs']} przebiegów, "
+        f"{result['modules_imported']} modułów)"
+    )
+    for row in result["top_packages"]:
+        print(f"  {row['self_ms']:9.2f} ms  {row['package']}")
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2) + "\n", encoding="utf-8")
+
+    status = 0
+    if result["eager_optional"]:
+        print(
+            "opcjonalne integracje załadowane przy starcie: "
+            + ", ".join(result["eager_optional"]),
+            file=sys.stderr,
+        )
+        status = 1
+    if args.max_ms is not None and result["min_ms"] > args.max_ms:
+        print(f"import wolniejszy niż {args.max_ms:.0f} ms", file=sys.stderr)
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
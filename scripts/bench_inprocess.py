@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+API_PATH = ROOT / "VetClinic" / "API"
+if str(API_PATH) not in sys.path:
+    sys.path.insert(0, str(API_PATH))
+
+from vetclinic_api.admin.fault_schedule import FaultSchedule  # noqa: E402
+from vetclinic_api.admin.link_rules import LinkRules  # noqa: E402
+from vetclinic_api.cluster.harness import InProcessCluster  # noqa: E402
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * (len(ordered) - 1)))]
+
+
+def _ms(value: float | None) -> float | None:
+    return round(value * 1000, 2) if value is not None else None
+
+
+def _load_json(path: str | None) -> dict | None:
+    if not path:
+        return None
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    cluster = InProcessCluster(size=args.nodes)
+    schedule = _load_json(args.schedule)
+    links = _load_json(args.links)
+    cluster.load_faults(
+        schedule=FaultSchedule(**schedule) if schedule else None,
+        links=LinkRules(**links) if links else None,
+    )
+
+    submitted: dict[str, float] = {}
+    latencies: list[float] = []
+    rounds = {"committed": 0, "rejected": 0, "error": 0}
+    leader = cluster[1]
+
+    async with cluster:
+        await cluster.start()
+        async with cluster.client(timeout=30.0) as client:
+            start = time.perf_counter()
+            for r in range(args.rounds):
+                for i in range(args.block_size):
+                    node_id = 1 if args.submit_to == "leader" else rng.randint(1, args.nodes)
+                    resp = await client.post(
+                        f"http://node{node_id}:8000/tx/submit",
+                        json={"sender": f"bench{r}x{i}", "recipient": "sink", "amount": 1},
+                    )
+                    if resp.status_code == 202:
+                        submitted[resp.json()["tx_id"]] = time.perf_counter()
+                # Transakcje z followerów docierają do lidera paczkami w tle.
+                while any(node.forwarder.depth for node in cluster.nodes.values()):
+                    await asyncio.sleep(0.005)
+
+                resp = await client.post(
+                    "http://node1:8000/chain/mine_distributed",
+                    params={"pipelined": str(args.pipelined).lower()},
+                )
+                status = resp.json().get("status") if resp.status_code == 200 else "error"
+                rounds[status if status in rounds else "error"] += 1
+                if status == "committed":
+                    now = time.perf_counter()
+                    for tx in leader.storage.get_tip().transactions:
+                        if tx.id in submitted:
+                            latencies.append(now - submitted.pop(tx.id))
+            elapsed = time.perf_counter() - start
+            convergence = await cluster.wait_converged(timeout=args.converge_timeout)
+
+    return {
+        "nodes": args.nodes,
+        "rounds": rounds,
+        "committed_txs": len(latencies),
+        "tx_per_s": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "commit_latency_ms": {
+            "p50": _ms(_percentile(latencies, 0.5)),
+            "p95": _ms(_percentile(latencies, 0.95)),
+            "p99": _ms(_percentile(latencies, 0.99)),
+        },
+        "convergence_s": round(convergence, 4) if convergence is not None else None,
+        "height": leader.storage.get_tip().index,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Konsensus w klastrze jednoprocesowym (bez Dockera): tx/s, opóźnienie commitu, zbieżność"
+    )
+    parser.add_argument("--nodes", type=int, default=6)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--block-size", type=int, default=50)
+    parser.add_argument("--submit-to", choices=["leader", "any"], default="leader")
+    parser.add_argument("--pipelined", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--schedule", help="harmonogram awarii (JSON, jak PUT /admin/network/schedule)")
+    parser.add_argument("--links", help="reguły łączy (JSON, jak PUT /admin/network/links)")
+    parser.add_argument("--converge-timeout", type=float, default=10.0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+ROOT = Path(__file__).resolve().parents[1]
+API_PATH = ROOT / "VetClinic" / "API"
+if str(API_PATH) not in sys.path:
+    sys.path.insert(0, str(API_PATH))
+
+from vetclinic_api.admin.network_state import STATE  # noqa: E402
+from vetclinic_api.metrics import (  # noqa: E402
+    inc_http_exception,
+    observe_http_request,
+    route_path,
+)
+from vetclinic_api.middleware.chaos import ChaosMiddleware  # noqa: E402
+
+
+class LegacyChaosMiddleware(BaseHTTPMiddleware):
+    """
+    Poprzednia wersja (BaseHTTPMiddleware) przy wyłączonym chaosie –
+    wyłącznie do porównania.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        return await call_next(request)
+
+
+async def legacy_instrumentator(request: Request, call_next):
+    path = route_path(request.scope)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    except Exception as exc:
+        inc_http_exception(exc, path)
+        raise
+    finally:
+        observe_http_request(request.method, path, status, time.perf_counter() - start)
+
+
+def _base_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/noop/{item_id}")
+    def noop(item_id: int) -> dict:
+        return {"id": item_id}
+
+    return app
+
+
+def build_apps() -> dict[str, FastAPI]:
+    bare = _base_app()
+
+    legacy = _base_app()
+    legacy.middleware("http")(legacy_instrumentator)
+    legacy.add_middleware(LegacyChaosMiddleware)
+
+    asgi = _base_app()
+    asgi.add_middleware(ChaosMiddleware, instrument=True)
+
+    return {"bare": bare, "legacy": legacy, "asgi": asgi}
+
+
+async def _measure(app: FastAPI, requests: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(min(200, requests)):
+            await client.get(f"/noop/{i}")
+
+        latencies: list[float] = []
+        queue = iter(range(requests))
+
+        async def worker() -> None:
+            for i in queue:
+                start = time.perf_counter()
+                await client.get(f"/noop/{i}")
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "rps": round(requests / wall, 1),
+        "p50_us": round(statistics.median(latencies) * 1e6, 1),
+        "p99_us": round(latencies[int(0.99 * (len(latencies) - 1))] * 1e6, 1),
+        "us_per_request": round(wall / requests * 1e6, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Narzut middleware (chaos + metryki HTTP): goła aplikacja vs stary stos vs czyste ASGI"
+    )
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    STATE.chaos_enabled = False
+    results = {
+        name: asyncio.run(_measure(app, args.requests, args.concurrency))
+        for name, app in build_apps().items()
+    }
+    bare = results["bare"]["us_per_request"]
+    for name in ("legacy", "asgi"):
+        results[name]["overhead_us"] = round(results[name]["us_per_request"] - bare, 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import json
 import random
 from typing import Callable
 
@@ -177,6 +178,39 @@ SCENARIOS: dict[str, Callable[[], None]] = {
 }
 
 
+def load_fault_schedule(path: str, seed: int | None = None) -> None:
+    """
+    Wgrywa ten sam harmonogram awarii (JSON, zob. /admin/network/schedule)
+    na wszystkie węzły; zegary logiczne startują od zera.
+    """
+    with open(path, encoding="utf-8") as fh:
+        schedule = json.load(fh)
+    if seed is not None:
+        schedule["seed"] = seed
+    with httpx.Client() as client:
+        for node_id, base_url in sorted(NODES.items()):
+            resp = client.put(f"{base_url}/admin/network/schedule", json=schedule, timeout=5.0)
+            print(f"[schedule] node={node_id} status={resp.status_code}")
+
+
+def save_fault_recordings(path: str) -> None:
+    """
+    Zapisuje nagrane decyzje wszystkich węzłów: {node_id: [zdarzenia]}.
+    Odtworzenie: `replay` z tego pliku w harmonogramie danego węzła.
+    """
+    recordings = {}
+    with httpx.Client() as client:
+        for node_id, base_url in sorted(NODES.items()):
+            try:
+                resp = client.get(f"{base_url}/admin/network/schedule/recording", timeout=10.0)
+                recordings[node_id] = resp.json() if resp.status_code == 200 else None
+            except httpx.RequestError:
+                recordings[node_id] = None
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(recordings, fh, indent=2)
+    print(f"[schedule] recordings saved to {path}")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Cluster scenario runner")
     parser.add_argument(
@@ -184,11 +218,20 @@ def main() -> None:
         choices=SCENARIOS.keys(),
         help="Scenario to run",
     )
+    parser.add_argument("--seed", type=int, default=None, help="ziarno losowania (powtarzalny scenariusz)")
+    parser.add_argument("--schedule", help="plik JSON z harmonogramem awarii dla wszystkich węzłów")
+    parser.add_argument("--record", help="zapis nagranych decyzji awarii do pliku JSON")
     args = parser.parse_args()
     scenario_fn = SCENARIOS.get(args.scenario)
     if not scenario_fn:
         parser.error(f"Unknown scenario {args.scenario}")
+    if args.seed is not None:
+        random.seed(args.seed)
+    if args.schedule:
+        load_fault_schedule(args.schedule, args.seed)
     scenario_fn()
+    if args.record:
+        save_fault_recordings(args.record)
 
 
 if __name__ == "__main__":
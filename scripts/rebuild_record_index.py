@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+API_PATH = ROOT / "VetClinic" / "API"
+if str(API_PATH) not in sys.path:
+    sys.path.insert(0, str(API_PATH))
+
+from vetclinic_api.blockchain.core import SQLAlchemyStorage  # noqa: E402
+
+
+def main() -> None:
+    """
+    Odbudowuje tabelę record_anchors z bloków zapisanych w bazie węzła.
+    Potrzebne raz dla łańcuchów utworzonych przed wprowadzeniem indeksu.
+    """
+    storage = SQLAlchemyStorage()
+    count = storage.rebuild_record_index()
+    print(f"record_anchors rebuilt: {count} entries")
+
+
+if __name__ == "__main__":
+    main()
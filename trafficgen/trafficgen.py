@@ -1,8 +1,29 @@
+"""
+Generator ruchu dla klastra VetClinic (asyncio + httpx).
+
+Tryby:
+- open   – stałe tempo przybywania żądań (rps), niezależne od czasu odpowiedzi;
+           opóźnienie liczone od zaplanowanej chwili wysłania, więc zator po
+           stronie serwera nie zaniża percentyli (coordinated omission),
+- closed – N równoległych użytkowników; przy zadanym tempie brakujące próbki
+           są uzupełniane jak w HdrHistogram (recordValueWithExpectedInterval).
+
+Tempo i włączenie ruchu można zmieniać na żywo przez PUT /admin/network/sim
+(`traffic_rps`, `traffic_enabled`), o ile `--follow-sim` jest włączone.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
 import os
 import random
 import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
 
-import requests
+import httpx
 
 API_ADMIN = os.getenv("ADMIN_API", "http://node1:8000")
 LEADER = os.getenv("LEADER_URL", "http://node1:8000")
@@ -11,79 +32,393 @@ NODES = os.getenv(
     "http://node1:8000,http://node2:8000,http://node3:8000,http://node4:8000,http://node5:8000,http://node6:8000",
 ).split(",")
 
-SESSION = requests.Session()
-SESSION.timeout = 2.0
+DEFAULT_MIX = "status=55,submit=30,verify=10,mine=5"
+SIM_POLL_S = float(os.getenv("TRAFFIC_SIM_POLL_S", "1"))
+
+
+class Histogram:
+    """
+    Histogram log-liniowy w stylu HdrHistogram (mikrosekundy),
+    bez zewnętrznych zależności.
+    """
+
+    # Dokładnie do 128 µs, potem 64 kubełki na każdą potęgę dwójki (~1.5%).
+    SUB_BUCKETS = 64
+
+    def __init__(self) -> None:
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.max_us = 0
+        self.min_us: Optional[int] = None
+        self.sum_us = 0
+
+    def _bucket(self, value_us: int) -> int:
+        if value_us < 2 * self.SUB_BUCKETS:
+            return value_us
+        exp = value_us.bit_length() - self.SUB_BUCKETS.bit_length()
+        return exp * self.SUB_BUCKETS + (value_us >> exp)
+
+    def _bucket_value(self, bucket: int) -> int:
+        """Górna granica kubełka (µs)."""
+        if bucket < 2 * self.SUB_BUCKETS:
+            return bucket
+        exp = bucket // self.SUB_BUCKETS - 1
+        sub = bucket - exp * self.SUB_BUCKETS
+        return ((sub + 1) << exp) - 1
+
+    def record(self, seconds: float, count: int = 1) -> None:
+        value_us = max(0, int(seconds * 1_000_000))
+        bucket = self._bucket(value_us)
+        self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += count
+        self.sum_us += value_us * count
+        self.max_us = max(self.max_us, value_us)
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
 
+    def record_corrected(self, seconds: float, expected_interval_s: float) -> None:
+        """
+        Próbka + brakujące próbki, których klient nie wysłał, bo czekał
+        na tę odpowiedź (korekta coordinated omission dla trybu closed).
+        """
+        self.record(seconds)
+        if expected_interval_s <= 0:
+            return
+        missing = seconds - expected_interval_s
+        while missing >= expected_interval_s:
+            self.record(missing)
+            missing -= expected_interval_s
 
-def get_state():
-    try:
-        r = SESSION.get(f"{API_ADMIN}/admin/network/sim", timeout=2.0)
-        r.raise_for_status()
-        return r.json()
-    except Exception:
-        # if admin API is temporarily unavailable, reduce traffic
-        return {"traffic_enabled": True, "traffic_rps": 0.5, "chaos_enabled": False}
+    def merge(self, other: "Histogram") -> None:
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += other.total
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
 
+    def percentile(self, q: float) -> float:
+        """
+        Percentyl (0..100) w milisekundach.
+        """
+        if not self.total:
+            return 0.0
+        rank = max(1, math.ceil(q / 100.0 * self.total))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self._bucket_value(bucket), self.max_us) / 1000.0
+        return self.max_us / 1000.0
 
-def submit_tx():
+    def summary(self) -> dict:
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum_us / self.total / 1000.0, 3) if self.total else 0.0,
+            "min_ms": round((self.min_us or 0) / 1000.0, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p90_ms": round(self.percentile(90), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "p99_9_ms": round(self.percentile(99.9), 3),
+            "max_ms": round(self.max_us / 1000.0, 3),
+        }
+
+    def hgrm(self) -> str:
+        """
+        Rozkład percentyli w formacie .hgrm (HdrHistogram plotter), wartości w ms.
+        """
+        lines = [f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}", ""]
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            pct = seen / self.total
+            inv = "inf" if pct >= 1.0 else f"{1 / (1 - pct):14.2f}"
+            value_ms = min(self._bucket_value(bucket), self.max_us) / 1000.0
+            lines.append(f"{value_ms:12.3f} {pct:14.12f} {seen:10d} {inv:>14}")
+        lines.append(f"#[Mean    = {self.summary()['mean_ms']:12.3f}, Max = {self.max_us / 1000.0:12.3f}]")
+        lines.append(f"#[Total count    = {self.total:12d}]")
+        return "\n".join(lines) + "\n"
+
+
+@dataclass
+class EndpointStats:
+    histogram: Histogram = field(default_factory=Histogram)
+    statuses: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    def count_status(self, status: int) -> None:
+        key = f"{status // 100}xx"
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def count_error(self, exc: BaseException) -> None:
+        key = type(exc).__name__
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+
+@dataclass
+class Endpoint:
+    name: str
+    build: Callable[[random.Random], tuple]  # -> (method, url, json | None)
+
+
+def _submit(rng: random.Random) -> tuple:
     payload_ok = {
         "sender": "alice",
         "recipient": "bob",
-        "amount": round(random.uniform(0.1, 50.0), 2),
+        "amount": round(rng.uniform(0.1, 50.0), 2),
     }
     payload_bad = {"sender": "alice"}  # celowo popsute -> 4xx
-    body = payload_bad if random.random() < 0.05 else payload_ok
-    try:
-        SESSION.post(f"{LEADER}/tx/submit", json=body, timeout=2.0)
-    except Exception:
-        pass
+    body = payload_bad if rng.random() < 0.05 else payload_ok
+    return "POST", f"{LEADER}/tx/submit", body
+
 
+ENDPOINTS: Dict[str, Endpoint] = {
+    "status": Endpoint("status", lambda rng: ("GET", rng.choice(NODES) + "/chain/status", None)),
+    "submit": Endpoint("submit", _submit),
+    "verify": Endpoint("verify", lambda rng: ("GET", rng.choice(NODES) + "/chain/verify", None)),
+    "mine": Endpoint("mine", lambda rng: ("POST", f"{LEADER}/chain/mine_distributed", None)),
+}
 
-def hit_status():
-    url = random.choice(NODES) + "/chain/status"
-    try:
-        SESSION.get(url, timeout=2.0)
-    except Exception:
-        pass
 
+def parse_mix(raw: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in raw.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"unknown endpoint in mix: {name}")
+        mix[name] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("empty endpoint mix")
+    return mix
+
+
+@dataclass
+class LoadState:
+    enabled: bool = True
+    rps: float = 1.0
+
+
+class LoadGenerator:
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        mix: Dict[str, float],
+        mode: str = "open",
+        rps: float = 1.0,
+        users: int = 10,
+        max_inflight: int = 1000,
+        follow_sim: bool = True,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.client = client
+        self.mix = mix
+        self.mode = mode
+        self.users = users
+        self.max_inflight = max_inflight
+        self.follow_sim = follow_sim
+        self.rng = random.Random(seed)
+        self.load = LoadState(enabled=True, rps=rps)
+        self.stats: Dict[str, EndpointStats] = {name: EndpointStats() for name in mix}
+        self.backlogged = 0
+        self.started_at = time.perf_counter()
+        self._inflight: set = set()
+        self._names = list(mix)
+        self._weights = [mix[n] for n in self._names]
+
+    def _pick(self) -> Endpoint:
+        return ENDPOINTS[self.rng.choices(self._names, self._weights)[0]]
+
+    async def _call(self, endpoint: Endpoint) -> None:
+        method, url, body = endpoint.build(self.rng)
+        stats = self.stats[endpoint.name]
+        try:
+            resp = await self.client.request(method, url, json=body)
+            stats.count_status(resp.status_code)
+        except httpx.HTTPError as exc:
+            stats.count_error(exc)
+
+    async def _timed(self, endpoint: Endpoint, intended: float) -> None:
+        await self._call(endpoint)
+        # Od zaplanowanej chwili wysłania, nie od faktycznego startu.
+        self.stats[endpoint.name].histogram.record(time.perf_counter() - intended)
+
+    async def refresh_sim(self) -> None:
+        try:
+            resp = await self.client.get(f"{API_ADMIN}/admin/network/sim")
+            resp.raise_for_status()
+            data = resp.json()
+            self.load.enabled = bool(data.get("traffic_enabled", True))
+            self.load.rps = max(0.0, float(data.get("traffic_rps", self.load.rps)))
+        except (httpx.HTTPError, ValueError):
+            pass
+
+    async def poll_sim(self) -> None:
+        while True:
+            await asyncio.sleep(SIM_POLL_S)
+            await self.refresh_sim()
 
-def hit_verify():
-    url = random.choice(NODES) + "/chain/verify"
-    try:
-        SESSION.get(url, timeout=2.0)
-    except Exception:
-        pass
+    async def run_open(self, deadline: Optional[float]) -> None:
+        next_at = time.perf_counter()
+        while deadline is None or time.perf_counter() < deadline:
+            if not self.load.enabled or self.load.rps <= 0:
+                await asyncio.sleep(0.1)
+                next_at = time.perf_counter()
+                continue
+            now = time.perf_counter()
+            if next_at > now:
+                await asyncio.sleep(next_at - now)
+            intended = next_at
+            next_at += 1.0 / self.load.rps
+            if len(self._inflight) >= self.max_inflight:
+                # Klient nie nadąża – żądanie czeka, a czas oczekiwania wlicza się w opóźnienie.
+                self.backlogged += 1
+                await asyncio.wait(self._inflight, return_when=asyncio.FIRST_COMPLETED)
+            task = asyncio.ensure_future(self._timed(self._pick(), intended))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+        if self._inflight:
+            await asyncio.wait(self._inflight)
 
+    async def _user(self, deadline: Optional[float]) -> None:
+        while deadline is None or time.perf_counter() < deadline:
+            if not self.load.enabled:
+                await asyncio.sleep(0.1)
+                continue
+            endpoint = self._pick()
+            # Tempo z /admin/network/sim dzielone między użytkowników (0 = bez przerw).
+            interval = self.users / self.load.rps if self.load.rps > 0 else 0.0
+            start = time.perf_counter()
+            await self._call(endpoint)
+            elapsed = time.perf_counter() - start
+            self.stats[endpoint.name].histogram.record_corrected(elapsed, interval)
+            if interval > elapsed:
+                await asyncio.sleep(interval - elapsed)
 
-def mine_distributed():
-    try:
-        SESSION.post(f"{LEADER}/chain/mine_distributed", timeout=5.0)
-    except Exception:
-        pass
+    async def run_closed(self, deadline: Optional[float]) -> None:
+        await asyncio.gather(*(self._user(deadline) for _ in range(self.users)))
 
+    async def run(self, duration: Optional[float] = None) -> dict:
+        poller = None
+        if self.follow_sim:
+            # Stan z /admin/network/sim przed pierwszym żądaniem, nie w jego trakcie.
+            await self.refresh_sim()
+            poller = asyncio.ensure_future(self.poll_sim())
+        self.started_at = time.perf_counter()
+        deadline = self.started_at + duration if duration else None
+        try:
+            if self.mode == "closed":
+                await self.run_closed(deadline)
+            else:
+                await self.run_open(deadline)
+        finally:
+            if poller is not None:
+                poller.cancel()
+        return self.report()
 
-def main():
+    def report(self) -> dict:
+        elapsed = max(1e-9, time.perf_counter() - self.started_at)
+        overall = Histogram()
+        endpoints = {}
+        for name, stats in self.stats.items():
+            overall.merge(stats.histogram)
+            endpoints[name] = {
+                **stats.histogram.summary(),
+                "rps": round(stats.histogram.total / elapsed, 2),
+                "statuses": dict(stats.statuses),
+                "errors": dict(stats.errors),
+            }
+        return {
+            "mode": self.mode,
+            "elapsed_s": round(elapsed, 3),
+            "target_rps": self.load.rps,
+            "achieved_rps": round(overall.total / elapsed, 2),
+            "backlogged": self.backlogged,
+            "overall": overall.summary(),
+            "endpoints": endpoints,
+        }
+
+    def write_hgrm(self, directory: str) -> List[str]:
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for name, stats in self.stats.items():
+            path = os.path.join(directory, f"{name}.hgrm")
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(stats.histogram.hgrm())
+            paths.append(path)
+        return paths
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    return default if raw is None else raw.lower() in ("1", "true", "yes", "on")
+
+
+async def _report_periodically(gen: LoadGenerator, interval: float) -> None:
     while True:
-        state = get_state()
-        if not state.get("traffic_enabled", True):
-            time.sleep(1.0)
-            continue
+        await asyncio.sleep(interval)
+        report = gen.report()
+        print(json.dumps({"achieved_rps": report["achieved_rps"], "overall": report["overall"]}), flush=True)
+
+
+async def amain(args: argparse.Namespace) -> dict:
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        gen = LoadGenerator(
+            client,
+            parse_mix(args.mix),
+            mode=args.mode,
+            rps=args.rps,
+            users=args.users,
+            max_inflight=args.max_inflight,
+            follow_sim=args.follow_sim,
+            seed=args.seed,
+        )
+        reporter = (
+            asyncio.ensure_future(_report_periodically(gen, args.report_interval))
+            if args.report_interval > 0
+            else None
+        )
+        try:
+            report = await gen.run(args.duration or None)
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+        if args.hgrm_dir:
+            report["hgrm"] = gen.write_hgrm(args.hgrm_dir)
+        return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generator ruchu (open/closed loop) dla klastra VetClinic")
+    parser.add_argument("--mode", choices=["open", "closed"], default=os.getenv("TRAFFIC_MODE", "open"))
+    parser.add_argument("--rps", type=float, default=float(os.getenv("TRAFFIC_RPS", "1")))
+    parser.add_argument("--users", type=int, default=int(os.getenv("TRAFFIC_USERS", "10")))
+    parser.add_argument("--duration", type=float, default=float(os.getenv("TRAFFIC_DURATION_S", "0")), help="0 = bez końca")
+    parser.add_argument("--mix", default=os.getenv("TRAFFIC_MIX", DEFAULT_MIX))
+    parser.add_argument("--timeout", type=float, default=float(os.getenv("TRAFFIC_TIMEOUT_S", "5")))
+    parser.add_argument("--max-inflight", type=int, default=int(os.getenv("TRAFFIC_MAX_INFLIGHT", "1000")))
+    parser.add_argument("--max-connections", type=int, default=int(os.getenv("TRAFFIC_MAX_CONNECTIONS", "200")))
+    parser.add_argument(
+        "--follow-sim",
+        action=argparse.BooleanOptionalAction,
+        default=_env_bool("TRAFFIC_FOLLOW_SIM", True),
+        help="tempo i włączenie ruchu z /admin/network/sim",
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--report", default=os.getenv("TRAFFIC_REPORT"), help="plik JSON z podsumowaniem")
+    parser.add_argument("--hgrm-dir", default=os.getenv("TRAFFIC_HGRM_DIR"), help="katalog na pliki .hgrm")
+    parser.add_argument("--report-interval", type=float, default=float(os.getenv("TRAFFIC_REPORT_INTERVAL_S", "10")))
+    args = parser.parse_args()
 
-        rps = float(state.get("traffic_rps", 1.0))
-        rps = max(0.1, min(50.0, rps))
-        interval = 1.0 / rps
-
-        x = random.random()
-        if x < 0.55:
-            hit_status()
-        elif x < 0.85:
-            submit_tx()
-        elif x < 0.95:
-            hit_verify()
-        else:
-            mine_distributed()
-
-        time.sleep(interval)
+    report = asyncio.run(amain(args))
+    text = json.dumps(report, indent=2)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fh:
+            fh.write(text)
+    print(text)
 
 
 if __name__ == "__main__":